@@ -11,9 +11,10 @@ from datetime import datetime, timedelta
 from pydantic import BaseModel
 
 from api.v1.auth import get_current_user
-from config.database import get_db
+from config.database import get_db, get_read_db
 from config.logging_config import get_logger
-from database.models import User, UserAchievement, UserConceptProgress, QuizAttempt
+from database.models import User, UserAchievement, UserConceptProgress
+from services.attempt_history import user_quiz_totals
 
 # Get logger for this module
 logger = get_logger(__name__)
@@ -214,7 +215,7 @@ async def get_user_achievements(
     category: Optional[str] = None,
     include_progress: bool = True,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get user's achievements with optional filtering"""
     
@@ -268,7 +269,7 @@ async def get_user_achievements(
 async def get_available_achievements(
     category: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all available achievement definitions"""
     
@@ -307,7 +308,7 @@ async def get_available_achievements(
 @router.get("/analytics")
 async def get_achievement_analytics(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get comprehensive achievement analytics for user"""
     
@@ -324,15 +325,10 @@ async def get_achievement_analytics(
             UserConceptProgress.user_id == current_user.user_id
         ).all()
         
-        quiz_attempts = db.query(QuizAttempt).filter(
-            and_(
-                QuizAttempt.user_id == current_user.user_id,
-                QuizAttempt.status == 'completed'
-            )
-        ).all()
+        quiz_totals = user_quiz_totals(db, current_user.user_id)
         
         # Calculate user statistics
-        user_stats = calculate_user_learning_stats(concept_progress, quiz_attempts)
+        user_stats = calculate_user_learning_stats(concept_progress, quiz_totals)
         
         # Analyze achievement progress
         achievement_progress = analyze_achievement_progress(user_stats, achievements)
@@ -372,15 +368,10 @@ async def check_and_award_achievements(
             UserConceptProgress.user_id == current_user.user_id
         ).all()
         
-        quiz_attempts = db.query(QuizAttempt).filter(
-            and_(
-                QuizAttempt.user_id == current_user.user_id,
-                QuizAttempt.status == 'completed'
-            )
-        ).all()
+        quiz_totals = user_quiz_totals(db, current_user.user_id)
         
         # Calculate user statistics
-        user_stats = calculate_user_learning_stats(concept_progress, quiz_attempts)
+        user_stats = calculate_user_learning_stats(concept_progress, quiz_totals)
         
         # Check for new achievements
         new_achievements = []
@@ -443,7 +434,7 @@ async def check_and_award_achievements(
 async def get_achievement_leaderboard(
     limit: int = 10,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get achievement leaderboard (users with most achievements)"""
     
@@ -555,8 +546,13 @@ def get_recent_achievements(achievements: List[UserAchievement], limit: int) ->
     ]
 
 
-def calculate_user_learning_stats(concept_progress: List[UserConceptProgress], quiz_attempts: List[QuizAttempt]):
-    """Calculate user learning statistics for achievement checking"""
+def calculate_user_learning_stats(concept_progress: List[UserConceptProgress], quiz_totals: Dict[str, int]):
+    """
+    Calculate user learning statistics for achievement checking
+    
+    quiz_totals comes from services.attempt_history.user_quiz_totals, so
+    archived quiz attempts still count towards achievements
+    """
     
     # Concept statistics
     completed_concepts = [p for p in concept_progress if p.status == 'completed']
@@ -574,8 +570,8 @@ def calculate_user_learning_stats(concept_progress: List[UserConceptProgress], q
             domain_stats[domain] = 1
     
     # Quiz statistics
-    quiz_completed = len(quiz_attempts)
-    perfect_scores = sum(1 for q in quiz_attempts if q.percentage == 1.0)
+    quiz_completed = quiz_totals["quizzes_completed"]
+    perfect_scores = quiz_totals["perfect_quiz_scores"]
     
     # Calculate learning streak (simplified)
     # This would need more complex logic to calculate actual streak
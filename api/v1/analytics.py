@@ -8,7 +8,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from api.v1.auth import get_current_user
-from config.database import get_db
+from config.database import get_read_db
 from database.models import User
 
 
@@ -19,7 +19,7 @@ router = APIRouter()
 @router.get("/dashboard")
 async def get_learning_dashboard(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get learning analytics dashboard data"""
     return {"message": "Analytics dashboard endpoint - implementation pending"}
@@ -28,7 +28,7 @@ async def get_learning_dashboard(
 @router.get("/insights")
 async def get_learning_insights(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get AI-powered learning insights"""
     return {"message": "Learning insights endpoint - implementation pending"}
\ No newline at end of file
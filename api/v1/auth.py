@@ -22,6 +22,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 load_dotenv()
 
 from config.database import get_db
+from config.read_routing import request_user_id
 from database.models import User, UserLearningPreferences
 
 # Security
@@ -29,6 +30,11 @@ security = HTTPBearer()
 SECRET_KEY = os.getenv("SECRET_KEY", "jeseci_jwt_secret_key_2024_super_secure_for_production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+ADMIN_USERNAMES = {
+    name.strip()
+    for name in os.getenv("ADMIN_USERNAMES", os.getenv("ADMIN_USERNAME", "cavin_admin")).split(",")
+    if name.strip()
+}
 
 
 # Pydantic models for API requests/responses
@@ -113,9 +119,21 @@ async def get_current_user(
     if user is None:
         raise credentials_exception
     
+    # Read routing keeps this user's reads on the primary after their writes
+    request_user_id.set(user.user_id)
     return user
 
 
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Get current authenticated user, requiring an administrator account"""
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator access required"
+        )
+    return current_user
+
+
 # Router instance
 router = APIRouter()
 
@@ -5,15 +5,36 @@ Knowledge graph and concept management
 
 from typing import List, Optional
 from datetime import datetime
+import json
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, bindparam, or_, select, tuple_
 from pydantic import BaseModel
 
-from api.v1.auth import get_current_user
-from config.database import get_db, get_neo4j_driver
-from database.models import Concept, UserProgress, User
-from services.ai_generator import generate_lesson_content, generate_practice_questions
+from api.v1.auth import get_current_admin, get_current_user
+from config.database import get_db, get_read_db, json_contains
+from database.models import Concept, UserConceptProgress, User, concept_relations
+from services.ai_generator import ai_generator
+from services.lesson_generation import generate_and_store_lesson, stream_and_store_lesson, LESSON_MODEL_NAME
+from services.generation_queue import (
+    generation_queue, enqueue_job, enqueue_missing_lessons, get_latest_job,
+    serialize_job, JOB_TYPE_LESSON, JOB_TYPE_PRACTICE_QUESTIONS, QUEUE_ENABLED
+)
+from services.graph_outbox import (
+    graph_outbox_dispatcher, enqueue_concept_upsert, enqueue_relationship_batch,
+    normalize_relationship_type
+)
+from services.concept_graph import concept_graph
+from services.lesson_store import (
+    get_active_lesson, get_active_version, has_lesson, clear_active_lesson, list_lesson_versions,
+    rollback_lesson, serialize_lesson_version
+)
+from services.neighbor_cache import neighbor_cache, NEIGHBOR_FIELDS
+from services.practice_cache import (
+    get_or_generate_practice_questions, pool_is_full, cache_stats, invalidate_concept,
+    CACHE_ENABLED as PRACTICE_CACHE_ENABLED
+)
 
 
 # Pydantic models
@@ -88,6 +109,7 @@ class ConceptSearch(BaseModel):
     category: Optional[str] = None
     domain: Optional[str] = None
     difficulty_level: Optional[str] = None
+    key_term: Optional[str] = None
     limit: Optional[int] = 20
     offset: Optional[int] = 0
 
@@ -95,39 +117,19 @@ class ConceptSearch(BaseModel):
 class ConceptRelationship(BaseModel):
     target_concept_id: str
     relationship_type: str = "PREREQUISITE"  # or RELATED_TO, SUB_CONCEPT_OF
+    strength: float = 1.0
 
 
-def sync_concept_to_neo4j(concept_id: str, data: ConceptCreate):
-    """Syncs a new concept to the Neo4j Graph"""
-    
-    driver = get_neo4j_driver()
-    if not driver:
-        print("WARNING: Neo4j driver not available.")
-        return
-    
-    query = """
-    MERGE (c:Concept {concept_id: $concept_id})
-    SET c.name = $name,
-        c.display_name = $display_name,
-        c.domain = $domain,
-        c.category = $category,
-        c.difficulty_level = $difficulty_level,
-        c.created_at = datetime()
-    """
-    
-    try:
-        with driver.session() as session:
-            session.run(query, 
-                concept_id=concept_id,
-                name=data.name,
-                display_name=data.display_name,
-                domain=data.domain,
-                category=data.category,
-                difficulty_level=data.difficulty_level
-            )
-            print(f"✅ Successfully synced concept {data.name} to Neo4j")
-    except Exception as e:
-        print(f"❌ Failed to sync to Neo4j: {str(e)}")
+class ConceptRelationshipBatchItem(ConceptRelationship):
+    source_concept_id: str
+
+
+class ConceptRelationshipBatch(BaseModel):
+    relationships: List[ConceptRelationshipBatchItem]
+
+
+# Upper bound on edges per batch request (keeps the IN lists bounded)
+MAX_RELATIONSHIP_BATCH = 5000
 
 
 # Router instance
@@ -138,7 +140,7 @@ router = APIRouter()
 async def get_concepts(
     search_params: ConceptSearch = Depends(),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get concepts with filtering and search"""
     
@@ -150,12 +152,15 @@ async def get_concepts(
             or_(
                 Concept.name.ilike(f"%{search_params.query}%"),
                 Concept.display_name.ilike(f"%{search_params.query}%"),
-                Concept.description.ilike(f"%{search_params.query}%")
-                # Note: JSON field search removed for SQLite compatibility
-                # Concept.key_terms.any(search_params.query) - Not supported in SQLite
+                Concept.description.ilike(f"%{search_params.query}%"),
+                json_contains(Concept.key_terms, search_params.query),
+                json_contains(Concept.synonyms, search_params.query)
             )
         )
     
+    if search_params.key_term:
+        query = query.filter(json_contains(Concept.key_terms, search_params.key_term))
+    
     if search_params.category:
         query = query.filter(Concept.category == search_params.category)
     
@@ -165,8 +170,8 @@ async def get_concepts(
     if search_params.difficulty_level:
         query = query.filter(Concept.difficulty_level == search_params.difficulty_level)
     
-    # Order by relevance and get results
-    concepts = query.order_by(Concept.usage_frequency.desc()).offset(
+    # Order by precomputed centrality (see concept_analytics.py); name keeps pages stable
+    concepts = query.order_by(Concept.usage_frequency.desc(), Concept.name).offset(
         search_params.offset
     ).limit(search_params.limit).all()
     
@@ -207,7 +212,7 @@ async def get_concepts(
 async def get_concept(
     concept_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get specific concept by ID"""
     
@@ -288,12 +293,14 @@ async def create_concept(
     )
     
     db.add(concept)
+    db.flush()
+    
+    # Queue the Neo4j sync in the same transaction; the outbox dispatcher applies it
+    enqueue_concept_upsert(db, concept)
     db.commit()
     db.refresh(concept)
-    
-    # 🚀 SYNC TO NEO4J (The New Part)
-    # We use a background task or simple try/except so graph failure doesn't crash the API
-    sync_concept_to_neo4j(str(concept.concept_id), concept_data)
+    graph_outbox_dispatcher.notify()
+    concept_graph.upsert_concept(concept)
     
     return ConceptResponse(
         concept_id=str(concept.concept_id),
@@ -348,8 +355,16 @@ async def update_concept(
         setattr(concept, field, value)
     
     concept.updated_at = datetime.utcnow()
+    enqueue_concept_upsert(db, concept)
     db.commit()
     db.refresh(concept)
+    graph_outbox_dispatcher.notify()
+    concept_graph.upsert_concept(concept)
+    if NEIGHBOR_FIELDS & update_data.keys():
+        # Cached neighbor lists embed this concept's summary fields
+        neighbor_cache.invalidate_referrers(db, concept_id)
+    # Practice questions were generated from the old concept text
+    invalidate_concept(db, concept_id)
     
     return ConceptResponse(
         concept_id=str(concept.concept_id),
@@ -385,7 +400,7 @@ async def update_concept(
 async def get_related_concepts(
     concept_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get concepts related to the given concept"""
     
@@ -397,17 +412,18 @@ async def get_related_concepts(
             detail="Concept not found"
         )
     
-    # Get related concepts through the many-to-many relationship
-    related_concepts = concept.prerequisite_concepts
+    # Outgoing concept_relations of any type, served from the neighbor cache
+    related_concepts = neighbor_cache.get(db, concept_id)
     
     return [
         {
-            "concept_id": str(related_concept.concept_id),
-            "name": related_concept.name,
-            "display_name": related_concept.display_name,
-            "category": related_concept.category,
-            "difficulty_level": related_concept.difficulty_level,
-            "relationship_type": "related"
+            "concept_id": related_concept["concept_id"],
+            "name": related_concept["name"],
+            "display_name": related_concept["display_name"],
+            "category": related_concept["category"],
+            "difficulty_level": related_concept["difficulty_level"],
+            "relationship_type": related_concept["relationship_type"].lower(),
+            "strength": related_concept["strength"]
         }
         for related_concept in related_concepts
     ]
@@ -417,7 +433,7 @@ async def get_related_concepts(
 async def get_concept_prerequisites(
     concept_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get prerequisite concepts for the given concept"""
     
@@ -429,16 +445,16 @@ async def get_concept_prerequisites(
             detail="Concept not found"
         )
     
-    # Get prerequisite concepts
-    prerequisites = concept.dependent_concepts
+    # Concepts this concept requires (outgoing PREREQUISITE edges)
+    prerequisites = neighbor_cache.get(db, concept_id, ["PREREQUISITE"])
     
     return [
         {
-            "concept_id": str(prereq.concept_id),
-            "name": prereq.name,
-            "display_name": prereq.display_name,
-            "category": prereq.category,
-            "difficulty_level": prereq.difficulty_level,
+            "concept_id": prereq["concept_id"],
+            "name": prereq["name"],
+            "display_name": prereq["display_name"],
+            "category": prereq["category"],
+            "difficulty_level": prereq["difficulty_level"],
             "relationship_type": "prerequisite"
         }
         for prereq in prerequisites
@@ -449,14 +465,14 @@ async def get_concept_prerequisites(
 async def get_user_concept_progress(
     concept_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get current user's progress on specific concept"""
     
-    progress = db.query(UserProgress).filter(
+    progress = db.query(UserConceptProgress).filter(
         and_(
-            UserProgress.user_id == current_user.user_id,
-            UserProgress.concept_id == concept_id
+            UserConceptProgress.user_id == current_user.user_id,
+            UserConceptProgress.concept_id == concept_id
         )
     ).first()
     
@@ -473,15 +489,17 @@ async def get_user_concept_progress(
     
     return {
         "concept_id": concept_id,
+        "status": progress.status,
+        "progress_percent": progress.progress_percent,
         "mastery_level": progress.mastery_level,
         "confidence_level": progress.confidence_level,
-        "time_spent": progress.time_spent,
+        "time_spent": progress.time_spent_minutes,
         "review_count": progress.review_count,
         "success_rate": progress.success_rate,
         "average_score": progress.average_score,
         "streak_count": progress.streak_count,
-        "first_attempt": progress.first_attempt.isoformat(),
-        "last_review": progress.last_review.isoformat(),
+        "first_attempt": progress.first_attempt.isoformat() if progress.first_attempt else None,
+        "last_review": progress.last_review.isoformat() if progress.last_review else None,
         "next_review_date": progress.next_review_date.isoformat() if progress.next_review_date else None,
         "has_progress": True
     }
@@ -493,44 +511,27 @@ async def sync_concept_manually(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Manually force-sync a concept from Postgres to Neo4j"""
+    """Manually queue a concept for re-sync from Postgres to Neo4j"""
     
-    # 1. Fetch the data from Postgres
     concept = db.query(Concept).filter(Concept.concept_id == concept_id).first()
     
     if not concept:
         raise HTTPException(status_code=404, detail="Concept not found in PostgreSQL")
     
-    # 2. Convert SQLAlchemy model to Pydantic model for the sync function
-    concept_data = ConceptCreate(
-        name=concept.name,
-        display_name=concept.display_name,
-        description=concept.description,
-        detailed_description=concept.detailed_description,
-        category=concept.category,
-        subcategory=concept.subcategory,
-        domain=concept.domain,
-        difficulty_level=concept.difficulty_level,
-        complexity_score=concept.complexity_score,
-        cognitive_load=concept.cognitive_load,
-        key_terms=concept.key_terms,
-        synonyms=concept.synonyms,
-        learning_objectives=concept.learning_objectives,
-        practical_applications=concept.practical_applications,
-        real_world_examples=concept.real_world_examples,
-        common_misconceptions=concept.common_misconceptions
-    )
-
-    # 3. Run the Sync
-    sync_concept_to_neo4j(concept_id, concept_data)
+    event = enqueue_concept_upsert(db, concept)
+    db.commit()
+    graph_outbox_dispatcher.notify()
     
-    return {"message": f"Successfully synced '{concept.name}' to Neo4j"}
+    return {
+        "message": f"Queued '{concept.name}' for sync to Neo4j",
+        "outbox_id": event.id
+    }
 
 
 @router.get("/domains/list")
 async def get_available_domains(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get list of available concept domains"""
     
@@ -544,7 +545,7 @@ async def get_available_domains(
 @router.get("/categories/list")
 async def get_available_categories(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get list of available concept categories"""
     
@@ -555,6 +556,149 @@ async def get_available_categories(
     }
 
 
+def _find_missing_concepts(db: Session, concept_ids) -> List[str]:
+    """Concept IDs that do not exist, checked with a single IN query"""
+    concept_ids = set(concept_ids)
+    found = {row[0] for row in db.execute(
+        select(Concept.concept_id).where(Concept.concept_id.in_(concept_ids))
+    )}
+    return sorted(concept_ids - found)
+
+
+def _upsert_relationships(db: Session, edges: dict) -> dict:
+    """
+    Insert or retype many relationships in concept_relations and queue the
+    matching graph writes, grouped by relationship type, in the same transaction.
+
+    Args:
+        edges: {(source_id, target_id): (relationship_type, strength)} with
+            already normalized types
+
+    Returns:
+        Counts of created/updated edges and edges per relationship type
+    """
+    existing = {
+        (row.concept_id, row.related_concept_id): (row.relationship_type or "").upper()
+        for row in db.execute(
+            select(
+                concept_relations.c.concept_id,
+                concept_relations.c.related_concept_id,
+                concept_relations.c.relationship_type
+            ).where(tuple_(concept_relations.c.concept_id, concept_relations.c.related_concept_id).in_(list(edges)))
+        )
+    }
+
+    inserts, updates = [], []
+    upserts_by_type, deletes_by_type = {}, {}
+    for (source_id, target_id), (relationship_type, strength) in edges.items():
+        old_type = existing.get((source_id, target_id))
+        if old_type is None:
+            inserts.append({
+                "concept_id": source_id,
+                "related_concept_id": target_id,
+                "relationship_type": relationship_type,
+                "strength": strength
+            })
+        else:
+            updates.append({
+                "b_source": source_id,
+                "b_target": target_id,
+                "b_type": relationship_type,
+                "b_strength": strength
+            })
+            if old_type != relationship_type:
+                deletes_by_type.setdefault(old_type, []).append({"source_id": source_id, "target_id": target_id})
+        upserts_by_type.setdefault(relationship_type, []).append({
+            "source_id": source_id, "target_id": target_id, "strength": strength
+        })
+
+    if inserts:
+        db.execute(concept_relations.insert(), inserts)
+    if updates:
+        db.execute(
+            concept_relations.update().where(
+                concept_relations.c.concept_id == bindparam("b_source"),
+                concept_relations.c.related_concept_id == bindparam("b_target")
+            ).values(relationship_type=bindparam("b_type"), strength=bindparam("b_strength")),
+            updates
+        )
+
+    # Legacy rows may carry types that are no longer allow-listed; their graph
+    # edges cannot be addressed safely, so only allow-listed deletes are queued
+    for relationship_type in set(upserts_by_type) | set(deletes_by_type):
+        try:
+            enqueue_relationship_batch(
+                db, relationship_type,
+                upserts_by_type.get(relationship_type, []),
+                deletes_by_type.get(relationship_type)
+            )
+        except ValueError:
+            print(f"⚠️  Skipping graph delete for unsupported relationship type {relationship_type!r}")
+    db.commit()
+
+    graph_outbox_dispatcher.notify()
+    neighbor_cache.invalidate({source_id for source_id, _ in edges})
+    for (source_id, target_id), (relationship_type, _) in edges.items():
+        concept_graph.apply_relationship_change(source_id, target_id, existing.get((source_id, target_id)), relationship_type)
+
+    return {
+        "created": len(inserts),
+        "updated": len(updates),
+        "by_type": {relationship_type: len(rows) for relationship_type, rows in upserts_by_type.items()}
+    }
+
+
+@router.post("/relations/batch")
+async def create_concept_relationships_batch(
+    batch: ConceptRelationshipBatch,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create (or retype) many relationships at once.
+    
+    All concept IDs are verified with one query, and the graph writes are
+    queued as one UNWIND statement per relationship type. A repeated
+    source/target pair keeps its last entry.
+    """
+    if not batch.relationships:
+        raise HTTPException(status_code=400, detail="No relationships given")
+    if len(batch.relationships) > MAX_RELATIONSHIP_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_RELATIONSHIP_BATCH} relationships per request"
+        )
+    
+    edges = {}
+    invalid_types = set()
+    for item in batch.relationships:
+        try:
+            relationship_type = normalize_relationship_type(item.relationship_type)
+        except ValueError:
+            invalid_types.add(item.relationship_type)
+            continue
+        edges[(item.source_concept_id, item.target_concept_id)] = (relationship_type, item.strength)
+    
+    if invalid_types:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid relationship types: {', '.join(sorted(invalid_types))}"
+        )
+    
+    missing = _find_missing_concepts(db, [concept_id for edge in edges for concept_id in edge])
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Concepts not found: {', '.join(missing)}")
+    
+    counts = _upsert_relationships(db, edges)
+    print(f"✅ Linked {len(edges)} concept pairs (graph sync queued)")
+    
+    return {
+        "message": f"Successfully saved {len(edges)} relationships",
+        **counts,
+        "graph_sync": "queued"
+    }
+
+
 @router.post("/{source_concept_id}/relations")
 async def create_concept_relationship(
     source_concept_id: str,
@@ -562,37 +706,32 @@ async def create_concept_relationship(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Create a relationship between two concepts in the Graph"""
-    
-    # 1. Verify both concepts exist in Postgres (Safety Check)
-    source = db.query(Concept).filter(Concept.concept_id == source_concept_id).first()
-    target = db.query(Concept).filter(Concept.concept_id == relation_data.target_concept_id).first()
+    """
+    Create (or retype) a relationship between two concepts.
     
-    if not source or not target:
-        raise HTTPException(status_code=404, detail="One or both concepts not found")
-
-    # 2. Sync Relationship to Neo4j
-    driver = get_neo4j_driver()
-    if not driver:
-        raise HTTPException(status_code=500, detail="Graph database unavailable")
-
-    # Cypher query to draw the arrow
-    query = f"""
-    MATCH (source:Concept {{concept_id: $source_id}})
-    MATCH (target:Concept {{concept_id: $target_id}})
-    MERGE (source)-[r:{relation_data.relationship_type.upper()}]->(target)
-    RETURN type(r)
+    The relationship is stored in concept_relations and queued for Neo4j in the
+    same transaction; the graph outbox dispatcher applies it asynchronously.
     """
     
     try:
-        with driver.session() as session:
-            session.run(query, source_id=source_concept_id, target_id=relation_data.target_concept_id)
-            print(f"✅ Linked '{source.name}' -> '{target.name}'")
-    except Exception as e:
-        print(f"❌ Graph Error: {e}")
-        raise HTTPException(status_code=500, detail="Failed to create graph relationship")
+        relationship_type = normalize_relationship_type(relation_data.relationship_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # 1. Verify both concepts exist in Postgres (Safety Check)
+    if _find_missing_concepts(db, [source_concept_id, relation_data.target_concept_id]):
+        raise HTTPException(status_code=404, detail="One or both concepts not found")
+    
+    # 2. Persist the relationship and its graph write together
+    _upsert_relationships(db, {
+        (source_concept_id, relation_data.target_concept_id): (relationship_type, relation_data.strength)
+    })
+    print(f"✅ Linked '{source_concept_id}' -> '{relation_data.target_concept_id}' (graph sync queued)")
         
-    return {"message": f"Successfully created {relation_data.relationship_type} relationship"}
+    return {
+        "message": f"Successfully created {relationship_type} relationship",
+        "graph_sync": "queued"
+    }
 
 
 # =============================================================================
@@ -601,15 +740,17 @@ async def create_concept_relationship(
 
 class LessonGenerationResponse(BaseModel):
     content: str
-    source: str  # "database" or "ai_generated"
+    source: str  # "database", "ai_generated" or "fallback" (template, not stored)
     generated_at: Optional[str] = None
     model_used: Optional[str] = None
+    version: Optional[int] = None
 
 
 class PracticeQuestionsResponse(BaseModel):
     questions: List[dict]
     generated_at: str
     model_used: str
+    source: str = "ai_generated"  # cache, ai_generated, fallback
 
 
 @router.get("/{concept_id}/lesson")
@@ -634,58 +775,34 @@ async def get_concept_lesson(
             detail="Concept not found"
         )
     
-    # 2. Check cache (existing generated content)
-    if concept.lesson_content:
+    # 2. Check the lesson store (existing generated content)
+    lesson = get_active_lesson(db, concept)
+    if lesson:
         print(f"📚 Returning cached lesson for: {concept.display_name}")
         return LessonGenerationResponse(
-            content=concept.lesson_content,
+            content=lesson["content"],
             source="database",
-            generated_at=concept.lesson_generated_at.isoformat() if concept.lesson_generated_at else None,
-            model_used=concept.lesson_model_used
+            generated_at=lesson["generated_at"].isoformat() if lesson["generated_at"] else None,
+            model_used=lesson["model_used"],
+            version=lesson["version"]
         )
     
     # 3. Generate fresh content using AI
     print(f"🤖 Generating AI lesson for: {concept.display_name}")
     
     try:
-        # Get related concepts for context (optional enhancement)
-        related_concepts = []
-        try:
-            driver = get_neo4j_driver()
-            if driver:
-                with driver.session() as session:
-                    result = session.run("""
-                        MATCH (c:Concept {concept_id: $concept_id})-[:RELATED_TO|PREREQUISITE]->(related:Concept)
-                        RETURN related.name as name
-                        LIMIT 5
-                    """, concept_id=concept_id)
-                    related_concepts = [record["name"] for record in result]
-        except Exception as e:
-            print(f"⚠️  Could not fetch related concepts: {e}")
-        
-        # Generate lesson content
-        generated_content = await generate_lesson_content(
-            concept_name=concept.display_name,
-            domain=concept.domain,
-            difficulty=concept.difficulty_level,
-            related_concepts=related_concepts,
-            category=concept.category,
-            detailed_description=concept.detailed_description
-        )
+        generated_content = await generate_and_store_lesson(db, concept)
         
-        # Save to database (cache for future requests)
-        concept.lesson_content = generated_content
-        concept.lesson_generated_at = datetime.utcnow()
-        concept.lesson_model_used = "gpt-4o-mini"
-        db.commit()
-        
-        print(f"✅ Generated and cached lesson for: {concept.display_name}")
+        if not concept.active_lesson_id:
+            # Generation failed or was shed; the template lesson is not stored
+            return LessonGenerationResponse(content=generated_content, source="fallback")
         
         return LessonGenerationResponse(
             content=generated_content,
             source="ai_generated",
             generated_at=concept.lesson_generated_at.isoformat(),
-            model_used=concept.lesson_model_used
+            model_used=concept.lesson_model_used,
+            version=get_active_version(db, concept)
         )
         
     except Exception as e:
@@ -696,6 +813,79 @@ async def get_concept_lesson(
         )
 
 
+def format_sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format a Server-Sent Events message"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+@router.get("/{concept_id}/lesson/stream")
+async def stream_concept_lesson(
+    concept_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream lesson content over Server-Sent Events.
+    
+    Events:
+    - `meta`: {"source": "database" | "ai_generated"}
+    - default (message): {"delta": "<chunk>"} as tokens arrive
+    - `done`: {"generated_at": ..., "model_used": ...} once the lesson is complete
+    - `error`: {"detail": ...} if generation fails part-way (nothing is saved)
+    
+    Freshly generated lessons are saved as a new lesson version when the stream finishes.
+    """
+    
+    concept = db.query(Concept).filter(Concept.concept_id == concept_id).first()
+    if not concept:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Concept not found"
+        )
+    
+    lesson = get_active_lesson(db, concept)
+    if lesson:
+        cached_content = lesson["content"]
+        cached_done = {
+            "generated_at": lesson["generated_at"].isoformat() if lesson["generated_at"] else None,
+            "model_used": lesson["model_used"],
+            "version": lesson["version"]
+        }
+        
+        async def cached_events():
+            yield format_sse_event({"source": "database"}, event="meta")
+            yield format_sse_event({"delta": cached_content})
+            yield format_sse_event(cached_done, event="done")
+        
+        events = cached_events()
+    else:
+        print(f"🤖 Streaming AI lesson for: {concept.display_name}")
+        lesson_stream = stream_and_store_lesson(concept)
+        
+        async def generated_events():
+            yield format_sse_event({"source": "ai_generated"}, event="meta")
+            try:
+                async for chunk in lesson_stream:
+                    yield format_sse_event({"delta": chunk})
+            except Exception as e:
+                print(f"❌ Lesson stream failed for {concept_id}: {str(e)}")
+                yield format_sse_event({"detail": f"Failed to generate lesson content: {str(e)}"}, event="error")
+                return
+            yield format_sse_event(
+                {"generated_at": datetime.utcnow().isoformat(), "model_used": LESSON_MODEL_NAME},
+                event="done"
+            )
+        
+        events = generated_events()
+    
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{concept_id}/practice-questions")
 async def get_practice_questions(
     concept_id: str,
@@ -704,7 +894,8 @@ async def get_practice_questions(
     db: Session = Depends(get_db)
 ):
     """
-    Generate practice questions for a concept using AI
+    Get practice questions for a concept, served from the practice question
+    cache and generated with AI on a miss
     """
     
     # Fetch concept
@@ -716,24 +907,26 @@ async def get_practice_questions(
         )
     
     try:
-        questions = await generate_practice_questions(
-            concept_name=concept.display_name,
-            difficulty=concept.difficulty_level,
-            question_count=question_count
-        )
-        
-        return PracticeQuestionsResponse(
-            questions=questions,
-            generated_at=datetime.utcnow().isoformat(),
-            model_used="gpt-4o-mini"
-        )
-        
+        result = await get_or_generate_practice_questions(db, concept, question_count)
     except Exception as e:
         print(f"❌ Failed to generate practice questions for {concept.display_name}: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate practice questions: {str(e)}"
         )
+    
+    # Top up the variant pool in the background so later sessions get a random variant
+    if result["source"] != "fallback" and PRACTICE_CACHE_ENABLED and QUEUE_ENABLED \
+            and not pool_is_full(db, result["cache_key"]):
+        enqueue_job(db, concept_id, JOB_TYPE_PRACTICE_QUESTIONS, {"question_count": question_count})
+        generation_queue.notify()
+    
+    return PracticeQuestionsResponse(
+        questions=result["questions"],
+        generated_at=datetime.utcnow().isoformat(),
+        model_used=ai_generator.model_name,
+        source=result["source"]
+    )
 
 
 @router.post("/{concept_id}/regenerate-lesson")
@@ -757,11 +950,10 @@ async def regenerate_concept_lesson(
     try:
         print(f"🔄 Regenerating lesson for: {concept.display_name}")
         
-        # Clear existing content
-        concept.lesson_content = None
-        concept.lesson_generated_at = None
-        concept.lesson_model_used = None
-        db.commit()
+        # Stop serving the current version (kept in history for rollback)
+        clear_active_lesson(db, concept)
+        # Practice questions follow the lesson, so regenerate them too
+        invalidate_concept(db, concept_id)
         
         # Generate new content (will be cached automatically)
         return await get_concept_lesson(concept_id, current_user, db)
@@ -791,11 +983,119 @@ async def get_lesson_status(
             detail="Concept not found"
         )
     
+    # Report background generation state (queued / in_progress / failed)
+    lesson_job = get_latest_job(db, concept_id, JOB_TYPE_LESSON)
+    practice_job = get_latest_job(db, concept_id, JOB_TYPE_PRACTICE_QUESTIONS)
+    
+    lesson_ready = has_lesson(db, concept)
+    if lesson_ready:
+        generation_status = "ready"
+    elif lesson_job:
+        generation_status = lesson_job.status
+    else:
+        generation_status = "not_queued"
+    
     return {
         "concept_id": concept_id,
         "concept_name": concept.display_name,
-        "has_lesson": concept.lesson_content is not None,
+        "has_lesson": lesson_ready,
         "generated_at": concept.lesson_generated_at.isoformat() if concept.lesson_generated_at else None,
         "model_used": concept.lesson_model_used,
-        "needs_generation": concept.lesson_content is None
-    }
\ No newline at end of file
+        "needs_generation": not lesson_ready,
+        "generation_status": generation_status,
+        "lesson_job": serialize_job(lesson_job) if lesson_job else None,
+        "practice_questions_job": serialize_job(practice_job) if practice_job else None
+    }
+
+
+@router.get("/{concept_id}/lesson/versions")
+async def get_lesson_versions(
+    concept_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    List stored lesson versions for a concept (newest first)
+    """
+    
+    concept = db.query(Concept).filter(Concept.concept_id == concept_id).first()
+    if not concept:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Concept not found"
+        )
+    
+    versions = list_lesson_versions(db, concept_id)
+    return {
+        "concept_id": concept_id,
+        "active_lesson_id": concept.active_lesson_id,
+        "versions": [serialize_lesson_version(v, concept.active_lesson_id) for v in versions]
+    }
+
+
+@router.post("/{concept_id}/lesson/rollback")
+async def rollback_concept_lesson(
+    concept_id: str,
+    version: Optional[int] = None,
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Make an earlier lesson version active again (admin only; every learner sees it).
+    Defaults to the version before the currently active one.
+    """
+    
+    concept = db.query(Concept).filter(Concept.concept_id == concept_id).first()
+    if not concept:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Concept not found"
+        )
+    
+    lesson = rollback_lesson(db, concept, version)
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No lesson version to roll back to"
+        )
+    invalidate_concept(db, concept_id)
+    
+    return {
+        "message": f"Lesson rolled back to version {lesson.version}",
+        **serialize_lesson_version(lesson, concept.active_lesson_id)
+    }
+
+
+@router.post("/lessons/pregenerate")
+async def pregenerate_missing_lessons(
+    limit: Optional[int] = None,
+    include_practice_questions: bool = True,
+    question_count: int = 3,
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue background generation for every concept that has no lesson yet (admin only)
+    """
+    
+    queued = enqueue_missing_lessons(
+        db,
+        limit=limit,
+        include_practice_questions=include_practice_questions,
+        question_count=question_count
+    )
+    generation_queue.notify()
+    
+    return {
+        "message": f"Queued {queued['lesson_jobs']} lessons for background generation",
+        **queued
+    }
+
+
+@router.get("/lessons/queue-status")
+async def get_generation_queue_status(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get background generation queue depth, worker, rate limiter and practice cache state"""
+    return {**generation_queue.status(db), "practice_cache": cache_stats(db)}
\ No newline at end of file
@@ -11,7 +11,7 @@ from sqlalchemy import and_, or_
 from pydantic import BaseModel
 
 from api.v1.auth import get_current_user
-from config.database import get_db
+from config.database import get_db, get_read_db, json_contains
 from database.models import Concept, ConceptContent, UserContentProgress, User
 
 
@@ -134,10 +134,11 @@ async def get_concept_content(
     concept_id: str,
     content_type: Optional[str] = None,
     difficulty_level: Optional[str] = None,
+    prerequisite: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all educational content for a concept"""
     
@@ -159,6 +160,9 @@ async def get_concept_content(
     if difficulty_level:
         query = query.filter(ConceptContent.difficulty_level == difficulty_level)
     
+    if prerequisite:
+        query = query.filter(json_contains(ConceptContent.prerequisites, prerequisite))
+    
     # Get active content only
     query = query.filter(ConceptContent.is_active == True)
     
@@ -205,7 +209,7 @@ async def get_concept_content(
 async def get_content_by_id(
     content_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get specific content by ID"""
     
@@ -336,7 +340,7 @@ async def update_content_progress(
 async def get_content_progress(
     content_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get user's progress on specific content"""
     
@@ -378,7 +382,7 @@ async def get_content_progress(
 async def get_concept_content_progress(
     concept_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get user's progress on all content for a concept"""
     
@@ -508,7 +512,7 @@ async def start_learning_concept(
 async def get_next_content(
     content_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get the next recommended content piece after completing current one"""
     
@@ -9,8 +9,10 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from api.v1.auth import get_current_user
-from config.database import get_db, get_neo4j_driver
+from config.database import get_db, get_read_db
 from database.models import User, LearningPath, LearningSession, Concept, UserConceptProgress, LearningPathConcept
+from services.concept_graph import concept_graph
+from services.graph_repository import fetch_recommendations
 
 
 # Router instance
@@ -20,7 +22,7 @@ router = APIRouter()
 @router.get("/")
 async def get_learning_paths(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get learning paths from database with accurate progress calculation.
@@ -107,7 +109,7 @@ async def get_learning_paths(
 @router.get("/recommendations")
 async def get_learning_recommendations(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     GENUINE AI: Queries the Knowledge Graph to find the optimal next step.
@@ -146,54 +148,29 @@ async def get_learning_recommendations(
             "recommendation_type": "beginner_friendly"
         }
 
-    # 2. ASK NEO4J (The Brain) - Get concepts that depend on completed ones
-    driver = get_neo4j_driver()
+    # 2. In-process concept graph (no Neo4j round trip), then NEO4J (The Brain)
     recommendations = []
-    
-    if driver:
-        try:
-            query = """
-            // Find concepts the user completed
-            MATCH (completed:Concept)
-            WHERE completed.concept_id IN $completed_ids
-            
-            // Find 'next step' concepts that REQUIRE the completed ones
-            MATCH (next:Concept)-[:PREREQUISITE]->(completed)
-            WHERE NOT next.concept_id IN $completed_ids
-            
-            // Return the concept and how many requirements user has met
-            RETURN next.concept_id as concept_id, next.name as name, 
-                   next.display_name as title, next.description as desc, 
-                   next.difficulty_level as difficulty,
-                   count(completed) as prerequisites_met,
-                   size((next)-[:PREREQUISITE]->(:Concept)) as total_prerequisites
-            ORDER BY prerequisites_met DESC, difficulty
-            LIMIT 5
-            """
-            
-            with driver.session() as session:
-                result = session.run(query, completed_ids=completed_ids)
-                
-                for record in result:
-                    prerequisites_met = record['prerequisites_met']
-                    total_prerequisites = record['total_prerequisites']
-                    readiness_score = (prerequisites_met / total_prerequisites * 100) if total_prerequisites > 0 else 100
-                    
-                    if readiness_score >= 50:  # User is ready for this concept
-                        recommendations.append({
-                            "concept_id": record["concept_id"],
-                            "title": record["title"],
-                            "description": record["desc"],
-                            "reason": f"You've mastered {prerequisites_met} of {total_prerequisites} prerequisites!",
-                            "difficulty": record["difficulty"],
-                            "match_score": f"{int(readiness_score)}%",
-                            "estimated_time": "45-90 minutes"
-                        })
-                        
-        except Exception as e:
-            print(f"Graph Error: {e}")
-            # Fallback to simple SQL-based recommendations
-            pass
+    graph_results = concept_graph.recommend(completed_ids) if concept_graph.ready else None
+
+    if graph_results is None:
+        graph_results = await fetch_recommendations(completed_ids)
+
+    graph_based = bool(graph_results)
+    for result in graph_results or []:
+        prerequisites_met = result["prerequisites_met"]
+        total_prerequisites = result["total_prerequisites"]
+        readiness_score = (prerequisites_met / total_prerequisites * 100) if total_prerequisites > 0 else 100
+
+        if readiness_score >= 50:  # User is ready for this concept
+            recommendations.append({
+                "concept_id": result["concept_id"],
+                "title": result["title"],
+                "description": result["description"],
+                "reason": f"You've mastered {prerequisites_met} of {total_prerequisites} prerequisites!",
+                "difficulty": result["difficulty"],
+                "match_score": f"{int(readiness_score)}%",
+                "estimated_time": "45-90 minutes"
+            })
     
     # 3. Fallback: SQL-based recommendations if Neo4j fails
     if not recommendations:
@@ -224,7 +201,7 @@ async def get_learning_recommendations(
         "recommendations": recommendations,
         "message": f"Found {len(recommendations)} personalized recommendations based on your progress",
         "completed_concepts": len(completed_ids),
-        "recommendation_type": "graph_based" if driver and recommendations else "sequential"
+        "recommendation_type": "graph_based" if graph_based and recommendations else "sequential"
     }
 
 
@@ -245,6 +222,69 @@ async def start_learning_path(
     }
 
 
+@router.get("/{path_id}/frontier")
+async def get_learning_path_frontier(
+    path_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Concepts in a path the user can start now (every prerequisite completed),
+    plus the path's prerequisite-respecting study order. Served from the
+    in-process concept graph.
+    """
+    if not db.query(LearningPath.path_id).filter(LearningPath.path_id == path_id).first():
+        raise HTTPException(status_code=404, detail="Learning path not found")
+    if not concept_graph.ready:
+        raise HTTPException(status_code=503, detail="Concept graph is not loaded")
+
+    completed_ids = [
+        r.concept_id for r in db.query(UserConceptProgress.concept_id).filter(
+            UserConceptProgress.user_id == current_user.user_id,
+            UserConceptProgress.status == "completed"
+        )
+    ]
+    path_concept_ids = [
+        r.concept_id for r in db.query(LearningPathConcept.concept_id).filter(
+            LearningPathConcept.path_id == path_id
+        )
+    ]
+
+    return {
+        "path_id": path_id,
+        "frontier": concept_graph.frontier(completed_ids, path_id=path_id),
+        "study_order": concept_graph.topological_order(path_concept_ids),
+        "completed_concepts": len(set(completed_ids) & set(path_concept_ids)),
+        "total_concepts": len(path_concept_ids)
+    }
+
+
+@router.get("/plan/{target_concept_id}")
+async def plan_learning_path(
+    target_concept_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Personal study plan for a target concept: every prerequisite the user has
+    not yet covered (transitively), in prerequisite order with time estimates.
+    """
+    if not concept_graph.ready:
+        raise HTTPException(status_code=503, detail="Concept graph is not loaded")
+
+    completed_ids = [
+        r.concept_id for r in db.query(UserConceptProgress.concept_id).filter(
+            UserConceptProgress.user_id == current_user.user_id,
+            UserConceptProgress.status == "completed"
+        )
+    ]
+
+    plan = concept_graph.plan(target_concept_id, completed_ids)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Concept not found")
+    return plan
+
+
 @router.post("/sessions/{session_id}/complete")
 async def complete_learning_session(
     session_id: str,
@@ -309,7 +349,7 @@ def transform_learning_path_to_api_format(learning_path: LearningPath, user_id:
 @router.get("/database")
 async def get_learning_paths_from_database(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get learning paths from the actual database with API transformation.
@@ -354,7 +394,7 @@ async def get_learning_paths_from_database(
 async def get_learning_path_by_id(
     path_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get a specific learning path by ID from the database with API transformation.
@@ -423,7 +463,7 @@ async def get_learning_path_by_id(
 @router.get("/detailed-progress")
 async def get_learning_paths_detailed_progress(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Enhanced version with detailed progress breakdown.
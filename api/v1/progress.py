@@ -5,14 +5,17 @@ User progress monitoring and analytics
 
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 from api.v1.auth import get_current_user
-from config.database import get_db
+from config.database import get_db, get_read_db
 from config.logging_config import get_logger
 from database.models import User, UserConceptProgress, Concept
+from services.progress_buffer import progress_buffer
+from services.progress_events import MAX_PROGRESS_BATCH, apply_progress_events
 
 # Get logger for this module
 logger = get_logger(__name__)
@@ -30,10 +33,33 @@ class ProgressUpdateRequest(BaseModel):
     user_notes: Optional[str] = None
 
 
+class ProgressEvent(BaseModel):
+    """One progress event recorded by a client, possibly while offline"""
+    event_id: str = Field(..., min_length=1, max_length=64)  # Client-generated idempotency key
+    concept_id: Optional[str] = None
+    content_id: Optional[str] = None
+    time_spent_minutes: int = Field(0, ge=0)
+    progress_percent: Optional[float] = Field(None, ge=0, le=100)
+    status: Optional[str] = None  # not_started, in_progress, completed (content also: mastered)
+    score: Optional[float] = None  # Content events only
+    occurred_at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def one_target(self):
+        if bool(self.concept_id) == bool(self.content_id):
+            raise ValueError("Exactly one of concept_id or content_id is required")
+        return self
+
+
+class ProgressEventBatch(BaseModel):
+    """Request model for replaying queued progress events"""
+    events: List[ProgressEvent] = Field(..., max_length=MAX_PROGRESS_BATCH)
+
+
 @router.get("/")
 async def get_progress_dashboard(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get full dashboard progress stats (Matches Frontend Expectations)"""
     
@@ -147,7 +173,27 @@ async def update_concept_progress(
     
     logger.info(f"🔄 Updating progress for concept: {concept_id}")
     logger.debug(f"📊 Update data received: {progress_data}")
-    
+
+    # Reading heartbeats go to the write-behind buffer. One read checks the
+    # concept exists (unknown ids still get a 404 from the SQL path below) and
+    # fetches the stored progress, so the reply never shows less than SQL has.
+    if progress_data.status == "in_progress" and progress_data.user_notes is None:
+        known = db.query(Concept.concept_id, UserConceptProgress.progress_percent).outerjoin(
+            UserConceptProgress,
+            and_(UserConceptProgress.concept_id == Concept.concept_id,
+                 UserConceptProgress.user_id == current_user.user_id)
+        ).filter(Concept.concept_id == concept_id).first()
+        buffered_percent = progress_buffer.record(
+            current_user.user_id, concept_id, progress_data.time_spent_minutes, progress_data.progress_percent
+        ) if known else None
+        if buffered_percent is not None:
+            return {
+                "message": "Progress update buffered",
+                "current_progress": int(max(known.progress_percent or 0, buffered_percent)),
+                "status": progress_data.status,
+                "buffered": True
+            }
+
     # Check if concept exists first
     concept = db.query(Concept).filter(Concept.concept_id == concept_id).first()
     if not concept:
@@ -182,7 +228,9 @@ async def update_concept_progress(
     
     db.commit()
     db.refresh(progress)
-    
+    # Write heartbeats buffered before this change without waiting for the flush interval
+    progress_buffer.notify()
+
     logger.info(f"✅ Progress updated successfully: {progress.status}, time_spent_minutes: {progress.time_spent_minutes}")
     
     return {
@@ -192,11 +240,31 @@ async def update_concept_progress(
     }
 
 
+@router.post("/batch")
+async def apply_progress_batch(
+    batch: ProgressEventBatch,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Apply queued progress events in one transaction.
+
+    Safe to retry: events are deduplicated by event_id, minutes accumulate and
+    progress, status and best score never regress, whatever the event order.
+    Events for unknown concepts or content are returned in "rejected" and can
+    be resent once the item exists.
+    """
+    result = apply_progress_events(
+        db, current_user.user_id, [event.model_dump() for event in batch.events]
+    )
+    return {"message": "Progress events applied", **result}
+
+
 @router.get("/concepts/{concept_id}")
 async def get_concept_progress(
     concept_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get progress for specific concept"""
     
@@ -227,7 +295,7 @@ async def get_concept_progress(
 @router.get("/overview")
 async def get_progress_overview(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get user's overall progress overview"""
     return await get_progress_dashboard(current_user, db)
\ No newline at end of file
@@ -12,9 +12,10 @@ from pydantic import BaseModel
 import uuid
 
 from api.v1.auth import get_current_user
-from config.database import get_db
+from config.database import get_db, get_read_db
 from config.logging_config import get_logger
 from database.models import User, Quiz, QuizAttempt, UserConceptProgress
+from services.attempt_history import quiz_completion_stats, user_attempts_used, user_quiz_overview
 
 # Get logger for this module
 logger = get_logger(__name__)
@@ -78,7 +79,7 @@ async def get_quizzes(
     quiz_type: Optional[str] = None,
     difficulty_level: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get available quizzes for user"""
     
@@ -99,17 +100,12 @@ async def get_quizzes(
         
         quizzes = query.order_by(Quiz.created_at.desc()).all()
         
-        # Get user's progress for each concept to add completion status
+        # User's attempts and best scores for every listed quiz (archived history included)
+        overview = user_quiz_overview(db, current_user.user_id, [quiz.quiz_id for quiz in quizzes])
+        
         result = []
         for quiz in quizzes:
-            # Get user's best attempt for this quiz
-            best_attempt = db.query(QuizAttempt).filter(
-                and_(
-                    QuizAttempt.quiz_id == quiz.quiz_id,
-                    QuizAttempt.user_id == current_user.user_id,
-                    QuizAttempt.status == 'completed'
-                )
-            ).order_by(desc(QuizAttempt.percentage)).first()
+            user_history = overview[quiz.quiz_id]
             
             quiz_data = {
                 "quiz_id": quiz.quiz_id,
@@ -126,14 +122,9 @@ async def get_quizzes(
                 "average_score": quiz.average_score,
                 "completion_rate": quiz.completion_rate,
                 "created_at": quiz.created_at,
-                "user_best_score": best_attempt.percentage if best_attempt else 0.0,
-                "user_passed": best_attempt.passed if best_attempt else False,
-                "attempts_used": db.query(func.count(QuizAttempt.attempt_id)).filter(
-                    and_(
-                        QuizAttempt.quiz_id == quiz.quiz_id,
-                        QuizAttempt.user_id == current_user.user_id
-                    )
-                ).scalar() or 0
+                "user_best_score": user_history["best_score"],
+                "user_passed": user_history["passed"],
+                "attempts_used": user_history["attempts_used"]
             }
             result.append(quiz_data)
         
@@ -149,7 +140,7 @@ async def get_quizzes(
 async def get_quiz_details(
     quiz_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get detailed quiz information"""
     
@@ -233,12 +224,7 @@ async def start_quiz(
             raise HTTPException(status_code=404, detail="Quiz not found")
         
         # Check attempt limits
-        attempts_used = db.query(func.count(QuizAttempt.attempt_id)).filter(
-            and_(
-                QuizAttempt.quiz_id == quiz_id,
-                QuizAttempt.user_id == current_user.user_id
-            )
-        ).scalar() or 0
+        attempts_used = user_attempts_used(db, current_user.user_id, quiz_id)
         
         if attempts_used >= quiz.max_attempts:
             raise HTTPException(
@@ -370,7 +356,7 @@ async def submit_quiz_attempt(
 async def get_quiz_attempt(
     attempt_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get quiz attempt details"""
     
@@ -420,7 +406,7 @@ async def get_user_quiz_attempts(
     status_filter: Optional[str] = None,
     limit: int = 20,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get user's quiz attempts"""
     
@@ -473,7 +459,7 @@ async def get_user_quiz_attempts(
 async def get_quiz_analytics(
     quiz_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get quiz analytics and statistics"""
     
@@ -482,28 +468,36 @@ async def get_quiz_analytics(
         if not quiz:
             raise HTTPException(status_code=404, detail="Quiz not found")
         
-        attempts = db.query(QuizAttempt).filter(QuizAttempt.quiz_id == quiz_id).all()
-        completed_attempts = [a for a in attempts if a.status == 'completed']
+        stats = quiz_completion_stats(db, quiz_id)
         
-        if not completed_attempts:
+        if not stats["completed"]:
             return {"success": True, "data": {"message": "No completed attempts yet"}}
         
+        # Difficulty ratings are not kept in the archive summaries, so the
+        # distribution covers the attempts still in quiz_attempts
+        ratings = [rating for (rating,) in db.query(QuizAttempt.difficulty_rating).filter(
+            and_(
+                QuizAttempt.quiz_id == quiz_id,
+                QuizAttempt.status == 'completed',
+                QuizAttempt.difficulty_rating.isnot(None)
+            )
+        )]
+        
         # Calculate statistics
-        total_attempts = len(completed_attempts)
-        scores = [a.percentage for a in completed_attempts]
-        times = [a.time_taken for a in completed_attempts if a.time_taken]
+        total_attempts = stats["completed"]
         
         analytics = {
             "total_attempts": total_attempts,
-            "average_score": sum(scores) / len(scores),
-            "best_score": max(scores),
-            "pass_rate": sum(1 for s in scores if s >= quiz.passing_score) / len(scores),
-            "completion_rate": len(completed_attempts) / len(attempts) if attempts else 0,
-            "average_time": sum(times) / len(times) if times else 0,
+            "average_score": stats["percentage_sum"] / total_attempts,
+            "best_score": stats["best_percentage"],
+            "pass_rate": stats["passed"] / total_attempts,
+            "completion_rate": total_attempts / stats["attempts"] if stats["attempts"] else 0,
+            # Attempts without a recorded time would drag the average down
+            "average_time": stats["time_taken_sum"] / stats["timed_attempts"] if stats["timed_attempts"] else 0,
             "difficulty_distribution": {
-                "easy": sum(1 for a in completed_attempts if a.difficulty_rating and a.difficulty_rating <= 3),
-                "medium": sum(1 for a in completed_attempts if a.difficulty_rating and 3 < a.difficulty_rating <= 7),
-                "hard": sum(1 for a in completed_attempts if a.difficulty_rating and a.difficulty_rating > 7)
+                "easy": sum(1 for r in ratings if r <= 3),
+                "medium": sum(1 for r in ratings if 3 < r <= 7),
+                "hard": sum(1 for r in ratings if r > 7)
             }
         }
         
@@ -543,16 +537,11 @@ def calculate_quiz_score(responses: Dict[str, Any], questions: List[Dict], passi
 def update_quiz_statistics(quiz: Quiz, db: Session):
     """Update quiz aggregate statistics"""
     
-    attempts = db.query(QuizAttempt).filter(
-        and_(
-            QuizAttempt.quiz_id == quiz.quiz_id,
-            QuizAttempt.status == 'completed'
-        )
-    ).all()
+    stats = quiz_completion_stats(db, quiz.quiz_id)
     
-    if attempts:
-        quiz.average_score = sum(a.percentage for a in attempts) / len(attempts)
-        quiz.completion_rate = sum(1 for a in attempts if a.passed) / len(attempts)
+    if stats["completed"]:
+        quiz.average_score = stats["percentage_sum"] / stats["completed"]
+        quiz.completion_rate = stats["passed"] / stats["completed"]
 
 
 async def award_quiz_achievements(user_id: str, quiz: Quiz, db: Session):
@@ -7,7 +7,7 @@ from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, case, func, or_
 from pydantic import BaseModel, EmailStr
 
 import sys
@@ -15,7 +15,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
 from api.v1.auth import get_current_user
-from config.database import get_db
+from config.database import get_db, get_read_db
 from database.models import User, UserLearningPreferences
 
 
@@ -209,34 +209,29 @@ async def update_user_preferences(
 @router.get("/stats", response_model=UserStats)
 async def get_user_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get current user's learning statistics"""
     
     # Import here to avoid circular imports
-    from database.models import LearningSession, UserProgress, UserAchievement
+    from database.models import LearningSession, UserConceptProgress, UserAchievement
     
     # Calculate statistics
     total_sessions = db.query(LearningSession).filter(
         LearningSession.user_id == current_user.user_id
     ).count()
     
-    concepts_learned = db.query(UserProgress).filter(
-        and_(
-            UserProgress.user_id == current_user.user_id,
-            UserProgress.mastery_level >= 0.8
-        )
-    ).count()
-    
-    # Average mastery score
-    avg_mastery = db.query(UserProgress.mastery_level).filter(
-        UserProgress.user_id == current_user.user_id
-    ).all()
+    # Concepts learned (completed or mastered) and average mastery in one pass
+    concepts_learned, avg_mastery = db.query(
+        func.count(case(
+            (or_(UserConceptProgress.status == "completed", UserConceptProgress.mastery_level >= 0.8), 1)
+        )),
+        func.avg(UserConceptProgress.mastery_level)
+    ).filter(
+        UserConceptProgress.user_id == current_user.user_id
+    ).one()
     
-    average_mastery_score = (
-        sum([m[0] for m in avg_mastery]) / len(avg_mastery)
-        if avg_mastery else 0.0
-    )
+    average_mastery_score = avg_mastery or 0.0
     
     # Current streak (simplified - could be more sophisticated)
     current_streak = 3  # Placeholder - would calculate based on recent activity
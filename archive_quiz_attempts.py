@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Quiz Attempt Archival
+Keeps quiz_attempts bounded: attempts older than the retention window are
+exported to compressed files, compacted into one QuizAttemptSummary row per
+(user, quiz) and removed from the hot table. Attempt limits, quiz analytics,
+achievements and concept analytics read the summaries alongside the live
+rows (services/attempt_history.py), so nothing they count is lost.
+
+PostgreSQL: quiz_attempts is converted once (--partition) to a table
+partitioned by month on started_at, with a DEFAULT partition for anything
+outside the created range. Every run then:
+
+- rollover: creates the partitions for the current month and the next
+  --months-ahead months (rows that already landed in DEFAULT are moved in)
+- archive:  for each month older than the retention window, exports the rows,
+  folds them into the summaries and drops the month's partition (DETACH +
+  DROP, no row-by-row DELETE or vacuum debt)
+
+SQLite (development): no partitioning; archived months are deleted by range.
+
+Each month is exported first and then summarised and removed in a single
+transaction, so a failed run never double counts; re-running it only writes
+another export file for the month.
+
+Usage:
+    python archive_quiz_attempts.py --dry-run
+    python archive_quiz_attempts.py --partition        # PostgreSQL, once
+    python archive_quiz_attempts.py                    # rollover + archive (cron, monthly)
+    python archive_quiz_attempts.py --retention-months 6 --format parquet
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, JSON, and_, case, create_engine, func, select, text, tuple_
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from config.database import DATABASE_URL, UUIDKey
+from database.models import QuizAttempt, QuizAttemptSummary
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+RETENTION_MONTHS = int(os.getenv("QUIZ_ATTEMPT_RETENTION_MONTHS", "12"))
+EXPORT_DIR = os.getenv("QUIZ_ATTEMPT_ARCHIVE_DIR", "data/archive/quiz_attempts")
+EXPORT_FORMAT = os.getenv("QUIZ_ATTEMPT_ARCHIVE_FORMAT", "jsonl")
+MONTHS_AHEAD = int(os.getenv("QUIZ_ATTEMPT_PARTITION_MONTHS_AHEAD", "3"))
+
+TABLE = QuizAttempt.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+UNPARTITIONED = f"{TABLE}_unpartitioned"
+COMPLETED = "completed"
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def month_label(month: datetime) -> str:
+    return month.strftime("%Y-%m")
+
+
+# =============================================================================
+# POSTGRESQL PARTITIONS
+# =============================================================================
+
+def _partition_name(month: datetime) -> str:
+    return f"{TABLE}_{month.strftime('%Y_%m')}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    kind = conn.execute(text(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"
+    ), {"table": TABLE}).scalar()
+    return kind == "p"
+
+
+def _partition_exists(conn: Connection, month: datetime) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"),
+                        {"name": _partition_name(month)}).scalar()
+
+
+def create_partition(conn: Connection, month: datetime) -> bool:
+    """Create the month's partition; False if it already exists"""
+    if _partition_exists(conn, month):
+        return False
+    name, bounds = _partition_name(month), {"start": month, "end": add_months(month, 1)}
+    values = f"FROM ('{month.isoformat()}') TO ('{bounds['end'].isoformat()}')"
+    # Attaching validates that DEFAULT holds no row of the new range, so rows
+    # that landed there before the partition existed are moved in first
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE started_at >= :start AND started_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    conn.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES {values}"))
+    return True
+
+
+def partition_table(engine: Engine, months_ahead: int):
+    """
+    One-off conversion of quiz_attempts to monthly range partitions. Runs in a
+    single transaction holding an exclusive lock on the table, so schedule it
+    in a maintenance window on large tables.
+    """
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            print(f"   ✅ {TABLE} is already partitioned")
+            return
+        started = time.time()
+        conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+        conn.execute(text(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text(f"UPDATE {TABLE} SET started_at = COALESCE(created_at, now()) WHERE started_at IS NULL"))
+        first = conn.execute(text(f"SELECT MIN(started_at) FROM {TABLE}")).scalar()
+
+        conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {UNPARTITIONED}"))
+        conn.execute(text(
+            f"CREATE TABLE {TABLE} (LIKE {UNPARTITIONED} INCLUDING DEFAULTS) PARTITION BY RANGE (started_at)"
+        ))
+        # The partition key has to be part of every unique constraint
+        conn.execute(text(f"ALTER TABLE {TABLE} ALTER COLUMN started_at SET NOT NULL"))
+        conn.execute(text(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (attempt_id, started_at)"))
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+
+        month = month_start(first or datetime.utcnow())
+        last = add_months(month_start(datetime.utcnow()), months_ahead)
+        while month <= last:
+            create_partition(conn, month)
+            month = add_months(month, 1)
+
+        copied = conn.execute(text(f"INSERT INTO {TABLE} SELECT * FROM {UNPARTITIONED}")).rowcount
+        conn.execute(text(f"DROP TABLE {UNPARTITIONED}"))
+
+        # Indexes and foreign keys on the parent cascade to every partition
+        for index in QuizAttempt.__table__.indexes:
+            columns = ", ".join(column.name for column in index.columns)
+            conn.execute(text(f"CREATE INDEX {index.name} ON {TABLE} ({columns})"))
+        for foreign_key in QuizAttempt.__table__.foreign_keys:
+            conn.execute(text(
+                f"ALTER TABLE {TABLE} ADD FOREIGN KEY ({foreign_key.parent.name}) "
+                f"REFERENCES {foreign_key.column.table.name} ({foreign_key.column.name})"
+            ))
+    print(f"   ✅ {TABLE} partitioned by month, {copied} rows copied in {time.time() - started:.1f}s")
+
+
+def rollover(engine: Engine, months_ahead: int):
+    """Create the partitions for the current month and the next months_ahead"""
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            print(f"   ⚠️ {TABLE} is not partitioned yet (run with --partition), skipping rollover")
+            return
+        month = month_start(datetime.utcnow())
+        for _ in range(months_ahead + 1):
+            if create_partition(conn, month):
+                print(f"   ✅ partition {_partition_name(month)} created")
+            month = add_months(month, 1)
+
+
+# =============================================================================
+# ARCHIVE
+# =============================================================================
+
+def archive_months(engine: Engine, retention_months: int) -> List[Tuple[datetime, int]]:
+    """(month, rows) for every month with attempts older than the retention window"""
+    cutoff = add_months(month_start(datetime.utcnow()), -retention_months)
+    started_at = QuizAttempt.started_at
+    with engine.connect() as conn:
+        first = conn.execute(select(func.min(started_at)).where(started_at < cutoff)).scalar()
+        months = []
+        month = month_start(first) if first else cutoff
+        while month < cutoff:
+            end = add_months(month, 1)
+            rows = conn.execute(
+                select(func.count()).select_from(QuizAttempt).where(started_at >= month, started_at < end)
+            ).scalar()
+            if rows:
+                months.append((month, rows))
+            month = end
+    return months
+
+
+def _month_rows(conn: Connection, month: datetime, batch_size: int) -> Iterator[List[dict]]:
+    table = QuizAttempt.__table__
+    result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+        select(table)
+        .where(table.c.started_at >= month, table.c.started_at < add_months(month, 1))
+        .order_by(table.c.started_at)
+    )
+    for partition in result.mappings().partitions(batch_size):
+        yield [dict(row) for row in partition]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _parquet_schema():
+    types = {UUIDKey: pa.string(), Integer: pa.int64(), Float: pa.float64(),
+             Boolean: pa.bool_(), DateTime: pa.timestamp("us"), JSON: pa.string()}
+    fields = []
+    for column in QuizAttempt.__table__.columns:
+        arrow_type = next((arrow for sql, arrow in types.items() if isinstance(column.type, sql)), pa.string())
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def export_month(engine: Engine, month: datetime, export_dir: str, export_format: str, batch_size: int) -> str:
+    """
+    Write the month's raw attempts to export_dir. The file only appears under
+    its final name once it is complete.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    extension = "parquet" if export_format == "parquet" else "jsonl.gz"
+    path = os.path.join(export_dir, f"{TABLE}-{month_label(month)}-{stamp}.{extension}")
+    partial = f"{path}.partial"
+
+    with engine.connect() as conn:
+        if export_format == "parquet":
+            schema = _parquet_schema()
+            json_columns = [c.name for c in QuizAttempt.__table__.columns if isinstance(c.type, JSON)]
+            with pq.ParquetWriter(partial, schema, compression="zstd") as writer:
+                for rows in _month_rows(conn, month, batch_size):
+                    for row in rows:
+                        for name in json_columns:
+                            row[name] = json.dumps(row[name], default=_json_default)
+                    writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+        else:
+            with gzip.open(partial, "wt", encoding="utf-8") as handle:
+                for rows in _month_rows(conn, month, batch_size):
+                    for row in rows:
+                        handle.write(json.dumps(row, default=_json_default) + "\n")
+    os.replace(partial, path)
+    return path
+
+
+def _month_summaries(db: Session, month: datetime) -> list:
+    completed = QuizAttempt.status == COMPLETED
+    return db.execute(
+        select(
+            QuizAttempt.user_id,
+            QuizAttempt.quiz_id,
+            func.count(QuizAttempt.attempt_id).label("attempts"),
+            func.count(case((completed, 1))).label("completed"),
+            func.count(case((and_(completed, QuizAttempt.passed.is_(True)), 1))).label("passed"),
+            func.count(case((and_(completed, QuizAttempt.percentage == 1.0), 1))).label("perfect"),
+            func.max(case((completed, QuizAttempt.percentage))).label("best"),
+            func.sum(case((completed, QuizAttempt.percentage), else_=0.0)).label("percentage_sum"),
+            func.sum(case((completed, QuizAttempt.time_taken), else_=0)).label("time_taken_sum"),
+            func.count(case((and_(completed, QuizAttempt.time_taken.isnot(None)), 1))).label("timed"),
+            func.min(QuizAttempt.started_at).label("first_started_at"),
+            func.max(QuizAttempt.started_at).label("last_started_at")
+        )
+        .where(QuizAttempt.started_at >= month, QuizAttempt.started_at < add_months(month, 1))
+        .group_by(QuizAttempt.user_id, QuizAttempt.quiz_id)
+    ).all()
+
+
+def summarize_and_remove(engine: Engine, month: datetime, batch_size: int) -> int:
+    """Fold the month into QuizAttemptSummary and remove its attempts, in one transaction"""
+    with Session(engine) as db, db.begin():
+        groups = _month_summaries(db, month)
+        for offset in range(0, len(groups), batch_size):
+            batch = groups[offset:offset + batch_size]
+            keys = [(group.user_id, group.quiz_id) for group in batch]
+            existing: Dict[tuple, QuizAttemptSummary] = {
+                (summary.user_id, summary.quiz_id): summary
+                for summary in db.scalars(
+                    select(QuizAttemptSummary)
+                    .where(tuple_(QuizAttemptSummary.user_id, QuizAttemptSummary.quiz_id).in_(keys))
+                )
+            }
+            for group in batch:
+                summary = existing.get((group.user_id, group.quiz_id))
+                if summary is None:
+                    summary = QuizAttemptSummary(
+                        user_id=group.user_id, quiz_id=group.quiz_id, attempts=0, completed_attempts=0,
+                        passed_attempts=0, perfect_attempts=0, percentage_sum=0.0, time_taken_sum=0,
+                        timed_attempts=0
+                    )
+                    db.add(summary)
+                summary.attempts += group.attempts
+                summary.completed_attempts += group.completed
+                summary.passed_attempts += group.passed
+                summary.perfect_attempts += group.perfect
+                summary.percentage_sum += group.percentage_sum or 0.0
+                summary.time_taken_sum += group.time_taken_sum or 0
+                summary.timed_attempts = (summary.timed_attempts or 0) + group.timed
+                if group.best is not None:
+                    summary.best_percentage = max(summary.best_percentage or 0.0, group.best)
+                summary.first_started_at = min(filter(None, (summary.first_started_at, group.first_started_at)))
+                summary.last_started_at = max(filter(None, (summary.last_started_at, group.last_started_at)))
+            db.flush()
+
+        conn = db.connection()
+        if conn.dialect.name == "postgresql" and is_partitioned(conn) and _partition_exists(conn, month):
+            removed = conn.execute(text(f"SELECT COUNT(*) FROM {_partition_name(month)}")).scalar()
+            conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {_partition_name(month)}"))
+            conn.execute(text(f"DROP TABLE {_partition_name(month)}"))
+        else:
+            removed = conn.execute(
+                QuizAttempt.__table__.delete()
+                .where(QuizAttempt.started_at >= month, QuizAttempt.started_at < add_months(month, 1))
+            ).rowcount
+    return removed
+
+
+def archive(engine: Engine, retention_months: int, export_dir: str, export_format: str,
+            batch_size: int, dry_run: bool) -> Dict[str, int]:
+    archived = {}
+    for month, rows in archive_months(engine, retention_months):
+        if dry_run:
+            print(f"   {month_label(month)}: {rows} attempts would be archived")
+            continue
+        started = time.time()
+        path = export_month(engine, month, export_dir, export_format, batch_size)
+        removed = summarize_and_remove(engine, month, batch_size)
+        archived[month_label(month)] = removed
+        print(f"   ✅ {month_label(month)}: {removed} attempts -> {path} ({time.time() - started:.1f}s)")
+    if not archived and not dry_run:
+        print(f"   Nothing older than {retention_months} months to archive")
+    return archived
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition, roll over and archive quiz_attempts")
+    parser.add_argument("--database-url", default=DATABASE_URL, help="Database to maintain (defaults to DATABASE_URL)")
+    parser.add_argument("--partition", action="store_true",
+                        help="Convert quiz_attempts to monthly partitions (PostgreSQL, one-off)")
+    parser.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD, help="Future monthly partitions to keep ready")
+    parser.add_argument("--retention-months", type=int, default=RETENTION_MONTHS,
+                        help="Months of raw attempts kept in quiz_attempts")
+    parser.add_argument("--export-dir", default=EXPORT_DIR, help="Directory for archived attempt files")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default=EXPORT_FORMAT,
+                        help="Export format (gzip JSON lines or zstd Parquet, which needs pyarrow)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per export batch and summary upsert")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the months that would be archived")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and not PARQUET_AVAILABLE:
+        sys.exit("❌ Parquet export needs pyarrow (pip install pyarrow), or use --format jsonl")
+
+    engine = create_engine(args.database_url)
+    dialect = engine.dialect.name
+    print(f"🗄️  Quiz attempt archival ({dialect})")
+    print("=" * 60)
+
+    if dialect == "postgresql":
+        if args.partition and not args.dry_run:
+            partition_table(engine, args.months_ahead)
+        if not args.dry_run:
+            rollover(engine, args.months_ahead)
+    elif args.partition:
+        print(f"   ⚠️ Partitioning needs PostgreSQL; {dialect} archives by range delete")
+
+    archive(engine, args.retention_months, args.export_dir, args.format, args.batch_size, args.dry_run)
+    print("\n🎉 Quiz attempt archival finished")
+
+
+if __name__ == "__main__":
+    main()
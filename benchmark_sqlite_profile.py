@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+SQLite Profile Benchmark
+Compares concurrent read/write throughput of the default SQLite setup (one
+StaticPool connection shared by every thread) with SQLITE_PROFILE=tuned
+(WAL, pooled connections, single-writer queue).
+
+For each profile a database file is populated with users, concepts and
+progress rows, then reader and writer threads run for --seconds:
+
+- readers: per-user progress lookups joined to concepts (dashboard reads)
+- writers: progress updates plus a new quiz attempt per transaction
+  (progress tracking and quiz submission writes)
+
+Operations per second, latency percentiles and errors (locked database,
+shared-connection misuse) are reported per operation type; a profile whose
+process crashes is reported as failed. Each profile runs in its own process
+because the profile is read from the environment at import time.
+
+Usage:
+    python benchmark_sqlite_profile.py
+    python benchmark_sqlite_profile.py --readers 16 --writers 4 --seconds 20
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = ("default", "tuned")
+
+
+def populate(users: int, concepts: int, progress_per_user: int, seed: int) -> dict:
+    from config.database import SessionLocal, init_db
+    from database.models import Concept, Quiz, User, UserConceptProgress
+
+    init_db()
+    rng = random.Random(seed)
+    db = SessionLocal()
+    try:
+        user_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(users)]
+        concept_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(concepts)]
+        quiz_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(concepts)]
+        db.add_all(User(user_id=user_id, username=f"user{i}", email=f"user{i}@example.com", password_hash="x")
+                   for i, user_id in enumerate(user_ids))
+        db.add_all(Concept(concept_id=concept_id, name=f"concept_{i}", display_name=f"Concept {i}",
+                           description="benchmark", category="benchmark", domain="benchmark",
+                           difficulty_level="beginner")
+                   for i, concept_id in enumerate(concept_ids))
+        db.flush()
+        db.add_all(Quiz(quiz_id=quiz_id, title=f"Quiz {i}", concept_id=concept_ids[i],
+                        quiz_type="multiple_choice", difficulty_level="beginner", questions=[])
+                   for i, quiz_id in enumerate(quiz_ids))
+        pairs = []
+        for user_id in user_ids:
+            for concept_index in rng.sample(range(concepts), min(progress_per_user, concepts)):
+                pairs.append((user_id, concept_index))
+                db.add(UserConceptProgress(user_id=user_id, concept_id=concept_ids[concept_index],
+                                           status="in_progress", progress_percent=0, time_spent_minutes=0))
+        db.commit()
+    finally:
+        db.close()
+    return {"user_ids": user_ids, "concept_ids": concept_ids, "quiz_ids": quiz_ids, "pairs": pairs}
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_load(data: dict, readers: int, writers: int, seconds: float, seed: int) -> Dict[str, dict]:
+    from sqlalchemy import select, update
+    from config.database import SessionLocal
+    from database.models import Concept, QuizAttempt, UserConceptProgress
+
+    stop = threading.Event()
+    results = {"read": {"latencies": [], "errors": {}}, "write": {"latencies": [], "errors": {}}}
+    results_lock = threading.Lock()
+
+    def read(db, rng):
+        user_id = rng.choice(data["user_ids"])
+        db.execute(
+            select(Concept.name, UserConceptProgress.status, UserConceptProgress.progress_percent)
+            .join(Concept, Concept.concept_id == UserConceptProgress.concept_id)
+            .where(UserConceptProgress.user_id == user_id)
+        ).all()
+        db.rollback()
+
+    def write(db, rng):
+        user_id, concept_index = rng.choice(data["pairs"])
+        db.execute(
+            update(UserConceptProgress)
+            .where(UserConceptProgress.user_id == user_id,
+                   UserConceptProgress.concept_id == data["concept_ids"][concept_index])
+            .values(progress_percent=rng.randint(0, 100),
+                    time_spent_minutes=UserConceptProgress.time_spent_minutes + 1,
+                    last_accessed=datetime.utcnow())
+        )
+        db.add(QuizAttempt(quiz_id=data["quiz_ids"][concept_index], user_id=user_id, attempt_number=1,
+                           status="completed", percentage=rng.random()))
+        db.commit()
+
+    def worker(kind: str, operation, worker_seed: int):
+        rng = random.Random(worker_seed)
+        latencies, errors = [], {}
+        db = SessionLocal()
+        try:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    operation(db, rng)
+                    latencies.append(time.perf_counter() - started)
+                except Exception as e:
+                    name = type(e).__name__
+                    errors[name] = errors.get(name, 0) + 1
+                    try:
+                        db.rollback()
+                    except Exception:
+                        db.close()
+                        db = SessionLocal()
+        finally:
+            db.close()
+        with results_lock:
+            results[kind]["latencies"].extend(latencies)
+            for name, count in errors.items():
+                results[kind]["errors"][name] = results[kind]["errors"].get(name, 0) + count
+
+    threads = [threading.Thread(target=worker, args=("read", read, seed + i)) for i in range(readers)]
+    threads += [threading.Thread(target=worker, args=("write", write, seed + 1000 + i)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    report = {}
+    for kind, result in results.items():
+        latencies = result["latencies"]
+        report[kind] = {
+            "operations": len(latencies),
+            "per_second": round(len(latencies) / seconds, 1),
+            "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+            "errors": result["errors"],
+        }
+    return report
+
+
+def run_profile(args) -> dict:
+    """Populate and load one profile (runs in a child process)"""
+    from config.database import SQLITE_TUNED
+    from config.sqlite_profile import writer_queue
+
+    data = populate(args.users, args.concepts, args.progress_per_user, args.seed)
+    return {
+        "tuned": SQLITE_TUNED,
+        "load": run_load(data, args.readers, args.writers, args.seconds, args.seed),
+        "writer_queue": writer_queue.status(),
+    }
+
+
+def print_report(results: Dict[str, dict]):
+    print("\n⏱️  CONCURRENT THROUGHPUT")
+    print("=" * 78)
+    print(f"   {'profile':<9} {'op':<6} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  errors")
+    for profile, result in results.items():
+        if "failed" in result:
+            print(f"   {profile:<9} failed: {result['failed'][:60]}")
+            continue
+        for kind, load in result["load"].items():
+            errors = ", ".join(f"{name}={count}" for name, count in load["errors"].items()) or "-"
+            print(f"   {profile:<9} {kind:<6} {load['per_second']:>9.1f} {load['p50_ms']:>8.2f} "
+                  f"{load['p95_ms']:>8.2f} {load['p99_ms']:>8.2f}  {errors}")
+    queue = results.get("tuned", {}).get("writer_queue")
+    if queue and queue["enabled"]:
+        print(f"\n   Writer queue: {queue['acquisitions']} writes, {queue['waits']} queued "
+              f"(average wait {queue['average_wait_ms']}ms), {queue['timeouts']} timeouts")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent SQLite throughput per SQLITE_PROFILE")
+    parser.add_argument("--users", type=int, default=500, help="Users to create")
+    parser.add_argument("--concepts", type=int, default=200, help="Concepts (and quizzes) to create")
+    parser.add_argument("--progress-per-user", type=int, default=20, help="user_concept_progress rows per user")
+    parser.add_argument("--readers", type=int, default=8, help="Reader threads")
+    parser.add_argument("--writers", type=int, default=2, help="Writer threads")
+    parser.add_argument("--seconds", type=float, default=10, help="Load duration per profile")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for generated data and load")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    parser.add_argument("--run-profile", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_profile:
+        print(json.dumps(run_profile(args)))
+        return
+
+    print("🗃️  SQLite profile benchmark")
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for profile in PROFILES:
+            print(f"   ▶️  {profile} profile ({args.readers} readers, {args.writers} writers, {args.seconds}s)...")
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--run-profile"],
+                env={**os.environ, "SQLITE_PROFILE": profile, "DEBUG": "false", "QUERY_INSPECTOR_ENABLED": "false",
+                     "DATABASE_URL": f"sqlite:///{os.path.join(workdir, f'{profile}.db')}"},
+                capture_output=True, text=True
+            )
+            if child.returncode == 0:
+                results[profile] = json.loads(child.stdout.strip().splitlines()[-1])
+            else:
+                # Concurrent transactions on the shared default connection can
+                # crash the sqlite3 module outright
+                failure = (child.stderr.strip().splitlines() or [f"exit code {child.returncode}"])[-1]
+                results[profile] = {"failed": failure}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
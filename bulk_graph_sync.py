@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Bulk Graph Sync
+Streams concepts, concept relationships and learning paths from SQL into Neo4j
+with parameterized UNWIND batches written over parallel sessions.
+
+Full mode rewrites everything; incremental mode only sends rows whose
+updated_at is newer than the watermark left by the previous run (stored on a
+:SyncState node in the graph, so it always describes the graph being synced).
+Writes are idempotent MERGEs, so overlapping or repeated runs are harmless.
+
+Day-to-day changes reach Neo4j through the graph outbox; this command is for
+initial loads, rebuilds and catching up after the outbox was disabled.
+
+Usage:
+    # Rebuild the graph from scratch
+    python bulk_graph_sync.py --mode full --reset
+
+    # Only rows changed since the last run
+    python bulk_graph_sync.py --mode incremental --batch-size 5000 --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from neo4j.exceptions import TransientError
+from sqlalchemy import select
+
+from config.database import SessionLocal, get_neo4j_driver
+from database.models import Concept, LearningPath, LearningPathConcept, concept_relations
+from services.graph_outbox import apply_graph_statements, normalize_relationship_type
+
+PHASES = ("concepts", "relations", "paths")
+SYNC_STATE_NAME = "bulk_graph_sync"
+MAX_TRANSIENT_RETRIES = 5
+
+CONSTRAINTS = [
+    "CREATE CONSTRAINT concept_id_unique IF NOT EXISTS FOR (c:Concept) REQUIRE c.concept_id IS UNIQUE",
+    "CREATE CONSTRAINT path_id_unique IF NOT EXISTS FOR (p:LearningPath) REQUIRE p.path_id IS UNIQUE",
+]
+
+CONCEPT_NODES_CYPHER = """
+UNWIND $rows AS row
+MERGE (c:Concept {concept_id: row.concept_id})
+ON CREATE SET c.created_at = datetime()
+SET c.name = row.name,
+    c.display_name = row.display_name,
+    c.description = row.description,
+    c.domain = row.domain,
+    c.category = row.category,
+    c.difficulty_level = row.difficulty_level,
+    c.updated_at = datetime()
+"""
+
+RELATIONSHIPS_CYPHER = """
+UNWIND $rows AS row
+MATCH (source:Concept {{concept_id: row.source_id}})
+MATCH (target:Concept {{concept_id: row.target_id}})
+MERGE (source)-[r:{rel_type}]->(target)
+SET r.strength = row.strength
+"""
+
+# Path edges are replaced wholesale so concepts removed from a path disappear
+PATH_NODES_CYPHER = """
+UNWIND $rows AS row
+MERGE (lp:LearningPath {path_id: row.path_id})
+SET lp.title = row.title,
+    lp.difficulty = row.difficulty,
+    lp.category = row.category,
+    lp.estimated_hours = row.estimated_hours,
+    lp.updated_at = datetime()
+WITH lp
+OPTIONAL MATCH (lp)-[old:CONTAINS]->(:Concept)
+DELETE old
+"""
+
+PATH_CONTAINS_CYPHER = """
+UNWIND $rows AS row
+MATCH (lp:LearningPath {path_id: row.path_id})
+MATCH (c:Concept {concept_id: row.concept_id})
+MERGE (lp)-[r:CONTAINS]->(c)
+SET r.sequence_order = row.sequence_order
+"""
+
+PATH_NEXT_DELETE_CYPHER = """
+UNWIND $rows AS row
+MATCH (:Concept)-[n:NEXT_IN_PATH {path_id: row.path_id}]->(:Concept)
+DELETE n
+"""
+
+PATH_NEXT_CYPHER = """
+UNWIND $rows AS row
+MATCH (a:Concept {concept_id: row.source_id})
+MATCH (b:Concept {concept_id: row.target_id})
+MERGE (a)-[n:NEXT_IN_PATH {path_id: row.path_id}]->(b)
+SET n.path_name = row.path_name
+"""
+
+
+# =============================================================================
+# SQL STREAMING
+# =============================================================================
+
+def stream_rows(db, statement, batch_size: int) -> Iterator[List[dict]]:
+    """Yield result rows as lists of dicts, batch_size at a time (server-side cursor where supported)"""
+    result = db.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.mappings().partitions(batch_size):
+        yield [dict(row) for row in partition]
+
+
+def changed_since(column, since: Optional[datetime]):
+    return column > since if since is not None else True
+
+
+# =============================================================================
+# PARALLEL WRITER
+# =============================================================================
+
+class BatchWriter:
+    """Runs UNWIND batches on a pool of Neo4j sessions with bounded in-flight work"""
+
+    def __init__(self, driver, workers: int):
+        self.driver = driver
+        self.workers = max(1, workers)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        self.pending = set()
+
+    def _write(self, statements: List[tuple]) -> int:
+        for attempt in range(1, MAX_TRANSIENT_RETRIES + 1):
+            try:
+                apply_graph_statements(self.driver, statements)
+                return sum(len(rows) for _, rows in statements)
+            except TransientError:
+                # Parallel MERGEs on shared nodes can deadlock; back off and retry the batch
+                if attempt == MAX_TRANSIENT_RETRIES:
+                    raise
+                time.sleep(0.1 * 2 ** attempt)
+
+    def submit(self, statements: List[tuple]):
+        """Queue one transaction's worth of statements, blocking while the pool is saturated"""
+        while len(self.pending) >= self.workers * 2:
+            done, self.pending = wait(self.pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+        self.pending.add(self.pool.submit(self._write, statements))
+
+    def drain(self):
+        """Wait for every queued batch, re-raising the first failure"""
+        pending, self.pending = self.pending, set()
+        for future in wait(pending).done:
+            future.result()
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+class PhaseStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.batches = 0
+        self.skipped = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+
+    @property
+    def rate(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+# =============================================================================
+# PHASES
+# =============================================================================
+
+def sync_concepts(db, writer: BatchWriter, batch_size: int, since: Optional[datetime]) -> PhaseStats:
+    stats = PhaseStats("concepts")
+    statement = select(
+        Concept.concept_id, Concept.name, Concept.display_name, Concept.description,
+        Concept.domain, Concept.category, Concept.difficulty_level
+    ).where(changed_since(Concept.updated_at, since)).order_by(Concept.concept_id)
+
+    for rows in stream_rows(db, statement, batch_size):
+        writer.submit([(CONCEPT_NODES_CYPHER, rows)])
+        stats.rows += len(rows)
+        stats.batches += 1
+    writer.drain()
+    stats.finish()
+    return stats
+
+
+def sync_relations(db, writer: BatchWriter, batch_size: int, since: Optional[datetime]) -> PhaseStats:
+    stats = PhaseStats("relations")
+    statement = select(
+        concept_relations.c.concept_id.label("source_id"),
+        concept_relations.c.related_concept_id.label("target_id"),
+        concept_relations.c.relationship_type,
+        concept_relations.c.strength
+    ).where(changed_since(concept_relations.c.updated_at, since))
+
+    for rows in stream_rows(db, statement, batch_size):
+        # Relationship types are inlined into the Cypher, so each type is its own statement
+        by_type: Dict[str, list] = OrderedDict()
+        for row in rows:
+            try:
+                rel_type = normalize_relationship_type(row.pop("relationship_type"))
+            except ValueError:
+                stats.skipped += 1
+                continue
+            row["strength"] = row["strength"] if row["strength"] is not None else 1.0
+            by_type.setdefault(rel_type, []).append(row)
+
+        for rel_type, typed_rows in by_type.items():
+            writer.submit([(RELATIONSHIPS_CYPHER.format(rel_type=rel_type), typed_rows)])
+            stats.rows += len(typed_rows)
+            stats.batches += 1
+    writer.drain()
+    stats.finish()
+    return stats
+
+
+def sync_paths(db, writer: BatchWriter, batch_size: int, since: Optional[datetime]) -> PhaseStats:
+    stats = PhaseStats("paths")
+    statement = select(
+        LearningPath.path_id, LearningPath.name, LearningPath.difficulty_level,
+        LearningPath.category, LearningPath.estimated_duration
+    ).where(changed_since(LearningPath.updated_at, since)).order_by(LearningPath.path_id)
+
+    # Paths are usually few with many members; chunk by path so each transaction stays bounded
+    path_chunk = max(1, batch_size // 50)
+    for paths in stream_rows(db, statement, path_chunk):
+        path_rows = [{
+            "path_id": p["path_id"],
+            "title": p["name"],
+            "difficulty": p["difficulty_level"],
+            "category": p["category"],
+            "estimated_hours": p["estimated_duration"]
+        } for p in paths]
+        names = {p["path_id"]: p["name"] for p in paths}
+
+        members = db.execute(
+            select(LearningPathConcept.path_id, LearningPathConcept.concept_id, LearningPathConcept.sequence_order)
+            .where(LearningPathConcept.path_id.in_(list(names)))
+            .order_by(LearningPathConcept.path_id, LearningPathConcept.sequence_order)
+        ).all()
+
+        contains_rows = [
+            {"path_id": m.path_id, "concept_id": m.concept_id, "sequence_order": m.sequence_order}
+            for m in members
+        ]
+        next_rows = [
+            {"path_id": a.path_id, "path_name": names[a.path_id], "source_id": a.concept_id, "target_id": b.concept_id}
+            for a, b in zip(members, members[1:]) if a.path_id == b.path_id
+        ]
+
+        writer.submit([
+            (PATH_NODES_CYPHER, path_rows),
+            (PATH_CONTAINS_CYPHER, contains_rows),
+            (PATH_NEXT_DELETE_CYPHER, path_rows),
+            (PATH_NEXT_CYPHER, next_rows),
+        ])
+        stats.rows += len(path_rows) + len(contains_rows) + len(next_rows)
+        stats.batches += 1
+    writer.drain()
+    stats.finish()
+    return stats
+
+
+# =============================================================================
+# GRAPH HOUSEKEEPING
+# =============================================================================
+
+def create_constraints(driver):
+    with driver.session() as session:
+        for constraint in CONSTRAINTS:
+            session.run(constraint).consume()
+
+
+def clear_graph(driver, batch_size: int):
+    """Delete every node in batches so large graphs don't exhaust transaction memory"""
+    deleted = 0
+    with driver.session() as session:
+        while True:
+            count = session.run(
+                "MATCH (n) WITH n LIMIT $limit DETACH DELETE n RETURN count(*) AS deleted",
+                limit=batch_size
+            ).single()["deleted"]
+            deleted += count
+            if count == 0:
+                return deleted
+
+
+def read_watermark(driver) -> Optional[datetime]:
+    with driver.session() as session:
+        record = session.run(
+            "MATCH (s:SyncState {name: $name}) RETURN s.watermark AS watermark", name=SYNC_STATE_NAME
+        ).single()
+    if record and record["watermark"]:
+        return datetime.fromisoformat(record["watermark"])
+    return None
+
+
+def write_watermark(driver, watermark: datetime, mode: str):
+    with driver.session() as session:
+        session.run(
+            """
+            MERGE (s:SyncState {name: $name})
+            SET s.watermark = $watermark, s.mode = $mode, s.completed_at = datetime()
+            """,
+            name=SYNC_STATE_NAME, watermark=watermark.isoformat(), mode=mode
+        ).consume()
+
+
+# =============================================================================
+# DRIVER
+# =============================================================================
+
+def run_bulk_sync(
+    mode: str = "full",
+    batch_size: int = 5000,
+    workers: int = 4,
+    reset: bool = False,
+    phases=PHASES,
+    since: Optional[datetime] = None,
+    overlap_seconds: float = 60,
+    driver=None
+) -> List[PhaseStats]:
+    """
+    Sync SQL into Neo4j.
+
+    Args:
+        mode: "full" sends every row; "incremental" only rows updated after the watermark
+        reset: Delete the whole graph first (full mode only)
+        since: Explicit watermark overriding the stored one (incremental mode)
+        overlap_seconds: Re-send rows this close to the watermark, covering
+            transactions that committed after the previous run read its rows
+
+    Returns:
+        Per-phase statistics
+    """
+    driver = driver or get_neo4j_driver()
+    # Taken before reading so rows committed during the run are picked up next time
+    started_at = datetime.utcnow()
+
+    print(f"🔄 Bulk graph sync ({mode}, batch size {batch_size}, {workers} parallel sessions)")
+    create_constraints(driver)
+
+    if mode == "incremental":
+        since = since or read_watermark(driver)
+        if since is None:
+            print("   ℹ️  No previous watermark found, syncing everything")
+        else:
+            since = since - timedelta(seconds=overlap_seconds)
+            print(f"   🕒 Rows updated after {since.isoformat()}")
+    else:
+        since = None
+        if reset:
+            print(f"   🧹 Cleared {clear_graph(driver, batch_size)} existing nodes")
+
+    sync_functions = {"concepts": sync_concepts, "relations": sync_relations, "paths": sync_paths}
+    results = []
+    db = SessionLocal()
+    writer = BatchWriter(driver, workers)
+    try:
+        # Nodes before edges so relationship MATCHes find their endpoints
+        for phase in PHASES:
+            if phase not in phases:
+                continue
+            stats = sync_functions[phase](db, writer, batch_size, since)
+            results.append(stats)
+            skipped = f", {stats.skipped} skipped" if stats.skipped else ""
+            print(f"   ✅ {phase:<10} {stats.rows:>9} rows in {stats.batches} batches, "
+                  f"{stats.seconds:.2f}s ({stats.rate:,.0f} rows/s){skipped}")
+    finally:
+        writer.close()
+        db.close()
+
+    write_watermark(driver, started_at, mode)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk sync concepts, relationships and learning paths from SQL to Neo4j")
+    parser.add_argument("--mode", choices=("full", "incremental"), default="full")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per UNWIND batch")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel Neo4j sessions")
+    parser.add_argument("--reset", action="store_true", help="Delete the whole graph before a full sync")
+    parser.add_argument("--phases", default=",".join(PHASES), help=f"Comma-separated subset of {', '.join(PHASES)}")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Override the stored watermark (ISO timestamp)")
+    parser.add_argument("--overlap-seconds", type=float, default=60)
+    args = parser.parse_args()
+
+    phases = [p.strip() for p in args.phases.split(",") if p.strip()]
+    unknown = set(phases) - set(PHASES)
+    if unknown:
+        parser.error(f"Unknown phases: {', '.join(sorted(unknown))}")
+
+    started = time.perf_counter()
+    results = run_bulk_sync(
+        mode=args.mode,
+        batch_size=max(1, args.batch_size),
+        workers=args.workers,
+        reset=args.reset,
+        phases=phases,
+        since=args.since,
+        overlap_seconds=args.overlap_seconds
+    )
+    elapsed = time.perf_counter() - started
+    total = sum(stats.rows for stats in results)
+
+    print("\n📊 BULK GRAPH SYNC RESULTS")
+    print("=" * 60)
+    print(f"   Rows written: {total}")
+    print(f"   Elapsed:      {elapsed:.2f}s")
+    print(f"   Throughput:   {total / elapsed if elapsed else 0:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
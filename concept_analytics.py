@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Concept Analytics
+Precomputes the concept analytics fields from the relationship graph and the
+learner history, so catalog ranking reads stored values instead of doing any
+work per request.
+
+The graph and per-concept aggregates of UserConceptProgress, QuizAttempt and
+archived QuizAttemptSummary rows (grouped in SQL, one row per concept) are loaded into NumPy arrays, then:
+
+- usage_frequency (0-100): PageRank over concept relationships, with edges
+  pointing from a concept to what it builds on and the teleport vector
+  weighted by learner activity. Foundational concepts that popular concepts
+  depend on rank highest.
+- complexity_score (0-10): prerequisite depth (longest prerequisite chain)
+  blended with empirical difficulty.
+- Empirical difficulty: quiz failure rate shrunk toward a prior. The prior
+  comes from the declared difficulty_level and is propagated from each
+  concept's prerequisites, so concepts with little history inherit the
+  difficulty of what they depend on.
+- cognitive_load (0-10), success_rate, engagement_score and
+  average_completion_time come from observed time on task, pass rate and
+  progress. They are only overwritten for concepts that have history.
+
+Scores are written back with executemany UPDATEs in batches. updated_at is
+left untouched so incremental graph syncs do not pick up every concept.
+
+Usage:
+    python concept_analytics.py
+    python concept_analytics.py --dry-run --top 20
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import Float, Integer, bindparam, case, func, select, update
+from sqlalchemy.orm import Session
+
+from config.database import SessionLocal
+from database.models import Concept, Quiz, QuizAttempt, QuizAttemptSummary, UserConceptProgress, concept_relations
+
+PREREQUISITE = "PREREQUISITE"
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-9
+PAGERANK_MAX_ITERATIONS = 100
+
+# Expected failure rate for a declared difficulty level, before any attempts
+LEVEL_DIFFICULTY = {"beginner": 0.25, "intermediate": 0.5, "advanced": 0.7, "expert": 0.85}
+DEFAULT_LEVEL_DIFFICULTY = 0.5
+# Share of a concept's prior taken from its prerequisites' difficulty
+PREREQUISITE_PRIOR_WEIGHT = 0.5
+# Pseudo-attempts backing the prior; observed attempts outweigh it as they accumulate
+PRIOR_ATTEMPTS = 10.0
+# Weight of prerequisite depth vs empirical difficulty in complexity_score
+DEPTH_WEIGHT = 0.5
+
+
+class ConceptArrays:
+    """Concept graph and learner history as dense per-concept arrays"""
+
+    def __init__(self, db: Session):
+        rows = db.execute(select(Concept.concept_id, Concept.name, Concept.difficulty_level)).all()
+        self.ids = [row.concept_id for row in rows]
+        self.names = [row.name for row in rows]
+        self.index: Dict[str, int] = {concept_id: i for i, concept_id in enumerate(self.ids)}
+        n = len(self.ids)
+
+        self.level_difficulty = np.array(
+            [LEVEL_DIFFICULTY.get((row.difficulty_level or "").lower(), DEFAULT_LEVEL_DIFFICULTY) for row in rows]
+        )
+
+        # Edges point from a concept to the concept it builds on / relates to
+        sources, targets, weights, prerequisite = [], [], [], []
+        for row in db.execute(select(
+            concept_relations.c.concept_id,
+            concept_relations.c.related_concept_id,
+            concept_relations.c.relationship_type,
+            concept_relations.c.strength
+        )):
+            source, target = self.index.get(row.concept_id), self.index.get(row.related_concept_id)
+            if source is None or target is None or source == target:
+                continue
+            sources.append(source)
+            targets.append(target)
+            weights.append(row.strength if row.strength and row.strength > 0 else 1.0)
+            prerequisite.append((row.relationship_type or "").upper() == PREREQUISITE)
+        self.edge_source = np.array(sources, dtype=np.int64)
+        self.edge_target = np.array(targets, dtype=np.int64)
+        self.edge_weight = np.array(weights, dtype=np.float64)
+        self.edge_prerequisite = np.array(prerequisite, dtype=bool)
+
+        # Quiz history (completed attempts only)
+        self.attempts = np.zeros(n)
+        self.score_sum = np.zeros(n)
+        self.passed = np.zeros(n)
+        for row in db.execute(
+            select(
+                Quiz.concept_id,
+                func.count(QuizAttempt.attempt_id).label("attempts"),
+                func.coalesce(func.sum(QuizAttempt.percentage), 0.0).label("score_sum"),
+                func.sum(case((QuizAttempt.passed.is_(True), 1), else_=0)).label("passed")
+            )
+            .join(Quiz, Quiz.quiz_id == QuizAttempt.quiz_id)
+            .where(QuizAttempt.status == "completed")
+            .group_by(Quiz.concept_id)
+        ):
+            i = self.index.get(row.concept_id)
+            if i is not None:
+                self.attempts[i], self.score_sum[i], self.passed[i] = row.attempts, row.score_sum, row.passed or 0
+
+        # Attempts archived by archive_quiz_attempts.py
+        for row in db.execute(
+            select(
+                Quiz.concept_id,
+                func.sum(QuizAttemptSummary.completed_attempts).label("attempts"),
+                func.sum(QuizAttemptSummary.percentage_sum).label("score_sum"),
+                func.sum(QuizAttemptSummary.passed_attempts).label("passed")
+            )
+            .join(Quiz, Quiz.quiz_id == QuizAttemptSummary.quiz_id)
+            .group_by(Quiz.concept_id)
+        ):
+            i = self.index.get(row.concept_id)
+            if i is not None:
+                self.attempts[i] += row.attempts or 0
+                self.score_sum[i] += row.score_sum or 0.0
+                self.passed[i] += row.passed or 0
+
+        # Progress history
+        self.learners = np.zeros(n)
+        self.progress_sum = np.zeros(n)
+        self.minutes_sum = np.zeros(n)
+        self.completed = np.zeros(n)
+        self.completed_minutes_sum = np.zeros(n)
+        is_completed = UserConceptProgress.status == "completed"
+        for row in db.execute(
+            select(
+                UserConceptProgress.concept_id,
+                func.count(UserConceptProgress.id).label("learners"),
+                func.coalesce(func.sum(UserConceptProgress.progress_percent), 0).label("progress_sum"),
+                func.coalesce(func.sum(UserConceptProgress.time_spent_minutes), 0).label("minutes_sum"),
+                func.sum(case((is_completed, 1), else_=0)).label("completed"),
+                func.sum(case((is_completed, UserConceptProgress.time_spent_minutes), else_=0)).label("completed_minutes")
+            ).group_by(UserConceptProgress.concept_id)
+        ):
+            i = self.index.get(row.concept_id)
+            if i is not None:
+                self.learners[i] = row.learners
+                self.progress_sum[i] = row.progress_sum
+                self.minutes_sum[i] = row.minutes_sum
+                self.completed[i] = row.completed or 0
+                self.completed_minutes_sum[i] = row.completed_minutes or 0
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+
+def pagerank(data: ConceptArrays) -> np.ndarray:
+    """Weighted PageRank with an activity-weighted teleport vector"""
+    n = data.size
+    teleport = 1.0 + data.learners + data.attempts
+    teleport /= teleport.sum()
+
+    out_weight = np.bincount(data.edge_source, weights=data.edge_weight, minlength=n)
+    dangling = out_weight == 0
+    edge_share = data.edge_weight / np.where(dangling, 1.0, out_weight)[data.edge_source]
+
+    rank = teleport.copy()
+    for _ in range(PAGERANK_MAX_ITERATIONS):
+        flow = np.bincount(data.edge_target, weights=rank[data.edge_source] * edge_share, minlength=n)
+        new_rank = PAGERANK_DAMPING * (flow + rank[dangling].sum() * teleport) + (1 - PAGERANK_DAMPING) * teleport
+        converged = np.abs(new_rank - rank).sum() < PAGERANK_TOLERANCE
+        rank = new_rank
+        if converged:
+            break
+    return rank
+
+
+def depth_and_difficulty(data: ConceptArrays):
+    """
+    Peel the prerequisite graph in topological layers (Kahn's algorithm, one
+    vectorized pass per layer) to get each concept's prerequisite depth, and
+    propagate difficulty priors from prerequisites to dependents on the way.
+
+    Concepts on a prerequisite cycle are released together once nothing else
+    can progress, with the fewest unmet prerequisites first.
+    """
+    n = data.size
+    source = data.edge_source[data.edge_prerequisite]
+    target = data.edge_target[data.edge_prerequisite]
+
+    failures = data.attempts - data.score_sum
+    unmet = np.bincount(source, minlength=n)
+    depth = np.zeros(n, dtype=np.int64)
+    difficulty = np.zeros(n)
+    done = np.zeros(n, dtype=bool)
+    frontier = unmet == 0
+    layer = 0
+
+    while not done.all():
+        if not frontier.any():
+            pending = np.flatnonzero(~done)
+            frontier = np.zeros(n, dtype=bool)
+            frontier[pending[unmet[pending] == unmet[pending].min()]] = True
+
+        # Prior: declared level blended with the mean difficulty of finished prerequisites
+        incoming = frontier[source] & done[target]
+        prereq_count = np.bincount(source[incoming], minlength=n)
+        prereq_sum = np.bincount(source[incoming], weights=difficulty[target[incoming]], minlength=n)
+        prior = data.level_difficulty.copy()
+        has_prereqs = frontier & (prereq_count > 0)
+        prior[has_prereqs] = (
+            (1 - PREREQUISITE_PRIOR_WEIGHT) * prior[has_prereqs]
+            + PREREQUISITE_PRIOR_WEIGHT * prereq_sum[has_prereqs] / prereq_count[has_prereqs]
+        )
+        difficulty[frontier] = (
+            (PRIOR_ATTEMPTS * prior[frontier] + failures[frontier])
+            / (PRIOR_ATTEMPTS + data.attempts[frontier])
+        )
+
+        depth[frontier] = layer
+        done |= frontier
+        released = frontier[target]
+        unmet -= np.bincount(source[released], minlength=n)
+        frontier = ~done & (unmet <= 0)
+        layer += 1
+
+    return depth, difficulty
+
+
+def compute_scores(data: ConceptArrays) -> dict:
+    """All analytics fields as arrays; NaN marks 'no history, keep the stored value'"""
+    rank = pagerank(data)
+    depth, difficulty = depth_and_difficulty(data)
+
+    max_depth = depth.max() if data.size else 0
+    depth_share = depth / max_depth if max_depth else np.zeros(data.size)
+    complexity = 10.0 * (DEPTH_WEIGHT * depth_share + (1 - DEPTH_WEIGHT) * difficulty)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        minutes_per_learner = np.where(data.learners > 0, data.minutes_sum / data.learners, np.nan)
+        observed = minutes_per_learner[~np.isnan(minutes_per_learner) & (minutes_per_learner > 0)]
+        reference = np.percentile(observed, 95) if observed.size else np.nan
+        cognitive_load = 10.0 * np.clip(minutes_per_learner / reference, 0.0, 1.0)
+
+        success_rate = np.where(data.attempts > 0, data.passed / data.attempts, np.nan)
+        engagement = np.where(data.learners > 0, data.progress_sum / (100.0 * data.learners), np.nan)
+        completion_time = np.where(data.completed > 0, np.round(data.completed_minutes_sum / data.completed), np.nan)
+
+    return {
+        "usage_frequency": 100.0 * rank / rank.max() if data.size else rank,
+        "complexity_score": complexity,
+        "cognitive_load": cognitive_load,
+        "success_rate": success_rate,
+        "engagement_score": engagement,
+        "average_completion_time": completion_time,
+        "depth": depth,
+        "difficulty": difficulty,
+    }
+
+
+def write_scores(db: Session, data: ConceptArrays, scores: dict, batch_size: int) -> int:
+    """Bulk UPDATE the analytics columns, keeping stored values where there is no history"""
+    table = Concept.__table__
+    statement = (
+        update(table)
+        .where(table.c.concept_id == bindparam("b_concept_id"))
+        .values(
+            usage_frequency=bindparam("b_usage_frequency", type_=Float),
+            complexity_score=bindparam("b_complexity_score", type_=Float),
+            cognitive_load=func.coalesce(bindparam("b_cognitive_load", type_=Float), table.c.cognitive_load),
+            success_rate=func.coalesce(bindparam("b_success_rate", type_=Float), table.c.success_rate),
+            engagement_score=func.coalesce(bindparam("b_engagement_score", type_=Float), table.c.engagement_score),
+            average_completion_time=func.coalesce(
+                bindparam("b_average_completion_time", type_=Integer), table.c.average_completion_time
+            ),
+            # Analytics are not content changes; keep the sync watermark column as is
+            updated_at=table.c.updated_at
+        )
+    )
+
+    def value(name: str, i: int, cast=float) -> Optional[float]:
+        v = scores[name][i]
+        return None if np.isnan(v) else cast(v)
+
+    written = 0
+    for start in range(0, data.size, batch_size):
+        rows = [
+            {
+                "b_concept_id": data.ids[i],
+                "b_usage_frequency": value("usage_frequency", i),
+                "b_complexity_score": value("complexity_score", i),
+                "b_cognitive_load": value("cognitive_load", i),
+                "b_success_rate": value("success_rate", i),
+                "b_engagement_score": value("engagement_score", i),
+                "b_average_completion_time": value("average_completion_time", i, int)
+            }
+            for i in range(start, min(start + batch_size, data.size))
+        ]
+        db.execute(statement, rows)
+        written += len(rows)
+    db.commit()
+    return written
+
+
+def run_concept_analytics(batch_size: int = 1000, dry_run: bool = False, db: Optional[Session] = None) -> dict:
+    """Load, score and (unless dry_run) write back analytics for every concept"""
+    owns_session = db is None
+    db = db or SessionLocal()
+    try:
+        started = time.perf_counter()
+        data = ConceptArrays(db)
+        loaded = time.perf_counter()
+        scores = compute_scores(data)
+        computed = time.perf_counter()
+        written = 0 if dry_run else write_scores(db, data, scores, max(1, batch_size))
+        finished = time.perf_counter()
+    finally:
+        if owns_session:
+            db.close()
+
+    return {
+        "data": data,
+        "scores": scores,
+        "concepts": data.size,
+        "edges": len(data.edge_source),
+        "written": written,
+        "load_seconds": loaded - started,
+        "compute_seconds": computed - loaded,
+        "write_seconds": finished - computed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute concept centrality, depth and difficulty scores")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Concepts per UPDATE batch")
+    parser.add_argument("--dry-run", action="store_true", help="Compute and print scores without writing them")
+    parser.add_argument("--top", type=int, default=10, help="Number of top-ranked concepts to print")
+    args = parser.parse_args()
+
+    print("🧮 Computing concept analytics...")
+    result = run_concept_analytics(batch_size=args.batch_size, dry_run=args.dry_run)
+    data, scores = result["data"], result["scores"]
+
+    print("\n📊 CONCEPT ANALYTICS RESULTS")
+    print("=" * 60)
+    print(f"   Concepts:     {result['concepts']}")
+    print(f"   Edges:        {result['edges']}")
+    print(f"   Load:         {result['load_seconds']:.2f}s")
+    print(f"   Compute:      {result['compute_seconds']:.2f}s")
+    print(f"   Write:        {result['write_seconds']:.2f}s ({result['written']} concepts updated)")
+
+    if data.size and args.top > 0:
+        print(f"\n🏆 Top {args.top} concepts by centrality")
+        for i in np.argsort(-scores["usage_frequency"], kind="stable")[:args.top]:
+            print(f"   {scores['usage_frequency'][i]:6.1f}  depth {scores['depth'][i]:<3} "
+                  f"difficulty {scores['difficulty'][i]:.2f}  {data.names[i]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,18 @@ Database configuration and connection management
 Supports PostgreSQL, SQLite, Redis, and Neo4j
 """
 
+import asyncio
 import os
-from typing import Generator, Optional, Union
-from sqlalchemy import create_engine, MetaData, String, Text
+import uuid
+from typing import Dict, Generator, Optional, Union
+from sqlalchemy import (
+    create_engine, MetaData, LargeBinary, String, JSON, Boolean, and_, exists, func, literal, text
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
+from sqlalchemy.types import TypeDecorator
 import redis
 import neo4j
 from dotenv import load_dotenv
@@ -33,11 +38,17 @@ REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1"))                # Seconds per Redis command
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "1"))              # Seconds to open a connection
 
 # Neo4j configuration
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "neo4j_secure_password_2024")
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "5"))    # Seconds to wait for a pooled connection
+NEO4J_CONNECTION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "5"))      # Seconds to open a new connection
+NEO4J_QUERY_TIMEOUT = float(os.getenv("NEO4J_QUERY_TIMEOUT", "3"))                # Per-query transaction timeout (seconds)
 
 # =============================================================================
 # HELPER FUNCTIONS
@@ -82,17 +93,128 @@ IS_SQLITE = "sqlite" in DATABASE_URL
 # =============================================================================
 
 def get_array_type():
-    """Get appropriate array type for current database"""
-    if IS_POSTGRES:
-        return ARRAY(String)
-    else:
-        # For SQLite, we'll use JSON and handle conversion in the model
-        return Text
+    """
+    Get appropriate array type for current database. Lists are stored as JSON
+    arrays everywhere (JSONB on PostgreSQL) so json_contains works on them.
+    """
+    return get_json_type()
 
 def get_json_type():
-    """Get JSON type for current database"""
-    from sqlalchemy import JSON
-    return JSON
+    """Get JSON type for current database: JSONB on PostgreSQL (GIN indexable)"""
+    return JSON().with_variant(JSONB(), "postgresql")
+
+
+def json_contains(column, *values):
+    """
+    Filter for JSON array columns holding every one of values.
+
+    PostgreSQL uses JSONB containment (@>), which the GIN indexes on the
+    searchable columns serve; SQLite checks the array with json_each.
+    """
+    if IS_POSTGRES:
+        return column.op("@>", return_type=Boolean)(literal(list(values), JSONB))
+    conditions = []
+    for value in values:
+        items = func.json_each(column).table_valued("value")
+        conditions.append(exists().select_from(items).where(items.c.value == value))
+    return and_(*conditions)
+
+
+# "text" keeps the VARCHAR(36) layout every existing database has; "binary"
+# (16 bytes) is only valid once the database has been converted with
+# migrate_uuid_keys.py, and init_db() refuses to start on a mismatch
+UUID_KEY_STORAGE = os.getenv("UUID_KEY_STORAGE", "text").lower()
+
+# Non-UUID strings (legacy or malformed ids) map to a stable name-based UUID,
+# so they compare consistently and can never match a real uuid4 key
+LEGACY_ID_NAMESPACE = uuid.UUID("6f1c1a8e-2b7d-4f0a-9a51-3c2e8d4b7a10")
+
+
+def uuid_key(value) -> Optional[uuid.UUID]:
+    """Parse a key value into a UUID (name-based UUID for non-UUID strings)"""
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    if isinstance(value, bytes) and len(value) == 16:
+        return uuid.UUID(bytes=value)
+    value = str(value)
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return uuid.uuid5(LEGACY_ID_NAMESPACE, value)
+
+
+class UUIDKey(TypeDecorator):
+    """
+    UUID primary/foreign key stored compactly: native uuid on PostgreSQL,
+    BLOB(16) elsewhere. Python code keeps reading and writing the canonical
+    36-character string form.
+    """
+
+    impl = String(36)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if UUID_KEY_STORAGE == "text":
+            return dialect.type_descriptor(String(36))
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(PG_UUID(as_uuid=True))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or UUID_KEY_STORAGE == "text":
+            return value
+        key = uuid_key(value)
+        return key if dialect.name == "postgresql" else key.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        if isinstance(value, (bytes, memoryview)) and len(value) == 16:
+            return str(uuid.UUID(bytes=bytes(value)))
+        return str(value)
+
+
+# Key columns sampled to tell how a database stores its UUID keys
+UUID_KEY_PROBES = [("users", "user_id"), ("concepts", "concept_id")]
+
+
+def detect_uuid_key_storage(connection) -> Optional[str]:
+    """
+    How an existing database stores UUID keys: "binary", "text", or None when
+    it cannot tell yet (no tables, or SQLite tables without rows).
+    """
+    from sqlalchemy import inspect
+
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    for table, column in UUID_KEY_PROBES:
+        if table not in tables:
+            continue
+        if connection.dialect.name == "postgresql":
+            types = {c["name"]: c["type"].__class__.__name__.upper() for c in inspector.get_columns(table)}
+            return "binary" if types.get(column) == "UUID" else "text"
+        if connection.dialect.name == "sqlite":
+            # Converted SQLite databases keep the VARCHAR declaration, so look at the values
+            stored = connection.execute(text(
+                f"SELECT typeof({column}) FROM {table} WHERE {column} IS NOT NULL LIMIT 1"
+            )).scalar()
+            if stored:
+                return "binary" if stored == "blob" else "text"
+    return None
+
+
+def check_uuid_key_storage(connection):
+    """Raise RuntimeError when UUID_KEY_STORAGE does not match the database"""
+    stored = detect_uuid_key_storage(connection)
+    if stored is None or stored == UUID_KEY_STORAGE:
+        return
+    if stored == "text":
+        hint = "convert it with `python migrate_uuid_keys.py` first, or set UUID_KEY_STORAGE=text"
+    else:
+        hint = "set UUID_KEY_STORAGE=binary"
+    raise RuntimeError(f"UUID_KEY_STORAGE={UUID_KEY_STORAGE} but the database stores {stored} UUID keys: {hint}")
 
 # =============================================================================
 # DATABASE SETUP
@@ -104,12 +226,35 @@ engine_kwargs = {
     "poolclass": StaticPool if "sqlite" in DATABASE_URL else None,
 }
 
+# SQLITE_PROFILE=tuned: WAL, pooled read connections and a single-writer queue
+from config import sqlite_profile
+SQLITE_TUNED = sqlite_profile.is_tuned(DATABASE_URL)
+if SQLITE_TUNED:
+    engine_kwargs.update(sqlite_profile.engine_options())
+
 # Create engine
 engine = create_engine(DATABASE_URL, **engine_kwargs)
+if SQLITE_TUNED:
+    sqlite_profile.install(engine)
+
+# Development-only EXPLAIN check that flags full table scans
+from config.query_inspector import QUERY_INSPECTOR_ENABLED, query_inspector
+if QUERY_INSPECTOR_ENABLED:
+    query_inspector.install(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replicas (DATABASE_REPLICA_URLS); without replicas reads use the primary
+from config.read_routing import DATABASE_REPLICA_URLS, ReadRouter, ReadSession, track_writes
+replica_engines = [
+    create_engine(url, echo=engine_kwargs["echo"], pool_pre_ping=True) for url in DATABASE_REPLICA_URLS
+]
+read_router = ReadRouter(engine, replica_engines)
+ReadSessionLocal = sessionmaker(class_=ReadSession, router=read_router, autocommit=False, autoflush=False)
+if read_router.enabled:
+    track_writes(SessionLocal, read_router)
+
 # Create base for declarative models
 Base = declarative_base()
 metadata = MetaData()
@@ -120,11 +265,23 @@ redis_pool = redis.ConnectionPool(
     port=REDIS_PORT,
     password=REDIS_PASSWORD if REDIS_PASSWORD else None,
     db=REDIS_DB,
-    decode_responses=True
+    decode_responses=True,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT
 )
 
-# Neo4j driver
+# Neo4j drivers (sync for scripts and worker threads, async for request handlers)
 neo4j_driver = None
+async_neo4j_drivers: Dict[asyncio.AbstractEventLoop, neo4j.AsyncDriver] = {}
+
+
+def _neo4j_driver_config() -> dict:
+    return {
+        "auth": (NEO4J_USER, NEO4J_PASSWORD),
+        "max_connection_pool_size": NEO4J_MAX_POOL_SIZE,
+        "connection_acquisition_timeout": NEO4J_ACQUISITION_TIMEOUT,
+        "connection_timeout": NEO4J_CONNECTION_TIMEOUT,
+    }
 
 # =============================================================================
 # CONNECTION FUNCTIONS
@@ -136,16 +293,35 @@ def get_redis_connection() -> redis.Redis:
 
 
 def get_neo4j_driver():
-    """Get Neo4j driver instance"""
+    """Get synchronous Neo4j driver instance (scripts and background threads only)"""
     global neo4j_driver
     if neo4j_driver is None:
-        neo4j_driver = neo4j.GraphDatabase.driver(
-            NEO4J_URI,
-            auth=(NEO4J_USER, NEO4J_PASSWORD)
-        )
+        neo4j_driver = neo4j.GraphDatabase.driver(NEO4J_URI, **_neo4j_driver_config())
     return neo4j_driver
 
 
+def get_async_neo4j_driver() -> neo4j.AsyncDriver:
+    """
+    Get the async Neo4j driver for use inside async handlers.
+
+    Async drivers are bound to the event loop they were created on, so there is
+    one driver per loop; close_async_neo4j_driver() closes them all.
+    """
+    loop = asyncio.get_running_loop()
+    driver = async_neo4j_drivers.get(loop)
+    if driver is None:
+        _discard_closed_loop_drivers()
+        driver = neo4j.AsyncGraphDatabase.driver(NEO4J_URI, **_neo4j_driver_config())
+        async_neo4j_drivers[loop] = driver
+    return driver
+
+
+def _discard_closed_loop_drivers():
+    """Forget drivers whose loop has closed; they can no longer be awaited"""
+    for loop in [loop for loop in async_neo4j_drivers if loop.is_closed()]:
+        async_neo4j_drivers.pop(loop)
+
+
 def create_db_session() -> Generator[Session, None, None]:
     """Create database session for dependency injection"""
     db = SessionLocal()
@@ -160,17 +336,91 @@ def get_db() -> Generator[Session, None, None]:
     yield from create_db_session()
 
 
+def get_read_db() -> Generator[Session, None, None]:
+    """
+    FastAPI dependency for read-only endpoints: a replica session, or the
+    primary right after the user's own write (see config/read_routing.py)
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+ALEMBIC_INI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
 def init_db():
-    """Initialize database tables"""
+    """
+    Initialize database tables.
+
+    A database already at the Alembic head is left alone: create_all would
+    reflect every table on each boot. A new, empty database is created from
+    the models and stamped at head; anything else gets the missing tables
+    created as before (run `alembic upgrade head` to bring it up to date).
+    """
+    from alembic.config import Config
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    from config.logging_config import get_logger
+    from sqlalchemy import inspect
+    import database.models  # noqa: F401  (registers every table on Base before stamping)
+
+    logger = get_logger(__name__)
+    try:
+        script = ScriptDirectory.from_config(Config(ALEMBIC_INI_PATH))
+        heads = set(script.get_heads())
+        with engine.connect() as connection:
+            current = set(MigrationContext.configure(connection).get_current_heads())
+            empty = not inspect(connection).get_table_names()
+    except Exception as e:
+        logger.warning(f"⚠️  Could not read the schema version, creating missing tables: {e}")
+        Base.metadata.create_all(bind=engine)
+        return
+
+    # Reading binary keys as text (or the reverse) would silently match nothing
+    with engine.connect() as connection:
+        check_uuid_key_storage(connection)
+
+    if current == heads:
+        logger.info(f"✅ Database schema at migration head {', '.join(heads)}, skipping create_all")
+        return
+    if current:
+        logger.warning(f"⚠️  Database schema at {', '.join(current)}, migration head is {', '.join(heads)}: "
+                       f"run `alembic upgrade head`")
+
     Base.metadata.create_all(bind=engine)
+    if empty:
+        with engine.begin() as connection:
+            MigrationContext.configure(connection).stamp(script, "heads")
+        logger.info(f"🆕 Created database schema from the models, stamped at {', '.join(heads)}")
 
 
 def close_db_connections():
     """Close all database connections"""
     engine.dispose()
+    for replica_engine in replica_engines:
+        replica_engine.dispose()
     if neo4j_driver:
         neo4j_driver.close()
 
+
+async def close_async_neo4j_driver():
+    """Close the async Neo4j drivers of this loop and of any other running loop"""
+    current = asyncio.get_running_loop()
+    _discard_closed_loop_drivers()
+    for loop, driver in list(async_neo4j_drivers.items()):
+        async_neo4j_drivers.pop(loop)
+        try:
+            if loop is current:
+                await driver.close()
+            else:
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(driver.close(), loop))
+        except Exception as e:
+            from config.logging_config import get_logger
+            get_logger(__name__).warning(f"⚠️  Could not close async Neo4j driver: {e}")
+
 # =============================================================================
 # HEALTH CHECK FUNCTIONS
 # =============================================================================
@@ -195,23 +445,32 @@ def check_redis_connection() -> bool:
         return False
 
 
-def check_neo4j_connection() -> bool:
+async def check_neo4j_connection() -> bool:
     """Check Neo4j connection"""
     try:
-        driver = get_neo4j_driver()
-        with driver.session() as session:
-            session.run("RETURN 1")
+        driver = get_async_neo4j_driver()
+        await asyncio.wait_for(
+            driver.verify_connectivity(),
+            timeout=NEO4J_ACQUISITION_TIMEOUT + NEO4J_QUERY_TIMEOUT
+        )
         return True
     except Exception:
         return False
 
 
-def check_all_connections() -> dict:
-    """Check all database connections"""
-    return {
+async def check_all_connections(include_neo4j: bool = True) -> dict:
+    """
+    Check all database connections.
+
+    Args:
+        include_neo4j: Also probe Neo4j (can take up to the acquisition + query timeout)
+    """
+    connections = {
         "postgres": check_postgres_connection(),
         "redis": check_redis_connection(),
-        "neo4j": check_neo4j_connection(),
         "sqlite": IS_SQLITE,
         "database_type": "postgresql" if IS_POSTGRES else "sqlite"
-    }
\ No newline at end of file
+    }
+    if include_neo4j:
+        connections["neo4j"] = await check_neo4j_connection()
+    return connections
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Query Plan Inspector (development only)
+Runs EXPLAIN for every SELECT the application issues and flags full table
+scans, so missing indexes show up while developing instead of in production.
+
+- SQLite: EXPLAIN QUERY PLAN; a "SCAN <table>" step without an index is a full scan
+- PostgreSQL: EXPLAIN (FORMAT JSON); a "Seq Scan" node estimated to read at
+  least QUERY_INSPECTOR_MIN_ROWS rows is a full scan (the planner rightly
+  scans tiny tables)
+
+Each distinct statement is explained once. Findings are logged and kept in a
+report exposed on /metrics. Enable with QUERY_INSPECTOR_ENABLED=true; it
+adds an EXPLAIN round trip per new statement and is not meant for production.
+"""
+
+import os
+import threading
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+from config.logging_config import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+QUERY_INSPECTOR_ENABLED = os.getenv("QUERY_INSPECTOR_ENABLED", "false").lower() == "true"
+QUERY_INSPECTOR_MIN_ROWS = int(os.getenv("QUERY_INSPECTOR_MIN_ROWS", "1000"))
+MAX_REPORTED_STATEMENTS = 200
+
+
+class QueryInspector:
+    """Explains each new SELECT once and records the tables it scans in full"""
+
+    def __init__(self, min_rows: int = QUERY_INSPECTOR_MIN_ROWS):
+        self.min_rows = min_rows
+        self.enabled = False
+        self._seen: set = set()
+        self._findings: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def install(self, engine):
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        self.enabled = True
+        logger.info(f"🔍 Query inspector enabled ({engine.dialect.name})")
+
+    # -------------------------------------------------------------------------
+    # Plan parsing
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _sqlite_full_scans(cursor, statement: str, parameters) -> List[str]:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        scans = []
+        for row in cursor.fetchall():
+            detail = row[-1]
+            # "SCAN concepts" reads every row; "SCAN concepts USING INDEX ..." and
+            # "SEARCH ..." steps are index driven
+            if detail.startswith("SCAN ") and "USING" not in detail and "CONSTANT ROW" not in detail:
+                scans.append(detail[len("SCAN "):].split(" ")[0])
+        return scans
+
+    def _postgres_full_scans(self, cursor, statement: str, parameters) -> List[str]:
+        # A failing EXPLAIN must not abort the caller's transaction
+        cursor.execute("SAVEPOINT query_inspector")
+        try:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = cursor.fetchone()[0]
+            cursor.execute("RELEASE SAVEPOINT query_inspector")
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT query_inspector")
+            raise
+
+        scans = []
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if node.get("Node Type") == "Seq Scan" and node.get("Plan Rows", 0) >= self.min_rows:
+                scans.append(node.get("Relation Name"))
+            nodes.extend(node.get("Plans", []))
+        return scans
+
+    # -------------------------------------------------------------------------
+    # Event hook
+    # -------------------------------------------------------------------------
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or getattr(self._local, "active", False):
+            return
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        with self._lock:
+            if statement in self._seen:
+                return
+            self._seen.add(statement)
+
+        self._local.active = True
+        explain_cursor = conn.connection.cursor()
+        try:
+            if conn.dialect.name == "sqlite":
+                scans = self._sqlite_full_scans(explain_cursor, statement, parameters)
+            elif conn.dialect.name == "postgresql":
+                scans = self._postgres_full_scans(explain_cursor, statement, parameters)
+            else:
+                return
+        except Exception as e:
+            logger.debug(f"Query inspector could not explain statement: {e}")
+            return
+        finally:
+            explain_cursor.close()
+            self._local.active = False
+
+        if scans:
+            with self._lock:
+                if len(self._findings) < MAX_REPORTED_STATEMENTS:
+                    self._findings[statement] = {"statement": " ".join(statement.split()), "full_scans": scans}
+            logger.warning(f"🐢 Full scan on {', '.join(scans)}: {' '.join(statement.split())[:300]}")
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "statements_explained": len(self._seen),
+                "full_scans": list(self._findings.values())
+            }
+
+
+# Global instance
+query_inspector = QueryInspector()
@@ -0,0 +1,155 @@
+"""
+Read Replica Routing
+Sends read-only request traffic (dashboards, catalog listings, analytics) to
+the replicas in DATABASE_REPLICA_URLS, round-robin, so the primary only
+serves writes and the reads that must see them.
+
+Read-your-writes: when a request of an authenticated user commits a write on
+the primary, that user's reads stay on the primary for
+READ_STICKINESS_SECONDS, long enough for the replicas to catch up. The
+marker is kept in-process and in Redis, so it holds across workers; without
+Redis it only holds within the worker that took the write.
+
+Read sessions (get_read_db) refuse to flush changes. Without replicas they
+are bound to the primary and nothing else changes.
+"""
+
+import itertools
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from config.logging_config import get_logger
+from services.resilience import DependencyUnavailable, redis_dependency
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+READ_STICKINESS_SECONDS = float(os.getenv("READ_STICKINESS_SECONDS", "5"))
+REDIS_KEY_PREFIX = "db:last_write:"
+
+# Authenticated user of the current request (set by get_current_user)
+request_user_id: ContextVar[Optional[str]] = ContextVar("request_user_id", default=None)
+
+
+class ReadRouter:
+    """Picks the engine for a read session: a replica, or the primary after the user's own write"""
+
+    def __init__(self, primary, replicas: List, stickiness_seconds: float = READ_STICKINESS_SECONDS):
+        self.primary = primary
+        self.replicas = replicas
+        self.stickiness_seconds = stickiness_seconds
+        self._next = itertools.count()
+        self._recent_writes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.stats = {"replica_reads": 0, "primary_reads": 0, "sticky_reads": 0, "writes_recorded": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    @staticmethod
+    def _redis_failed(e: Exception):
+        if not isinstance(e, DependencyUnavailable):
+            logger.warning(f"⚠️  Read stickiness Redis marker unavailable: {e}")
+
+    def record_write(self, user_id: Optional[str]):
+        """Pin the user's reads to the primary for the stickiness window"""
+        if not self.enabled or not user_id:
+            return
+        with self._lock:
+            self._recent_writes[user_id] = time.monotonic() + self.stickiness_seconds
+            self.stats["writes_recorded"] += 1
+            if len(self._recent_writes) > 10000:
+                now = time.monotonic()
+                self._recent_writes = {u: until for u, until in self._recent_writes.items() if until > now}
+        try:
+            from config.database import get_redis_connection
+            with redis_dependency.guard():
+                get_redis_connection().set(REDIS_KEY_PREFIX + user_id, 1, px=int(self.stickiness_seconds * 1000))
+        except Exception as e:
+            self._redis_failed(e)
+
+    def is_sticky(self, user_id: Optional[str]) -> bool:
+        if not user_id:
+            return False
+        with self._lock:
+            until = self._recent_writes.get(user_id)
+        if until is not None and until > time.monotonic():
+            return True
+        try:
+            from config.database import get_redis_connection
+            with redis_dependency.guard():
+                return bool(get_redis_connection().exists(REDIS_KEY_PREFIX + user_id))
+        except Exception as e:
+            self._redis_failed(e)
+            return False
+
+    def engine_for(self, user_id: Optional[str]):
+        if not self.enabled:
+            self.stats["primary_reads"] += 1
+            return self.primary
+        if self.is_sticky(user_id):
+            self.stats["sticky_reads"] += 1
+            return self.primary
+        self.stats["replica_reads"] += 1
+        return self.replicas[next(self._next) % len(self.replicas)]
+
+    def status(self) -> dict:
+        return {
+            "replicas": len(self.replicas),
+            "stickiness_seconds": self.stickiness_seconds,
+            **self.stats
+        }
+
+
+class ReadSession(Session):
+    """
+    Read-only session. The engine is chosen on first use, once the request's
+    user is known (dependencies resolve before the endpoint body runs).
+    """
+
+    def __init__(self, router: ReadRouter, **kwargs):
+        super().__init__(**kwargs)
+        self.router = router
+        self._engine = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._engine is None:
+            self._engine = self.router.engine_for(request_user_id.get())
+        return self._engine
+
+    def flush(self, objects=None):
+        if self.new or self.dirty or self.deleted:
+            raise RuntimeError("Read session cannot write; use get_db for endpoints that modify data")
+        super().flush(objects)
+
+
+def track_writes(session_factory, router: ReadRouter):
+    """Record a write for the request's user whenever a primary session commits changes"""
+    from sqlalchemy import event
+
+    @event.listens_for(session_factory, "after_flush")
+    def _flushed(session, flush_context):
+        session.info["wrote"] = True
+
+    @event.listens_for(session_factory, "do_orm_execute")
+    def _executed(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            orm_execute_state.session.info["wrote"] = True
+
+    @event.listens_for(session_factory, "after_commit")
+    def _committed(session):
+        if session.info.pop("wrote", False):
+            router.record_write(request_user_id.get())
+
+    @event.listens_for(session_factory, "after_rollback")
+    def _rolled_back(session):
+        session.info.pop("wrote", None)
@@ -0,0 +1,233 @@
+"""
+SQLite Production Profile
+Tuning for deployments that serve traffic from a SQLite file
+(SQLITE_PROFILE=tuned). The default profile keeps the single shared
+StaticPool connection used in development.
+
+- Every connection runs in WAL mode with synchronous=NORMAL, a memory-mapped
+  file, a larger page cache and a busy timeout, so readers never block the
+  writer or each other
+- Reads use a pool of SQLITE_POOL_SIZE connections (plus up to
+  SQLITE_MAX_OVERFLOW short-lived ones) instead of one shared connection
+- Mutations go through a single-writer queue: a connection takes the writer
+  slot before its first write statement and hands it to the next waiting
+  connection (FIFO) on commit or rollback. Writers queue in-process instead
+  of polling SQLite's busy handler, which backs off with sleeps of up to
+  100ms and starves under contention
+- Writes made from the event loop thread (sync sessions inside async
+  handlers) wait at most SQLITE_LOOP_WRITE_TIMEOUT_MS for the slot, so a busy
+  writer cannot stall every other request; worker threads wait up to
+  SQLITE_BUSY_TIMEOUT_MS. A thread that already holds the slot through another
+  connection fails at once instead of waiting on itself
+
+SQLite allows one writer per database file, so the queue only coordinates
+writers within a process; run a single worker process per database.
+"""
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from config.logging_config import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default").lower()
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+SQLITE_MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", "16"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_LOOP_WRITE_TIMEOUT_MS = int(os.getenv("SQLITE_LOOP_WRITE_TIMEOUT_MS", "100"))
+
+# Statements that take SQLite's write lock
+WRITE_STATEMENT = re.compile(
+    r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER|BEGIN\s+(IMMEDIATE|EXCLUSIVE))\b", re.IGNORECASE
+)
+
+
+class WriterQueue:
+    """FIFO hand-off of the single SQLite writer slot between connections"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: deque = deque()
+        self._held = False
+        self._owner = None  # Thread ident holding the slot
+        self.enabled = False
+        self.acquisitions = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self, timeout: float) -> bool:
+        thread = threading.get_ident()
+        with self._lock:
+            self.acquisitions += 1
+            if not self._held and not self._waiters:
+                self._held = True
+                self._owner = thread
+                return True
+            if self._owner == thread:
+                # Held by this thread through another connection: waiting can never succeed
+                self.timeouts += 1
+                return False
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+            self.waits += 1
+
+        started = time.perf_counter()
+        acquired = waiter.wait(timeout)
+        with self._lock:
+            self.wait_seconds += time.perf_counter() - started
+            # The slot may have been handed over just as the wait timed out
+            if acquired or waiter.is_set():
+                self._owner = thread
+                return True
+            self._waiters.remove(waiter)
+            self.timeouts += 1
+            return False
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # Ownership passes straight to the next writer
+                self._owner = None
+                self._waiters.popleft().set()
+            else:
+                self._held = False
+                self._owner = None
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "writer_held": self._held,
+                "writers_waiting": len(self._waiters),
+                "acquisitions": self.acquisitions,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "average_wait_ms": round(self.wait_seconds / self.waits * 1000, 2) if self.waits else 0.0
+            }
+
+
+writer_queue = WriterQueue()
+
+
+def _on_event_loop() -> bool:
+    """True when called from a thread that is running an asyncio event loop"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class QueuedCursor(sqlite3.Cursor):
+    """Takes the writer slot before the first write statement of a transaction"""
+
+    def execute(self, sql, parameters=()):
+        if WRITE_STATEMENT.match(sql):
+            self.connection.begin_write()
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if WRITE_STATEMENT.match(sql):
+            self.connection.begin_write()
+        return super().executemany(sql, seq_of_parameters)
+
+
+class QueuedConnection(sqlite3.Connection):
+    """sqlite3 connection that holds the writer slot from its first write until commit/rollback"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writing = False
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or QueuedCursor)
+
+    def begin_write(self):
+        if self.writing:
+            return
+        timeout_ms = SQLITE_LOOP_WRITE_TIMEOUT_MS if _on_event_loop() else SQLITE_BUSY_TIMEOUT_MS
+        if not writer_queue.acquire(timeout_ms / 1000):
+            raise sqlite3.OperationalError("database is locked (timed out waiting for the writer queue)")
+        self.writing = True
+
+    def end_write(self):
+        if self.writing:
+            self.writing = False
+            writer_queue.release()
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self.end_write()
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self.end_write()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.end_write()
+
+
+def is_tuned(database_url: str) -> bool:
+    """True when the tuned profile applies (file-backed SQLite only)"""
+    if SQLITE_PROFILE != "tuned" or not database_url.startswith("sqlite"):
+        return False
+    if ":memory:" in database_url or database_url.rstrip("/") in ("sqlite:", "sqlite+pysqlite:"):
+        logger.warning("⚠️ SQLITE_PROFILE=tuned ignored for an in-memory database")
+        return False
+    return True
+
+
+def engine_options() -> dict:
+    """create_engine() arguments for the tuned profile"""
+    return {
+        "poolclass": QueuePool,
+        "pool_size": SQLITE_POOL_SIZE,
+        "max_overflow": SQLITE_MAX_OVERFLOW,
+        "connect_args": {
+            "factory": QueuedConnection,
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+            "check_same_thread": False,
+        },
+    }
+
+
+def _set_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def install(engine):
+    event.listen(engine, "connect", _set_pragmas)
+    writer_queue.enabled = True
+    logger.info(f"⚡ SQLite tuned profile: WAL, {SQLITE_POOL_SIZE} pooled connections, single-writer queue")
+
@@ -27,6 +27,12 @@ __all__ = [
     'UserProgress', 
     'Quiz', 
     'QuizAttempt', 
+    'QuizAttemptSummary',       # Archived quiz attempts compacted per (user, quiz)
     'UserAchievement',
+    'GenerationJob',            # Background lesson / practice question generation jobs
+    'PracticeQuestionCache',    # SQL tier of the practice question cache
+    'ConceptLesson',            # Versioned, compressed concept lesson bodies
+    'GraphOutbox',              # Pending Neo4j writes for the graph outbox dispatcher
+    'ProcessedProgressEvent',   # Idempotency keys of batched progress events
     'concept_relations'         # Association table for concept relationships
 ]
\ No newline at end of file
@@ -1,28 +1,33 @@
 """
 Simplified database models for SQLite compatibility
-Uses JSON instead of PostgreSQL ARRAY types
+Uses JSON instead of PostgreSQL ARRAY types (JSONB on PostgreSQL for the
+concept, content and quiz documents, so they can be GIN indexed)
 """
 
 from datetime import datetime
 from typing import Optional, List
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Text, Float, 
-    ForeignKey, JSON, Table, UniqueConstraint, Index
+    ForeignKey, JSON, Table, UniqueConstraint, Index, LargeBinary, DDL, event, inspect
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred, synonym
 import uuid
 
-from config.database import Base
+from config.database import Base, UUIDKey, get_json_type
+
+# JSON documents that are filtered with json_contains (JSONB on PostgreSQL)
+JSONDocument = get_json_type()
 
 
 # Association table for many-to-many relationships (simplified for SQLite)
 concept_relations = Table(
     'concept_relations',
     Base.metadata,
-    Column('concept_id', String(36), ForeignKey('concepts.concept_id'), primary_key=True),
-    Column('related_concept_id', String(36), ForeignKey('concepts.concept_id'), primary_key=True),
+    Column('concept_id', UUIDKey, ForeignKey('concepts.concept_id'), primary_key=True),
+    Column('related_concept_id', UUIDKey, ForeignKey('concepts.concept_id'), primary_key=True),
     Column('relationship_type', String(50), nullable=False),
-    Column('strength', Float, default=1.0)
+    Column('strength', Float, default=1.0),
+    Column('updated_at', DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 )
 
 
@@ -30,7 +35,7 @@ class User(Base):
     """Core User model"""
     __tablename__ = "users"
     
-    user_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
     username = Column(String(50), unique=True, index=True, nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
@@ -58,8 +63,8 @@ class UserLearningPreferences(Base):
     """User learning preferences and settings"""
     __tablename__ = "user_learning_preferences"
     
-    preference_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey("users.user_id"), nullable=False)
+    preference_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(UUIDKey, ForeignKey("users.user_id"), nullable=False)
     
     # Content preferences (using JSON instead of ARRAY)
     content_type_preferences = Column(JSON, default=list)
@@ -86,7 +91,7 @@ class Concept(Base):
     """Core concept model for knowledge graph"""
     __tablename__ = "concepts"
     
-    concept_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    concept_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(100), unique=True, nullable=False)
     display_name = Column(String(100), nullable=False)
     description = Column(Text, nullable=False)
@@ -103,18 +108,18 @@ class Concept(Base):
     cognitive_load = Column(Float, default=0.0)
     
     # Content and resources (using JSON instead of ARRAY)
-    key_terms = Column(JSON, default=list)
-    synonyms = Column(JSON, default=list)
-    multimedia_resources = Column(JSON, default=list)
-    interactive_elements = Column(JSON, default=list)
+    key_terms = Column(JSONDocument, default=list)
+    synonyms = Column(JSONDocument, default=list)
+    multimedia_resources = Column(JSONDocument, default=list)
+    interactive_elements = Column(JSONDocument, default=list)
     
     # Learning metadata
-    learning_objectives = Column(JSON, default=list)
-    assessment_criteria = Column(JSON, default=list)
-    practical_applications = Column(JSON, default=list)
-    real_world_examples = Column(JSON, default=list)
-    common_misconceptions = Column(JSON, default=list)
-    teaching_strategies = Column(JSON, default=list)
+    learning_objectives = Column(JSONDocument, default=list)
+    assessment_criteria = Column(JSONDocument, default=list)
+    practical_applications = Column(JSONDocument, default=list)
+    real_world_examples = Column(JSONDocument, default=list)
+    common_misconceptions = Column(JSONDocument, default=list)
+    teaching_strategies = Column(JSONDocument, default=list)
     
     # Analytics
     mastery_score = Column(Float, default=0.0)
@@ -129,8 +134,11 @@ class Concept(Base):
     ai_generated_content = Column(Boolean, default=False)
     
     # AI-generated lesson content (Just-in-Time Content Generator)
-    lesson_content = Column(Text, nullable=True)  # Stores AI-generated lesson content
-    lesson_generated_at = Column(DateTime, nullable=True)  # When lesson was last generated
+    # Lesson bodies live in concept_lessons; lesson_content only holds legacy lessons
+    # awaiting lazy migration and is deferred so catalog queries never load it
+    active_lesson_id = Column(UUIDKey, nullable=True)  # Active ConceptLesson version
+    lesson_content = deferred(Column(Text, nullable=True))  # Legacy inline lesson content
+    lesson_generated_at = Column(DateTime, nullable=True)  # When the active lesson was generated
     lesson_model_used = Column(String(50), nullable=True)  # Which AI model was used
     
     # Versioning and timestamps
@@ -138,13 +146,26 @@ class Concept(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_updated = Column(DateTime, default=datetime.utcnow)
+    
+    # Indexes (catalog filters and ranking)
+    __table_args__ = (
+        Index('idx_concept_category', 'category'),
+        Index('idx_concept_domain', 'domain'),
+        Index('idx_concept_difficulty', 'difficulty_level'),
+        Index('idx_concept_usage', 'usage_frequency'),
+        # Containment filters on tags (json_contains); PostgreSQL only
+        Index('idx_concept_key_terms_gin', 'key_terms', postgresql_using='gin',
+              postgresql_ops={'key_terms': 'jsonb_path_ops'}).ddl_if(dialect='postgresql'),
+        Index('idx_concept_synonyms_gin', 'synonyms', postgresql_using='gin',
+              postgresql_ops={'synonyms': 'jsonb_path_ops'}).ddl_if(dialect='postgresql'),
+    )
 
 
 class LearningPath(Base):
     """Learning path and curriculum model"""
     __tablename__ = "learning_paths"
     
-    path_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    path_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(100), nullable=False)
     description = Column(Text, nullable=False)
     
@@ -165,7 +186,7 @@ class LearningPath(Base):
     assessment_points = Column(JSON, default=list)
     
     # Metadata
-    created_by = Column(String(36), ForeignKey("users.user_id"), nullable=True)
+    created_by = Column(UUIDKey, ForeignKey("users.user_id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     version = Column(String(20), default="1.0")
@@ -175,8 +196,8 @@ class LearningPathConcept(Base):
     """Association table for learning path concepts with order"""
     __tablename__ = "learning_path_concepts"
     
-    path_id = Column(String(36), ForeignKey("learning_paths.path_id"), primary_key=True)
-    concept_id = Column(String(36), ForeignKey("concepts.concept_id"), primary_key=True)
+    path_id = Column(UUIDKey, ForeignKey("learning_paths.path_id"), primary_key=True)
+    concept_id = Column(UUIDKey, ForeignKey("concepts.concept_id"), primary_key=True)
     sequence_order = Column(Integer, nullable=False)
     estimated_duration = Column(Integer, nullable=True)
     
@@ -189,16 +210,16 @@ class LearningSession(Base):
     """Individual learning session model"""
     __tablename__ = "learning_sessions"
     
-    session_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey("users.user_id"), nullable=False)
-    path_id = Column(String(36), ForeignKey("learning_paths.path_id"), nullable=True)
+    session_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(UUIDKey, ForeignKey("users.user_id"), nullable=False)
+    path_id = Column(UUIDKey, ForeignKey("learning_paths.path_id"), nullable=True)
     
     # Session details
     session_type = Column(String(50), nullable=False)
     status = Column(String(20), default="in_progress")
     
     # Content and progress
-    current_concept_id = Column(String(36), ForeignKey("concepts.concept_id"), nullable=True)
+    current_concept_id = Column(UUIDKey, ForeignKey("concepts.concept_id"), nullable=True)
     progress_percentage = Column(Float, default=0.0)
     concepts_completed = Column(JSON, default=list)
     
@@ -217,66 +238,21 @@ class LearningSession(Base):
     difficulty_adjustments = Column(JSON, default=dict)
 
 
-class UserProgress(Base):
-    """User progress tracking for concepts and learning"""
-    __tablename__ = "user_progress"
-    
-    progress_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey("users.user_id"), nullable=False)
-    concept_id = Column(String(36), ForeignKey("concepts.concept_id"), nullable=False)
-    session_id = Column(String(36), ForeignKey("learning_sessions.session_id"), nullable=True)
-    
-    # Progress metrics
-    mastery_level = Column(Float, default=0.0)
-    confidence_level = Column(Float, default=0.0)
-    time_spent = Column(Integer, default=0)
-    
-    # Learning history
-    first_attempt = Column(DateTime, default=datetime.utcnow)
-    last_review = Column(DateTime, default=datetime.utcnow)
-    review_count = Column(Integer, default=0)
-    
-    # Performance metrics
-    success_rate = Column(Float, default=0.0)
-    average_score = Column(Float, default=0.0)
-    streak_count = Column(Integer, default=0)
-    
-    # Spaced repetition
-    next_review_date = Column(DateTime, nullable=True)
-    review_interval = Column(Integer, default=1)
-    
-    # AI insights
-    learning_velocity = Column(Float, default=0.0)
-    struggling_areas = Column(JSON, default=list)
-    strengths = Column(JSON, default=list)
-    
-    # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    # Indexes
-    __table_args__ = (
-        Index('idx_progress_user_concept', 'user_id', 'concept_id', unique=True),
-        Index('idx_progress_mastery', 'mastery_level'),
-        Index('idx_progress_next_review', 'next_review_date'),
-    )
-
-
 class Quiz(Base):
     """Quiz and assessment model"""
     __tablename__ = "quizzes"
     
-    quiz_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    quiz_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
     
     # Quiz metadata
-    concept_id = Column(String(36), ForeignKey("concepts.concept_id"), nullable=False)
+    concept_id = Column(UUIDKey, ForeignKey("concepts.concept_id"), nullable=False)
     quiz_type = Column(String(50), nullable=False)
     difficulty_level = Column(String(20), nullable=False)
     
     # Content
-    questions = Column(JSON, nullable=False)
+    questions = Column(JSONDocument, nullable=False)
     time_limit = Column(Integer, nullable=True)
     passing_score = Column(Float, default=0.7)
     max_attempts = Column(Integer, default=3)
@@ -294,15 +270,20 @@ class Quiz(Base):
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_quiz_concept_difficulty', 'concept_id', 'difficulty_level', 'created_at'),
+    )
 
 
 class QuizAttempt(Base):
     """Individual quiz attempt model"""
     __tablename__ = "quiz_attempts"
     
-    attempt_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    quiz_id = Column(String(36), ForeignKey("quizzes.quiz_id"), nullable=False)
-    user_id = Column(String(36), ForeignKey("users.user_id"), nullable=False)
+    attempt_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
+    quiz_id = Column(UUIDKey, ForeignKey("quizzes.quiz_id"), nullable=False)
+    user_id = Column(UUIDKey, ForeignKey("users.user_id"), nullable=False)
     
     # Attempt details
     attempt_number = Column(Integer, nullable=False)
@@ -335,6 +316,35 @@ class QuizAttempt(Base):
     __table_args__ = (
         Index('idx_attempt_user_quiz', 'user_id', 'quiz_id'),
         Index('idx_attempt_score', 'score'),
+        Index('idx_attempt_user_started', 'user_id', 'started_at'),
+    )
+
+
+class QuizAttemptSummary(Base):
+    """Archived quiz attempts compacted to one row per (user, quiz)"""
+    __tablename__ = "quiz_attempt_summaries"
+
+    user_id = Column(UUIDKey, ForeignKey("users.user_id"), primary_key=True)
+    quiz_id = Column(UUIDKey, ForeignKey("quizzes.quiz_id"), primary_key=True)
+
+    # Counts over every archived attempt (completed or abandoned)
+    attempts = Column(Integer, default=0)
+    completed_attempts = Column(Integer, default=0)
+    passed_attempts = Column(Integer, default=0)
+    perfect_attempts = Column(Integer, default=0)
+
+    # Completed attempts only
+    best_percentage = Column(Float, nullable=True)
+    percentage_sum = Column(Float, default=0.0)
+    time_taken_sum = Column(Integer, default=0)
+    timed_attempts = Column(Integer, default=0)  # Completed attempts with a recorded time
+
+    first_started_at = Column(DateTime, nullable=True)
+    last_started_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_attempt_summary_quiz', 'quiz_id'),
     )
 
 
@@ -342,8 +352,8 @@ class UserAchievement(Base):
     """User achievements and badges"""
     __tablename__ = "user_achievements"
     
-    achievement_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey("users.user_id"), nullable=False)
+    achievement_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(UUIDKey, ForeignKey("users.user_id"), nullable=False)
     
     # Achievement details
     achievement_type = Column(String(50), nullable=False)
@@ -369,12 +379,19 @@ class UserAchievement(Base):
 
 
 class UserConceptProgress(Base):
-    """Tracks a user's progress on a specific concept - simplified for dashboard"""
+    """
+    Per-user, per-concept progress: dashboard status plus mastery and spaced
+    repetition metrics (formerly the separate user_progress table, which is
+    now a read-only compatibility view over this one)
+    """
     __tablename__ = "user_concept_progress"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String(36), ForeignKey("users.user_id"), nullable=False)
-    concept_id = Column(String(36), ForeignKey("concepts.concept_id"), nullable=False)
+    # UUID the former user_progress table used as its key (kept for API and view readers)
+    progress_id = Column(UUIDKey, nullable=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(UUIDKey, ForeignKey("users.user_id"), nullable=False)
+    concept_id = Column(UUIDKey, ForeignKey("concepts.concept_id"), nullable=False)
+    session_id = Column(UUIDKey, ForeignKey("learning_sessions.session_id"), nullable=True)
     
     # Progress tracking fields matching frontend expectations
     status = Column(String(20), default="not_started")  # not_started, in_progress, completed
@@ -385,18 +402,73 @@ class UserConceptProgress(Base):
     # Optional user notes
     user_notes = Column(Text, nullable=True)
     
-    # Unique constraint to prevent duplicate progress records
+    # Mastery metrics
+    mastery_level = Column(Float, default=0.0)
+    confidence_level = Column(Float, default=0.0)
+    success_rate = Column(Float, default=0.0)
+    average_score = Column(Float, default=0.0)
+    streak_count = Column(Integer, default=0)
+    
+    # Spaced repetition
+    first_attempt = Column(DateTime, default=datetime.utcnow)
+    last_review = Column(DateTime, nullable=True)
+    review_count = Column(Integer, default=0)
+    next_review_date = Column(DateTime, nullable=True)
+    review_interval = Column(Integer, default=1)
+    
+    # AI insights
+    learning_velocity = Column(Float, default=0.0)
+    struggling_areas = Column(JSON, default=list)
+    strengths = Column(JSON, default=list)
+    
+    # Metadata
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Former UserProgress attribute name
+    time_spent = synonym("time_spent_minutes")
+    
+    # One unique index per (user, concept); no duplicate progress records
     __table_args__ = (
         Index('idx_concept_progress_unique', 'user_id', 'concept_id', unique=True),
+        Index('idx_concept_progress_progress_id', 'progress_id', unique=True),
+        Index('idx_concept_progress_user_status', 'user_id', 'status'),
+        Index('idx_concept_progress_user_accessed', 'user_id', 'last_accessed'),
     )
 
 
+# Old name kept so existing imports keep working
+UserProgress = UserConceptProgress
+
+# Read-only view with the old user_progress columns for raw SQL readers
+USER_PROGRESS_VIEW = """
+CREATE VIEW user_progress AS
+SELECT progress_id, user_id, concept_id, session_id, mastery_level, confidence_level,
+       time_spent_minutes AS time_spent, first_attempt, last_review, review_count, success_rate,
+       average_score, streak_count, next_review_date, review_interval, learning_velocity,
+       struggling_areas, strengths, created_at, updated_at
+FROM user_concept_progress
+"""
+
+
+def _user_progress_free(ddl, target, bind, **kw) -> bool:
+    """True unless a user_progress table (not yet merged by the migration) or view exists"""
+    inspector = inspect(bind)
+    return "user_progress" not in inspector.get_table_names() and \
+        "user_progress" not in inspector.get_view_names()
+
+
+event.listen(UserConceptProgress.__table__, "after_create",
+             DDL(USER_PROGRESS_VIEW).execute_if(callable_=_user_progress_free))
+event.listen(UserConceptProgress.__table__, "before_drop", DDL("DROP VIEW IF EXISTS user_progress"))
+
+
 class ConceptContent(Base):
     """Educational content for concepts - lessons, exercises, and reading materials"""
     __tablename__ = "concept_content"
     
-    content_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    concept_id = Column(String(36), ForeignKey("concepts.concept_id"), nullable=False)
+    content_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
+    concept_id = Column(UUIDKey, ForeignKey("concepts.concept_id"), nullable=False)
     
     # Content metadata
     title = Column(String(200), nullable=False)
@@ -406,23 +478,23 @@ class ConceptContent(Base):
     # Content body
     content = Column(Text, nullable=False)  # Main content in markdown/HTML
     summary = Column(Text, nullable=True)   # Brief summary
-    learning_objectives = Column(JSON, default=list)  # Specific objectives for this content
+    learning_objectives = Column(JSONDocument, default=list)  # Specific objectives for this content
     
     # Media and resources
-    multimedia_resources = Column(JSON, default=list)  # Images, videos, audio files
-    external_links = Column(JSON, default=list)        # Additional resources
-    code_examples = Column(JSON, default=list)         # Programming examples
-    interactive_elements = Column(JSON, default=list)  # Interactive components
+    multimedia_resources = Column(JSONDocument, default=list)  # Images, videos, audio files
+    external_links = Column(JSONDocument, default=list)        # Additional resources
+    code_examples = Column(JSONDocument, default=list)         # Programming examples
+    interactive_elements = Column(JSONDocument, default=list)  # Interactive components
     
     # Difficulty and prerequisites
     difficulty_level = Column(String(20), nullable=False)
     estimated_duration = Column(Integer, default=30)  # Duration in minutes
-    prerequisites = Column(JSON, default=list)        # Required prior knowledge
+    prerequisites = Column(JSONDocument, default=list)        # Required prior knowledge
     
     # Assessment and practice
-    practice_questions = Column(JSON, default=list)   # Practice problems
-    examples = Column(JSON, default=list)             # Worked examples
-    exercises = Column(JSON, default=list)            # Hands-on exercises
+    practice_questions = Column(JSONDocument, default=list)   # Practice problems
+    examples = Column(JSONDocument, default=list)             # Worked examples
+    exercises = Column(JSONDocument, default=list)            # Hands-on exercises
     
     # Analytics
     completion_rate = Column(Float, default=0.0)
@@ -446,6 +518,9 @@ class ConceptContent(Base):
         Index('idx_content_concept', 'concept_id'),
         Index('idx_content_type', 'content_type'),
         Index('idx_content_order', 'concept_id', 'order_index'),
+        Index('idx_content_active_order', 'concept_id', 'is_active', 'order_index'),
+        Index('idx_content_prerequisites_gin', 'prerequisites', postgresql_using='gin',
+              postgresql_ops={'prerequisites': 'jsonb_path_ops'}).ddl_if(dialect='postgresql'),
     )
 
 
@@ -453,9 +528,9 @@ class UserContentProgress(Base):
     """Track user progress through specific content pieces"""
     __tablename__ = "user_content_progress"
     
-    progress_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey("users.user_id"), nullable=False)
-    content_id = Column(String(36), ForeignKey("concept_content.content_id"), nullable=False)
+    progress_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(UUIDKey, ForeignKey("users.user_id"), nullable=False)
+    content_id = Column(UUIDKey, ForeignKey("concept_content.content_id"), nullable=False)
     
     # Progress tracking
     status = Column(String(20), default="not_started")  # not_started, in_progress, completed, mastered
@@ -486,4 +561,126 @@ class UserContentProgress(Base):
         Index('idx_content_progress_user', 'user_id', 'content_id', unique=True),
         Index('idx_content_progress_status', 'status'),
         Index('idx_content_progress_next_review', 'next_review'),
-    )
\ No newline at end of file
+    )
+
+
+class GenerationJob(Base):
+    """Background AI content generation job (lessons and practice questions)"""
+    __tablename__ = "generation_jobs"
+
+    job_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
+    concept_id = Column(UUIDKey, ForeignKey("concepts.concept_id"), nullable=False)
+
+    # Job definition
+    job_type = Column(String(30), nullable=False)       # lesson, practice_questions
+    status = Column(String(20), default="queued")       # queued, in_progress, completed, failed
+    params = Column(JSON, default=dict)                 # Generation parameters (e.g. question_count)
+    result = Column(JSON, nullable=True)                # Result summary for non-lesson jobs (e.g. cache slot)
+
+    # Retry bookkeeping
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=5)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+
+    # Timestamps
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_generation_job_status', 'status', 'next_attempt_at'),
+        Index('idx_generation_job_concept', 'concept_id', 'job_type'),
+    )
+
+
+class PracticeQuestionCache(Base):
+    """Content-addressed practice question cache (SQL tier behind Redis)"""
+    __tablename__ = "practice_question_cache"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cache_key = Column(String(64), nullable=False)      # sha256 of prompt inputs + template version + model
+    variant = Column(Integer, nullable=False, default=0)  # Slot within the variant pool
+    concept_id = Column(UUIDKey, ForeignKey("concepts.concept_id"), nullable=True)
+
+    questions = Column(JSON, nullable=False)
+    model_used = Column(String(100), nullable=True)
+    template_version = Column(String(20), nullable=True)
+
+    # Cache bookkeeping
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    # Constraints and indexes
+    __table_args__ = (
+        UniqueConstraint('cache_key', 'variant', name='unique_practice_cache_variant'),
+        Index('idx_practice_cache_expires', 'expires_at'),
+        Index('idx_practice_cache_accessed', 'last_accessed_at'),
+    )
+
+
+class ConceptLesson(Base):
+    """Versioned, compressed lesson body for a concept"""
+    __tablename__ = "concept_lessons"
+
+    lesson_id = Column(UUIDKey, primary_key=True, default=lambda: str(uuid.uuid4()))
+    concept_id = Column(UUIDKey, ForeignKey("concepts.concept_id"), nullable=False)
+    version = Column(Integer, nullable=False)
+
+    # Compressed lesson body, only loaded when the lesson itself is requested
+    body = deferred(Column(LargeBinary, nullable=False))
+    compression = Column(String(10), nullable=False, default="gzip")  # zstd, gzip, none
+    content_length = Column(Integer, default=0)                       # Uncompressed size in bytes
+    content_sha256 = Column(String(64), nullable=True)
+
+    # Provenance
+    model_used = Column(String(100), nullable=True)
+    source = Column(String(20), default="ai_generated")  # ai_generated, legacy, manual
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Constraints and indexes
+    __table_args__ = (
+        UniqueConstraint('concept_id', 'version', name='unique_concept_lesson_version'),
+    )
+
+
+class GraphOutbox(Base):
+    """Transactional outbox of pending Neo4j writes, committed with the SQL change"""
+    __tablename__ = "graph_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)  # Also the graph write sequence number
+    event_type = Column(String(30), nullable=False)     # concept_upsert, relationship_upsert, relationship_delete
+    aggregate_id = Column(String(100), nullable=False)  # concept_id or source|target pair
+    payload = Column(JSON, nullable=False)
+
+    # Delivery bookkeeping
+    status = Column(String(20), default="pending")      # pending, in_flight, dispatched, failed
+    claimed_by = Column(String(36), nullable=True)      # Dispatcher batch that claimed the row
+    claimed_at = Column(DateTime, nullable=True)        # Lease start, renewed while the batch is sent
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    dispatched_at = Column(DateTime, nullable=True)
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_graph_outbox_pending', 'status', 'next_attempt_at', 'id'),
+    )
+
+
+class ProcessedProgressEvent(Base):
+    """Idempotency keys of progress events applied through the batch progress API"""
+    __tablename__ = "processed_progress_events"
+
+    user_id = Column(UUIDKey, ForeignKey("users.user_id"), primary_key=True)
+    event_id = Column(String(64), primary_key=True)     # Client-generated, unique per user
+    processed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_processed_progress_events_at', 'processed_at'),
+    )
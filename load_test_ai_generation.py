@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+AI Generation Load Test
+Drives the lesson and practice-question generation paths with concurrent
+requests and reports latency percentiles, throughput and error rates.
+
+Runs offline by default against the local simulated LLM provider
+(LLM_PROVIDER=local); tune its timings with the LLM_SIM_* environment variables.
+
+Usage:
+    # In-process: exercise the AI generator directly
+    python load_test_ai_generation.py --scenario lesson --requests 200 --concurrency 20
+
+    # Against a running API server (start it with LLM_PROVIDER=local for offline runs)
+    python load_test_ai_generation.py --target api --base-url http://localhost:8000 \\
+        --token <jwt> --scenario stream --requests 100 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import sys
+import time
+from typing import List, Optional
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("lesson", "practice", "stream")
+
+
+class Sample:
+    """Timing for a single request"""
+
+    def __init__(self, ok: bool, total: float, first_byte: Optional[float] = None, error: str = ""):
+        self.ok = ok
+        self.total = total
+        self.first_byte = first_byte
+        self.error = error
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+# =============================================================================
+# IN-PROCESS TARGET
+# =============================================================================
+
+async def run_direct(scenario: str, index: int) -> Sample:
+    """Call the AI generator directly"""
+    from services.ai_generator import ai_generator
+
+    concept_name = f"Load Test Concept {index % 50}"
+    started = time.perf_counter()
+    first_byte = None
+    try:
+        if scenario == "lesson":
+            await ai_generator.generate_concept_lesson(
+                concept_name, "Computer Science", "Intermediate", allow_fallback=False
+            )
+        elif scenario == "practice":
+            await ai_generator.generate_practice_questions(
+                concept_name, "Intermediate", question_count=3, allow_fallback=False
+            )
+        else:
+            async for _ in ai_generator.stream_concept_lesson(concept_name, "Computer Science", "Intermediate"):
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+        return Sample(True, time.perf_counter() - started, first_byte)
+    except Exception as e:
+        return Sample(False, time.perf_counter() - started, first_byte, str(e))
+
+
+# =============================================================================
+# API TARGET
+# =============================================================================
+
+async def fetch_concept_ids(client, base_url: str, limit: int) -> List[str]:
+    """Pick concepts to target from the concepts listing"""
+    response = await client.get(f"{base_url}/api/v1/concepts/", params={"limit": limit})
+    response.raise_for_status()
+    return [concept["concept_id"] for concept in response.json()]
+
+
+async def run_api(client, base_url: str, scenario: str, concept_id: str) -> Sample:
+    """Call the lesson / practice-question endpoints over HTTP"""
+    url = f"{base_url}/api/v1/concepts/{concept_id}"
+    started = time.perf_counter()
+    first_byte = None
+    try:
+        if scenario == "lesson":
+            response = await client.post(f"{url}/regenerate-lesson")
+            response.raise_for_status()
+        elif scenario == "practice":
+            response = await client.get(f"{url}/practice-questions", params={"question_count": 3})
+            response.raise_for_status()
+        else:
+            async with client.stream("GET", f"{url}/lesson/stream") as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if first_byte is None and line.startswith("data:") and '"delta"' in line:
+                        first_byte = time.perf_counter() - started
+                    if line.startswith("event: error"):
+                        raise RuntimeError("stream reported an error event")
+        return Sample(True, time.perf_counter() - started, first_byte)
+    except Exception as e:
+        return Sample(False, time.perf_counter() - started, first_byte, str(e))
+
+
+# =============================================================================
+# DRIVER
+# =============================================================================
+
+async def run_load_test(args) -> List[Sample]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    client = None
+    concept_ids: List[str] = []
+
+    if args.target == "api":
+        import httpx
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+        client = httpx.AsyncClient(headers=headers, timeout=args.timeout)
+        concept_ids = await fetch_concept_ids(client, args.base_url, args.concepts)
+        if not concept_ids:
+            raise SystemExit("❌ No concepts found to target")
+
+    async def one(index: int) -> Sample:
+        async with semaphore:
+            if client is not None:
+                return await run_api(client, args.base_url, args.scenario, concept_ids[index % len(concept_ids)])
+            return await run_direct(args.scenario, index)
+
+    try:
+        return await asyncio.gather(*(one(i) for i in range(args.requests)))
+    finally:
+        if client is not None:
+            await client.aclose()
+
+
+def print_report(samples: List[Sample], elapsed: float, args):
+    ok = [s for s in samples if s.ok]
+    errors = [s for s in samples if not s.ok]
+    totals = [s.total * 1000 for s in ok]
+    first_bytes = [s.first_byte * 1000 for s in ok if s.first_byte is not None]
+
+    print("📊 AI GENERATION LOAD TEST RESULTS")
+    print("=" * 60)
+    print(f"   Target:      {args.target} ({args.scenario})")
+    print(f"   Provider:    {os.getenv('LLM_PROVIDER', 'openai')}")
+    print(f"   Requests:    {len(samples)} @ concurrency {args.concurrency}")
+    print(f"   Elapsed:     {elapsed:.2f}s")
+    print(f"   Throughput:  {len(ok) / elapsed if elapsed else 0:.2f} req/s")
+    print(f"   Errors:      {len(errors)} ({len(errors) / len(samples) * 100 if samples else 0:.1f}%)")
+    for label, values in (("Latency", totals), ("First token", first_bytes)):
+        if values:
+            print(
+                f"   {label + ' ms:':<13} p50={percentile(values, 50):.0f} p90={percentile(values, 90):.0f} "
+                f"p95={percentile(values, 95):.0f} p99={percentile(values, 99):.0f} max={max(values):.0f}"
+            )
+    if errors:
+        print(f"   Sample error: {errors[0].error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the AI lesson and practice-question generation paths")
+    parser.add_argument("--target", choices=("direct", "api"), default="direct")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="lesson")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", default=os.getenv("LOAD_TEST_TOKEN"), help="Bearer token for --target api")
+    parser.add_argument("--concepts", type=int, default=20, help="Number of concepts to spread API requests over")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    # Offline by default for in-process runs
+    if args.target == "direct":
+        os.environ.setdefault("LLM_PROVIDER", "local")
+
+    started = time.perf_counter()
+    samples = asyncio.run(run_load_test(args))
+    print_report(samples, time.perf_counter() - started, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,16 +7,28 @@ from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 import os
 from dotenv import load_dotenv
 
 from config.database import (
-    init_db, close_db_connections, check_all_connections,
-    get_db, get_redis_connection, get_neo4j_driver
+    init_db, close_db_connections, close_async_neo4j_driver, check_all_connections,
+    check_neo4j_connection, get_db, get_redis_connection, read_router
 )
 from config.logging_config import setup_logging, get_logger
+from config.query_inspector import query_inspector
+from config.sqlite_profile import writer_queue
+from services.generation_queue import (
+    generation_queue, enqueue_missing_lessons, QUEUE_ENABLED, PREGENERATE_ON_STARTUP
+)
+from services.graph_outbox import graph_outbox_dispatcher, OUTBOX_ENABLED
+from services.concept_graph import concept_graph, CONCEPT_GRAPH_ENABLED
+from services.resilience import deadline, resilience_status, REQUEST_DEADLINE_SECONDS
+from services.neighbor_cache import neighbor_cache, warm_neighbor_cache, WARM_ON_STARTUP as NEIGHBOR_CACHE_WARM_ON_STARTUP
+from services.progress_buffer import progress_buffer, BUFFER_ENABLED as PROGRESS_BUFFER_ENABLED
 from api.v1 import (
     auth, users, concepts, content, learning_paths, progress, 
     quizzes, achievements, analytics
@@ -30,6 +42,13 @@ load_dotenv()
 setup_logging()
 
 
+async def report_neo4j_connection():
+    """Probe Neo4j after startup; graph features fall back to the local concept graph meanwhile"""
+    available = await check_neo4j_connection()
+    print(f"📊 Neo4j connection: {available}" if available else
+          "⚠️  Neo4j unreachable, graph features are served from the local concept graph")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
@@ -39,14 +58,52 @@ async def lifespan(app: FastAPI):
     # Initialize database
     init_db()
     
-    # Check connections
-    connections = check_all_connections()
+    # Check connections (Neo4j in the background so an unreachable graph never delays startup)
+    connections = await check_all_connections(include_neo4j=False)
     print(f"📊 Database connections: {connections}")
+    neo4j_check = asyncio.create_task(report_neo4j_connection())
+    
+    # Start background lesson pre-generation workers
+    if QUEUE_ENABLED:
+        if PREGENERATE_ON_STARTUP:
+            db = next(get_db())
+            try:
+                enqueue_missing_lessons(db)
+            finally:
+                db.close()
+        await generation_queue.start()
+    
+    # Start the SQL -> Neo4j graph outbox dispatcher
+    if OUTBOX_ENABLED:
+        await graph_outbox_dispatcher.start()
+    
+    # Load the in-process prerequisite graph used for recommendations
+    if CONCEPT_GRAPH_ENABLED:
+        try:
+            await concept_graph.start()
+        except Exception as e:
+            print(f"⚠️  Concept graph not loaded, recommendations will query Neo4j: {e}")
+    
+    if NEIGHBOR_CACHE_WARM_ON_STARTUP:
+        try:
+            warm_neighbor_cache()
+        except Exception as e:
+            print(f"⚠️  Neighbor cache warm-up failed: {e}")
+    
+    # Start the progress heartbeat flusher
+    if PROGRESS_BUFFER_ENABLED:
+        await progress_buffer.start()
     
     yield
     
     # Shutdown
     print("🛑 Shutting down Jeseci API...")
+    neo4j_check.cancel()
+    await generation_queue.stop()
+    await graph_outbox_dispatcher.stop()
+    await concept_graph.stop()
+    await progress_buffer.stop()
+    await close_async_neo4j_driver()
     close_db_connections()
 
 
@@ -97,6 +154,13 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def request_deadline(request, call_next):
+    """Give each request one time budget shared by its Neo4j, Redis and LLM calls"""
+    with deadline(REQUEST_DEADLINE_SECONDS):
+        return await call_next(request)
+
+
 # Include API routers
 api_prefix = os.getenv("API_V1_STR", "/api/v1")
 
@@ -169,7 +233,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    connections = check_all_connections()
+    connections = await check_all_connections()
     all_healthy = all(connections.values())
     
     return {
@@ -179,6 +243,25 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics(
+    current_user=Depends(auth.get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Background worker metrics (graph outbox lag, generation queue depth, concept graph size, circuit breakers, SQLite writer queue, read routing, progress buffer); admin only"""
+    return {
+        "graph_outbox": graph_outbox_dispatcher.metrics(db),
+        "generation_queue": generation_queue.status(db),
+        "concept_graph": concept_graph.stats(),
+        "neighbor_cache": neighbor_cache.status(),
+        "resilience": resilience_status(),
+        "query_inspector": query_inspector.report(),
+        "sqlite_writer_queue": writer_queue.status(),
+        "read_routing": read_router.status(),
+        "progress_buffer": progress_buffer.status()
+    }
+
+
 @app.get("/info")
 async def api_info():
     """API information endpoint"""
@@ -35,7 +35,8 @@ def migrate_database():
             new_columns = [
                 ("lesson_content", "TEXT"),
                 ("lesson_generated_at", "TEXT"),
-                ("lesson_model_used", "TEXT")
+                ("lesson_model_used", "TEXT"),
+                ("active_lesson_id", "VARCHAR(36)")
             ]
             
             for column_name, column_type in new_columns:
@@ -45,6 +46,13 @@ def migrate_database():
                 else:
                     print(f"   ✅ Column already exists: {column_name}")
             
+            # Relationship timestamps drive incremental graph syncs (bulk_graph_sync.py)
+            result = conn.execute(text("PRAGMA table_info(concept_relations)"))
+            relation_columns = [row[1] for row in result]
+            if relation_columns and "updated_at" not in relation_columns:
+                print("   ➕ Adding column: concept_relations.updated_at")
+                conn.execute(text("ALTER TABLE concept_relations ADD COLUMN updated_at TIMESTAMP"))
+            
             # Commit the changes
             conn.commit()
             print("\n✅ Database migration completed successfully!")
@@ -68,6 +76,27 @@ def migrate_database():
     print("📚 Ready for AI content generation!")
 
 
+def move_lessons_to_store():
+    """Move inline Concept.lesson_content lessons into the versioned lesson store"""
+    
+    print("📦 Moving inline lessons into the concept_lessons store...")
+    print("=" * 60)
+    
+    from database.models import Base
+    from config.database import SessionLocal
+    from services.lesson_store import migrate_legacy_lessons, ZSTD_AVAILABLE
+    
+    engine = create_engine(DATABASE_URL)
+    Base.metadata.create_all(engine)
+    
+    db = SessionLocal()
+    try:
+        migrated = migrate_legacy_lessons(db)
+        print(f"   ✅ Moved {migrated} lessons ({'zstd' if ZSTD_AVAILABLE else 'gzip'} compressed)")
+    finally:
+        db.close()
+
+
 def recreate_database():
     """Recreate database from scratch (for development/testing)"""
     
@@ -95,11 +124,14 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Database migration for AI content generation")
     parser.add_argument("--recreate", action="store_true", help="Recreate database from scratch")
+    parser.add_argument("--move-lessons", action="store_true", help="Move inline lessons into the versioned lesson store")
     args = parser.parse_args()
     
     if args.recreate:
         recreate_database()
     else:
         migrate_database()
+        if args.move_lessons:
+            move_lessons_to_store()
         
     print("\n🚀 You can now run: python test_ai_content_generation.py")
\ No newline at end of file
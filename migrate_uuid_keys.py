@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+UUID Key Migration
+Converts existing databases from VARCHAR(36) UUID keys to the compact UUIDKey
+storage (native uuid on PostgreSQL, 16-byte BLOB on SQLite).
+
+The columns to convert are every UUIDKey column in the model metadata.
+Non-UUID strings found in old rows (legacy ids) stop the conversion: they
+would be rewritten to name-based UUIDs (config.database.uuid_key) that no
+longer match the ids Neo4j and API clients hold. Pass --remap-legacy-ids to
+convert them anyway, then rebuild the graph with
+`python bulk_graph_sync.py --mode full --reset`.
+
+PostgreSQL (online, run the phases in order while the application serves
+traffic; each phase can be re-run):
+
+- expand:   add a uuid shadow column next to every key column, a trigger that
+            keeps it in sync on INSERT/UPDATE, and NOT VALID NOT NULL checks
+- backfill: fill the shadow columns in small committed batches
+- index:    build the primary key, unique and secondary indexes on the shadow
+            columns with CREATE INDEX CONCURRENTLY and validate the checks
+- contract: one short transaction that drops the foreign keys and old
+            columns, renames the shadow columns into place and attaches the
+            prebuilt indexes; foreign keys are re-added NOT VALID and
+            validated afterwards without blocking writes
+
+Set UUID_KEY_STORAGE=binary right after contract. Until then keep the
+default UUID_KEY_STORAGE=text; the application refuses to start when the
+setting does not match how the database stores its keys.
+
+SQLite (development, offline): key values are rewritten in place as 16-byte
+blobs in a single transaction. Stop the application first.
+
+Usage:
+    python migrate_uuid_keys.py --status
+    python migrate_uuid_keys.py                      # SQLite
+    python migrate_uuid_keys.py --phase expand       # PostgreSQL, then backfill, index, contract
+    python migrate_uuid_keys.py --remap-legacy-ids   # Also convert non-UUID ids
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List
+import uuid
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from config.database import DATABASE_URL, LEGACY_ID_NAMESPACE, UUIDKey, uuid_key
+from database.models import Base
+from database.models.sqlite_models import USER_PROGRESS_VIEW
+
+PHASES = ["expand", "backfill", "index", "contract"]
+SHADOW_SUFFIX = "__uuid"
+UUID_FUNCTION = "jeseci_uuid_key"
+IS_UUID_FUNCTION = "jeseci_is_uuid"
+UUID_PATTERN = "^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$"
+
+
+def uuid_key_columns() -> Dict[str, List[str]]:
+    """{table: [column, ...]} for every UUIDKey column in the models"""
+    columns: Dict[str, List[str]] = {}
+    for table in Base.metadata.sorted_tables:
+        names = [column.name for column in table.columns if isinstance(column.type, UUIDKey)]
+        if names:
+            columns[table.name] = names
+    return columns
+
+
+def _existing_tables(conn: Connection, wanted: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    tables = set(inspect(conn).get_table_names())
+    return {table: columns for table, columns in wanted.items() if table in tables}
+
+
+def _is_uuid(value) -> int:
+    try:
+        uuid.UUID(str(value))
+        return 1
+    except ValueError:
+        return 0
+
+
+def legacy_key_counts(engine: Engine) -> Dict[str, int]:
+    """Rows per table.column whose text key is not a UUID (would be remapped)"""
+    counts = {}
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.connection.dbapi_connection.create_function(IS_UUID_FUNCTION, 1, _is_uuid, deterministic=True)
+            tables = _existing_tables(conn, uuid_key_columns())
+            predicate = "typeof({column}) = 'text' AND NOT " + IS_UUID_FUNCTION + "({column})"
+            params = {}
+        else:
+            tables = _pending_tables(conn)
+            predicate = "{column} IS NOT NULL AND CAST({column} AS text) !~ :uuid_pattern"
+            params = {"uuid_pattern": UUID_PATTERN}
+        for table, columns in tables.items():
+            for column in columns:
+                rows = conn.execute(text(
+                    f"SELECT COUNT(*) FROM {table} WHERE {predicate.format(column=column)}"
+                ), params).scalar()
+                if rows:
+                    counts[f"{table}.{column}"] = rows
+    return counts
+
+
+# =============================================================================
+# SQLITE
+# =============================================================================
+
+def _sqlite_uuid_blob(value):
+    return None if value is None else uuid_key(value).bytes
+
+
+def sqlite_status(engine: Engine) -> Dict[str, int]:
+    """Rows per table that still hold a text key"""
+    pending = {}
+    with engine.connect() as conn:
+        for table, columns in _existing_tables(conn, uuid_key_columns()).items():
+            predicate = " OR ".join(f"typeof({column}) = 'text'" for column in columns)
+            pending[table] = conn.execute(text(f"SELECT COUNT(*) FROM {table} WHERE {predicate}")).scalar()
+    return pending
+
+
+def migrate_sqlite(engine: Engine) -> Dict[str, int]:
+    """
+    Rewrite text keys as 16-byte blobs. Blobs are stored as-is even in columns
+    declared VARCHAR(36), so the schema itself does not need rebuilding.
+    """
+    converted = {}
+    with engine.connect() as conn:
+        tables = _existing_tables(conn, uuid_key_columns())
+        dbapi_connection = conn.connection.dbapi_connection
+        dbapi_connection.create_function(UUID_FUNCTION, 1, _sqlite_uuid_blob, deterministic=True)
+        # Parent and child keys change in the same transaction; enforcement
+        # would reject the intermediate states (the pragma is a no-op inside
+        # a transaction, so end the inspector's first)
+        conn.commit()
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        for table, columns in tables.items():
+            assignments = ", ".join(
+                f"{column} = CASE WHEN typeof({column}) = 'text' THEN {UUID_FUNCTION}({column}) ELSE {column} END"
+                for column in columns
+            )
+            predicate = " OR ".join(f"typeof({column}) = 'text'" for column in columns)
+            result = conn.execute(text(f"UPDATE {table} SET {assignments} WHERE {predicate}"))
+            converted[table] = result.rowcount
+            print(f"   ✅ {table}: {result.rowcount} rows converted")
+        conn.commit()
+    return converted
+
+
+# =============================================================================
+# POSTGRESQL
+# =============================================================================
+
+def _shadow(column: str) -> str:
+    return f"{column}{SHADOW_SUFFIX}"
+
+
+def _pending_tables(conn: Connection) -> Dict[str, List[str]]:
+    """UUIDKey columns that are not of type uuid yet"""
+    pending: Dict[str, List[str]] = {}
+    for table, columns in _existing_tables(conn, uuid_key_columns()).items():
+        types = {column["name"]: column["type"].__class__.__name__.upper() for column in inspect(conn).get_columns(table)}
+        todo = [column for column in columns if types.get(column) != "UUID"]
+        if todo:
+            pending[table] = todo
+    return pending
+
+
+def _trigger_name(table: str) -> str:
+    return f"{table}_uuid_key_sync"
+
+
+def _check_name(table: str, column: str) -> str:
+    return f"{table}_{column}_uuid_not_null"
+
+
+def postgres_status(engine: Engine) -> Dict[str, int]:
+    """Rows per table whose shadow columns are not filled yet (-1 before expand)"""
+    status = {}
+    with engine.connect() as conn:
+        for table, columns in _pending_tables(conn).items():
+            existing = {column["name"] for column in inspect(conn).get_columns(table)}
+            if not all(_shadow(column) in existing for column in columns):
+                status[table] = -1
+                continue
+            predicate = " OR ".join(f"({c} IS NOT NULL AND {_shadow(c)} IS NULL)" for c in columns)
+            status[table] = conn.execute(text(f"SELECT COUNT(*) FROM {table} WHERE {predicate}")).scalar()
+    return status
+
+
+def postgres_expand(engine: Engine):
+    with engine.begin() as conn:
+        conn.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"'))
+        conn.execute(text(f"""
+            CREATE OR REPLACE FUNCTION {UUID_FUNCTION}(value text) RETURNS uuid AS $$
+            BEGIN
+                RETURN value::uuid;
+            EXCEPTION WHEN invalid_text_representation THEN
+                RETURN uuid_generate_v5('{LEGACY_ID_NAMESPACE}'::uuid, value);
+            END;
+            $$ LANGUAGE plpgsql IMMUTABLE
+        """))
+        for table, columns in _pending_tables(conn).items():
+            nullable = {column["name"]: column["nullable"] for column in inspect(conn).get_columns(table)}
+            for column in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {_shadow(column)} uuid"))
+                if not nullable[column]:
+                    # NOT VALID: no scan now; validated in the index phase
+                    conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {_check_name(table, column)}"))
+                    conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {_check_name(table, column)} "
+                                      f"CHECK ({_shadow(column)} IS NOT NULL) NOT VALID"))
+            assignments = "\n".join(f"NEW.{_shadow(c)} := {UUID_FUNCTION}(NEW.{c});" for c in columns)
+            conn.execute(text(f"""
+                CREATE OR REPLACE FUNCTION {_trigger_name(table)}() RETURNS trigger AS $$
+                BEGIN
+                    {assignments}
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql
+            """))
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {_trigger_name(table)} ON {table}"))
+            conn.execute(text(f"CREATE TRIGGER {_trigger_name(table)} BEFORE INSERT OR UPDATE ON {table} "
+                              f"FOR EACH ROW EXECUTE FUNCTION {_trigger_name(table)}()"))
+            print(f"   ✅ {table}: shadow columns and sync trigger added ({', '.join(columns)})")
+
+
+def postgres_backfill(engine: Engine, batch_size: int):
+    with engine.connect() as conn:
+        tables = _pending_tables(conn)
+    for table, columns in tables.items():
+        predicate = " OR ".join(f"({c} IS NOT NULL AND {_shadow(c)} IS NULL)" for c in columns)
+        assignments = ", ".join(f"{_shadow(c)} = {UUID_FUNCTION}({c})" for c in columns)
+        total = 0
+        while True:
+            # Short transactions keep row locks brief and let autovacuum keep up
+            with engine.begin() as conn:
+                result = conn.execute(text(
+                    f"UPDATE {table} SET {assignments} WHERE ctid = ANY(ARRAY("
+                    f"SELECT ctid FROM {table} WHERE {predicate} LIMIT :batch_size))"
+                ), {"batch_size": batch_size})
+            total += result.rowcount
+            if result.rowcount == 0:
+                break
+        print(f"   ✅ {table}: {total} rows backfilled")
+
+
+def _shadow_indexes(conn: Connection, table: str, columns: List[str]) -> List[dict]:
+    """Primary key, unique and secondary indexes that involve a converted column"""
+    inspector = inspect(conn)
+    indexes = []
+    primary_key = inspector.get_pk_constraint(table)
+    if primary_key["constrained_columns"]:
+        indexes.append({"name": primary_key["name"], "columns": primary_key["constrained_columns"],
+                        "unique": True, "kind": "primary_key"})
+    for constraint in inspector.get_unique_constraints(table):
+        if set(constraint["column_names"]) & set(columns):
+            indexes.append({"name": constraint["name"], "columns": constraint["column_names"],
+                            "unique": True, "kind": "unique_constraint"})
+    constraint_names = {index["name"] for index in indexes}
+    for index in inspector.get_indexes(table):
+        if index["name"] not in constraint_names and set(index["column_names"]) & set(columns):
+            indexes.append({"name": index["name"], "columns": index["column_names"],
+                            "unique": index["unique"], "kind": "index"})
+    for index in indexes:
+        index["shadow_name"] = f"{index['name']}{SHADOW_SUFFIX}"
+        index["shadow_columns"] = [_shadow(c) if c in columns else c for c in index["columns"]]
+    return indexes
+
+
+def postgres_index(engine: Engine):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table, columns in _pending_tables(conn).items():
+            existing = {index["name"]: index for index in inspect(conn).get_indexes(table)}
+            for index in _shadow_indexes(conn, table, columns):
+                if index["shadow_name"] in existing:
+                    # A failed concurrent build leaves an INVALID index behind
+                    valid = conn.execute(text(
+                        "SELECT indisvalid FROM pg_index WHERE indexrelid = CAST(:name AS regclass)"
+                    ), {"name": index["shadow_name"]}).scalar()
+                    if valid:
+                        continue
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY {index['shadow_name']}"))
+                unique = "UNIQUE " if index["unique"] else ""
+                started = time.time()
+                conn.execute(text(f"CREATE {unique}INDEX CONCURRENTLY {index['shadow_name']} "
+                                  f"ON {table} ({', '.join(index['shadow_columns'])})"))
+                print(f"   ✅ {index['shadow_name']} built in {time.time() - started:.1f}s")
+            nullable = {column["name"]: column["nullable"] for column in inspect(conn).get_columns(table)}
+            for column in columns:
+                if not nullable[column]:
+                    # Validation only takes a SHARE UPDATE EXCLUSIVE lock
+                    conn.execute(text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {_check_name(table, column)}"))
+
+
+def postgres_contract(engine: Engine):
+    foreign_keys = []
+    with engine.begin() as conn:
+        conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+        tables = _pending_tables(conn)
+        inspector = inspect(conn)
+
+        # The compatibility view depends on the key columns being swapped
+        conn.execute(text("DROP VIEW IF EXISTS user_progress"))
+
+        # Every foreign key into or out of a converted column must go first
+        for table in inspector.get_table_names():
+            for foreign_key in inspector.get_foreign_keys(table):
+                referred = tables.get(foreign_key["referred_table"], [])
+                if set(foreign_key["referred_columns"]) & set(referred) or \
+                        set(foreign_key["constrained_columns"]) & set(tables.get(table, [])):
+                    foreign_keys.append({**foreign_key, "table": table})
+        for foreign_key in foreign_keys:
+            conn.execute(text(f"ALTER TABLE {foreign_key['table']} DROP CONSTRAINT {foreign_key['name']}"))
+
+        for table, columns in tables.items():
+            indexes = _shadow_indexes(conn, table, columns)
+            nullable = {column["name"]: column["nullable"] for column in inspector.get_columns(table)}
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {_trigger_name(table)} ON {table}"))
+            conn.execute(text(f"DROP FUNCTION IF EXISTS {_trigger_name(table)}()"))
+            for column in columns:
+                # Drops the old primary key and indexes on the column as well
+                conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column} CASCADE"))
+                conn.execute(text(f"ALTER TABLE {table} RENAME COLUMN {_shadow(column)} TO {column}"))
+                if not nullable[column]:
+                    # Instant: the validated check already proves no NULLs
+                    conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL"))
+                    conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {_check_name(table, column)}"))
+            for index in indexes:
+                if index["kind"] == "index":
+                    conn.execute(text(f"ALTER INDEX {index['shadow_name']} RENAME TO {index['name']}"))
+                else:
+                    constraint = "PRIMARY KEY" if index["kind"] == "primary_key" else "UNIQUE"
+                    conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {index['name']} "
+                                      f"{constraint} USING INDEX {index['shadow_name']}"))
+            print(f"   ✅ {table}: {', '.join(columns)} now uuid")
+
+        for foreign_key in foreign_keys:
+            conn.execute(text(
+                f"ALTER TABLE {foreign_key['table']} ADD CONSTRAINT {foreign_key['name']} "
+                f"FOREIGN KEY ({', '.join(foreign_key['constrained_columns'])}) "
+                f"REFERENCES {foreign_key['referred_table']} ({', '.join(foreign_key['referred_columns'])}) NOT VALID"
+            ))
+        if "user_concept_progress" in inspector.get_table_names():
+            conn.execute(text(USER_PROGRESS_VIEW))
+
+    # Validating outside the swap transaction only blocks schema changes
+    with engine.begin() as conn:
+        for foreign_key in foreign_keys:
+            conn.execute(text(f"ALTER TABLE {foreign_key['table']} VALIDATE CONSTRAINT {foreign_key['name']}"))
+    print(f"   ✅ {len(foreign_keys)} foreign keys re-added and validated")
+
+
+def migrate_postgres(engine: Engine, phase: str, batch_size: int):
+    steps = {
+        "expand": lambda: postgres_expand(engine),
+        "backfill": lambda: postgres_backfill(engine, batch_size),
+        "index": lambda: postgres_index(engine),
+        "contract": lambda: postgres_contract(engine),
+    }
+    for name in (PHASES if phase == "all" else [phase]):
+        print(f"\n▶️  {name}")
+        steps[name]()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert VARCHAR(36) UUID keys to native uuid / 16-byte blobs")
+    parser.add_argument("--database-url", default=DATABASE_URL, help="Database to convert (defaults to DATABASE_URL)")
+    parser.add_argument("--phase", choices=PHASES + ["all"], default="all",
+                        help="PostgreSQL migration phase (SQLite always converts in one step)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per PostgreSQL backfill transaction")
+    parser.add_argument("--status", action="store_true", help="Only report rows still holding text keys")
+    parser.add_argument("--remap-legacy-ids", action="store_true",
+                        help="Convert non-UUID ids to name-based UUIDs (resync Neo4j afterwards)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    dialect = engine.dialect.name
+    print(f"🔑 UUID key migration ({dialect})")
+    print("=" * 60)
+
+    if args.status:
+        pending = sqlite_status(engine) if dialect == "sqlite" else postgres_status(engine)
+        for table, rows in pending.items():
+            print(f"   {table:<32} {'not expanded' if rows < 0 else f'{rows} rows pending'}")
+        if not pending:
+            print("   Nothing to convert")
+        for column, rows in legacy_key_counts(engine).items():
+            print(f"   {column:<32} {rows} legacy (non-UUID) ids")
+        return
+
+    legacy = legacy_key_counts(engine)
+    if legacy and not args.remap_legacy_ids:
+        for column, rows in legacy.items():
+            print(f"   ❌ {column}: {rows} legacy (non-UUID) ids")
+        sys.exit("❌ Legacy ids would be remapped to new UUIDs that Neo4j and clients do not know. "
+                 "Rerun with --remap-legacy-ids, then `python bulk_graph_sync.py --mode full --reset`.")
+
+    if dialect == "sqlite":
+        migrate_sqlite(engine)
+    elif dialect == "postgresql":
+        migrate_postgres(engine, args.phase, args.batch_size)
+    else:
+        sys.exit(f"❌ Unsupported database: {dialect}")
+    print("\n🎉 UUID key migration finished")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 # Import our database models
+from config.database import UUIDKey
 from database.models import Base
 
 # this is the Alembic Config object, which provides
@@ -25,6 +26,23 @@ if config.config_file_name is not None:
 # Set target metadata for autogenerate support
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Skip dialect-specific indexes (e.g. PostgreSQL GIN) when comparing against another dialect"""
+    if type_ == "index" and not reflected:
+        ddl_if = getattr(object, "_ddl_if", None)
+        if ddl_if is not None and ddl_if.dialect and ddl_if.dialect != context.get_context().dialect.name:
+            return False
+    return True
+
+
+def compare_type(context, inspected_column, metadata_column, inspected_type, metadata_type):
+    """UUID key storage is converted by migrate_uuid_keys.py, not by migrations"""
+    if isinstance(metadata_column.type, UUIDKey):
+        return False
+    return None
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -49,6 +67,9 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
+        compare_type=compare_type,
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
@@ -69,8 +90,12 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # One transaction per migration, so a migration that builds indexes
+        # CONCURRENTLY (migrations/online_ddl.py) only commits its own work
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object, compare_type=compare_type,
+            transaction_per_migration=True
         )
 
         with context.begin_transaction():
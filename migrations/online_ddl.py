@@ -0,0 +1,62 @@
+"""
+Online schema change helpers for migrations.
+
+On PostgreSQL indexes are created and dropped CONCURRENTLY, outside the
+migration transaction, so reads and writes continue while the index builds
+(a plain CREATE INDEX blocks writes to the table for the whole build). A
+concurrent build that failed leaves an INVALID index behind; it is dropped and
+rebuilt on the next run. Other databases use the plain operations.
+
+Both helpers check for the index first, so migrations stay safe to re-run and
+to run against tables that create_all already built. Because the concurrent
+statements commit the work of the migration done so far, migrations that use
+them must be idempotent (env.py runs one transaction per migration).
+"""
+
+from typing import List, Optional
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _postgres_index_valid(name: str) -> Optional[bool]:
+    """None if the index does not exist, else whether it is valid"""
+    row = op.get_bind().execute(sa.text(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND pg_catalog.pg_table_is_visible(c.oid)"
+    ), {"name": name}).first()
+    return None if row is None else bool(row[0])
+
+
+def index_exists(name: str, table: str) -> bool:
+    if op.get_bind().dialect.name == "postgresql":
+        return _postgres_index_valid(name) is not None
+    return name in {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def create_index(name: str, table: str, columns: List[str], **kwargs):
+    """op.create_index, CONCURRENTLY on PostgreSQL; skipped if the index exists"""
+    if op.get_bind().dialect.name != "postgresql":
+        if not index_exists(name, table):
+            op.create_index(name, table, columns, **kwargs)
+        return
+
+    with op.get_context().autocommit_block():
+        valid = _postgres_index_valid(name)
+        if valid:
+            return
+        if valid is False:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+
+
+def drop_index(name: str, table: str):
+    """op.drop_index, CONCURRENTLY on PostgreSQL; skipped if the index is missing"""
+    if op.get_bind().dialect.name != "postgresql":
+        if index_exists(name, table):
+            op.drop_index(name, table_name=table)
+        return
+
+    with op.get_context().autocommit_block():
+        if _postgres_index_valid(name) is not None:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
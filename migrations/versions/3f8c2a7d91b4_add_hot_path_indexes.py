@@ -0,0 +1,52 @@
+"""Add composite indexes for hot query predicates
+
+Revision ID: 3f8c2a7d91b4
+Revises: e6a8c0d2f375
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online_ddl import create_index, drop_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8c2a7d91b4'
+down_revision: Union[str, Sequence[str], None] = 'e6a8c0d2f375'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('idx_concept_progress_user_status', 'user_concept_progress', ['user_id', 'status']),
+    ('idx_concept_progress_user_accessed', 'user_concept_progress', ['user_id', 'last_accessed']),
+    ('idx_quiz_concept_difficulty', 'quizzes', ['concept_id', 'difficulty_level', 'created_at']),
+    ('idx_attempt_user_started', 'quiz_attempts', ['user_id', 'started_at']),
+    ('idx_concept_category', 'concepts', ['category']),
+    ('idx_concept_domain', 'concepts', ['domain']),
+    ('idx_concept_difficulty', 'concepts', ['difficulty_level']),
+    ('idx_concept_usage', 'concepts', ['usage_frequency']),
+    ('idx_content_active_order', 'concept_content', ['concept_id', 'is_active', 'order_index']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Some of these tables were historically created by create_all rather than
+    # a migration, and create_all may already have built the indexes
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, table, columns in INDEXES:
+        if table in tables:
+            create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, table, _ in reversed(INDEXES):
+        if table in tables:
+            drop_index(name, table)
@@ -0,0 +1,240 @@
+"""Merge user_progress into user_concept_progress
+
+Revision ID: 8d5e1f3a2b67
+Revises: 3f8c2a7d91b4
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from config.database import UUID_KEY_STORAGE, UUIDKey
+from migrations.online_ddl import index_exists
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d5e1f3a2b67'
+down_revision: Union[str, Sequence[str], None] = '3f8c2a7d91b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Columns user_progress had that user_concept_progress did not
+MERGED_COLUMNS = [
+    ('session_id', UUIDKey),
+    ('mastery_level', sa.Float()),
+    ('confidence_level', sa.Float()),
+    ('success_rate', sa.Float()),
+    ('average_score', sa.Float()),
+    ('streak_count', sa.Integer()),
+    ('first_attempt', sa.DateTime()),
+    ('last_review', sa.DateTime()),
+    ('review_count', sa.Integer()),
+    ('next_review_date', sa.DateTime()),
+    ('review_interval', sa.Integer()),
+    ('learning_velocity', sa.Float()),
+    ('struggling_areas', sa.JSON()),
+    ('strengths', sa.JSON()),
+    ('created_at', sa.DateTime()),
+    ('updated_at', sa.DateTime()),
+]
+COPIED = [name for name, _ in MERGED_COLUMNS]
+
+USER_PROGRESS_VIEW = """
+CREATE VIEW user_progress AS
+SELECT progress_id, user_id, concept_id, session_id, mastery_level, confidence_level,
+       time_spent_minutes AS time_spent, first_attempt, last_review, review_count, success_rate,
+       average_score, streak_count, next_review_date, review_interval, learning_velocity,
+       struggling_areas, strengths, created_at, updated_at
+FROM user_concept_progress
+"""
+
+# Mastery at which a concept counts as learned (api/v1/users.py stats)
+MASTERY_COMPLETED = 0.8
+
+
+def _create_user_concept_progress() -> None:
+    # Historically created by create_all rather than a migration
+    op.create_table('user_concept_progress',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', UUIDKey, nullable=False),
+    sa.Column('concept_id', UUIDKey, nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('progress_percent', sa.Integer(), nullable=True),
+    sa.Column('time_spent_minutes', sa.Integer(), nullable=True),
+    sa.Column('last_accessed', sa.DateTime(), nullable=True),
+    sa.Column('user_notes', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['concept_id'], ['concepts.concept_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_user_concept_progress_id', 'user_concept_progress', ['id'], unique=False)
+    op.create_index('idx_concept_progress_unique', 'user_concept_progress', ['user_id', 'concept_id'], unique=True)
+    op.create_index('idx_concept_progress_user_status', 'user_concept_progress', ['user_id', 'status'], unique=False)
+    op.create_index('idx_concept_progress_user_accessed', 'user_concept_progress', ['user_id', 'last_accessed'], unique=False)
+
+
+# A random version-4 UUID in canonical text form, generated by SQLite itself
+SQLITE_UUID4_TEXT = (
+    "lower(hex(randomblob(4))) || '-' || lower(hex(randomblob(2))) || '-4' || "
+    "substr(lower(hex(randomblob(2))), 2) || '-' || substr('89ab', 1 + (abs(random()) % 4), 1) || "
+    "substr(lower(hex(randomblob(2))), 2) || '-' || lower(hex(randomblob(6)))"
+)
+FILL_BATCH_SIZE = 1000
+
+
+def _fill_progress_ids() -> None:
+    """Give rows that never had a user_progress key a new one"""
+    bind = op.get_bind()
+    if bind.dialect.name in ('postgresql', 'sqlite'):
+        # One set-based UPDATE; the key format follows UUIDKey's storage
+        if bind.dialect.name == 'postgresql':
+            new_key = 'gen_random_uuid()::text' if UUID_KEY_STORAGE == 'text' else 'gen_random_uuid()'
+        else:
+            new_key = SQLITE_UUID4_TEXT if UUID_KEY_STORAGE == 'text' else 'randomblob(16)'
+        op.execute(f"UPDATE user_concept_progress SET progress_id = {new_key} WHERE progress_id IS NULL")
+        return
+
+    progress = sa.table('user_concept_progress', sa.column('id', sa.Integer()), sa.column('progress_id', UUIDKey))
+    ids = bind.execute(sa.select(progress.c.id).where(progress.c.progress_id.is_(None))).scalars().all()
+    fill = progress.update().where(progress.c.id == sa.bindparam('row_id')).values(progress_id=sa.bindparam('new_id'))
+    for start in range(0, len(ids), FILL_BATCH_SIZE):
+        bind.execute(fill, [{'row_id': row_id, 'new_id': str(uuid.uuid4())}
+                            for row_id in ids[start:start + FILL_BATCH_SIZE]])
+
+
+def _merge_user_progress() -> None:
+    """Fold user_progress rows into user_concept_progress and drop the table"""
+    # Rows present in both tables: keep the dashboard fields, take the key and
+    # mastery history from user_progress. Both tables counted minutes for the
+    # same study time, so the larger total wins rather than the sum
+    assignments = ", ".join(f"{name} = up.{name}" for name in COPIED)
+    op.execute(f"""
+        UPDATE user_concept_progress SET {assignments}, progress_id = up.progress_id,
+            time_spent_minutes = CASE
+                WHEN COALESCE(up.time_spent, 0) > COALESCE(user_concept_progress.time_spent_minutes, 0)
+                THEN up.time_spent ELSE user_concept_progress.time_spent_minutes END,
+            last_accessed = CASE
+                WHEN user_concept_progress.last_accessed IS NULL
+                  OR up.last_review > user_concept_progress.last_accessed
+                THEN up.last_review ELSE user_concept_progress.last_accessed END
+        FROM user_progress up
+        WHERE up.user_id = user_concept_progress.user_id
+          AND up.concept_id = user_concept_progress.concept_id
+    """)
+
+    # Rows only in user_progress: derive the dashboard fields from mastery
+    op.execute(f"""
+        INSERT INTO user_concept_progress
+            (progress_id, user_id, concept_id, status, progress_percent, time_spent_minutes, last_accessed,
+             {", ".join(COPIED)})
+        SELECT up.progress_id, up.user_id, up.concept_id,
+            CASE WHEN up.mastery_level >= {MASTERY_COMPLETED} THEN 'completed'
+                 WHEN COALESCE(up.mastery_level, 0) > 0 OR COALESCE(up.time_spent, 0) > 0 THEN 'in_progress'
+                 ELSE 'not_started' END,
+            CAST(ROUND(COALESCE(up.mastery_level, 0) * 100) AS INTEGER),
+            COALESCE(up.time_spent, 0),
+            COALESCE(up.last_review, up.updated_at, up.created_at),
+            {", ".join(f"up.{name}" for name in COPIED)}
+        FROM user_progress up
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_concept_progress ucp
+            WHERE ucp.user_id = up.user_id AND ucp.concept_id = up.concept_id
+        )
+    """)
+
+    op.drop_index('idx_progress_user_concept', table_name='user_progress')
+    op.drop_index('idx_progress_next_review', table_name='user_progress')
+    op.drop_index('idx_progress_mastery', table_name='user_progress')
+    op.drop_table('user_progress')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    if 'user_concept_progress' not in tables:
+        _create_user_concept_progress()
+
+    existing = {column['name'] for column in sa.inspect(bind).get_columns('user_concept_progress')}
+    # Batch mode: SQLite cannot add the session_id foreign key with ALTER TABLE
+    with op.batch_alter_table('user_concept_progress') as batch_op:
+        for name, type_ in MERGED_COLUMNS:
+            if name not in existing:
+                batch_op.add_column(sa.Column(name, type_, nullable=True))
+        if 'progress_id' not in existing:
+            batch_op.add_column(sa.Column('progress_id', UUIDKey, nullable=True))
+        if 'session_id' not in existing:
+            batch_op.create_foreign_key('fk_user_concept_progress_session', 'learning_sessions',
+                                        ['session_id'], ['session_id'])
+
+    if 'user_progress' in tables:
+        _merge_user_progress()
+    _fill_progress_ids()
+    if not index_exists('idx_concept_progress_progress_id', 'user_concept_progress'):
+        op.create_index('idx_concept_progress_progress_id', 'user_concept_progress', ['progress_id'], unique=True)
+    op.execute(USER_PROGRESS_VIEW)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    op.execute("DROP VIEW IF EXISTS user_progress")
+
+    op.create_table('user_progress',
+    sa.Column('progress_id', UUIDKey, nullable=False),
+    sa.Column('user_id', UUIDKey, nullable=False),
+    sa.Column('concept_id', UUIDKey, nullable=False),
+    sa.Column('session_id', UUIDKey, nullable=True),
+    sa.Column('mastery_level', sa.Float(), nullable=True),
+    sa.Column('confidence_level', sa.Float(), nullable=True),
+    sa.Column('time_spent', sa.Integer(), nullable=True),
+    sa.Column('first_attempt', sa.DateTime(), nullable=True),
+    sa.Column('last_review', sa.DateTime(), nullable=True),
+    sa.Column('review_count', sa.Integer(), nullable=True),
+    sa.Column('success_rate', sa.Float(), nullable=True),
+    sa.Column('average_score', sa.Float(), nullable=True),
+    sa.Column('streak_count', sa.Integer(), nullable=True),
+    sa.Column('next_review_date', sa.DateTime(), nullable=True),
+    sa.Column('review_interval', sa.Integer(), nullable=True),
+    sa.Column('learning_velocity', sa.Float(), nullable=True),
+    sa.Column('struggling_areas', sa.JSON(), nullable=True),
+    sa.Column('strengths', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['concept_id'], ['concepts.concept_id'], ),
+    sa.ForeignKeyConstraint(['session_id'], ['learning_sessions.session_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('progress_id')
+    )
+    op.create_index('idx_progress_mastery', 'user_progress', ['mastery_level'], unique=False)
+    op.create_index('idx_progress_next_review', 'user_progress', ['next_review_date'], unique=False)
+    op.create_index('idx_progress_user_concept', 'user_progress', ['user_id', 'concept_id'], unique=True)
+
+    # Rows with mastery history go back to user_progress under their own key
+    progress = sa.table('user_concept_progress', sa.column('progress_id', UUIDKey),
+                        sa.column('time_spent_minutes', sa.Integer()),
+                        sa.column('user_id', UUIDKey), sa.column('concept_id', UUIDKey),
+                        *[sa.column(name, type_) for name, type_ in MERGED_COLUMNS])
+    user_progress = sa.table('user_progress', sa.column('progress_id', UUIDKey), sa.column('time_spent', sa.Integer()),
+                             sa.column('user_id', UUIDKey), sa.column('concept_id', UUIDKey),
+                             *[sa.column(name, type_) for name, type_ in MERGED_COLUMNS])
+    rows = bind.execute(
+        sa.select(progress).where(progress.c.mastery_level.isnot(None))
+    ).mappings().all()
+    if rows:
+        op.bulk_insert(user_progress, [
+            {**{key: value for key, value in row.items() if key != 'time_spent_minutes'},
+             'progress_id': row['progress_id'] or str(uuid.uuid4()), 'time_spent': row['time_spent_minutes']}
+            for row in rows
+        ])
+
+    op.drop_index('idx_concept_progress_progress_id', table_name='user_concept_progress')
+    with op.batch_alter_table('user_concept_progress') as batch_op:
+        for name in reversed(COPIED):
+            batch_op.drop_column(name)
+        batch_op.drop_column('progress_id')
@@ -0,0 +1,60 @@
+"""Add generation_jobs for the background lesson pre-generation queue
+
+Revision ID: a1f3c5e7b920
+Revises: ea9a352bef9d
+Create Date: 2026-10-19 08:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online_ddl import create_index, drop_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f3c5e7b920'
+down_revision: Union[str, Sequence[str], None] = 'ea9a352bef9d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, columns)
+INDEXES = [
+    ('idx_generation_job_status', ['status', 'next_attempt_at']),
+    ('idx_generation_job_concept', ['concept_id', 'job_type']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases bootstrapped by init_db() already have the table from create_all
+    if 'generation_jobs' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('generation_jobs',
+        sa.Column('job_id', sa.String(length=36), nullable=False),
+        sa.Column('concept_id', sa.String(length=36), nullable=False),
+        sa.Column('job_type', sa.String(length=30), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('max_attempts', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['concept_id'], ['concepts.concept_id'], ),
+        sa.PrimaryKeyConstraint('job_id')
+        )
+    for name, columns in INDEXES:
+        create_index(name, 'generation_jobs', columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _ in reversed(INDEXES):
+        drop_index(name, 'generation_jobs')
+    op.drop_table('generation_jobs')
@@ -0,0 +1,58 @@
+"""Add practice_question_cache for the content-addressed practice question cache
+
+Revision ID: b2d4f6a8c031
+Revises: a1f3c5e7b920
+Create Date: 2026-10-19 08:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online_ddl import create_index, drop_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a8c031'
+down_revision: Union[str, Sequence[str], None] = 'a1f3c5e7b920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, columns)
+INDEXES = [
+    ('idx_practice_cache_expires', ['expires_at']),
+    ('idx_practice_cache_accessed', ['last_accessed_at']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases bootstrapped by init_db() already have the table from create_all
+    if 'practice_question_cache' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('practice_question_cache',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('variant', sa.Integer(), nullable=False),
+        sa.Column('concept_id', sa.String(length=36), nullable=True),
+        sa.Column('questions', sa.JSON(), nullable=False),
+        sa.Column('model_used', sa.String(length=100), nullable=True),
+        sa.Column('template_version', sa.String(length=20), nullable=True),
+        sa.Column('hit_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_accessed_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['concept_id'], ['concepts.concept_id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('cache_key', 'variant', name='unique_practice_cache_variant')
+        )
+    for name, columns in INDEXES:
+        create_index(name, 'practice_question_cache', columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _ in reversed(INDEXES):
+        drop_index(name, 'practice_question_cache')
+    op.drop_table('practice_question_cache')
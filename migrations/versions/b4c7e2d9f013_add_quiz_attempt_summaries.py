@@ -0,0 +1,49 @@
+"""Add quiz_attempt_summaries for archived quiz attempts
+
+Revision ID: b4c7e2d9f013
+Revises: 8d5e1f3a2b67
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from config.database import UUIDKey
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4c7e2d9f013'
+down_revision: Union[str, Sequence[str], None] = '8d5e1f3a2b67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('quiz_attempt_summaries',
+    sa.Column('user_id', UUIDKey, nullable=False),
+    sa.Column('quiz_id', UUIDKey, nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('completed_attempts', sa.Integer(), nullable=True),
+    sa.Column('passed_attempts', sa.Integer(), nullable=True),
+    sa.Column('perfect_attempts', sa.Integer(), nullable=True),
+    sa.Column('best_percentage', sa.Float(), nullable=True),
+    sa.Column('percentage_sum', sa.Float(), nullable=True),
+    sa.Column('time_taken_sum', sa.Integer(), nullable=True),
+    sa.Column('timed_attempts', sa.Integer(), nullable=True),
+    sa.Column('first_started_at', sa.DateTime(), nullable=True),
+    sa.Column('last_started_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.quiz_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'quiz_id')
+    )
+    op.create_index('idx_attempt_summary_quiz', 'quiz_attempt_summaries', ['quiz_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_attempt_summary_quiz', table_name='quiz_attempt_summaries')
+    op.drop_table('quiz_attempt_summaries')
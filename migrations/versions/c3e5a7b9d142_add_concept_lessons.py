@@ -0,0 +1,105 @@
+"""Add concept_lessons for versioned, compressed lesson storage
+
+Revision ID: c3e5a7b9d142
+Revises: b2d4f6a8c031
+Create Date: 2026-10-19 08:30:00.000000
+
+Lessons stored inline in concepts.lesson_content are moved into the store
+here, so reading a lesson never has to write.
+"""
+from typing import Sequence, Union
+import hashlib
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+from services.lesson_store import compress_lesson, decompress_lesson
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e5a7b9d142'
+down_revision: Union[str, Sequence[str], None] = 'b2d4f6a8c031'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _concept_columns():
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns('concepts')}
+
+
+def _move_legacy_lessons():
+    """Append each inline lesson as version 1 and make it active"""
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT concept_id, lesson_content, lesson_generated_at, lesson_model_used FROM concepts "
+        "WHERE lesson_content IS NOT NULL AND active_lesson_id IS NULL"
+    )).fetchall()
+    for concept_id, content, generated_at, model_used in rows:
+        # Match the key storage of the concepts table (text or 16-byte binary)
+        lesson_id = uuid.uuid4().bytes if isinstance(concept_id, bytes) else str(uuid.uuid4())
+        body, codec = compress_lesson(content)
+        raw = content.encode('utf-8')
+        bind.execute(sa.text(
+            "INSERT INTO concept_lessons (lesson_id, concept_id, version, body, compression, "
+            "content_length, content_sha256, model_used, source, created_at) "
+            "VALUES (:lesson_id, :concept_id, "
+            "(SELECT COALESCE(MAX(version), 0) + 1 FROM concept_lessons WHERE concept_id = :concept_id), "
+            ":body, :compression, :content_length, :content_sha256, :model_used, 'legacy', :created_at)"
+        ), {
+            'lesson_id': lesson_id, 'concept_id': concept_id, 'body': body, 'compression': codec,
+            'content_length': len(raw), 'content_sha256': hashlib.sha256(raw).hexdigest(),
+            'model_used': model_used, 'created_at': generated_at,
+        })
+        bind.execute(sa.text(
+            "UPDATE concepts SET active_lesson_id = :lesson_id, lesson_content = NULL "
+            "WHERE concept_id = :concept_id"
+        ), {'lesson_id': lesson_id, 'concept_id': concept_id})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases bootstrapped by init_db() already have these from create_all
+    if 'concept_lessons' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('concept_lessons',
+        sa.Column('lesson_id', sa.String(length=36), nullable=False),
+        sa.Column('concept_id', sa.String(length=36), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('body', sa.LargeBinary(), nullable=False),
+        sa.Column('compression', sa.String(length=10), nullable=False),
+        sa.Column('content_length', sa.Integer(), nullable=True),
+        sa.Column('content_sha256', sa.String(length=64), nullable=True),
+        sa.Column('model_used', sa.String(length=100), nullable=True),
+        sa.Column('source', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['concept_id'], ['concepts.concept_id'], ),
+        sa.PrimaryKeyConstraint('lesson_id'),
+        sa.UniqueConstraint('concept_id', 'version', name='unique_concept_lesson_version')
+        )
+
+    columns = _concept_columns()
+    if 'active_lesson_id' not in columns:
+        op.add_column('concepts', sa.Column('active_lesson_id', sa.String(length=36), nullable=True))
+    # Only databases built by create_all have the inline lesson columns
+    if 'lesson_content' in columns:
+        _move_legacy_lessons()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    # Put the active lesson back inline so downgrading does not lose it
+    if 'lesson_content' in _concept_columns():
+        rows = bind.execute(sa.text(
+            "SELECT c.concept_id, l.body, l.compression FROM concepts c "
+            "JOIN concept_lessons l ON l.lesson_id = c.active_lesson_id "
+            "WHERE c.lesson_content IS NULL"
+        )).fetchall()
+        for concept_id, body, codec in rows:
+            bind.execute(sa.text(
+                "UPDATE concepts SET lesson_content = :content WHERE concept_id = :concept_id"
+            ), {'content': decompress_lesson(body, codec), 'concept_id': concept_id})
+
+    with op.batch_alter_table('concepts') as batch_op:
+        batch_op.drop_column('active_lesson_id')
+    op.drop_table('concept_lessons')
@@ -0,0 +1,68 @@
+"""Store concept, content and quiz documents as JSONB with GIN indexes
+
+Revision ID: c91d4a6e2f58
+Revises: b4c7e2d9f013
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online_ddl import create_index, drop_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c91d4a6e2f58'
+down_revision: Union[str, Sequence[str], None] = 'b4c7e2d9f013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+JSONB_COLUMNS = {
+    'concepts': ['key_terms', 'synonyms', 'multimedia_resources', 'interactive_elements',
+                 'learning_objectives', 'assessment_criteria', 'practical_applications',
+                 'real_world_examples', 'common_misconceptions', 'teaching_strategies'],
+    'concept_content': ['learning_objectives', 'multimedia_resources', 'external_links', 'code_examples',
+                        'interactive_elements', 'prerequisites', 'practice_questions', 'examples', 'exercises'],
+    'quizzes': ['questions'],
+}
+
+GIN_INDEXES = [
+    ('idx_concept_key_terms_gin', 'concepts', 'key_terms'),
+    ('idx_concept_synonyms_gin', 'concepts', 'synonyms'),
+    ('idx_content_prerequisites_gin', 'concept_content', 'prerequisites'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite keeps JSON text; json_contains falls back to json_each there
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for table, columns in JSONB_COLUMNS.items():
+        if table not in tables:
+            continue
+        alterations = ", ".join(f"ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb" for column in columns)
+        op.execute(f"ALTER TABLE {table} {alterations}")
+    for name, table, column in GIN_INDEXES:
+        if table in tables:
+            create_index(name, table, [column], postgresql_using='gin',
+                         postgresql_ops={column: 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, table, _ in GIN_INDEXES:
+        if table in tables:
+            drop_index(name, table)
+    for table, columns in JSONB_COLUMNS.items():
+        if table not in tables:
+            continue
+        alterations = ", ".join(f"ALTER COLUMN {column} TYPE JSON USING {column}::json" for column in columns)
+        op.execute(f"ALTER TABLE {table} {alterations}")
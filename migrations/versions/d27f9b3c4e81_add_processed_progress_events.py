@@ -0,0 +1,38 @@
+"""Add processed_progress_events for idempotent batch progress updates
+
+Revision ID: d27f9b3c4e81
+Revises: c91d4a6e2f58
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from config.database import UUIDKey
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd27f9b3c4e81'
+down_revision: Union[str, Sequence[str], None] = 'c91d4a6e2f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('processed_progress_events',
+    sa.Column('user_id', UUIDKey, nullable=False),
+    sa.Column('event_id', sa.String(length=64), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'event_id')
+    )
+    op.create_index('idx_processed_progress_events_at', 'processed_progress_events', ['processed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_processed_progress_events_at', table_name='processed_progress_events')
+    op.drop_table('processed_progress_events')
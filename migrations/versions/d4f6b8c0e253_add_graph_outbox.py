@@ -0,0 +1,51 @@
+"""Add graph_outbox for transactional SQL -> Neo4j dual writes
+
+Revision ID: d4f6b8c0e253
+Revises: c3e5a7b9d142
+Create Date: 2026-10-19 08:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online_ddl import create_index, drop_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6b8c0e253'
+down_revision: Union[str, Sequence[str], None] = 'c3e5a7b9d142'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases bootstrapped by init_db() already have the table from create_all
+    inspector = sa.inspect(op.get_bind())
+    if 'graph_outbox' not in inspector.get_table_names():
+        op.create_table('graph_outbox',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('event_type', sa.String(length=30), nullable=False),
+        sa.Column('aggregate_id', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('claimed_by', sa.String(length=36), nullable=True),
+        sa.Column('claimed_at', sa.DateTime(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('dispatched_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    elif 'claimed_at' not in {c['name'] for c in inspector.get_columns('graph_outbox')}:
+        op.add_column('graph_outbox', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+    create_index('idx_graph_outbox_pending', 'graph_outbox', ['status', 'next_attempt_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index('idx_graph_outbox_pending', 'graph_outbox')
+    op.drop_table('graph_outbox')
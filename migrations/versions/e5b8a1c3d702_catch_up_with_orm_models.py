@@ -0,0 +1,153 @@
+"""Create the tables and columns that were only ever built by create_all
+
+Revision ID: e5b8a1c3d702
+Revises: d27f9b3c4e81
+Create Date: 2026-10-19 17:00:00.000000
+
+Content, content progress and the inline lesson columns on concepts were
+added to the models without a migration, so only databases bootstrapped by
+init_db() had them. After this revision a database built with
+`alembic upgrade head` matches the models and init_db() no longer needs
+create_all. Every step checks what exists first, so databases that
+create_all already populated upgrade cleanly.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from config.database import UUIDKey, get_json_type
+from migrations.online_ddl import create_index, drop_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8a1c3d702'
+down_revision: Union[str, Sequence[str], None] = 'd27f9b3c4e81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+JSONDocument = get_json_type()
+
+TABLES = {
+    'concept_content': lambda: op.create_table('concept_content',
+        sa.Column('content_id', UUIDKey, nullable=False),
+        sa.Column('concept_id', UUIDKey, nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('content_type', sa.String(length=50), nullable=False),
+        sa.Column('order_index', sa.Integer(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('learning_objectives', JSONDocument, nullable=True),
+        sa.Column('multimedia_resources', JSONDocument, nullable=True),
+        sa.Column('external_links', JSONDocument, nullable=True),
+        sa.Column('code_examples', JSONDocument, nullable=True),
+        sa.Column('interactive_elements', JSONDocument, nullable=True),
+        sa.Column('difficulty_level', sa.String(length=20), nullable=False),
+        sa.Column('estimated_duration', sa.Integer(), nullable=True),
+        sa.Column('prerequisites', JSONDocument, nullable=True),
+        sa.Column('practice_questions', JSONDocument, nullable=True),
+        sa.Column('examples', JSONDocument, nullable=True),
+        sa.Column('exercises', JSONDocument, nullable=True),
+        sa.Column('completion_rate', sa.Float(), nullable=True),
+        sa.Column('average_score', sa.Float(), nullable=True),
+        sa.Column('engagement_score', sa.Float(), nullable=True),
+        sa.Column('completion_time', sa.Integer(), nullable=True),
+        sa.Column('content_quality_score', sa.Float(), nullable=True),
+        sa.Column('version', sa.String(length=20), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('ai_generated', sa.Boolean(), nullable=True),
+        sa.Column('author', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['concept_id'], ['concepts.concept_id'], ),
+        sa.PrimaryKeyConstraint('content_id')
+    ),
+    'user_content_progress': lambda: op.create_table('user_content_progress',
+        sa.Column('progress_id', UUIDKey, nullable=False),
+        sa.Column('user_id', UUIDKey, nullable=False),
+        sa.Column('content_id', UUIDKey, nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('progress_percent', sa.Float(), nullable=True),
+        sa.Column('time_spent', sa.Integer(), nullable=True),
+        sa.Column('score', sa.Float(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('best_score', sa.Float(), nullable=True),
+        sa.Column('first_accessed', sa.DateTime(), nullable=True),
+        sa.Column('last_accessed', sa.DateTime(), nullable=True),
+        sa.Column('last_completed', sa.DateTime(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('bookmarks', sa.JSON(), nullable=True),
+        sa.Column('difficulty_rating', sa.Float(), nullable=True),
+        sa.Column('next_review', sa.DateTime(), nullable=True),
+        sa.Column('review_count', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['content_id'], ['concept_content.content_id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+        sa.PrimaryKeyConstraint('progress_id')
+    ),
+}
+
+# (table, nullable column, type)
+COLUMNS = [
+    ('concepts', 'lesson_content', sa.Text()),
+    ('concepts', 'lesson_generated_at', sa.DateTime()),
+    ('concepts', 'lesson_model_used', sa.String(length=50)),
+]
+
+# (index name, table, columns, options)
+INDEXES = [
+    ('idx_content_concept', 'concept_content', ['concept_id'], {}),
+    ('idx_content_type', 'concept_content', ['content_type'], {}),
+    ('idx_content_order', 'concept_content', ['concept_id', 'order_index'], {}),
+    ('idx_content_active_order', 'concept_content', ['concept_id', 'is_active', 'order_index'], {}),
+    ('idx_content_progress_user', 'user_content_progress', ['user_id', 'content_id'], {'unique': True}),
+    ('idx_content_progress_status', 'user_content_progress', ['status'], {}),
+    ('idx_content_progress_next_review', 'user_content_progress', ['next_review'], {}),
+]
+
+# GIN indexes are PostgreSQL only (see c91d4a6e2f58); concept_content may not
+# have existed when that revision ran
+GIN_INDEXES = [
+    ('idx_content_prerequisites_gin', 'concept_content', 'prerequisites'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table, create in TABLES.items():
+        if table not in tables:
+            create()
+
+    for table, column, type_ in COLUMNS:
+        if column not in {c['name'] for c in inspector.get_columns(table)}:
+            op.add_column(table, sa.Column(column, type_, nullable=True))
+
+    for name, table, columns, options in INDEXES:
+        create_index(name, table, columns, **options)
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, table, column in GIN_INDEXES:
+            create_index(name, table, [column], postgresql_using='gin',
+                         postgresql_ops={column: 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, table, _ in GIN_INDEXES:
+            if table in tables:
+                drop_index(name, table)
+    for name, table, _, _ in reversed(INDEXES):
+        if table in tables:
+            drop_index(name, table)
+
+    for table, column, _ in reversed(COLUMNS):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column(column)
+
+    # Content progress references concept_content, so drop in reverse order
+    for table in reversed(list(TABLES)):
+        if table in tables:
+            op.drop_table(table)
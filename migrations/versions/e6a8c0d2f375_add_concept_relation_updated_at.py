@@ -0,0 +1,32 @@
+"""Add concept_relations.updated_at for the bulk graph synchronizer
+
+Revision ID: e6a8c0d2f375
+Revises: d4f6b8c0e253
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a8c0d2f375'
+down_revision: Union[str, Sequence[str], None] = 'd4f6b8c0e253'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases bootstrapped by init_db() already have the column from create_all
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('concept_relations')}
+    if 'updated_at' not in columns:
+        op.add_column('concept_relations', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('concept_relations') as batch_op:
+        batch_op.drop_column('updated_at')
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 JAC Programming Lesson Content Population Script
-Populates the lesson_content column with rich tutorial content for each JAC programming concept
+Populates the lesson store with rich tutorial content for each JAC programming concept
 """
 
 import json
@@ -10,6 +10,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from config.database import SessionLocal, engine
 from database.models.sqlite_models import Concept, LearningPath, LearningPathConcept
+from services.lesson_store import save_lesson_version
 
 def populate_lesson_content(db: Session):
     """Populate JAC concepts with rich lesson content"""
@@ -5679,10 +5680,10 @@ With JAC, you write the application once, and it automatically scales to meet wh
     for concept in concepts:
         concept_name = concept.name
         if concept_name in lesson_contents:
-            # Set lesson content to the dedicated lesson_content column
+            # Store the lesson as a new active version in the lesson store
             lesson_content = lesson_contents[concept_name]
             
-            concept.lesson_content = lesson_content
+            save_lesson_version(db, concept, lesson_content, model_used="curated", source="manual", commit=False)
             concept.updated_at = datetime.utcnow()
             
             updated_count += 1
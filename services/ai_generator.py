@@ -1,35 +1,42 @@
 """
 AI Content Generator Service
-Just-in-Time content generation using OpenAI for personalized educational lessons
+Just-in-Time content generation for personalized educational lessons, backed by a
+pluggable LLM provider (OpenAI in production, a local simulator for offline testing)
 """
 
 import os
 import json
 from datetime import datetime
-from typing import List, Optional
-from openai import AsyncOpenAI
+from typing import AsyncIterator, List, Optional
 import asyncio
 import logging
 
+from services.llm_providers import LLMProvider, get_llm_provider
+from services.resilience import llm_dependency
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI Client
-try:
-    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    OPENAI_AVAILABLE = True
-except Exception as e:
-    logger.warning(f"OpenAI client initialization failed: {e}")
-    OPENAI_AVAILABLE = False
+# Lesson generation settings
+AI_MAX_TOKENS = int(os.getenv("AI_MAX_TOKENS", "1500"))
+AI_TEMPERATURE = float(os.getenv("AI_TEMPERATURE", "0.7"))
+
+# Bump when the practice question prompt changes so cached questions are regenerated
+PRACTICE_PROMPT_VERSION = "1"
 
 
 class AIContentGenerator:
     """AI-powered content generation service for educational lessons"""
     
-    def __init__(self):
-        self.client = client if OPENAI_AVAILABLE else None
-        self.available = OPENAI_AVAILABLE
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        self.provider = provider or get_llm_provider()
+        self.available = self.provider.available
+    
+    @property
+    def model_name(self) -> str:
+        """Model identifier recorded alongside generated content"""
+        return self.provider.model
     
     async def generate_concept_lesson(
         self, 
@@ -38,10 +45,11 @@ class AIContentGenerator:
         difficulty: str, 
         related_concepts: Optional[List[str]] = None,
         category: Optional[str] = None,
-        detailed_description: Optional[str] = None
+        detailed_description: Optional[str] = None,
+        allow_fallback: bool = True
     ) -> str:
         """
-        Generates a structured educational lesson using OpenAI.
+        Generates a structured educational lesson using the configured LLM provider.
         
         Args:
             concept_name: The concept to teach
@@ -50,15 +58,109 @@ class AIContentGenerator:
             related_concepts: Related concepts for context
             category: Subcategory within the domain
             detailed_description: Existing description for more context
+            allow_fallback: Return template content instead of raising when the provider fails
             
         Returns:
             Generated lesson content in Markdown format
         """
         
-        if not self.available or not self.client:
+        if not self.available:
+            if not allow_fallback:
+                raise RuntimeError(f"LLM provider '{self.provider.name}' is not available")
             return self._generate_fallback_content(concept_name, domain, difficulty)
         
-        # Construct context-aware prompt
+        prompt = self._build_lesson_prompt(
+            concept_name, domain, difficulty, related_concepts, category, detailed_description
+        )
+        
+        try:
+            logger.info(f"🤖 Generating AI lesson for: {concept_name} ({difficulty} level)")
+            
+            generated_content = await llm_dependency.call(
+                self.provider.complete,
+                self._lesson_messages(prompt),
+                temperature=AI_TEMPERATURE,
+                max_tokens=AI_MAX_TOKENS
+            )
+            
+            final_content = self._lesson_metadata_header(difficulty, domain) + generated_content
+            
+            logger.info(f"✅ Successfully generated lesson for {concept_name}")
+            return final_content
+            
+        except Exception as e:
+            logger.error(f"❌ {self.provider.name} error for {concept_name}: {str(e)}")
+            if not allow_fallback:
+                raise
+            return self._generate_fallback_content(concept_name, domain, difficulty)
+    
+    async def stream_concept_lesson(
+        self,
+        concept_name: str,
+        domain: str,
+        difficulty: str,
+        related_concepts: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        detailed_description: Optional[str] = None,
+        allow_fallback: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of generate_concept_lesson.
+        
+        Yields lesson chunks as soon as the provider produces them. Falls back to the
+        template lesson when the provider is unavailable or fails before the first token
+        (or raises, with allow_fallback=False); errors after partial output are re-raised
+        so the caller can discard it.
+        """
+        
+        if not self.available:
+            if not allow_fallback:
+                raise RuntimeError(f"LLM provider '{self.provider.name}' is not available")
+            for chunk in self._chunk_fallback_content(concept_name, domain, difficulty):
+                yield chunk
+            return
+        
+        prompt = self._build_lesson_prompt(
+            concept_name, domain, difficulty, related_concepts, category, detailed_description
+        )
+        
+        started = False
+        try:
+            logger.info(f"🤖 Streaming AI lesson for: {concept_name} ({difficulty} level)")
+            
+            # The breaker/bulkhead slot is held for the whole stream
+            with llm_dependency.guard():
+                stream = self.provider.stream(
+                    self._lesson_messages(prompt),
+                    temperature=AI_TEMPERATURE,
+                    max_tokens=AI_MAX_TOKENS
+                )
+                
+                async for delta in stream:
+                    if not started:
+                        started = True
+                        yield self._lesson_metadata_header(difficulty, domain)
+                    yield delta
+            
+            logger.info(f"✅ Finished streaming lesson for {concept_name}")
+            
+        except Exception as e:
+            logger.error(f"❌ {self.provider.name} streaming error for {concept_name}: {str(e)}")
+            if started or not allow_fallback:
+                raise
+            for chunk in self._chunk_fallback_content(concept_name, domain, difficulty):
+                yield chunk
+    
+    def _build_lesson_prompt(
+        self,
+        concept_name: str,
+        domain: str,
+        difficulty: str,
+        related_concepts: Optional[List[str]],
+        category: Optional[str],
+        detailed_description: Optional[str]
+    ) -> str:
+        """Construct the context-aware lesson prompt"""
         related_text = ""
         if related_concepts:
             related_text = f"Relate this to: {', '.join(related_concepts)}."
@@ -75,7 +177,7 @@ class AIContentGenerator:
         difficulty_instructions = difficulty_guidance.get(difficulty.lower(), difficulty_guidance["beginner"])
         
         # Create comprehensive prompt
-        prompt = f"""
+        return f"""
         You are an expert tutor in {domain}{category_text}. Create a comprehensive, engaging lesson for the concept: "{concept_name}".
         
         Target Audience: {difficulty} level student.
@@ -108,44 +210,33 @@ class AIContentGenerator:
         
         Make the content engaging, educational, and appropriate for the specified difficulty level.
         """
-        
-        try:
-            logger.info(f"🤖 Generating AI lesson for: {concept_name} ({difficulty} level)")
-            
-            # Call OpenAI
-            response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",  # Cost-effective model
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a helpful, clear, and encouraging educational AI assistant. Create engaging, well-structured lessons that help students understand complex concepts."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=1500
-            )
-            
-            generated_content = response.choices[0].message.content
-            
-            # Add metadata header
-            metadata_header = f"""
+    
+    def _lesson_messages(self, prompt: str) -> List[dict]:
+        """Chat messages for lesson generation"""
+        return [
+            {
+                "role": "system", 
+                "content": "You are a helpful, clear, and encouraging educational AI assistant. Create engaging, well-structured lessons that help students understand complex concepts."
+            },
+            {
+                "role": "user", 
+                "content": prompt
+            }
+        ]
+    
+    def _lesson_metadata_header(self, difficulty: str, domain: str) -> str:
+        """HTML comment header prepended to generated lessons"""
+        return f"""
 <!-- Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} -->
-<!-- Difficulty: {difficulty} | Domain: {domain} | Model: gpt-4o-mini -->
+<!-- Difficulty: {difficulty} | Domain: {domain} | Model: {self.model_name} -->
 
 """
-            
-            final_content = metadata_header + generated_content
-            
-            logger.info(f"✅ Successfully generated lesson for {concept_name}")
-            return final_content
-            
-        except Exception as e:
-            logger.error(f"❌ OpenAI Error for {concept_name}: {str(e)}")
-            return self._generate_fallback_content(concept_name, domain, difficulty)
+    
+    def _chunk_fallback_content(self, concept_name: str, domain: str, difficulty: str) -> List[str]:
+        """Split the fallback lesson into section-sized chunks for streaming"""
+        content = self._generate_fallback_content(concept_name, domain, difficulty)
+        sections = content.split("\n\n")
+        return [section + "\n\n" for section in sections[:-1]] + [sections[-1]]
     
     def _generate_fallback_content(self, concept_name: str, domain: str, difficulty: str) -> str:
         """
@@ -187,12 +278,15 @@ Understanding {concept_name} helps you approach problems more systematically and
         self,
         concept_name: str,
         difficulty: str,
-        question_count: int = 3
+        question_count: int = 3,
+        allow_fallback: bool = True
     ) -> List[dict]:
         """
         Generate practice questions for a concept
         """
-        if not self.available or not self.client:
+        if not self.available:
+            if not allow_fallback:
+                raise RuntimeError(f"LLM provider '{self.provider.name}' is not available")
             return self._generate_fallback_questions(concept_name, difficulty, question_count)
         
         prompt = f"""
@@ -216,26 +310,28 @@ Understanding {concept_name} helps you approach problems more systematically and
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
+            content = await llm_dependency.call(
+                self.provider.complete,
+                [
                     {"role": "system", "content": "You are an educational assessment expert. Create clear, relevant practice questions."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.5,
                 max_tokens=800
             )
-            
-            content = response.choices[0].message.content
             # Parse JSON response
             try:
                 questions = json.loads(content)
                 return questions
             except json.JSONDecodeError:
+                if not allow_fallback:
+                    raise
                 return self._generate_fallback_questions(concept_name, difficulty, question_count)
                 
         except Exception as e:
             logger.error(f"Error generating practice questions: {e}")
+            if not allow_fallback:
+                raise
             return self._generate_fallback_questions(concept_name, difficulty, question_count)
     
     def _generate_fallback_questions(self, concept_name: str, difficulty: str, count: int) -> List[dict]:
@@ -267,7 +363,8 @@ async def generate_lesson_content(
     difficulty: str,
     related_concepts: Optional[List[str]] = None,
     category: Optional[str] = None,
-    detailed_description: Optional[str] = None
+    detailed_description: Optional[str] = None,
+    allow_fallback: bool = True
 ) -> str:
     """Generate lesson content for a concept"""
     return await ai_generator.generate_concept_lesson(
@@ -276,18 +373,58 @@ async def generate_lesson_content(
         difficulty=difficulty,
         related_concepts=related_concepts,
         category=category,
-        detailed_description=detailed_description
+        detailed_description=detailed_description,
+        allow_fallback=allow_fallback
     )
 
 
+async def stream_lesson_content(
+    concept_name: str,
+    domain: str,
+    difficulty: str,
+    related_concepts: Optional[List[str]] = None,
+    category: Optional[str] = None,
+    detailed_description: Optional[str] = None,
+    allow_fallback: bool = True
+) -> AsyncIterator[str]:
+    """Stream lesson content for a concept chunk by chunk"""
+    async for chunk in ai_generator.stream_concept_lesson(
+        concept_name=concept_name,
+        domain=domain,
+        difficulty=difficulty,
+        related_concepts=related_concepts,
+        category=category,
+        detailed_description=detailed_description,
+        allow_fallback=allow_fallback
+    ):
+        yield chunk
+
+
+def fallback_lesson_content(concept_name: str, domain: str, difficulty: str) -> str:
+    """Template lesson used when generation fails"""
+    return ai_generator._generate_fallback_content(concept_name, domain, difficulty)
+
+
+def fallback_lesson_chunks(concept_name: str, domain: str, difficulty: str) -> List[str]:
+    """Template lesson split into section-sized chunks for streaming"""
+    return ai_generator._chunk_fallback_content(concept_name, domain, difficulty)
+
+
 async def generate_practice_questions(
     concept_name: str,
     difficulty: str,
-    question_count: int = 3
+    question_count: int = 3,
+    allow_fallback: bool = True
 ) -> List[dict]:
     """Generate practice questions for a concept"""
     return await ai_generator.generate_practice_questions(
         concept_name=concept_name,
         difficulty=difficulty,
-        question_count=question_count
-    )
\ No newline at end of file
+        question_count=question_count,
+        allow_fallback=allow_fallback
+    )
+
+
+def fallback_practice_questions(concept_name: str, difficulty: str, question_count: int = 3) -> List[dict]:
+    """Template practice questions used when generation fails"""
+    return ai_generator._generate_fallback_questions(concept_name, difficulty, question_count)
@@ -0,0 +1,125 @@
+"""
+Quiz Attempt History
+Aggregates over a user's or a quiz's full attempt history.
+
+Old attempts are moved out of quiz_attempts by archive_quiz_attempts.py and
+compacted into one QuizAttemptSummary row per (user, quiz), so every count,
+best score or average has to combine the live rows with the summaries.
+Both sides are aggregated in SQL; nothing here loads individual attempts.
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from database.models import QuizAttempt, QuizAttemptSummary
+
+COMPLETED = "completed"
+
+
+def user_quiz_overview(db: Session, user_id: str, quiz_ids: List[str]) -> Dict[str, dict]:
+    """
+    Attempts used, best score and pass state per quiz for one user.
+
+    Returns:
+        {quiz_id: {"attempts_used", "best_score", "passed"}} for every quiz_id
+    """
+    overview = {quiz_id: {"attempts_used": 0, "best_score": 0.0, "passed": False} for quiz_id in quiz_ids}
+    if not quiz_ids:
+        return overview
+
+    completed = QuizAttempt.status == COMPLETED
+    live = db.execute(
+        select(
+            QuizAttempt.quiz_id,
+            func.count(QuizAttempt.attempt_id).label("attempts"),
+            func.max(case((completed, QuizAttempt.percentage))).label("best"),
+            func.max(case((and_(completed, QuizAttempt.passed.is_(True)), 1), else_=0)).label("passed")
+        )
+        .where(QuizAttempt.user_id == user_id, QuizAttempt.quiz_id.in_(quiz_ids))
+        .group_by(QuizAttempt.quiz_id)
+    )
+    archived = db.execute(
+        select(QuizAttemptSummary.quiz_id, QuizAttemptSummary.attempts,
+               QuizAttemptSummary.best_percentage.label("best"),
+               QuizAttemptSummary.passed_attempts.label("passed"))
+        .where(QuizAttemptSummary.user_id == user_id, QuizAttemptSummary.quiz_id.in_(quiz_ids))
+    )
+    for row in [*live, *archived]:
+        entry = overview[row.quiz_id]
+        entry["attempts_used"] += row.attempts or 0
+        entry["best_score"] = max(entry["best_score"], row.best or 0.0)
+        entry["passed"] = entry["passed"] or bool(row.passed)
+    return overview
+
+
+def user_attempts_used(db: Session, user_id: str, quiz_id: str) -> int:
+    """Attempts a user has made on a quiz, archived ones included"""
+    return user_quiz_overview(db, user_id, [quiz_id])[quiz_id]["attempts_used"]
+
+
+def quiz_completion_stats(db: Session, quiz_id: str) -> dict:
+    """
+    Totals over every attempt on a quiz.
+
+    Returns:
+        attempts, completed, passed, percentage_sum, best_percentage and
+        time_taken_sum and timed_attempts (time summed over, and count of,
+        completed attempts with a recorded time)
+    """
+    completed = QuizAttempt.status == COMPLETED
+    live = db.execute(
+        select(
+            func.count(QuizAttempt.attempt_id),
+            func.count(case((completed, 1))),
+            func.count(case((and_(completed, QuizAttempt.passed.is_(True)), 1))),
+            func.sum(case((completed, QuizAttempt.percentage), else_=0.0)),
+            func.max(case((completed, QuizAttempt.percentage))),
+            func.sum(case((completed, QuizAttempt.time_taken), else_=0)),
+            func.count(case((and_(completed, QuizAttempt.time_taken.isnot(None)), 1)))
+        ).where(QuizAttempt.quiz_id == quiz_id)
+    ).one()
+    archived = db.execute(
+        select(
+            func.sum(QuizAttemptSummary.attempts),
+            func.sum(QuizAttemptSummary.completed_attempts),
+            func.sum(QuizAttemptSummary.passed_attempts),
+            func.sum(QuizAttemptSummary.percentage_sum),
+            func.max(QuizAttemptSummary.best_percentage),
+            func.sum(QuizAttemptSummary.time_taken_sum),
+            func.sum(QuizAttemptSummary.timed_attempts)
+        ).where(QuizAttemptSummary.quiz_id == quiz_id)
+    ).one()
+
+    bests = [best for best in (live[4], archived[4]) if best is not None]
+    return {
+        "attempts": (live[0] or 0) + (archived[0] or 0),
+        "completed": (live[1] or 0) + (archived[1] or 0),
+        "passed": (live[2] or 0) + (archived[2] or 0),
+        "percentage_sum": (live[3] or 0.0) + (archived[3] or 0.0),
+        "best_percentage": max(bests) if bests else None,
+        "time_taken_sum": (live[5] or 0) + (archived[5] or 0),
+        "timed_attempts": (live[6] or 0) + (archived[6] or 0)
+    }
+
+
+def user_quiz_totals(db: Session, user_id: str) -> dict:
+    """Completed and perfect-score quiz attempts for a user (achievement checks)"""
+    completed = QuizAttempt.status == COMPLETED
+    live = db.execute(
+        select(
+            func.count(QuizAttempt.attempt_id),
+            func.count(case((QuizAttempt.percentage == 1.0, 1)))
+        ).where(QuizAttempt.user_id == user_id, completed)
+    ).one()
+    archived = db.execute(
+        select(
+            func.sum(QuizAttemptSummary.completed_attempts),
+            func.sum(QuizAttemptSummary.perfect_attempts)
+        ).where(QuizAttemptSummary.user_id == user_id)
+    ).one()
+    return {
+        "quizzes_completed": (live[0] or 0) + (archived[0] or 0),
+        "perfect_quiz_scores": (live[1] or 0) + (archived[1] or 0)
+    }
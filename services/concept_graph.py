@@ -0,0 +1,825 @@
+"""
+In-Memory Concept Graph
+Process-local prerequisite graph for recommendations without Neo4j round trips.
+
+The graph is loaded from concept_relations (PREREQUISITE rows, where the
+source concept requires the target) and learning_path_concepts, and stored as
+CSR adjacency arrays in both directions:
+
+- requires: concept -> the concepts it requires
+- unlocks:  concept -> the concepts that require it
+
+Relationship and concept changes made through the API are applied
+incrementally to a small overlay on top of the CSR arrays, which is folded
+back in once it grows past a threshold. A periodic full reload picks up
+changes made by other processes. Reloads build a fresh graph (and write its
+snapshot) in a worker thread and swap it in on the event loop; changes applied
+while a reload is in flight are replayed onto the new graph.
+
+Recommendation semantics mirror the Neo4j query in graph_repository so results
+are identical whether or not the graph database is reachable.
+
+After every load from SQL the graph is exported to a binary snapshot file
+(JSON header with the ID table and metadata, followed by aligned CSR arrays).
+At startup the snapshot is memory-mapped so graph features are served
+immediately, without waiting for SQL or depending on Neo4j, and a fresh SQL
+load replaces it in the background.
+
+Learning plans use precomputed reachability: prerequisite cycles are
+collapsed into strongly connected components and each component's
+transitive prerequisite closure is stored as an int bitset over node
+indices, so the unmet prerequisites of any target are a few bitwise ops.
+After a graph change the closures are rebuilt in a worker thread; until the
+rebuild lands, closures are answered by a traversal of the current graph.
+"""
+
+import asyncio
+import heapq
+import json
+import os
+import struct
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config.database import SessionLocal
+from config.logging_config import get_logger
+from database.models import Concept, LearningPathConcept, concept_relations
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+CONCEPT_GRAPH_ENABLED = os.getenv("CONCEPT_GRAPH_ENABLED", "true").lower() == "true"
+CONCEPT_GRAPH_REFRESH_SECONDS = float(os.getenv("CONCEPT_GRAPH_REFRESH_SECONDS", "300"))
+OVERLAY_COMPACT_THRESHOLD = int(os.getenv("CONCEPT_GRAPH_OVERLAY_COMPACT_THRESHOLD", "1000"))
+SNAPSHOT_PATH = os.getenv(
+    "CONCEPT_GRAPH_SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "concept_graph.snapshot")
+)
+
+SNAPSHOT_MAGIC = b"CGSNAP01"
+SNAPSHOT_ALIGNMENT = 64
+
+PREREQUISITE = "PREREQUISITE"
+RECOMMENDATION_LIMIT = 5
+READINESS_THRESHOLD = 50
+DEFAULT_CONCEPT_MINUTES = 60   # Study time assumed when no path or analytics estimate exists
+
+
+def iter_bits(bits: int) -> Iterable[int]:
+    """Indices of the set bits of an int bitset"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def build_csr(node_count: int, edges: Iterable[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Build (indptr, indices) CSR arrays for directed edges src -> dst"""
+    edge_array = np.array(sorted(set(edges)), dtype=np.int64).reshape(-1, 2)
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    if len(edge_array):
+        np.add.at(indptr, edge_array[:, 0] + 1, 1)
+    np.cumsum(indptr, out=indptr)
+    indices = edge_array[:, 1].astype(np.int32) if len(edge_array) else np.zeros(0, dtype=np.int32)
+    return indptr, indices
+
+
+def strongly_connected_components(adjacency: List[List[int]]) -> Tuple[List[int], List[List[int]]]:
+    """
+    Iterative Tarjan over requires-edges. Components are emitted after every
+    component they require, i.e. prerequisites first.
+    """
+    n = len(adjacency)
+    order = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack: List[int] = []
+    component = [-1] * n
+    components: List[List[int]] = []
+    counter = 0
+
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, iter(adjacency[root]))]
+
+        while work:
+            node, neighbors = work[-1]
+            descended = False
+            for nxt in neighbors:
+                if order[nxt] == -1:
+                    order[nxt] = low[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack[nxt] = True
+                    work.append((nxt, iter(adjacency[nxt])))
+                    descended = True
+                    break
+                if on_stack[nxt]:
+                    low[node] = min(low[node], order[nxt])
+            if descended:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == order[node]:
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = len(components)
+                    members.append(member)
+                    if member == node:
+                        break
+                components.append(members)
+
+    return component, components
+
+
+def build_reachability(adjacency: List[List[int]]) -> Tuple[List[int], List[int]]:
+    """
+    Transitive prerequisite closure of every component as a bitset.
+
+    Works on a private copy of the adjacency so it can run in a worker thread.
+
+    Returns:
+        (component of each node, closure bitset of each component)
+    """
+    component, components = strongly_connected_components(adjacency)
+    member_bits = [sum(1 << m for m in members) for members in components]
+    closures = [0] * len(components)
+
+    for c, members in enumerate(components):
+        closure = member_bits[c] if len(members) > 1 else 0
+        for member in members:
+            for prerequisite in adjacency[member]:
+                pc = component[prerequisite]
+                if pc != c:
+                    closure |= member_bits[pc] | closures[pc]
+        closures[c] = closure
+
+    return component, closures
+
+
+class ConceptGraph:
+    """CSR prerequisite graph with an incremental overlay"""
+
+    def __init__(self):
+        self.ready = False
+        self.loaded_at: Optional[datetime] = None
+        self.source: Optional[str] = None  # "sql" or "snapshot"
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._reachability_task: Optional[asyncio.Future] = None
+        self._changes_during_reload: Optional[List[Callable[[], None]]] = None
+        self._reset()
+
+    def _reset(self):
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.meta: List[dict] = []
+        self.durations: List[int] = []
+        self.path_sequences: Dict[str, List[Tuple[int, int]]] = {}
+
+        self._requires_indptr = np.zeros(1, dtype=np.int64)
+        self._requires_indices = np.zeros(0, dtype=np.int32)
+        self._unlocks_indptr = np.zeros(1, dtype=np.int64)
+        self._unlocks_indices = np.zeros(0, dtype=np.int32)
+
+        self._added: Set[Tuple[int, int]] = set()
+        self._removed: Set[Tuple[int, int]] = set()
+
+        # Reachability (rebuilt in the background after any graph change); the
+        # closures are current while _reachability_version is _graph_version
+        self._component: List[int] = []
+        self._closures: List[int] = []
+        self._reachability_version: Optional[object] = None
+        self._invalidate_reachability()
+
+    # -------------------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------------------
+
+    def load(self, db: Session):
+        """(Re)build the graph from SQL"""
+        concepts = db.query(
+            Concept.concept_id, Concept.name, Concept.display_name,
+            Concept.description, Concept.difficulty_level, Concept.average_completion_time
+        ).all()
+        relations = db.query(
+            concept_relations.c.concept_id, concept_relations.c.related_concept_id
+        ).filter(concept_relations.c.relationship_type.in_((PREREQUISITE, PREREQUISITE.lower()))).all()
+        path_rows = db.query(
+            LearningPathConcept.path_id, LearningPathConcept.concept_id, LearningPathConcept.sequence_order
+        ).all()
+        path_durations = dict(db.query(
+            LearningPathConcept.concept_id, func.avg(LearningPathConcept.estimated_duration)
+        ).filter(LearningPathConcept.estimated_duration.isnot(None)).group_by(LearningPathConcept.concept_id).all())
+
+        self._reset()
+        for row in concepts:
+            idx = self._add_node(row.concept_id, row.name, row.display_name, row.description, row.difficulty_level)
+            # Curriculum estimates first, then observed completion time
+            minutes = path_durations.get(row.concept_id) or row.average_completion_time
+            if minutes:
+                self.durations[idx] = int(round(minutes))
+
+        edges = [
+            (self.index[source], self.index[target])
+            for source, target in relations
+            if source in self.index and target in self.index
+        ]
+        self._build(edges)
+
+        for path_id, concept_id, sequence_order in path_rows:
+            if concept_id in self.index:
+                self.path_sequences.setdefault(path_id, []).append((sequence_order or 0, self.index[concept_id]))
+        for sequence in self.path_sequences.values():
+            sequence.sort()
+
+        self.ready = True
+        self.loaded_at = datetime.utcnow()
+        self.source = "sql"
+        logger.info(f"🧠 Concept graph loaded: {len(self.ids)} concepts, {len(edges)} prerequisite edges")
+
+    def _build(self, edges: List[Tuple[int, int]]):
+        self._requires_indptr, self._requires_indices = build_csr(len(self.ids), edges)
+        self._unlocks_indptr, self._unlocks_indices = build_csr(len(self.ids), [(t, s) for s, t in edges])
+        self._added.clear()
+        self._removed.clear()
+        self._invalidate_reachability()
+
+    def _add_node(self, concept_id: str, name, display_name, description, difficulty) -> int:
+        idx = len(self.ids)
+        self.ids.append(concept_id)
+        self.index[concept_id] = idx
+        self.meta.append({
+            "name": name,
+            "display_name": display_name,
+            "description": description,
+            "difficulty_level": difficulty
+        })
+        self.durations.append(DEFAULT_CONCEPT_MINUTES)
+        self._invalidate_reachability()
+        return idx
+
+    @staticmethod
+    def _load_fresh() -> "ConceptGraph":
+        """Load a new graph from SQL and write its snapshot (safe in a worker thread)"""
+        fresh = ConceptGraph()
+        db = SessionLocal()
+        try:
+            fresh.load(db)
+        finally:
+            db.close()
+        if SNAPSHOT_PATH:
+            try:
+                fresh.save_snapshot(SNAPSHOT_PATH)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not write concept graph snapshot: {e}")
+        return fresh
+
+    def _adopt(self, fresh: "ConceptGraph"):
+        """Take over the state of a freshly loaded graph, keeping this instance's tasks"""
+        state = {
+            name: value for name, value in vars(fresh).items()
+            if name not in ("_refresh_task", "_reachability_task", "_changes_during_reload")
+        }
+        self.__dict__.update(state)
+
+    def reload(self):
+        """Reload from SQL in the calling thread (scripts and tests)"""
+        self._adopt(self._load_fresh())
+
+    async def reload_async(self):
+        """Reload from SQL in a worker thread, then swap the new graph in"""
+        self._changes_during_reload = []
+        try:
+            fresh = await asyncio.to_thread(self._load_fresh)
+            changes = self._changes_during_reload
+        finally:
+            self._changes_during_reload = None
+        self._adopt(fresh)
+        for change in changes:
+            change()
+
+    # -------------------------------------------------------------------------
+    # Snapshot file
+    # -------------------------------------------------------------------------
+
+    def _snapshot_arrays(self) -> Dict[str, np.ndarray]:
+        """Current adjacency (overlay folded in) and path sequences as flat arrays"""
+        node_count = len(self.ids)
+        if self._added or self._removed or len(self._requires_indptr) != node_count + 1:
+            edges = [(s, t) for s in range(node_count) for t in self.requires(s)]
+            requires_indptr, requires_indices = build_csr(node_count, edges)
+            unlocks_indptr, unlocks_indices = build_csr(node_count, [(t, s) for s, t in edges])
+        else:
+            requires_indptr, requires_indices = self._requires_indptr, self._requires_indices
+            unlocks_indptr, unlocks_indices = self._unlocks_indptr, self._unlocks_indices
+
+        path_lengths = [len(sequence) for sequence in self.path_sequences.values()]
+        steps = [step for sequence in self.path_sequences.values() for step in sequence]
+        return {
+            "requires_indptr": np.asarray(requires_indptr, dtype=np.int64),
+            "requires_indices": np.asarray(requires_indices, dtype=np.int32),
+            "unlocks_indptr": np.asarray(unlocks_indptr, dtype=np.int64),
+            "unlocks_indices": np.asarray(unlocks_indices, dtype=np.int32),
+            "durations": np.array(self.durations, dtype=np.int32),
+            "path_indptr": np.concatenate(([0], np.cumsum(path_lengths, dtype=np.int64))).astype(np.int64),
+            "path_orders": np.array([order for order, _ in steps], dtype=np.int32),
+            "path_nodes": np.array([node for _, node in steps], dtype=np.int32),
+        }
+
+    def save_snapshot(self, path: str = SNAPSHOT_PATH):
+        """Write the graph to a memory-mappable snapshot file (atomically replaced)"""
+        arrays = self._snapshot_arrays()
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+        header = json.dumps({
+            "created_at": (self.loaded_at or datetime.utcnow()).isoformat(),
+            "ids": self.ids,
+            "meta": self.meta,
+            "path_ids": list(self.path_sequences),
+            "arrays": layout
+        }, separators=(",", ":")).encode("utf-8")
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_MAGIC + struct.pack("<Q", len(header)) + header)
+            data_start = -(-f.tell() // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+        logger.debug(f"💾 Concept graph snapshot written: {path} ({data_start + offset} bytes)")
+
+    def load_snapshot(self, path: str = SNAPSHOT_PATH):
+        """Load the graph from a snapshot file, memory-mapping the adjacency arrays"""
+        with open(path, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError(f"Not a concept graph snapshot: {path}")
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length).decode("utf-8"))
+            data_start = -(-f.tell() // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            shape = tuple(spec["shape"])
+            if 0 in shape:
+                arrays[name] = np.zeros(shape, dtype=spec["dtype"])
+            else:
+                arrays[name] = np.memmap(path, dtype=spec["dtype"], mode="r",
+                                         offset=data_start + spec["offset"], shape=shape)
+
+        self._reset()
+        self.ids = header["ids"]
+        self.index = {concept_id: i for i, concept_id in enumerate(self.ids)}
+        self.meta = header["meta"]
+        self.durations = arrays["durations"].tolist()
+        self._requires_indptr, self._requires_indices = arrays["requires_indptr"], arrays["requires_indices"]
+        self._unlocks_indptr, self._unlocks_indices = arrays["unlocks_indptr"], arrays["unlocks_indices"]
+
+        path_indptr, path_orders, path_nodes = arrays["path_indptr"], arrays["path_orders"], arrays["path_nodes"]
+        for i, path_id in enumerate(header["path_ids"]):
+            start, end = int(path_indptr[i]), int(path_indptr[i + 1])
+            self.path_sequences[path_id] = list(zip(path_orders[start:end].tolist(), path_nodes[start:end].tolist()))
+
+        self.ready = True
+        self.loaded_at = datetime.fromisoformat(header["created_at"])
+        self.source = "snapshot"
+        logger.info(f"🧠 Concept graph loaded from snapshot: {len(self.ids)} concepts "
+                    f"({self.loaded_at.isoformat()})")
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    async def start(self):
+        """
+        Serve from the last snapshot right away when one exists, then load from
+        SQL (in the background if the snapshot was used) and keep refreshing.
+        """
+        from_snapshot = False
+        if SNAPSHOT_PATH and os.path.exists(SNAPSHOT_PATH):
+            try:
+                self.load_snapshot(SNAPSHOT_PATH)
+                from_snapshot = True
+            except Exception as e:
+                logger.warning(f"⚠️  Ignoring unreadable concept graph snapshot: {e}")
+        if not from_snapshot:
+            await self.reload_async()
+        if self._refresh_task is None and (from_snapshot or CONCEPT_GRAPH_REFRESH_SECONDS > 0):
+            self._refresh_task = asyncio.create_task(self._refresh_loop(reload_first=from_snapshot))
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    async def _refresh_loop(self, reload_first: bool = False):
+        if not reload_first:
+            await asyncio.sleep(CONCEPT_GRAPH_REFRESH_SECONDS)
+        while True:
+            try:
+                await self.reload_async()
+            except Exception as e:
+                logger.error(f"❌ Concept graph refresh failed: {e}")
+            if CONCEPT_GRAPH_REFRESH_SECONDS <= 0:
+                return
+            await asyncio.sleep(CONCEPT_GRAPH_REFRESH_SECONDS)
+
+    # -------------------------------------------------------------------------
+    # Incremental updates
+    # -------------------------------------------------------------------------
+
+    def upsert_concept(self, concept: Concept):
+        """Add a new concept node or refresh its metadata"""
+        if not self.ready:
+            return
+        if self._changes_during_reload is not None:
+            fields = (concept.concept_id, concept.name, concept.display_name,
+                      concept.description, concept.difficulty_level)
+            self._changes_during_reload.append(lambda: self._upsert_node(*fields))
+        self._upsert_node(concept.concept_id, concept.name, concept.display_name,
+                          concept.description, concept.difficulty_level)
+
+    def _upsert_node(self, concept_id: str, name, display_name, description, difficulty):
+        idx = self.index.get(concept_id)
+        if idx is None:
+            self._add_node(concept_id, name, display_name, description, difficulty)
+        else:
+            self.meta[idx].update(
+                name=name,
+                display_name=display_name,
+                description=description,
+                difficulty_level=difficulty
+            )
+
+    def apply_relationship_change(
+        self,
+        source_id: str,
+        target_id: str,
+        old_type: Optional[str],
+        new_type: Optional[str]
+    ):
+        """Apply a concept_relations change (retype, insert or delete) to the overlay"""
+        if not self.ready:
+            return
+        if self._changes_during_reload is not None:
+            self._changes_during_reload.append(
+                lambda: self._apply_relationship_change(source_id, target_id, old_type, new_type)
+            )
+        self._apply_relationship_change(source_id, target_id, old_type, new_type)
+
+    def _apply_relationship_change(
+        self,
+        source_id: str,
+        target_id: str,
+        old_type: Optional[str],
+        new_type: Optional[str]
+    ):
+        was_prerequisite = (old_type or "").upper() == PREREQUISITE
+        is_prerequisite = (new_type or "").upper() == PREREQUISITE
+        if was_prerequisite == is_prerequisite:
+            return
+
+        source, target = self.index.get(source_id), self.index.get(target_id)
+        if source is None or target is None:
+            # Unknown endpoint (created by another process); pick it up on the next reload
+            return
+
+        edge = (source, target)
+        self._invalidate_reachability()
+        if is_prerequisite:
+            self._removed.discard(edge)
+            if not self._in_base(source, target):
+                self._added.add(edge)
+        else:
+            self._added.discard(edge)
+            if self._in_base(source, target):
+                self._removed.add(edge)
+
+        if len(self._added) + len(self._removed) >= OVERLAY_COMPACT_THRESHOLD:
+            self._compact()
+
+    def _in_base(self, source: int, target: int) -> bool:
+        return target in self._base_neighbors(self._requires_indptr, self._requires_indices, source)
+
+    def _compact(self):
+        """Fold the overlay into fresh CSR arrays"""
+        edges = [(s, t) for s in range(len(self.ids)) for t in self.requires(s)]
+        self._build(edges)
+
+    # -------------------------------------------------------------------------
+    # Adjacency
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _base_neighbors(indptr: np.ndarray, indices: np.ndarray, node: int) -> np.ndarray:
+        if node + 1 >= len(indptr):
+            return indices[0:0]
+        return indices[indptr[node]:indptr[node + 1]]
+
+    def requires(self, node: int) -> List[int]:
+        """Indices of the concepts a concept requires"""
+        base = self._base_neighbors(self._requires_indptr, self._requires_indices, node)
+        result = [int(t) for t in base if (node, int(t)) not in self._removed] if self._removed else base.tolist()
+        if self._added:
+            result.extend(t for s, t in self._added if s == node)
+        return result
+
+    def unlocks(self, node: int) -> List[int]:
+        """Indices of the concepts that require a concept"""
+        base = self._base_neighbors(self._unlocks_indptr, self._unlocks_indices, node)
+        result = [int(s) for s in base if (int(s), node) not in self._removed] if self._removed else base.tolist()
+        if self._added:
+            result.extend(s for s, t in self._added if t == node)
+        return result
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    def _completed_indices(self, completed_ids: Iterable[str]) -> Set[int]:
+        return {self.index[c] for c in completed_ids if c in self.index}
+
+    def readiness(self, concept_id: str, completed_ids: Iterable[str]) -> Optional[dict]:
+        """Prerequisites met / total and readiness percentage for one concept"""
+        node = self.index.get(concept_id)
+        if node is None:
+            return None
+        completed = self._completed_indices(completed_ids)
+        prerequisites = self.requires(node)
+        met = sum(1 for p in prerequisites if p in completed)
+        total = len(prerequisites)
+        return {
+            "concept_id": concept_id,
+            "prerequisites_met": met,
+            "total_prerequisites": total,
+            "readiness_score": (met / total * 100) if total > 0 else 100
+        }
+
+    def recommend(self, completed_ids: Iterable[str], limit: int = RECOMMENDATION_LIMIT) -> List[dict]:
+        """
+        Next-step concepts that require something the user has completed.
+
+        Matches the Cypher recommendation query: candidates are uncompleted
+        concepts with at least one completed prerequisite, ordered by
+        prerequisites met (desc) then difficulty (asc, nulls last), limited,
+        then filtered to readiness >= 50%. concept_id breaks remaining ties.
+        """
+        completed = self._completed_indices(completed_ids)
+        met: Dict[int, int] = defaultdict(int)
+        for done in completed:
+            for candidate in self.unlocks(done):
+                if candidate not in completed:
+                    met[candidate] += 1
+
+        ranked = sorted(
+            met.items(),
+            key=lambda item: (
+                -item[1],
+                self.meta[item[0]]["difficulty_level"] is None,
+                self.meta[item[0]]["difficulty_level"] or "",
+                self.ids[item[0]]
+            )
+        )[:limit]
+
+        recommendations = []
+        for node, prerequisites_met in ranked:
+            total = len(self.requires(node))
+            readiness_score = (prerequisites_met / total * 100) if total > 0 else 100
+            if readiness_score < READINESS_THRESHOLD:
+                continue
+            meta = self.meta[node]
+            recommendations.append({
+                "concept_id": self.ids[node],
+                "name": meta["name"],
+                "title": meta["display_name"],
+                "description": meta["description"],
+                "difficulty": meta["difficulty_level"],
+                "prerequisites_met": prerequisites_met,
+                "total_prerequisites": total,
+                "readiness_score": readiness_score
+            })
+        return recommendations
+
+    def frontier(self, completed_ids: Iterable[str], path_id: Optional[str] = None) -> List[str]:
+        """
+        Uncompleted concepts whose prerequisites are all completed.
+
+        With a path_id the frontier is limited to that learning path and
+        returned in path sequence order; otherwise in topological order.
+        """
+        completed = self._completed_indices(completed_ids)
+        if path_id is not None:
+            nodes = [node for _, node in self.path_sequences.get(path_id, [])]
+        else:
+            nodes = [self.index[c] for c in self.topological_order()]
+        return [
+            self.ids[node] for node in nodes
+            if node not in completed and all(p in completed for p in self.requires(node))
+        ]
+
+    def topological_order(self, concept_ids: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Prerequisites-first ordering (Kahn's algorithm) of all or a subset of
+        concepts. Ties are broken by concept_id; concepts on a prerequisite
+        cycle are appended at the end.
+        """
+        if concept_ids is None:
+            nodes = set(range(len(self.ids)))
+        else:
+            nodes = {self.index[c] for c in concept_ids if c in self.index}
+
+        pending = {node: sum(1 for p in self.requires(node) if p in nodes) for node in nodes}
+        ready = deque(sorted((n for n, count in pending.items() if count == 0), key=lambda n: self.ids[n]))
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+            unlocked = []
+            for dependent in self.unlocks(node):
+                if dependent in pending:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        unlocked.append(dependent)
+            ready.extend(sorted(unlocked, key=lambda n: self.ids[n]))
+
+        if len(order) < len(nodes):
+            cyclic = sorted(set(nodes) - set(order), key=lambda n: self.ids[n])
+            logger.warning(f"⚠️  Prerequisite cycle detected among {len(cyclic)} concepts")
+            order.extend(cyclic)
+        return [self.ids[node] for node in order]
+
+    # -------------------------------------------------------------------------
+    # Reachability and planning
+    # -------------------------------------------------------------------------
+
+    def _invalidate_reachability(self):
+        # A fresh token per change, so a rebuild started before it never lands
+        self._graph_version = object()
+
+    def _schedule_reachability_rebuild(self):
+        """Rebuild the closures in a worker thread (inline when no event loop is running)"""
+        if self._reachability_task is not None:
+            return
+        version = self._graph_version
+        adjacency = [self.requires(node) for node in range(len(self.ids))]
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._install_reachability(version, *build_reachability(adjacency))
+            return
+
+        self._reachability_task = loop.run_in_executor(None, build_reachability, adjacency)
+        self._reachability_task.add_done_callback(
+            lambda future: self._reachability_built(version, future)
+        )
+
+    def _reachability_built(self, version: object, future: asyncio.Future):
+        self._reachability_task = None
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.error(f"❌ Concept graph reachability rebuild failed: {future.exception()}")
+            return
+        # A change that landed meanwhile schedules the next rebuild on demand
+        self._install_reachability(version, *future.result())
+
+    def _install_reachability(self, version: object, component: List[int], closures: List[int]):
+        if version is self._graph_version:
+            self._component = component
+            self._closures = closures
+            self._reachability_version = version
+
+    def _traverse_prerequisites(self, node: int) -> int:
+        """Prerequisite closure of one node by graph traversal (while the bitsets rebuild)"""
+        seen = np.zeros(len(self.ids), dtype=np.uint8)
+        stack = [node]
+        while stack:
+            for prerequisite in self.requires(stack.pop()):
+                if not seen[prerequisite]:
+                    seen[prerequisite] = 1
+                    stack.append(prerequisite)
+        closure = int.from_bytes(np.packbits(seen, bitorder="little").tobytes(), "little")
+        return closure & ~(1 << node)
+
+    def prerequisite_closure(self, node: int) -> int:
+        """Bitset of every concept a concept transitively requires (excluding itself)"""
+        if self._reachability_version is not self._graph_version:
+            self._schedule_reachability_rebuild()
+        if self._reachability_version is self._graph_version:
+            return self._closures[self._component[node]] & ~(1 << node)
+        return self._traverse_prerequisites(node)
+
+    def plan(self, target_id: str, completed_ids: Iterable[str]) -> Optional[dict]:
+        """
+        Minimal study plan for reaching a target concept.
+
+        Unmet prerequisites are the target's transitive closure minus completed
+        concepts and everything beneath them (a completed concept's own
+        prerequisites count as satisfied). Steps come in prerequisite order;
+        among concepts that are ready at the same time the shorter one goes
+        first, so early steps unlock the rest of the plan quickly.
+
+        Returns:
+            dict with steps and time estimates, or None for an unknown target
+        """
+        target = self.index.get(target_id)
+        if target is None:
+            return None
+
+        completed = self._completed_indices(completed_ids)
+        closure = self.prerequisite_closure(target)
+        satisfied = 0
+        for done in completed:
+            if closure >> done & 1:
+                satisfied |= (1 << done) | self.prerequisite_closure(done)
+
+        needed_bits = closure & ~satisfied
+        if target not in completed:
+            needed_bits |= 1 << target
+        needed = set(iter_bits(needed_bits))
+
+        waiting = {node: [p for p in self.requires(node) if p in needed] for node in needed}
+        remaining = {node: len(prerequisites) for node, prerequisites in waiting.items()}
+        ready = [(self.durations[n], self.ids[n], n) for n, count in remaining.items() if count == 0]
+        heapq.heapify(ready)
+
+        order = []
+        while ready:
+            _, _, node = heapq.heappop(ready)
+            order.append(node)
+            for dependent in self.unlocks(node):
+                if dependent in remaining:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        heapq.heappush(ready, (self.durations[dependent], self.ids[dependent], dependent))
+        if len(order) < len(needed):
+            # Prerequisite cycle: append the rest shortest first
+            scheduled = set(order)
+            order.extend(sorted(needed - scheduled, key=lambda n: (self.durations[n], self.ids[n])))
+
+        steps = []
+        cumulative = 0
+        for position, node in enumerate(order, start=1):
+            cumulative += self.durations[node]
+            meta = self.meta[node]
+            steps.append({
+                "step": position,
+                "concept_id": self.ids[node],
+                "title": meta["display_name"],
+                "difficulty": meta["difficulty_level"],
+                "estimated_minutes": self.durations[node],
+                "cumulative_minutes": cumulative,
+                "requires": [self.ids[p] for p in waiting[node]],
+                "is_target": node == target
+            })
+
+        return {
+            "target_concept_id": target_id,
+            "target_completed": target in completed,
+            "total_prerequisites": bin(closure).count("1"),
+            "prerequisites_satisfied": bin(closure & satisfied).count("1"),
+            "steps": steps,
+            "total_minutes": cumulative
+        }
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "concepts": len(self.ids),
+            "prerequisite_edges": int(len(self._requires_indices)) + len(self._added) - len(self._removed),
+            "overlay_added": len(self._added),
+            "overlay_removed": len(self._removed),
+            "learning_paths": len(self.path_sequences),
+            "source": self.source,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None
+        }
+
+
+# Global instance
+concept_graph = ConceptGraph()
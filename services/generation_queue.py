@@ -0,0 +1,420 @@
+"""
+Background Content Generation Queue
+Pre-generates lessons and practice questions ahead of learner requests.
+Practice question jobs fill the variant pool in the practice question cache.
+
+Jobs are persisted in the generation_jobs table so pending work survives
+restarts. An asyncio worker pool drains the table with bounded concurrency,
+a token bucket caps the request rate against the AI provider, and failed jobs
+are retried with exponential backoff. Running jobs hold a lease that their
+worker renews; a job whose lease expired (its worker or process died) is put
+back in the queue, while jobs other processes are still running are left alone.
+"""
+
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from config.database import SessionLocal
+from config.logging_config import get_logger
+from database.models import Concept, GenerationJob
+from services.ai_generator import generate_practice_questions
+from services.lesson_generation import generate_and_store_lesson
+from services.lesson_store import has_lesson
+from services.neighbor_cache import neighbor_cache
+from services.practice_cache import practice_cache_key, pool_is_full, store_questions
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+QUEUE_ENABLED = os.getenv("ENABLE_GENERATION_QUEUE", "true").lower() == "true"
+PREGENERATE_ON_STARTUP = os.getenv("PREGENERATE_LESSONS_ON_STARTUP", "false").lower() == "true"
+QUEUE_CONCURRENCY = int(os.getenv("GENERATION_QUEUE_CONCURRENCY", "2"))
+RATE_LIMIT_PER_MINUTE = float(os.getenv("GENERATION_RATE_LIMIT_PER_MINUTE", "20"))
+RATE_LIMIT_BURST = int(os.getenv("GENERATION_RATE_LIMIT_BURST", "5"))
+MAX_ATTEMPTS = int(os.getenv("GENERATION_MAX_ATTEMPTS", "5"))
+BACKOFF_BASE_SECONDS = float(os.getenv("GENERATION_BACKOFF_BASE_SECONDS", "10"))
+BACKOFF_MAX_SECONDS = float(os.getenv("GENERATION_BACKOFF_MAX_SECONDS", "600"))
+POLL_INTERVAL_SECONDS = float(os.getenv("GENERATION_POLL_INTERVAL_SECONDS", "5"))
+JOB_LEASE_SECONDS = float(os.getenv("GENERATION_JOB_LEASE_SECONDS", "300"))
+
+JOB_TYPE_LESSON = "lesson"
+JOB_TYPE_PRACTICE_QUESTIONS = "practice_questions"
+ACTIVE_STATUSES = ("queued", "in_progress")
+
+
+# =============================================================================
+# RATE LIMITING
+# =============================================================================
+
+class TokenBucket:
+    """Async token bucket limiting calls to `rate` per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Wait until a token is available and consume it"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def available_tokens(self) -> float:
+        self._refill()
+        return round(self.tokens, 2)
+
+
+# =============================================================================
+# JOB MANAGEMENT
+# =============================================================================
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the given attempt number (1-based)"""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def enqueue_job(db: Session, concept_id: str, job_type: str, params: Optional[dict] = None) -> GenerationJob:
+    """Queue a generation job unless an equivalent one is already pending"""
+    existing = db.query(GenerationJob).filter(
+        GenerationJob.concept_id == concept_id,
+        GenerationJob.job_type == job_type,
+        GenerationJob.status.in_(ACTIVE_STATUSES)
+    ).first()
+
+    if existing:
+        return existing
+
+    job = GenerationJob(
+        concept_id=concept_id,
+        job_type=job_type,
+        status="queued",
+        params=params or {},
+        max_attempts=MAX_ATTEMPTS,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def enqueue_missing_lessons(
+    db: Session,
+    limit: Optional[int] = None,
+    include_practice_questions: bool = True,
+    question_count: int = 3
+) -> Dict[str, int]:
+    """Queue lesson (and practice question) jobs for concepts without lesson content"""
+    query = db.query(Concept.concept_id).filter(
+        Concept.active_lesson_id.is_(None),
+        Concept.lesson_content.is_(None)
+    )
+    if limit:
+        query = query.limit(limit)
+    concept_ids = [row[0] for row in query.all()]
+
+    # Load lesson context for the whole batch up front so workers hit the cache
+    neighbor_cache.prefetch(db, concept_ids)
+
+    lessons = 0
+    practice = 0
+    for concept_id in concept_ids:
+        enqueue_job(db, concept_id, JOB_TYPE_LESSON)
+        lessons += 1
+        if include_practice_questions:
+            enqueue_job(db, concept_id, JOB_TYPE_PRACTICE_QUESTIONS, {"question_count": question_count})
+            practice += 1
+
+    logger.info(f"📥 Queued {lessons} lesson jobs and {practice} practice question jobs")
+    return {"lesson_jobs": lessons, "practice_question_jobs": practice}
+
+
+def serialize_job(job: GenerationJob) -> dict:
+    return {
+        "job_id": job.job_id,
+        "concept_id": job.concept_id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "last_error": job.last_error,
+        "next_attempt_at": job.next_attempt_at.isoformat() if job.next_attempt_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None
+    }
+
+
+def get_latest_job(db: Session, concept_id: str, job_type: str) -> Optional[GenerationJob]:
+    """Most recent job of a given type for a concept"""
+    return db.query(GenerationJob).filter(
+        GenerationJob.concept_id == concept_id,
+        GenerationJob.job_type == job_type
+    ).order_by(GenerationJob.created_at.desc()).first()
+
+
+# =============================================================================
+# WORKER POOL
+# =============================================================================
+
+class GenerationQueue:
+    """Asyncio worker pool that drains persisted generation jobs"""
+
+    def __init__(self, concurrency: int = QUEUE_CONCURRENCY, rate_limiter: Optional[TokenBucket] = None):
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = rate_limiter or TokenBucket(RATE_LIMIT_PER_MINUTE / 60.0, RATE_LIMIT_BURST)
+        self.running = False
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._in_flight: Dict[str, str] = {}
+        self.stats = {"completed": 0, "failed": 0, "retried": 0}
+
+    async def start(self):
+        """Recover interrupted jobs and spawn the worker pool"""
+        if self.running:
+            return
+        self._recover_interrupted_jobs()
+        self._wakeup = asyncio.Event()
+        self.running = True
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.concurrency)
+        ]
+        logger.info(f"🚀 Generation queue started with {self.concurrency} workers")
+
+    async def stop(self):
+        """Cancel workers and hand their in-flight jobs back to the queue"""
+        self.running = False
+        interrupted = list(self._in_flight)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if interrupted:
+            self._requeue(interrupted)
+        logger.info("🛑 Generation queue stopped")
+
+    def notify(self):
+        """Wake idle workers after new jobs have been queued"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _recover_interrupted_jobs(self):
+        """Re-queue running jobs whose lease expired without a heartbeat"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            result = db.execute(
+                update(GenerationJob)
+                .where(
+                    GenerationJob.status == "in_progress",
+                    GenerationJob.updated_at < now - timedelta(seconds=JOB_LEASE_SECONDS)
+                )
+                .values(status="queued", next_attempt_at=now, updated_at=now)
+            )
+            db.commit()
+            if result.rowcount:
+                logger.info(f"♻️  Re-queued {result.rowcount} interrupted generation jobs")
+        finally:
+            db.close()
+
+    def _requeue(self, job_ids: List[str]):
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            db.execute(
+                update(GenerationJob)
+                .where(GenerationJob.job_id.in_(job_ids), GenerationJob.status == "in_progress")
+                .values(status="queued", next_attempt_at=now, updated_at=now)
+            )
+            db.commit()
+        except Exception as e:
+            logger.warning(f"⚠️  Could not re-queue interrupted generation jobs: {e}")
+        finally:
+            db.close()
+
+    def _renew_lease(self, job_id: str):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(GenerationJob)
+                .where(GenerationJob.job_id == job_id, GenerationJob.status == "in_progress")
+                .values(updated_at=datetime.utcnow())
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    async def _heartbeat(self, job_id: str):
+        """Renew the job lease while it runs so other processes don't re-queue it"""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                self._renew_lease(job_id)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not renew lease for generation job {job_id}: {e}")
+
+    def _claim_next_job(self) -> Optional[str]:
+        """Atomically move the next due job from queued to in_progress"""
+        db = SessionLocal()
+        try:
+            candidates = db.query(GenerationJob.job_id).filter(
+                GenerationJob.status == "queued",
+                GenerationJob.next_attempt_at <= datetime.utcnow()
+            ).order_by(GenerationJob.created_at.asc()).limit(self.concurrency).all()
+
+            for (job_id,) in candidates:
+                result = db.execute(
+                    update(GenerationJob)
+                    .where(GenerationJob.job_id == job_id, GenerationJob.status == "queued")
+                    .values(
+                        status="in_progress",
+                        started_at=datetime.utcnow(),
+                        updated_at=datetime.utcnow(),
+                        attempts=GenerationJob.attempts + 1
+                    )
+                )
+                db.commit()
+                if result.rowcount == 1:
+                    return job_id
+            return None
+        finally:
+            db.close()
+
+    async def _worker(self, worker_id: int):
+        while self.running:
+            try:
+                job_id = self._claim_next_job()
+                if not job_id:
+                    # Pick up jobs left behind by workers that died elsewhere
+                    self._recover_interrupted_jobs()
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_INTERVAL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                await self.rate_limiter.acquire()
+                self._in_flight[job_id] = f"worker-{worker_id}"
+                heartbeat = asyncio.create_task(self._heartbeat(job_id))
+                try:
+                    await self._run_job(job_id)
+                finally:
+                    heartbeat.cancel()
+                    self._in_flight.pop(job_id, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Generation worker {worker_id} error: {e}")
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+    async def _run_job(self, job_id: str):
+        db = SessionLocal()
+        try:
+            job = db.query(GenerationJob).filter(GenerationJob.job_id == job_id).first()
+            if not job:
+                return
+
+            try:
+                concept = db.query(Concept).filter(Concept.concept_id == job.concept_id).first()
+                if not concept:
+                    raise ValueError(f"Concept {job.concept_id} no longer exists")
+
+                if job.job_type == JOB_TYPE_LESSON:
+                    if not has_lesson(db, concept):
+                        await generate_and_store_lesson(db, concept, allow_fallback=False)
+                elif job.job_type == JOB_TYPE_PRACTICE_QUESTIONS:
+                    question_count = (job.params or {}).get("question_count", 3)
+                    cache_key = practice_cache_key(concept.display_name, concept.difficulty_level, question_count)
+                    if not pool_is_full(db, cache_key):
+                        questions = await generate_practice_questions(
+                            concept_name=concept.display_name,
+                            difficulty=concept.difficulty_level,
+                            question_count=question_count,
+                            allow_fallback=False
+                        )
+                        variant = store_questions(db, cache_key, questions, concept.concept_id)
+                        job.result = {"cache_key": cache_key, "variant": variant}
+                else:
+                    raise ValueError(f"Unknown job type: {job.job_type}")
+
+                job.status = "completed"
+                job.completed_at = datetime.utcnow()
+                job.last_error = None
+                db.commit()
+                self.stats["completed"] += 1
+                logger.info(f"✅ Generation job {job.job_type} completed for concept {job.concept_id}")
+
+                # Keep filling the practice question variant pool one rate-limited job at a time
+                if job.job_type == JOB_TYPE_PRACTICE_QUESTIONS and not pool_is_full(db, cache_key):
+                    enqueue_job(db, job.concept_id, JOB_TYPE_PRACTICE_QUESTIONS, job.params)
+                    self.notify()
+
+            except Exception as e:
+                db.rollback()
+                job = db.query(GenerationJob).filter(GenerationJob.job_id == job_id).first()
+                job.last_error = str(e)[:1000]
+                if job.attempts >= job.max_attempts:
+                    job.status = "failed"
+                    job.completed_at = datetime.utcnow()
+                    self.stats["failed"] += 1
+                    logger.error(f"❌ Generation job {job_id} failed permanently: {e}")
+                else:
+                    delay = backoff_delay(job.attempts)
+                    job.status = "queued"
+                    job.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+                    self.stats["retried"] += 1
+                    logger.warning(f"⚠️  Generation job {job_id} failed (attempt {job.attempts}), retrying in {delay:.0f}s: {e}")
+                db.commit()
+        finally:
+            db.close()
+
+    def status(self, db: Session) -> dict:
+        """Queue depth by status/type plus worker and rate limiter state"""
+        counts = db.query(
+            GenerationJob.job_type, GenerationJob.status, func.count(GenerationJob.job_id)
+        ).group_by(GenerationJob.job_type, GenerationJob.status).all()
+
+        by_type: Dict[str, Dict[str, int]] = {}
+        for job_type, job_status, count in counts:
+            by_type.setdefault(job_type, {})[job_status] = count
+
+        return {
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "in_flight": len(self._in_flight),
+            "rate_limit_per_minute": RATE_LIMIT_PER_MINUTE,
+            "available_tokens": self.rate_limiter.available_tokens(),
+            "jobs": by_type,
+            "processed": dict(self.stats)
+        }
+
+
+# Global instance
+generation_queue = GenerationQueue()
@@ -0,0 +1,554 @@
+"""
+Graph Outbox
+Transactional outbox for SQL -> Neo4j dual writes.
+
+Concept and relationship changes add a graph_outbox row in the same SQL
+transaction as the change itself, so API writes return at SQL speed and a
+graph outage can never lose a write. An asyncio dispatcher drains the outbox
+in id order, groups each batch by event type and applies it with one UNWIND
+Cypher statement per group inside a single Neo4j transaction.
+
+Delivery is at-least-once. Writes are idempotent: every node/edge records the
+outbox sequence (row id) that last wrote it, and older or repeated events are
+skipped, so redelivery after a crash or partial failure is harmless. Failed
+batches are retried with exponential backoff; a failing multi-row batch is
+retried row by row so a single bad event cannot block the rest.
+
+Claimed rows carry a lease (claimed_at) that is renewed while the batch is
+being sent. Recovery only re-queues rows whose lease expired, so it never
+hands out a batch another dispatcher is still writing.
+"""
+
+import asyncio
+import os
+import random
+import re
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+
+from config.database import NEO4J_QUERY_TIMEOUT, SessionLocal, get_neo4j_driver
+from config.logging_config import get_logger
+from database.models import Concept, GraphOutbox
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+OUTBOX_ENABLED = os.getenv("GRAPH_OUTBOX_ENABLED", "true").lower() == "true"
+OUTBOX_BATCH_SIZE = int(os.getenv("GRAPH_OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("GRAPH_OUTBOX_POLL_INTERVAL_SECONDS", "1"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("GRAPH_OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("GRAPH_OUTBOX_BACKOFF_BASE_SECONDS", "2"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("GRAPH_OUTBOX_BACKOFF_MAX_SECONDS", "300"))
+OUTBOX_RETENTION_HOURS = float(os.getenv("GRAPH_OUTBOX_RETENTION_HOURS", "24"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("GRAPH_OUTBOX_LEASE_SECONDS", "60"))
+
+EVENT_CONCEPT_UPSERT = "concept_upsert"
+EVENT_RELATIONSHIP_UPSERT = "relationship_upsert"
+EVENT_RELATIONSHIP_DELETE = "relationship_delete"
+EVENT_RELATIONSHIP_BATCH_UPSERT = "relationship_batch_upsert"
+EVENT_RELATIONSHIP_BATCH_DELETE = "relationship_batch_delete"
+
+# Cypher cannot parameterize relationship types, so only allow-listed types are
+# inlined; a fixed set of types also keeps Neo4j's query plan cache small
+RELATIONSHIP_TYPE_PATTERN = re.compile(r"^[A-Z][A-Z0-9_]*$")
+ALLOWED_RELATIONSHIP_TYPES = frozenset(
+    t.strip().upper()
+    for t in os.getenv("GRAPH_RELATIONSHIP_TYPES", "PREREQUISITE,RELATED_TO,SUB_CONCEPT_OF").split(",")
+    if t.strip()
+)
+
+CONCEPT_UPSERT_CYPHER = """
+UNWIND $rows AS row
+MERGE (c:Concept {concept_id: row.concept_id})
+ON CREATE SET c.created_at = datetime()
+WITH c, row
+WHERE coalesce(c.outbox_seq, 0) < row.seq
+SET c.name = row.name,
+    c.display_name = row.display_name,
+    c.domain = row.domain,
+    c.category = row.category,
+    c.difficulty_level = row.difficulty_level,
+    c.updated_at = datetime(),
+    c.outbox_seq = row.seq
+"""
+
+RELATIONSHIP_UPSERT_CYPHER = """
+UNWIND $rows AS row
+MERGE (source:Concept {{concept_id: row.source_id}})
+MERGE (target:Concept {{concept_id: row.target_id}})
+MERGE (source)-[r:{rel_type}]->(target)
+WITH r, row
+WHERE coalesce(r.outbox_seq, 0) < row.seq
+SET r.strength = row.strength,
+    r.outbox_seq = row.seq
+"""
+
+RELATIONSHIP_DELETE_CYPHER = """
+UNWIND $rows AS row
+MATCH (:Concept {{concept_id: row.source_id}})-[r:{rel_type}]->(:Concept {{concept_id: row.target_id}})
+WHERE coalesce(r.outbox_seq, 0) < row.seq
+DELETE r
+"""
+
+
+def cypher_relationship_type(relationship_type: str) -> str:
+    """Upper-case a relationship type and reject anything unsafe to inline into Cypher"""
+    rel_type = (relationship_type or "").strip().upper()
+    if not RELATIONSHIP_TYPE_PATTERN.match(rel_type):
+        raise ValueError(f"Invalid relationship type: {relationship_type!r}")
+    return rel_type
+
+
+def normalize_relationship_type(relationship_type: str) -> str:
+    """Upper-case a relationship type and reject anything not on the allow-list (enqueue time)"""
+    rel_type = (relationship_type or "").strip().upper()
+    if not RELATIONSHIP_TYPE_PATTERN.match(rel_type) or rel_type not in ALLOWED_RELATIONSHIP_TYPES:
+        raise ValueError(
+            f"Invalid relationship type: {relationship_type!r} "
+            f"(allowed: {', '.join(sorted(ALLOWED_RELATIONSHIP_TYPES))})"
+        )
+    return rel_type
+
+
+# =============================================================================
+# ENQUEUE (same transaction as the SQL change; callers commit)
+# =============================================================================
+
+def enqueue_graph_event(db: Session, event_type: str, aggregate_id: str, payload: dict) -> GraphOutbox:
+    """Add an outbox row to the caller's transaction"""
+    event = GraphOutbox(
+        event_type=event_type,
+        aggregate_id=aggregate_id,
+        payload=payload,
+        status="pending",
+        next_attempt_at=datetime.utcnow()
+    )
+    db.add(event)
+    return event
+
+
+def enqueue_concept_upsert(db: Session, concept: Concept) -> GraphOutbox:
+    """Queue a graph upsert of a concept node"""
+    return enqueue_graph_event(db, EVENT_CONCEPT_UPSERT, str(concept.concept_id), {
+        "concept_id": str(concept.concept_id),
+        "name": concept.name,
+        "display_name": concept.display_name,
+        "domain": concept.domain,
+        "category": concept.category,
+        "difficulty_level": concept.difficulty_level
+    })
+
+
+def enqueue_relationship_upsert(
+    db: Session,
+    source_id: str,
+    target_id: str,
+    relationship_type: str,
+    strength: float = 1.0
+) -> GraphOutbox:
+    """Queue a graph MERGE of a typed relationship between two concepts"""
+    return enqueue_graph_event(db, EVENT_RELATIONSHIP_UPSERT, f"{source_id}|{target_id}", {
+        "source_id": source_id,
+        "target_id": target_id,
+        "relationship_type": normalize_relationship_type(relationship_type),
+        "strength": strength
+    })
+
+
+def enqueue_relationship_delete(db: Session, source_id: str, target_id: str, relationship_type: str) -> GraphOutbox:
+    """Queue removal of a typed relationship between two concepts"""
+    return enqueue_graph_event(db, EVENT_RELATIONSHIP_DELETE, f"{source_id}|{target_id}", {
+        "source_id": source_id,
+        "target_id": target_id,
+        "relationship_type": normalize_relationship_type(relationship_type)
+    })
+
+
+def enqueue_relationship_batch(
+    db: Session,
+    relationship_type: str,
+    upserts: List[dict],
+    deletes: Optional[List[dict]] = None
+) -> List[GraphOutbox]:
+    """
+    Queue many edges of one relationship type as single outbox rows, so the
+    dispatcher writes the whole group with one UNWIND statement.
+
+    Args:
+        upserts: Rows with source_id, target_id and strength
+        deletes: Rows with source_id and target_id to remove for this type
+    """
+    rel_type = normalize_relationship_type(relationship_type)
+    events = []
+    if deletes:
+        events.append(enqueue_graph_event(db, EVENT_RELATIONSHIP_BATCH_DELETE, rel_type, {
+            "relationship_type": rel_type,
+            "rows": deletes
+        }))
+    if upserts:
+        events.append(enqueue_graph_event(db, EVENT_RELATIONSHIP_BATCH_UPSERT, rel_type, {
+            "relationship_type": rel_type,
+            "rows": upserts
+        }))
+    return events
+
+
+def outbox_backoff_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the given attempt number (1-based)"""
+    delay = min(OUTBOX_BACKOFF_MAX_SECONDS, OUTBOX_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+# =============================================================================
+# CYPHER BATCHING
+# =============================================================================
+
+def build_graph_statements(events: List[GraphOutbox]) -> List[tuple]:
+    """
+    Group outbox rows into (cypher, rows) UNWIND statements.
+
+    Concept upserts run first so relationship writes in the same batch find
+    their endpoints; relationship groups are keyed by type because the type
+    must be inlined into the Cypher text. The allow-list is enforced when rows
+    are enqueued, not here, so rows queued before a type left the list still
+    dispatch.
+    """
+    concepts = []
+    upserts: Dict[str, list] = OrderedDict()
+    deletes: Dict[str, list] = OrderedDict()
+
+    for event in events:
+        row = dict(event.payload or {}, seq=event.id)
+        if event.event_type == EVENT_CONCEPT_UPSERT:
+            concepts.append(row)
+        elif event.event_type == EVENT_RELATIONSHIP_UPSERT:
+            upserts.setdefault(cypher_relationship_type(row["relationship_type"]), []).append(row)
+        elif event.event_type == EVENT_RELATIONSHIP_DELETE:
+            deletes.setdefault(cypher_relationship_type(row["relationship_type"]), []).append(row)
+        elif event.event_type in (EVENT_RELATIONSHIP_BATCH_UPSERT, EVENT_RELATIONSHIP_BATCH_DELETE):
+            group = upserts if event.event_type == EVENT_RELATIONSHIP_BATCH_UPSERT else deletes
+            group.setdefault(cypher_relationship_type(row["relationship_type"]), []).extend(
+                dict(edge, seq=event.id) for edge in row["rows"]
+            )
+        else:
+            raise ValueError(f"Unknown graph outbox event type: {event.event_type}")
+
+    statements = []
+    if concepts:
+        statements.append((CONCEPT_UPSERT_CYPHER, concepts))
+    for rel_type, rows in upserts.items():
+        statements.append((RELATIONSHIP_UPSERT_CYPHER.format(rel_type=rel_type), rows))
+    for rel_type, rows in deletes.items():
+        statements.append((RELATIONSHIP_DELETE_CYPHER.format(rel_type=rel_type), rows))
+    return statements
+
+
+def apply_graph_statements(driver, statements: List[tuple]):
+    """
+    Run all statements of a batch in one Neo4j write transaction.
+
+    Uses an explicit transaction rather than execute_write so the driver does
+    not retry internally; the dispatcher owns retries and backoff.
+    """
+    with driver.session() as session:
+        with session.begin_transaction(timeout=NEO4J_QUERY_TIMEOUT) as tx:
+            for cypher, rows in statements:
+                tx.run(cypher, rows=rows).consume()
+            tx.commit()
+
+
+# =============================================================================
+# DISPATCHER
+# =============================================================================
+
+class GraphOutboxDispatcher:
+    """Asyncio task that drains the graph outbox into Neo4j"""
+
+    def __init__(self, batch_size: int = OUTBOX_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_cleanup: Optional[datetime] = None
+        self._claim: Optional[str] = None
+        self.stats = {
+            "dispatched": 0,
+            "failed": 0,
+            "retried": 0,
+            "batches": 0,
+            "last_batch_size": 0,
+            "last_batch_seconds": 0.0,
+            "last_batch_max_lag_seconds": 0.0,
+            "last_dispatch_at": None,
+            "last_error": None
+        }
+
+    async def start(self):
+        """Recover rows with an expired lease and start the dispatch loop"""
+        if self.running:
+            return
+        self._recover_in_flight()
+        self._wakeup = asyncio.Event()
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"🚀 Graph outbox dispatcher started (batch size {self.batch_size})")
+
+    async def stop(self):
+        """Stop the dispatch loop and hand the batch being sent back to the outbox"""
+        self.running = False
+        interrupted = self._claim
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if interrupted:
+            self._requeue_claim(interrupted)
+        logger.info("🛑 Graph outbox dispatcher stopped")
+
+    def notify(self):
+        """Wake the dispatcher after new outbox rows have been committed"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _recover_in_flight(self):
+        """Re-queue in-flight rows whose lease expired without a renewal"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            result = db.execute(
+                update(GraphOutbox)
+                .where(
+                    GraphOutbox.status == "in_flight",
+                    or_(GraphOutbox.claimed_at.is_(None),
+                        GraphOutbox.claimed_at < now - timedelta(seconds=OUTBOX_LEASE_SECONDS))
+                )
+                .values(status="pending", claimed_by=None, claimed_at=None, next_attempt_at=now)
+            )
+            db.commit()
+            if result.rowcount:
+                logger.info(f"♻️  Re-queued {result.rowcount} graph outbox rows with an expired lease")
+        finally:
+            db.close()
+
+    def _requeue_claim(self, claim: str):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(GraphOutbox)
+                .where(GraphOutbox.claimed_by == claim, GraphOutbox.status == "in_flight")
+                .values(status="pending", claimed_by=None, claimed_at=None, next_attempt_at=datetime.utcnow())
+            )
+            db.commit()
+        except Exception as e:
+            logger.warning(f"⚠️  Could not re-queue interrupted graph outbox batch: {e}")
+        finally:
+            db.close()
+
+    def _renew_lease(self, claim: str):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(GraphOutbox)
+                .where(GraphOutbox.claimed_by == claim, GraphOutbox.status == "in_flight")
+                .values(claimed_at=datetime.utcnow())
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    async def _heartbeat(self, claim: str):
+        """Renew the batch lease while it is being sent so other processes don't re-queue it"""
+        while True:
+            await asyncio.sleep(OUTBOX_LEASE_SECONDS / 3)
+            try:
+                self._renew_lease(claim)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not renew lease for graph outbox batch {claim}: {e}")
+
+    def _claim_batch(self, db: Session) -> List[GraphOutbox]:
+        """Claim the next due rows in sequence order"""
+        ids = [row_id for (row_id,) in db.query(GraphOutbox.id).filter(
+            GraphOutbox.status == "pending",
+            GraphOutbox.next_attempt_at <= datetime.utcnow()
+        ).order_by(GraphOutbox.id.asc()).limit(self.batch_size).all()]
+        if not ids:
+            return []
+
+        claim = str(uuid.uuid4())
+        db.execute(
+            update(GraphOutbox)
+            .where(GraphOutbox.id.in_(ids), GraphOutbox.status == "pending")
+            .values(status="in_flight", claimed_by=claim, claimed_at=datetime.utcnow(),
+                    attempts=GraphOutbox.attempts + 1)
+        )
+        db.commit()
+        return db.query(GraphOutbox).filter(
+            GraphOutbox.claimed_by == claim
+        ).order_by(GraphOutbox.id.asc()).all()
+
+    async def _run(self):
+        while self.running:
+            try:
+                dispatched = await self.dispatch_once()
+                if not dispatched:
+                    # Pick up batches left behind by dispatchers that died elsewhere
+                    self._recover_in_flight()
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Graph outbox dispatcher error: {e}")
+                await asyncio.sleep(OUTBOX_POLL_INTERVAL_SECONDS)
+
+    async def dispatch_once(self) -> int:
+        """Dispatch one batch; returns the number of rows written to the graph"""
+        driver = get_neo4j_driver()
+        if not driver:
+            return 0
+
+        db = SessionLocal()
+        try:
+            self._cleanup(db)
+            events = self._claim_batch(db)
+            if not events:
+                return 0
+
+            started = datetime.utcnow()
+            self._claim = events[0].claimed_by
+            heartbeat = asyncio.create_task(self._heartbeat(self._claim))
+            try:
+                try:
+                    await asyncio.to_thread(apply_graph_statements, driver, build_graph_statements(events))
+                    self._mark_dispatched(db, events)
+                except (ServiceUnavailable, SessionExpired) as e:
+                    # Graph unreachable: not the events' fault, so release them without using up attempts
+                    self._release(db, events, e)
+                    return 0
+                except Exception as e:
+                    if len(events) == 1:
+                        self._mark_failed(db, events, e)
+                    else:
+                        logger.warning(f"⚠️  Graph outbox batch of {len(events)} failed, retrying rows individually: {e}")
+                        for event in events:
+                            try:
+                                await asyncio.to_thread(apply_graph_statements, driver, build_graph_statements([event]))
+                                self._mark_dispatched(db, [event])
+                            except Exception as row_error:
+                                self._mark_failed(db, [event], row_error)
+            finally:
+                heartbeat.cancel()
+                self._claim = None
+
+            self.stats["batches"] += 1
+            self.stats["last_batch_size"] = len(events)
+            self.stats["last_batch_seconds"] = round((datetime.utcnow() - started).total_seconds(), 4)
+            return sum(1 for event in events if event.status == "dispatched")
+        finally:
+            db.close()
+
+    def _mark_dispatched(self, db: Session, events: List[GraphOutbox]):
+        now = datetime.utcnow()
+        for event in events:
+            event.status = "dispatched"
+            event.dispatched_at = now
+            event.claimed_by = None
+            event.claimed_at = None
+            event.last_error = None
+        db.commit()
+        self.stats["dispatched"] += len(events)
+        self.stats["last_dispatch_at"] = now.isoformat()
+        self.stats["last_error"] = None
+        self.stats["last_batch_max_lag_seconds"] = round(
+            max((now - event.created_at).total_seconds() for event in events), 4
+        )
+
+    def _release(self, db: Session, events: List[GraphOutbox], error: Exception):
+        retry_at = datetime.utcnow() + timedelta(seconds=OUTBOX_BACKOFF_BASE_SECONDS)
+        for event in events:
+            event.status = "pending"
+            event.claimed_by = None
+            event.claimed_at = None
+            event.attempts = max(0, event.attempts - 1)
+            event.next_attempt_at = retry_at
+        db.commit()
+        self.stats["last_error"] = str(error)[:500]
+        logger.warning(f"⚠️  Neo4j unavailable, {len(events)} graph outbox rows left pending: {error}")
+
+    def _mark_failed(self, db: Session, events: List[GraphOutbox], error: Exception):
+        for event in events:
+            event.last_error = str(error)[:1000]
+            event.claimed_by = None
+            event.claimed_at = None
+            if event.attempts >= OUTBOX_MAX_ATTEMPTS:
+                event.status = "failed"
+                self.stats["failed"] += 1
+                logger.error(f"❌ Graph outbox row {event.id} ({event.event_type}) failed permanently: {error}")
+            else:
+                delay = outbox_backoff_delay(event.attempts)
+                event.status = "pending"
+                event.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+                self.stats["retried"] += 1
+                logger.warning(f"⚠️  Graph outbox row {event.id} failed (attempt {event.attempts}), retrying in {delay:.0f}s: {error}")
+        db.commit()
+        self.stats["last_error"] = str(error)[:500]
+
+    def _cleanup(self, db: Session):
+        """Delete dispatched rows older than the retention window (at most once a minute)"""
+        now = datetime.utcnow()
+        if self._last_cleanup and (now - self._last_cleanup).total_seconds() < 60:
+            return
+        self._last_cleanup = now
+        db.query(GraphOutbox).filter(
+            GraphOutbox.status == "dispatched",
+            GraphOutbox.dispatched_at < now - timedelta(hours=OUTBOX_RETENTION_HOURS)
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    def requeue_failed(self, db: Session) -> int:
+        """Give permanently failed rows a fresh set of attempts"""
+        result = db.execute(
+            update(GraphOutbox)
+            .where(GraphOutbox.status == "failed")
+            .values(status="pending", attempts=0, next_attempt_at=datetime.utcnow())
+        )
+        db.commit()
+        self.notify()
+        return result.rowcount
+
+    def metrics(self, db: Session) -> dict:
+        """Backlog size, replication lag and dispatcher counters"""
+        counts = dict(db.query(GraphOutbox.status, func.count(GraphOutbox.id)).group_by(GraphOutbox.status).all())
+        oldest_pending = db.query(func.min(GraphOutbox.created_at)).filter(
+            GraphOutbox.status.in_(("pending", "in_flight"))
+        ).scalar()
+
+        return {
+            "running": self.running,
+            "batch_size": self.batch_size,
+            "pending": counts.get("pending", 0),
+            "in_flight": counts.get("in_flight", 0),
+            "failed": counts.get("failed", 0),
+            "lag_seconds": round((datetime.utcnow() - oldest_pending).total_seconds(), 3) if oldest_pending else 0.0,
+            "oldest_pending_at": oldest_pending.isoformat() if oldest_pending else None,
+            "processed": dict(self.stats)
+        }
+
+
+# Global instance
+graph_outbox_dispatcher = GraphOutboxDispatcher()
@@ -0,0 +1,82 @@
+"""
+Graph Repository
+Read queries against the Neo4j knowledge graph for async request handlers.
+
+All queries go through the async driver with a server-side transaction
+timeout and a client-side deadline (connection acquisition + query, capped by
+the request deadline), behind the shared Neo4j circuit breaker and bulkhead,
+so a slow or unreachable graph degrades to "no graph data" instead of
+stalling the event loop. Callers get None when the graph could not be
+queried and fall back to SQL or the in-process concept graph.
+
+Writes are not done here; they go through the graph outbox.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import neo4j
+
+from config.database import NEO4J_ACQUISITION_TIMEOUT, NEO4J_QUERY_TIMEOUT, get_async_neo4j_driver
+from config.logging_config import get_logger
+from services.resilience import DependencyUnavailable, neo4j_dependency
+
+logger = get_logger(__name__)
+
+
+RECOMMENDATIONS_QUERY = """
+// Find concepts the user completed
+MATCH (completed:Concept)
+WHERE completed.concept_id IN $completed_ids
+
+// Find 'next step' concepts that REQUIRE the completed ones
+MATCH (next:Concept)-[:PREREQUISITE]->(completed)
+WHERE NOT next.concept_id IN $completed_ids
+
+// Return the concept and how many requirements user has met
+RETURN next.concept_id as concept_id, next.name as name,
+       next.display_name as title, next.description as description,
+       next.difficulty_level as difficulty,
+       count(completed) as prerequisites_met,
+       size((next)-[:PREREQUISITE]->(:Concept)) as total_prerequisites
+ORDER BY prerequisites_met DESC, difficulty, concept_id
+LIMIT $limit
+"""
+
+
+async def run_read(query: str, timeout: Optional[float] = None, **params) -> Optional[List[Dict[str, Any]]]:
+    """
+    Run a read query and return its records as dicts.
+
+    Args:
+        query: Cypher text
+        timeout: Transaction timeout in seconds (defaults to NEO4J_QUERY_TIMEOUT)
+
+    Returns:
+        List of records, or None if Neo4j is unavailable, slow or the query failed
+    """
+    timeout = timeout or NEO4J_QUERY_TIMEOUT
+
+    async def _run():
+        driver = get_async_neo4j_driver()
+        async with driver.session(default_access_mode=neo4j.READ_ACCESS) as session:
+            result = await session.run(neo4j.Query(query, timeout=timeout), params)
+            return await result.data()
+
+    try:
+        return await neo4j_dependency.call(_run, timeout=NEO4J_ACQUISITION_TIMEOUT + timeout)
+    except DependencyUnavailable as e:
+        logger.debug(f"Skipping Neo4j query: {e}")
+    except asyncio.TimeoutError:
+        logger.warning("⚠️  Neo4j query timed out")
+    except Exception as e:
+        logger.warning(f"⚠️  Neo4j query failed: {e}")
+    return None
+
+
+async def fetch_recommendations(completed_ids: List[str], limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+    """
+    Next-step concepts that require something the user has completed.
+    Mirrors ConceptGraph.recommend so both sources rank identically.
+    """
+    return await run_read(RECOMMENDATIONS_QUERY, completed_ids=completed_ids, limit=limit)
@@ -0,0 +1,121 @@
+"""
+Lesson Generation Service
+Shared helpers for generating and persisting concept lessons, used by both the
+request handlers and the background generation queue.
+
+Only provider output is stored. When generation fails or the LLM dependency
+sheds the call (breaker open, bulkhead full), the template lesson is served
+without being saved, so the next request generates a real lesson.
+"""
+
+from typing import AsyncIterator
+
+from sqlalchemy.orm import Session
+
+from config.database import SessionLocal
+from config.logging_config import get_logger
+from database.models import Concept
+from services.ai_generator import (
+    ai_generator, fallback_lesson_chunks, fallback_lesson_content, generate_lesson_content, stream_lesson_content
+)
+from services.lesson_store import save_lesson_version
+from services.neighbor_cache import related_concept_names
+
+logger = get_logger(__name__)
+
+LESSON_MODEL_NAME = ai_generator.model_name
+
+
+async def generate_and_store_lesson(db: Session, concept: Concept, allow_fallback: bool = True) -> str:
+    """
+    Generate a lesson for a concept and store it as the active lesson version.
+
+    Args:
+        db: Active database session (committed on success)
+        concept: Concept to generate the lesson for
+        allow_fallback: Return template content (not stored) when generation
+            fails instead of raising (background jobs disable this to retry later)
+
+    Returns:
+        The lesson content; concept.active_lesson_id is unset when it is the
+        unsaved template
+    """
+    related_concepts = related_concept_names(concept.concept_id, db=db)
+
+    try:
+        generated_content = await generate_lesson_content(
+            concept_name=concept.display_name,
+            domain=concept.domain,
+            difficulty=concept.difficulty_level,
+            related_concepts=related_concepts,
+            category=concept.category,
+            detailed_description=concept.detailed_description,
+            allow_fallback=False
+        )
+    except Exception as e:
+        if not allow_fallback:
+            raise
+        logger.warning(f"⚠️  Serving the template lesson for {concept.display_name} without storing it: {e}")
+        return fallback_lesson_content(concept.display_name, concept.domain, concept.difficulty_level)
+
+    store_lesson_content(db, concept, generated_content)
+
+    logger.info(f"✅ Generated and stored lesson for: {concept.display_name}")
+    return generated_content
+
+
+def store_lesson_content(db: Session, concept: Concept, content: str):
+    """Persist generated lesson content as the concept's new active lesson version"""
+    save_lesson_version(db, concept, content, model_used=LESSON_MODEL_NAME)
+
+
+def stream_and_store_lesson(concept: Concept) -> AsyncIterator[str]:
+    """
+    Stream a lesson chunk by chunk and persist the assembled lesson once complete.
+
+    Concept fields are snapshotted when this is called and the result is saved
+    through a fresh session, so the caller's request-scoped session may close
+    while streaming. A lesson interrupted part-way (client disconnect or
+    provider error) is not saved, and neither is the template lesson streamed
+    when the provider fails or is shed before the first token.
+    """
+    concept_id = concept.concept_id
+    display_name = concept.display_name
+    lesson_inputs = dict(
+        concept_name=display_name,
+        domain=concept.domain,
+        difficulty=concept.difficulty_level,
+        category=concept.category,
+        detailed_description=concept.detailed_description
+    )
+
+    async def lesson_stream():
+        related_concepts = related_concept_names(concept_id)
+
+        chunks = []
+        try:
+            async for chunk in stream_lesson_content(
+                related_concepts=related_concepts, allow_fallback=False, **lesson_inputs
+            ):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            if chunks:
+                raise
+            logger.warning(f"⚠️  Streaming the template lesson for {display_name} without storing it: {e}")
+            for chunk in fallback_lesson_chunks(
+                lesson_inputs["concept_name"], lesson_inputs["domain"], lesson_inputs["difficulty"]
+            ):
+                yield chunk
+            return
+
+        db = SessionLocal()
+        try:
+            stored = db.query(Concept).filter(Concept.concept_id == concept_id).first()
+            if stored:
+                store_lesson_content(db, stored, "".join(chunks))
+                logger.info(f"✅ Streamed and stored lesson for: {display_name}")
+        finally:
+            db.close()
+
+    return lesson_stream()
@@ -0,0 +1,295 @@
+"""
+Lesson Store
+Versioned, compressed storage for generated concept lessons.
+
+Every generated lesson is appended to concept_lessons as a new version and
+Concept.active_lesson_id points at the version being served, so regeneration
+keeps history and can be rolled back. Bodies are compressed with zstd when the
+zstandard package is installed, otherwise gzip.
+
+Lessons stored inline in the legacy Concept.lesson_content column are moved
+into the store by the concept_lessons migration (or in bulk via
+migrate_legacy_lessons); until then they are served read-only.
+
+Version numbers are allocated under a row lock on the concept (SELECT ... FOR
+UPDATE), and a save that still collides on the (concept_id, version) unique
+constraint, e.g. on SQLite where the lock is a no-op, retries with the next
+number.
+"""
+
+import gzip
+import hashlib
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer
+
+from config.logging_config import get_logger
+from database.models import Concept, ConceptLesson
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+VERSION_ALLOCATION_ATTEMPTS = 5
+
+
+# =============================================================================
+# COMPRESSION
+# =============================================================================
+
+def compress_lesson(content: str) -> tuple:
+    """Compress lesson text, returning (body, codec)"""
+    raw = content.encode("utf-8")
+    if ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw), "zstd"
+    return gzip.compress(raw, compresslevel=GZIP_LEVEL), "gzip"
+
+
+def decompress_lesson(body: bytes, codec: str) -> str:
+    """Decompress a stored lesson body"""
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Lesson is zstd-compressed but the zstandard package is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(body)
+    elif codec == "gzip":
+        raw = gzip.decompress(body)
+    else:
+        raw = body
+    return raw.decode("utf-8")
+
+
+# =============================================================================
+# VERSIONS
+# =============================================================================
+
+def serialize_lesson_version(lesson: ConceptLesson, active_lesson_id: Optional[str] = None) -> dict:
+    return {
+        "lesson_id": lesson.lesson_id,
+        "version": lesson.version,
+        "model_used": lesson.model_used,
+        "source": lesson.source,
+        "compression": lesson.compression,
+        "content_length": lesson.content_length,
+        "created_at": lesson.created_at.isoformat() if lesson.created_at else None,
+        "is_active": lesson.lesson_id == active_lesson_id
+    }
+
+
+def save_lesson_version(
+    db: Session,
+    concept: Concept,
+    content: str,
+    model_used: Optional[str] = None,
+    source: str = "ai_generated",
+    activate: bool = True,
+    commit: bool = True
+) -> ConceptLesson:
+    """Append a new lesson version for a concept and (by default) make it active"""
+    body, codec = compress_lesson(content)
+
+    for attempt in range(1, VERSION_ALLOCATION_ATTEMPTS + 1):
+        # Serialize version allocation per concept; concurrent saves wait here
+        db.query(Concept.concept_id).filter(
+            Concept.concept_id == concept.concept_id
+        ).with_for_update().first()
+        latest = db.query(func.max(ConceptLesson.version)).filter(
+            ConceptLesson.concept_id == concept.concept_id
+        ).scalar() or 0
+
+        lesson = ConceptLesson(
+            concept_id=concept.concept_id,
+            version=latest + 1,
+            body=body,
+            compression=codec,
+            content_length=len(content.encode("utf-8")),
+            content_sha256=hashlib.sha256(content.encode("utf-8")).hexdigest(),
+            model_used=model_used,
+            source=source,
+            created_at=datetime.utcnow()
+        )
+        try:
+            with db.begin_nested():
+                db.add(lesson)
+            break
+        except IntegrityError:
+            if attempt == VERSION_ALLOCATION_ATTEMPTS:
+                raise
+            logger.warning(f"⚠️  Lesson version {latest + 1} for {concept.concept_id} taken concurrently, retrying")
+
+    if activate:
+        _activate(concept, lesson)
+    if commit:
+        db.commit()
+    return lesson
+
+
+def _activate(concept: Concept, lesson: ConceptLesson):
+    concept.active_lesson_id = lesson.lesson_id
+    concept.lesson_generated_at = lesson.created_at
+    concept.lesson_model_used = (lesson.model_used or "")[:50] or None
+    # Drop any legacy inline copy once the store holds the lesson
+    concept.lesson_content = None
+
+
+def list_lesson_versions(db: Session, concept_id: str) -> List[ConceptLesson]:
+    """Lesson versions for a concept, newest first (bodies not loaded)"""
+    return db.query(ConceptLesson).filter(
+        ConceptLesson.concept_id == concept_id
+    ).order_by(ConceptLesson.version.desc()).all()
+
+
+def has_lesson(db: Session, concept: Concept) -> bool:
+    """Whether a concept has an active or legacy lesson, without loading any text"""
+    if concept.active_lesson_id:
+        return True
+    return db.query(Concept.concept_id).filter(
+        Concept.concept_id == concept.concept_id,
+        Concept.lesson_content.isnot(None)
+    ).first() is not None
+
+
+def get_active_version(db: Session, concept: Concept) -> Optional[int]:
+    """Version number of the active lesson, without loading its body"""
+    if not concept.active_lesson_id:
+        return None
+    return db.query(ConceptLesson.version).filter(
+        ConceptLesson.lesson_id == concept.active_lesson_id
+    ).scalar()
+
+
+def get_active_lesson(db: Session, concept: Concept) -> Optional[dict]:
+    """
+    Load the active lesson for a concept.
+
+    Returns:
+        dict with content, version, generated_at and model_used, or None when the
+        concept has no lesson
+    """
+    if not concept.active_lesson_id:
+        return _get_legacy_lesson(db, concept)
+
+    lesson = db.query(ConceptLesson).options(undefer(ConceptLesson.body)).filter(
+        ConceptLesson.lesson_id == concept.active_lesson_id
+    ).first()
+    if not lesson:
+        logger.warning(f"⚠️  Active lesson {concept.active_lesson_id} missing for concept {concept.concept_id}")
+        return None
+
+    return {
+        "content": decompress_lesson(lesson.body, lesson.compression),
+        "version": lesson.version,
+        "generated_at": lesson.created_at,
+        "model_used": lesson.model_used
+    }
+
+
+def clear_active_lesson(db: Session, concept: Concept):
+    """Stop serving the active lesson (history is kept) so it will be regenerated"""
+    concept.active_lesson_id = None
+    concept.lesson_generated_at = None
+    concept.lesson_model_used = None
+    concept.lesson_content = None
+    db.commit()
+
+
+def rollback_lesson(db: Session, concept: Concept, version: Optional[int] = None) -> Optional[ConceptLesson]:
+    """
+    Make an earlier lesson version active again.
+
+    Args:
+        version: Version to activate; defaults to the version preceding the active one
+
+    Returns:
+        The activated version, or None if there is nothing to roll back to
+    """
+    query = db.query(ConceptLesson).filter(ConceptLesson.concept_id == concept.concept_id)
+
+    if version is None:
+        active = query.filter(ConceptLesson.lesson_id == concept.active_lesson_id).first() \
+            if concept.active_lesson_id else None
+        if active:
+            query = query.filter(ConceptLesson.version < active.version)
+        target = query.order_by(ConceptLesson.version.desc()).first()
+    else:
+        target = query.filter(ConceptLesson.version == version).first()
+
+    if not target:
+        return None
+
+    _activate(concept, target)
+    db.commit()
+    logger.info(f"⏪ Rolled back lesson for {concept.concept_id} to version {target.version}")
+    return target
+
+
+# =============================================================================
+# LEGACY MIGRATION
+# =============================================================================
+
+def _get_legacy_lesson(db: Session, concept: Concept) -> Optional[dict]:
+    """Serve an inline Concept.lesson_content lesson that has not been moved yet"""
+    row = db.query(Concept.lesson_content, Concept.lesson_generated_at, Concept.lesson_model_used).filter(
+        Concept.concept_id == concept.concept_id,
+        Concept.lesson_content.isnot(None)
+    ).first()
+    if not row:
+        return None
+
+    return {
+        "content": row.lesson_content,
+        "version": None,
+        "generated_at": row.lesson_generated_at,
+        "model_used": row.lesson_model_used
+    }
+
+
+def _migrate_legacy_lesson(db: Session, concept: Concept) -> bool:
+    """Move an inline Concept.lesson_content lesson into the store"""
+    row = db.query(Concept.lesson_content, Concept.lesson_generated_at, Concept.lesson_model_used).filter(
+        Concept.concept_id == concept.concept_id,
+        Concept.lesson_content.isnot(None)
+    ).first()
+    if not row:
+        return False
+
+    lesson = save_lesson_version(
+        db, concept, row.lesson_content,
+        model_used=row.lesson_model_used,
+        source="legacy",
+        commit=False
+    )
+    if row.lesson_generated_at:
+        lesson.created_at = row.lesson_generated_at
+        concept.lesson_generated_at = row.lesson_generated_at
+    db.commit()
+    logger.info(f"📦 Moved legacy lesson for {concept.concept_id} into the lesson store")
+    return True
+
+
+def migrate_legacy_lessons(db: Session, batch_size: int = 100) -> int:
+    """Move every remaining inline lesson into the store, committing per batch"""
+    migrated = 0
+    while True:
+        concepts = db.query(Concept).filter(
+            Concept.active_lesson_id.is_(None),
+            Concept.lesson_content.isnot(None)
+        ).limit(batch_size).all()
+        if not concepts:
+            break
+
+        for concept in concepts:
+            if _migrate_legacy_lesson(db, concept):
+                migrated += 1
+
+    logger.info(f"📦 Migrated {migrated} legacy lessons into the lesson store")
+    return migrated
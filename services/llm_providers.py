@@ -0,0 +1,241 @@
+"""
+LLM Provider Backends
+Pluggable chat-completion backends for the AI content generator.
+
+- OpenAIProvider: production backend using AsyncOpenAI
+- LocalSimulatedProvider: deterministic offline stand-in that simulates
+  time-to-first-token, per-token streaming latency and provider errors, so the
+  lesson and practice-question paths can be load tested without network access
+
+Select the backend with LLM_PROVIDER=openai|local.
+"""
+
+import abc
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+from collections import Counter
+from typing import AsyncIterator, List, Optional
+
+from dotenv import load_dotenv
+
+from config.logging_config import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
+AI_MODEL = os.getenv("AI_MODEL", "gpt-4o-mini")
+
+# Local simulator settings
+LLM_SIM_SEED = os.getenv("LLM_SIM_SEED", "jeseci")
+LLM_SIM_LATENCY_DIST = os.getenv("LLM_SIM_LATENCY_DIST", "lognormal").lower()  # fixed, uniform, lognormal
+LLM_SIM_TTFT_MS = float(os.getenv("LLM_SIM_TTFT_MS", "600"))            # Median time to first token
+LLM_SIM_TTFT_SPREAD = float(os.getenv("LLM_SIM_TTFT_SPREAD", "0.5"))    # lognormal sigma / uniform +- fraction
+LLM_SIM_TOKEN_MS = float(os.getenv("LLM_SIM_TOKEN_MS", "15"))           # Mean inter-token delay
+LLM_SIM_TOKEN_JITTER = float(os.getenv("LLM_SIM_TOKEN_JITTER", "0.3"))  # Inter-token jitter fraction
+LLM_SIM_ERROR_RATE = float(os.getenv("LLM_SIM_ERROR_RATE", "0.0"))      # Failure before the first token
+LLM_SIM_STREAM_ERROR_RATE = float(os.getenv("LLM_SIM_STREAM_ERROR_RATE", "0.0"))  # Failure mid-stream
+
+
+class LLMProviderError(Exception):
+    """Raised by providers when a completion cannot be produced"""
+
+
+# =============================================================================
+# PROVIDER INTERFACE
+# =============================================================================
+
+class LLMProvider(abc.ABC):
+    """Chat-completion backend interface"""
+
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+        self.available = True
+
+    @abc.abstractmethod
+    async def complete(self, messages: List[dict], temperature: float, max_tokens: int) -> str:
+        """Return the full completion text"""
+
+    @abc.abstractmethod
+    def stream(self, messages: List[dict], temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        """Yield completion text chunks as they are produced"""
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions backend"""
+
+    name = "openai"
+
+    def __init__(self, model: str = AI_MODEL):
+        super().__init__(model)
+        try:
+            from openai import AsyncOpenAI
+            self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        except Exception as e:
+            logger.warning(f"OpenAI client initialization failed: {e}")
+            self.client = None
+            self.available = False
+
+    async def complete(self, messages: List[dict], temperature: float, max_tokens: int) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+
+    async def stream(self, messages: List[dict], temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+
+class LocalSimulatedProvider(LLMProvider):
+    """
+    Deterministic offline LLM stand-in.
+
+    Output text and timings are derived from a seeded RNG keyed on the request
+    (messages, temperature, max_tokens) and how many times that same request has
+    been seen, so a replayed load test produces the same content, latency samples
+    and injected failures regardless of how concurrent requests interleave, while
+    retries and repeated prompts (practice question variants) still differ.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        model: str = "local-simulator",
+        seed: str = LLM_SIM_SEED,
+        latency_dist: str = LLM_SIM_LATENCY_DIST,
+        ttft_ms: float = LLM_SIM_TTFT_MS,
+        ttft_spread: float = LLM_SIM_TTFT_SPREAD,
+        token_ms: float = LLM_SIM_TOKEN_MS,
+        token_jitter: float = LLM_SIM_TOKEN_JITTER,
+        error_rate: float = LLM_SIM_ERROR_RATE,
+        stream_error_rate: float = LLM_SIM_STREAM_ERROR_RATE
+    ):
+        super().__init__(model)
+        self.seed = seed
+        self.latency_dist = latency_dist
+        self.ttft_ms = ttft_ms
+        self.ttft_spread = ttft_spread
+        self.token_ms = token_ms
+        self.token_jitter = token_jitter
+        self.error_rate = error_rate
+        self.stream_error_rate = stream_error_rate
+        self._repeats: Counter = Counter()
+
+    def _rng(self, messages: List[dict], temperature: float, max_tokens: int) -> random.Random:
+        request = json.dumps([messages, temperature, max_tokens], sort_keys=True)
+        digest = hashlib.sha256(request.encode()).hexdigest()
+        self._repeats[digest] += 1
+        return random.Random(f"{self.seed}:{digest}:{self._repeats[digest]}")
+
+    def _first_token_delay(self, rng: random.Random) -> float:
+        base = self.ttft_ms / 1000.0
+        if self.latency_dist == "fixed":
+            return base
+        if self.latency_dist == "uniform":
+            return max(0.0, rng.uniform(base * (1 - self.ttft_spread), base * (1 + self.ttft_spread)))
+        return rng.lognormvariate(math.log(base), self.ttft_spread) if base > 0 else 0.0
+
+    def _token_delay(self, rng: random.Random) -> float:
+        base = self.token_ms / 1000.0
+        return max(0.0, base * (1 + rng.uniform(-self.token_jitter, self.token_jitter)))
+
+    def _render(self, messages: List[dict], max_tokens: int, rng: random.Random) -> List[str]:
+        """Build the simulated response and split it into token-sized pieces"""
+        prompt = messages[-1]["content"] if messages else ""
+
+        question_match = re.search(r"Generate (\d+) practice questions for the concept \"(.+?)\"", prompt)
+        if question_match:
+            count = int(question_match.group(1))
+            name = question_match.group(2)
+            text = json.dumps([
+                {
+                    "question": f"Which statement best describes {name}? (variant {rng.randint(1, 999)})",
+                    "options": [
+                        f"A) {name} solves a specific class of problems",
+                        "B) It only applies in theory",
+                        "C) It replaces the need for design",
+                        "D) It has no practical use"
+                    ],
+                    "correct_answer": "A",
+                    "explanation": f"{name} provides a structured approach to a specific class of problems."
+                }
+                for _ in range(count)
+            ], indent=2)
+        else:
+            name_match = re.search(r"lesson for the concept: \"(.+?)\"", prompt)
+            name = name_match.group(1) if name_match else "this concept"
+            sections = [
+                "1. The Big Picture", "2. Simple Explanation", "3. Key Details",
+                "4. Real-World Examples", "5. Why It Matters", "6. Common Misconceptions"
+            ]
+            filler = ("structured", "practical", "foundational", "composable", "measurable", "reusable")
+            body = [f"# {name}\n"]
+            for section in sections:
+                words = " ".join(rng.choice(filler) for _ in range(rng.randint(40, 90)))
+                body.append(f"## {section}\n{name} is {words}.\n")
+            text = "\n".join(body)
+
+        # Roughly four characters per token, capped at max_tokens
+        tokens = [text[i:i + 4] for i in range(0, len(text), 4)]
+        return tokens[:max_tokens]
+
+    async def complete(self, messages: List[dict], temperature: float, max_tokens: int) -> str:
+        rng = self._rng(messages, temperature, max_tokens)
+        tokens = self._render(messages, max_tokens, rng)
+        delay = self._first_token_delay(rng) + sum(self._token_delay(rng) for _ in tokens)
+        await asyncio.sleep(delay)
+        if rng.random() < self.error_rate:
+            raise LLMProviderError("Simulated provider error")
+        return "".join(tokens)
+
+    async def stream(self, messages: List[dict], temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        rng = self._rng(messages, temperature, max_tokens)
+        tokens = self._render(messages, max_tokens, rng)
+        await asyncio.sleep(self._first_token_delay(rng))
+        if rng.random() < self.error_rate:
+            raise LLMProviderError("Simulated provider error")
+
+        fail_at = rng.randrange(len(tokens)) if tokens and rng.random() < self.stream_error_rate else None
+        for index, token in enumerate(tokens):
+            if index == fail_at:
+                raise LLMProviderError("Simulated provider error mid-stream")
+            if index:
+                await asyncio.sleep(self._token_delay(rng))
+            yield token
+
+
+def get_llm_provider(provider_name: Optional[str] = None) -> LLMProvider:
+    """Create the configured LLM provider (LLM_PROVIDER=openai|local)"""
+    provider_name = (provider_name or LLM_PROVIDER).lower()
+    if provider_name == "local":
+        logger.info("🧪 Using local simulated LLM provider")
+        return LocalSimulatedProvider()
+    return OpenAIProvider()
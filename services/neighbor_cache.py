@@ -0,0 +1,285 @@
+"""
+Concept Neighbor Cache
+Cached outgoing relationships (prerequisites, related concepts, ...) per concept.
+
+Neighbor lists come from concept_relations joined with the target concepts'
+summary fields, and are cached in two tiers: a per-process LRU (short TTL,
+no I/O) in front of Redis (shared across workers, longer TTL). Misses for
+many concepts are resolved together with one SQL query and one Redis MGET,
+so warming the cache for a batch of concepts costs a single round trip per
+tier.
+
+Relationship writes invalidate the source concept; concept renames
+invalidate every concept pointing at the renamed one. Other processes drop
+their local copy when the LRU TTL expires.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config.database import SessionLocal, get_redis_connection
+from config.logging_config import get_logger
+from database.models import Concept, concept_relations
+from services.resilience import DependencyUnavailable, redis_dependency
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+NEIGHBOR_CACHE_ENABLED = os.getenv("NEIGHBOR_CACHE_ENABLED", "true").lower() == "true"
+LOCAL_MAX_ENTRIES = int(os.getenv("NEIGHBOR_CACHE_MAX_ENTRIES", "10000"))
+LOCAL_TTL_SECONDS = float(os.getenv("NEIGHBOR_CACHE_LOCAL_TTL_SECONDS", "300"))
+REDIS_TTL_SECONDS = int(os.getenv("NEIGHBOR_CACHE_REDIS_TTL_SECONDS", str(24 * 3600)))
+WARM_ON_STARTUP = os.getenv("NEIGHBOR_CACHE_WARM_ON_STARTUP", "false").lower() == "true"
+
+REDIS_KEY_PREFIX = "concept:neighbors:"
+PREFETCH_CHUNK_SIZE = 500
+
+# Concept fields embedded in cached neighbor entries
+NEIGHBOR_FIELDS = {"name", "display_name", "category", "difficulty_level"}
+
+# Relationship types used as lesson generation context
+LESSON_CONTEXT_TYPES = ("RELATED_TO", "PREREQUISITE")
+
+
+class NeighborCache:
+    """Two-tier (process LRU + Redis) cache of concept neighbor lists"""
+
+    def __init__(self, max_entries: int = LOCAL_MAX_ENTRIES, ttl_seconds: float = LOCAL_TTL_SECONDS):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"local_hits": 0, "redis_hits": 0, "db_loads": 0, "invalidations": 0}
+
+    # -------------------------------------------------------------------------
+    # Local tier
+    # -------------------------------------------------------------------------
+
+    def _local_get(self, concept_id: str) -> Optional[List[dict]]:
+        with self._lock:
+            entry = self._local.get(concept_id)
+            if entry is None:
+                return None
+            expires_at, neighbors = entry
+            if expires_at < time.monotonic():
+                del self._local[concept_id]
+                return None
+            self._local.move_to_end(concept_id)
+            return neighbors
+
+    def _local_put(self, concept_id: str, neighbors: List[dict]):
+        with self._lock:
+            self._local[concept_id] = (time.monotonic() + self.ttl_seconds, neighbors)
+            self._local.move_to_end(concept_id)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    # -------------------------------------------------------------------------
+    # Redis tier
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _redis_failed(e: Exception):
+        # Rejections by the shared Redis breaker are expected while Redis is down
+        if not isinstance(e, DependencyUnavailable):
+            logger.warning(f"⚠️  Neighbor cache Redis tier unavailable: {e}")
+
+    def _redis_get_many(self, concept_ids: List[str]) -> Dict[str, List[dict]]:
+        if not concept_ids:
+            return {}
+        try:
+            with redis_dependency.guard():
+                values = get_redis_connection().mget([REDIS_KEY_PREFIX + concept_id for concept_id in concept_ids])
+        except Exception as e:
+            self._redis_failed(e)
+            return {}
+        return {
+            concept_id: json.loads(value)
+            for concept_id, value in zip(concept_ids, values) if value is not None
+        }
+
+    def _redis_put_many(self, neighbors_by_id: Dict[str, List[dict]]):
+        if not neighbors_by_id:
+            return
+        try:
+            with redis_dependency.guard():
+                pipe = get_redis_connection().pipeline(transaction=False)
+                for concept_id, neighbors in neighbors_by_id.items():
+                    pipe.set(REDIS_KEY_PREFIX + concept_id, json.dumps(neighbors), ex=REDIS_TTL_SECONDS)
+                pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+    def _redis_delete(self, concept_ids: List[str]):
+        if not concept_ids:
+            return
+        try:
+            with redis_dependency.guard():
+                get_redis_connection().delete(*[REDIS_KEY_PREFIX + concept_id for concept_id in concept_ids])
+        except Exception as e:
+            self._redis_failed(e)
+
+    # -------------------------------------------------------------------------
+    # SQL source
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _load_from_db(db: Session, concept_ids: List[str]) -> Dict[str, List[dict]]:
+        """Outgoing relationships for many concepts with one joined query"""
+        neighbors_by_id: Dict[str, List[dict]] = {concept_id: [] for concept_id in concept_ids}
+        for start in range(0, len(concept_ids), PREFETCH_CHUNK_SIZE):
+            chunk = concept_ids[start:start + PREFETCH_CHUNK_SIZE]
+            rows = db.execute(
+                select(
+                    concept_relations.c.concept_id.label("source_id"),
+                    concept_relations.c.relationship_type,
+                    concept_relations.c.strength,
+                    Concept.concept_id,
+                    Concept.name,
+                    Concept.display_name,
+                    Concept.category,
+                    Concept.difficulty_level
+                )
+                .join(Concept, Concept.concept_id == concept_relations.c.related_concept_id)
+                .where(concept_relations.c.concept_id.in_(chunk))
+                .order_by(concept_relations.c.concept_id, Concept.name)
+            ).all()
+            for row in rows:
+                neighbors_by_id[row.source_id].append({
+                    "concept_id": row.concept_id,
+                    "name": row.name,
+                    "display_name": row.display_name,
+                    "category": row.category,
+                    "difficulty_level": row.difficulty_level,
+                    "relationship_type": (row.relationship_type or "").upper(),
+                    "strength": row.strength if row.strength is not None else 1.0
+                })
+        return neighbors_by_id
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+
+    def get_many(self, db: Optional[Session], concept_ids: Iterable[str]) -> Dict[str, List[dict]]:
+        """
+        Neighbor lists for several concepts, resolving all misses together.
+
+        Args:
+            db: Session used for misses; a short-lived one is opened if None
+        """
+        concept_ids = list(dict.fromkeys(concept_ids))
+        result: Dict[str, List[dict]] = {}
+        if not NEIGHBOR_CACHE_ENABLED:
+            missing = concept_ids
+        else:
+            missing = []
+            for concept_id in concept_ids:
+                neighbors = self._local_get(concept_id)
+                if neighbors is None:
+                    missing.append(concept_id)
+                else:
+                    result[concept_id] = neighbors
+            self.stats["local_hits"] += len(result)
+
+            if missing:
+                from_redis = self._redis_get_many(missing)
+                for concept_id, neighbors in from_redis.items():
+                    self._local_put(concept_id, neighbors)
+                result.update(from_redis)
+                self.stats["redis_hits"] += len(from_redis)
+                missing = [concept_id for concept_id in missing if concept_id not in from_redis]
+
+        if missing:
+            owns_session = db is None
+            db = db or SessionLocal()
+            try:
+                loaded = self._load_from_db(db, missing)
+            finally:
+                if owns_session:
+                    db.close()
+            self.stats["db_loads"] += len(loaded)
+            if NEIGHBOR_CACHE_ENABLED:
+                for concept_id, neighbors in loaded.items():
+                    self._local_put(concept_id, neighbors)
+                self._redis_put_many(loaded)
+            result.update(loaded)
+
+        return result
+
+    def get(self, db: Optional[Session], concept_id: str, relationship_types: Optional[Iterable[str]] = None) -> List[dict]:
+        """Neighbor list for one concept, optionally restricted to relationship types"""
+        neighbors = self.get_many(db, [concept_id])[concept_id]
+        if relationship_types is None:
+            return neighbors
+        wanted = {t.upper() for t in relationship_types}
+        return [n for n in neighbors if n["relationship_type"] in wanted]
+
+    def prefetch(self, db: Optional[Session], concept_ids: Iterable[str]) -> int:
+        """Warm the cache for many concepts; returns how many were requested"""
+        concept_ids = list(concept_ids)
+        for start in range(0, len(concept_ids), PREFETCH_CHUNK_SIZE):
+            self.get_many(db, concept_ids[start:start + PREFETCH_CHUNK_SIZE])
+        return len(concept_ids)
+
+    def invalidate(self, concept_ids: Iterable[str]):
+        """Drop cached neighbor lists in this process and in Redis"""
+        concept_ids = list(dict.fromkeys(concept_ids))
+        with self._lock:
+            for concept_id in concept_ids:
+                self._local.pop(concept_id, None)
+        self._redis_delete(concept_ids)
+        self.stats["invalidations"] += len(concept_ids)
+
+    def invalidate_referrers(self, db: Session, concept_id: str):
+        """Drop the lists of every concept pointing at concept_id (after it was renamed)"""
+        referrers = [row[0] for row in db.execute(
+            select(concept_relations.c.concept_id).where(concept_relations.c.related_concept_id == concept_id)
+        )]
+        self.invalidate(referrers)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def status(self) -> dict:
+        with self._lock:
+            size = len(self._local)
+        return {"enabled": NEIGHBOR_CACHE_ENABLED, "local_entries": size, **self.stats}
+
+
+def related_concept_names(concept_id: str, limit: int = 5, db: Optional[Session] = None) -> List[str]:
+    """Names of related/prerequisite concepts used as lesson generation context"""
+    try:
+        return [n["name"] for n in neighbor_cache.get(db, concept_id, LESSON_CONTEXT_TYPES)[:limit]]
+    except Exception as e:
+        logger.warning(f"⚠️  Could not fetch related concepts: {e}")
+        return []
+
+
+def warm_neighbor_cache() -> int:
+    """Prefetch neighbor lists for every concept that has outgoing relationships"""
+    db = SessionLocal()
+    try:
+        concept_ids = [row[0] for row in db.execute(select(concept_relations.c.concept_id).distinct())]
+        neighbor_cache.prefetch(db, concept_ids)
+    finally:
+        db.close()
+    logger.info(f"🔥 Warmed neighbor cache for {len(concept_ids)} concepts")
+    return len(concept_ids)
+
+
+# Global instance
+neighbor_cache = NeighborCache()
@@ -0,0 +1,328 @@
+"""
+Practice Question Cache
+Content-addressed cache for generated practice questions.
+
+Entries are keyed by a hash of the prompt inputs (concept name, difficulty,
+question count), the practice prompt template version and the model, so a
+changed concept or prompt naturally misses. Each key holds a small pool of
+independently generated variants; repeated practice sessions are served a
+random variant without calling the LLM.
+
+Redis is the hot tier (hash per key with TTL, LRU-bounded via a sorted set);
+the practice_question_cache table is the durable tier used when Redis is
+unavailable and to re-warm Redis after eviction or restart.
+"""
+
+import hashlib
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config.database import get_redis_connection
+from config.logging_config import get_logger
+from database.models import Concept, PracticeQuestionCache
+from services.ai_generator import (
+    PRACTICE_PROMPT_VERSION,
+    ai_generator,
+    fallback_practice_questions,
+    generate_practice_questions,
+)
+from services.resilience import DependencyUnavailable, redis_dependency
+
+logger = get_logger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+CACHE_ENABLED = os.getenv("PRACTICE_CACHE_ENABLED", "true").lower() == "true"
+CACHE_TTL_SECONDS = int(os.getenv("PRACTICE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("PRACTICE_CACHE_MAX_ENTRIES", "5000"))   # Cache keys kept per tier
+POOL_SIZE = int(os.getenv("PRACTICE_CACHE_POOL_SIZE", "3"))                # Variants generated per key
+SERVE_RANDOM_VARIANT = os.getenv("PRACTICE_CACHE_RANDOM_VARIANT", "true").lower() == "true"
+
+REDIS_KEY_PREFIX = "practice:q:"
+REDIS_LRU_KEY = "practice:lru"
+
+
+def practice_cache_key(concept_name: str, difficulty: str, question_count: int, model: Optional[str] = None) -> str:
+    """Content address for a practice question prompt"""
+    payload = json.dumps({
+        "concept_name": concept_name,
+        "difficulty": (difficulty or "").lower(),
+        "question_count": question_count,
+        "template_version": PRACTICE_PROMPT_VERSION,
+        "model": model or ai_generator.model_name,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# =============================================================================
+# REDIS TIER
+# =============================================================================
+
+def _redis_failed(e: Exception):
+    # Rejections by the shared Redis breaker are expected while Redis is down
+    if not isinstance(e, DependencyUnavailable):
+        logger.warning(f"⚠️  Practice cache Redis tier unavailable, using SQL only: {e}")
+
+
+def _redis_get_variants(cache_key: str) -> Optional[dict]:
+    try:
+        with redis_dependency.guard():
+            pipe = get_redis_connection().pipeline()
+            pipe.hgetall(REDIS_KEY_PREFIX + cache_key)
+            pipe.zadd(REDIS_LRU_KEY, {cache_key: time.time()}, xx=True)
+            variants, _ = pipe.execute()
+        return {int(slot): json.loads(payload) for slot, payload in variants.items()}
+    except Exception as e:
+        _redis_failed(e)
+        return None
+
+
+def _write_variants(client, cache_key: str, variants: dict):
+    pipe = client.pipeline()
+    pipe.hset(REDIS_KEY_PREFIX + cache_key, mapping={
+        str(slot): json.dumps(questions) for slot, questions in variants.items()
+    })
+    pipe.expire(REDIS_KEY_PREFIX + cache_key, CACHE_TTL_SECONDS)
+    pipe.zadd(REDIS_LRU_KEY, {cache_key: time.time()})
+    pipe.zcard(REDIS_LRU_KEY)
+    size = pipe.execute()[-1]
+
+    # Evict least recently used keys beyond the size bound
+    overflow = size - CACHE_MAX_ENTRIES
+    if overflow > 0:
+        evicted = [member for member, _ in client.zpopmin(REDIS_LRU_KEY, overflow)]
+        if evicted:
+            client.delete(*[REDIS_KEY_PREFIX + member for member in evicted])
+
+
+def _redis_put_variants(cache_key: str, variants: dict):
+    try:
+        with redis_dependency.guard():
+            _write_variants(get_redis_connection(), cache_key, variants)
+    except Exception as e:
+        _redis_failed(e)
+
+
+def _redis_delete(cache_keys: List[str]):
+    if not cache_keys:
+        return
+    try:
+        with redis_dependency.guard():
+            pipe = get_redis_connection().pipeline()
+            pipe.delete(*[REDIS_KEY_PREFIX + key for key in cache_keys])
+            pipe.zrem(REDIS_LRU_KEY, *cache_keys)
+            pipe.execute()
+    except Exception as e:
+        _redis_failed(e)
+
+
+# =============================================================================
+# SQL TIER
+# =============================================================================
+
+def _sql_get_variants(db: Session, cache_key: str) -> dict:
+    rows = db.query(PracticeQuestionCache).filter(
+        PracticeQuestionCache.cache_key == cache_key,
+        PracticeQuestionCache.expires_at > datetime.utcnow()
+    ).all()
+    return {row.variant: row.questions for row in rows}
+
+
+def _sql_touch(db: Session, cache_key: str, variant: int):
+    db.query(PracticeQuestionCache).filter(
+        PracticeQuestionCache.cache_key == cache_key,
+        PracticeQuestionCache.variant == variant
+    ).update({
+        PracticeQuestionCache.hit_count: PracticeQuestionCache.hit_count + 1,
+        PracticeQuestionCache.last_accessed_at: datetime.utcnow()
+    }, synchronize_session=False)
+    db.commit()
+
+
+def _sql_put_variant(
+    db: Session,
+    cache_key: str,
+    variant: int,
+    questions: List[dict],
+    concept_id: Optional[str]
+):
+    now = datetime.utcnow()
+    row = db.query(PracticeQuestionCache).filter(
+        PracticeQuestionCache.cache_key == cache_key,
+        PracticeQuestionCache.variant == variant
+    ).first()
+    if not row:
+        row = PracticeQuestionCache(cache_key=cache_key, variant=variant, hit_count=0)
+        db.add(row)
+    row.concept_id = concept_id
+    row.questions = questions
+    row.model_used = ai_generator.model_name
+    row.template_version = PRACTICE_PROMPT_VERSION
+    row.created_at = now
+    row.last_accessed_at = now
+    row.expires_at = now + timedelta(seconds=CACHE_TTL_SECONDS)
+    db.commit()
+    _sql_evict(db)
+
+
+def _sql_evict(db: Session):
+    """Drop expired rows and the least recently used keys beyond the size bound"""
+    db.query(PracticeQuestionCache).filter(
+        PracticeQuestionCache.expires_at <= datetime.utcnow()
+    ).delete(synchronize_session=False)
+
+    key_count = db.query(func.count(func.distinct(PracticeQuestionCache.cache_key))).scalar() or 0
+    overflow = key_count - CACHE_MAX_ENTRIES
+    if overflow > 0:
+        stale_keys = [
+            row.cache_key for row in db.query(PracticeQuestionCache.cache_key)
+            .group_by(PracticeQuestionCache.cache_key)
+            .order_by(func.max(PracticeQuestionCache.last_accessed_at).asc())
+            .limit(overflow)
+        ]
+        db.query(PracticeQuestionCache).filter(
+            PracticeQuestionCache.cache_key.in_(stale_keys)
+        ).delete(synchronize_session=False)
+    db.commit()
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def get_cached_variants(db: Session, cache_key: str) -> dict:
+    """All cached variants for a key ({slot: questions}), re-warming Redis from SQL"""
+    variants = _redis_get_variants(cache_key)
+    if variants:
+        return variants
+
+    variants = _sql_get_variants(db, cache_key)
+    if variants:
+        _redis_put_variants(cache_key, variants)
+    return variants
+
+
+def get_cached_questions(db: Session, cache_key: str, random_variant: bool = SERVE_RANDOM_VARIANT) -> Optional[List[dict]]:
+    """Serve one cached variant for a key, or None on a miss"""
+    variants = _redis_get_variants(cache_key)
+    from_sql = not variants
+    if from_sql:
+        variants = _sql_get_variants(db, cache_key)
+        if not variants:
+            return None
+        _redis_put_variants(cache_key, variants)
+
+    slot = random.choice(list(variants)) if random_variant else min(variants)
+    if from_sql:
+        # Redis hits are tracked by the LRU sorted set; keep the SQL tier's LRU current too
+        _sql_touch(db, cache_key, slot)
+    return variants[slot]
+
+
+def store_questions(db: Session, cache_key: str, questions: List[dict], concept_id: Optional[str] = None) -> int:
+    """
+    Add a generated variant to the key's pool, replacing the oldest slot once the
+    pool is full. Returns the slot written.
+    """
+    variants = get_cached_variants(db, cache_key)
+    if len(variants) < POOL_SIZE:
+        slot = next(i for i in range(POOL_SIZE) if i not in variants)
+    else:
+        oldest = db.query(PracticeQuestionCache.variant).filter(
+            PracticeQuestionCache.cache_key == cache_key
+        ).order_by(PracticeQuestionCache.created_at.asc()).first()
+        slot = oldest.variant if oldest else 0
+
+    try:
+        _sql_put_variant(db, cache_key, slot, questions, concept_id)
+    except IntegrityError:
+        # A concurrent miss filled the same slot first; keep its variant
+        db.rollback()
+        return slot
+    variants[slot] = questions
+    _redis_put_variants(cache_key, variants)
+    return slot
+
+
+def pool_is_full(db: Session, cache_key: str) -> bool:
+    """Whether the key already holds POOL_SIZE variants"""
+    return len(get_cached_variants(db, cache_key)) >= POOL_SIZE
+
+
+def invalidate_concept(db: Session, concept_id: str) -> int:
+    """Drop every cached practice question set for a concept"""
+    keys = [row.cache_key for row in db.query(PracticeQuestionCache.cache_key).filter(
+        PracticeQuestionCache.concept_id == concept_id
+    ).distinct()]
+    deleted = db.query(PracticeQuestionCache).filter(
+        PracticeQuestionCache.concept_id == concept_id
+    ).delete(synchronize_session=False)
+    db.commit()
+    _redis_delete(keys)
+    return deleted
+
+
+async def get_or_generate_practice_questions(db: Session, concept: Concept, question_count: int = 3) -> dict:
+    """
+    Serve practice questions for a concept from the cache, generating and caching
+    a variant on a miss. Template fallback questions are returned but never cached.
+
+    Returns:
+        dict with questions, source (cache, ai_generated, fallback) and cache_key
+    """
+    cache_key = practice_cache_key(concept.display_name, concept.difficulty_level, question_count)
+
+    if CACHE_ENABLED:
+        questions = get_cached_questions(db, cache_key)
+        if questions:
+            return {"questions": questions, "source": "cache", "cache_key": cache_key}
+
+    try:
+        questions = await generate_practice_questions(
+            concept_name=concept.display_name,
+            difficulty=concept.difficulty_level,
+            question_count=question_count,
+            allow_fallback=False
+        )
+    except Exception as e:
+        logger.warning(f"⚠️  Practice question generation failed for {concept.display_name}, using fallback: {e}")
+        return {
+            "questions": fallback_practice_questions(concept.display_name, concept.difficulty_level, question_count),
+            "source": "fallback",
+            "cache_key": cache_key
+        }
+
+    if CACHE_ENABLED:
+        store_questions(db, cache_key, questions, concept.concept_id)
+    return {"questions": questions, "source": "ai_generated", "cache_key": cache_key}
+
+
+def cache_stats(db: Session) -> dict:
+    """Summary of the SQL tier and Redis LRU index"""
+    stats = {
+        "enabled": CACHE_ENABLED,
+        "pool_size": POOL_SIZE,
+        "ttl_seconds": CACHE_TTL_SECONDS,
+        "max_entries": CACHE_MAX_ENTRIES,
+        "template_version": PRACTICE_PROMPT_VERSION,
+        "sql_keys": db.query(func.count(func.distinct(PracticeQuestionCache.cache_key))).scalar() or 0,
+        "sql_variants": db.query(func.count(PracticeQuestionCache.id)).scalar() or 0,
+        "sql_hits": db.query(func.coalesce(func.sum(PracticeQuestionCache.hit_count), 0)).scalar(),
+        "redis_keys": None,
+    }
+    try:
+        with redis_dependency.guard():
+            stats["redis_keys"] = get_redis_connection().zcard(REDIS_LRU_KEY)
+    except Exception as e:
+        _redis_failed(e)
+    return stats
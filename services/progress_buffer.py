@@ -0,0 +1,332 @@
+"""
+Progress Heartbeat Buffer
+Write-behind buffer for the time-spent heartbeats the frontend posts to
+/progress/concepts/{id}/update while a learner reads.
+
+Heartbeats (status in_progress, no notes) are merged in Redis per
+(user, concept): minutes are summed with HINCRBY, progress and last-seen time
+kept as maxima with ZADD GT, all in one MULTI. Every
+PROGRESS_BUFFER_FLUSH_SECONDS a single worker (Redis lock) swaps the buffer
+out with RENAME and writes it to SQL through the batched progress upsert, one
+transaction per active learner. SQL write load therefore follows the number
+of active learners per flush window, not the heartbeat rate. Status changes
+are written through immediately and wake the flusher.
+
+Durability:
+- The buffer lives in Redis, so an API worker crash loses nothing; Redis
+  itself should run with appendonly persistence
+- A flush is claim (RENAME) -> apply -> delete. The claimed set keeps its
+  token until it has been applied, and its events carry ids derived from that
+  token, so a flush retried after a crash or SQL error is deduplicated by
+  processed_progress_events instead of counting minutes twice
+- A learner whose batch fails to apply does not hold up everyone else: the
+  other learners' entries are applied and deleted, the failing learner's are
+  moved to dead-letter keys (requeue_dead_letters() merges them back once the
+  cause is fixed) and the next flush claims the live buffer again. Only when
+  every learner fails (SQL itself is down) is the claimed set kept and
+  retried, up to PROGRESS_BUFFER_MAX_FLUSH_ATTEMPTS flushes
+- Without Redis (or with the breaker open) heartbeats are written through as
+  before
+
+Buffered minutes show up in progress reads after the next flush.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from config.database import SessionLocal, get_redis_connection
+from config.logging_config import get_logger
+from services.progress_events import apply_progress_events
+from services.resilience import DependencyUnavailable, redis_dependency
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+BUFFER_ENABLED = os.getenv("PROGRESS_BUFFER_ENABLED", "true").lower() == "true"
+FLUSH_INTERVAL_SECONDS = float(os.getenv("PROGRESS_BUFFER_FLUSH_SECONDS", "10"))
+FLUSH_LOCK_SECONDS = 60
+MAX_FLUSH_ATTEMPTS = int(os.getenv("PROGRESS_BUFFER_MAX_FLUSH_ATTEMPTS", "3"))
+
+BUFFER_PREFIX = "progress:buffer:"
+MINUTES_KEY = BUFFER_PREFIX + "minutes"    # hash  user:concept -> minutes
+PERCENT_KEY = BUFFER_PREFIX + "percent"    # zset  user:concept -> highest progress_percent
+SEEN_KEY = BUFFER_PREFIX + "seen"          # zset  user:concept -> latest heartbeat (epoch seconds)
+FLUSHING_PREFIX = "progress:flushing:"     # claimed copies of the three keys plus the claim token
+DEAD_PREFIX = "progress:buffer:dead:"      # entries of learners whose flush failed (same three keys)
+LOCK_KEY = "progress:flush:lock"
+
+
+def _redis_failed(e: Exception):
+    # Rejections by the shared Redis breaker are expected while Redis is down
+    if not isinstance(e, DependencyUnavailable):
+        logger.warning(f"⚠️  Progress buffer Redis unavailable, writing heartbeats through: {e}")
+
+
+class ProgressBuffer:
+    """Redis-backed heartbeat coalescing with a periodic SQL flush"""
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.flush_interval = flush_interval
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats = {
+            "buffered": 0,
+            "write_through": 0,
+            "flushes": 0,
+            "flushed_entries": 0,
+            "recovered_flushes": 0,
+            "dead_lettered": 0,
+            "last_flush_size": 0,
+            "last_flush_seconds": 0.0,
+            "last_flush_at": None,
+            "last_error": None
+        }
+
+    # -------------------------------------------------------------------------
+    # Heartbeats
+    # -------------------------------------------------------------------------
+
+    def record(self, user_id: str, concept_id: str, minutes: int, progress_percent: float) -> Optional[float]:
+        """
+        Buffer one heartbeat.
+
+        Returns:
+            The highest progress_percent buffered for the pair in this window,
+            or None when the caller must write the heartbeat through to SQL
+        """
+        if not BUFFER_ENABLED:
+            return None
+        member = f"{user_id}:{concept_id}"
+        try:
+            with redis_dependency.guard():
+                pipe = get_redis_connection().pipeline()
+                pipe.hincrby(MINUTES_KEY, member, max(int(minutes or 0), 0))
+                pipe.zadd(PERCENT_KEY, {member: progress_percent or 0}, gt=True)
+                pipe.zadd(SEEN_KEY, {member: time.time()}, gt=True)
+                pipe.zscore(PERCENT_KEY, member)
+                buffered_percent = pipe.execute()[-1]
+        except Exception as e:
+            _redis_failed(e)
+            self.stats["write_through"] += 1
+            return None
+        self.stats["buffered"] += 1
+        return buffered_percent
+
+    def notify(self):
+        """Flush soon (after a status change was written through)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # -------------------------------------------------------------------------
+    # Flushing
+    # -------------------------------------------------------------------------
+
+    def _claim(self, client, token: str) -> Optional[tuple]:
+        """Swap the live buffer out, or pick up a claimed set left by a failed flush"""
+        if client.exists(FLUSHING_PREFIX + "seen"):
+            self.stats["recovered_flushes"] += 1
+        elif client.exists(SEEN_KEY):
+            # The three keys are always written together, so all of them exist
+            pipe = client.pipeline()
+            pipe.rename(MINUTES_KEY, FLUSHING_PREFIX + "minutes")
+            pipe.rename(PERCENT_KEY, FLUSHING_PREFIX + "percent")
+            pipe.rename(SEEN_KEY, FLUSHING_PREFIX + "seen")
+            pipe.set(FLUSHING_PREFIX + "token", token)
+            pipe.execute()
+        else:
+            return None
+
+        pipe = client.pipeline(transaction=False)
+        pipe.get(FLUSHING_PREFIX + "token")
+        pipe.hgetall(FLUSHING_PREFIX + "minutes")
+        pipe.zrange(FLUSHING_PREFIX + "percent", 0, -1, withscores=True)
+        pipe.zrange(FLUSHING_PREFIX + "seen", 0, -1, withscores=True)
+        claim_token, minutes, percents, seen = pipe.execute()
+        return claim_token, minutes, dict(percents), dict(seen)
+
+    @staticmethod
+    def _merge_entries(pipe, prefix: str, members: List[str], minutes: dict, percents: dict, seen: dict):
+        """Queue commands adding entries to a minutes/percent/seen key set with the buffer's merge rules"""
+        for member in members:
+            pipe.hincrby(prefix + "minutes", member, int(minutes.get(member, 0)))
+            pipe.zadd(prefix + "percent", {member: percents.get(member) or 0}, gt=True)
+            pipe.zadd(prefix + "seen", {member: seen[member]}, gt=True)
+
+    @staticmethod
+    def _events_by_user(claim_token: str, minutes: dict, percents: dict, seen: dict) -> Dict[str, List[dict]]:
+        events: Dict[str, List[dict]] = {}
+        for member, last_seen in seen.items():
+            user_id, concept_id = member.split(":", 1)
+            events.setdefault(user_id, []).append({
+                # Same id on every retry of this claimed set
+                "event_id": "hb-" + hashlib.sha1(f"{claim_token}:{member}".encode()).hexdigest(),
+                "concept_id": concept_id,
+                "time_spent_minutes": int(minutes.get(member, 0)),
+                "progress_percent": percents.get(member),
+                "status": "in_progress",
+                "occurred_at": datetime.utcfromtimestamp(last_seen)
+            })
+        return events
+
+    def flush_once(self) -> int:
+        """Write the buffered heartbeats to SQL; returns the number of (user, concept) entries flushed"""
+        token = uuid.uuid4().hex
+        try:
+            with redis_dependency.guard():
+                client = get_redis_connection()
+                if not client.set(LOCK_KEY, token, nx=True, px=FLUSH_LOCK_SECONDS * 1000):
+                    return 0  # Another worker is flushing
+                claimed = self._claim(client, token)
+        except Exception as e:
+            _redis_failed(e)
+            return 0
+
+        try:
+            if not claimed:
+                return 0
+            started = time.perf_counter()
+            claim_token, minutes, percents, seen = claimed
+            events = self._events_by_user(claim_token, minutes, percents, seen)
+
+            failed = []
+            db = SessionLocal()
+            try:
+                for user_id, user_events in events.items():
+                    try:
+                        apply_progress_events(db, user_id, user_events)
+                    except Exception as e:
+                        db.rollback()
+                        failed.append(user_id)
+                        self.stats["last_error"] = str(e)[:500]
+                        logger.error(f"❌ Progress buffer flush failed for user {user_id}: {e}")
+            finally:
+                db.close()
+
+            with redis_dependency.guard():
+                if failed and len(failed) == len(events):
+                    attempts = client.incr(FLUSHING_PREFIX + "attempts")
+                    if attempts < MAX_FLUSH_ATTEMPTS:
+                        # Nothing applied, most likely SQL is down: retry the whole claimed set
+                        logger.warning(f"⚠️  Progress buffer flush failed for every user "
+                                       f"(attempt {attempts}/{MAX_FLUSH_ATTEMPTS}), retrying next window")
+                        return 0
+                pipe = client.pipeline()
+                dead = [member for member in seen if member.split(":", 1)[0] in failed]
+                self._merge_entries(pipe, DEAD_PREFIX, dead, minutes, percents, seen)
+                pipe.delete(*(FLUSHING_PREFIX + name for name in ("minutes", "percent", "seen", "token", "attempts")))
+                pipe.execute()
+
+            flushed = len(seen) - len(dead)
+            if dead:
+                self.stats["dead_lettered"] += len(dead)
+                logger.warning(f"⚠️  Progress buffer moved {len(dead)} entries of {len(failed)} failing users "
+                               f"to {DEAD_PREFIX}*")
+            self.stats["flushes"] += 1
+            self.stats["flushed_entries"] += flushed
+            self.stats["last_flush_size"] = flushed
+            self.stats["last_flush_seconds"] = round(time.perf_counter() - started, 4)
+            self.stats["last_flush_at"] = datetime.utcnow().isoformat()
+            return flushed
+        except Exception as e:
+            # The claimed set stays in Redis and is retried next window
+            self.stats["last_error"] = str(e)[:500]
+            logger.error(f"❌ Progress buffer flush error: {e}")
+            return 0
+        finally:
+            try:
+                with redis_dependency.guard():
+                    if client.get(LOCK_KEY) == token:
+                        client.delete(LOCK_KEY)
+            except Exception:
+                pass  # The lock expires on its own
+
+    def requeue_dead_letters(self) -> int:
+        """Merge dead-lettered entries back into the live buffer; returns the number moved"""
+        with redis_dependency.guard():
+            client = get_redis_connection()
+            pipe = client.pipeline(transaction=False)
+            pipe.hgetall(DEAD_PREFIX + "minutes")
+            pipe.zrange(DEAD_PREFIX + "percent", 0, -1, withscores=True)
+            pipe.zrange(DEAD_PREFIX + "seen", 0, -1, withscores=True)
+            minutes, percents, seen = pipe.execute()
+            seen = dict(seen)
+            if not seen:
+                return 0
+            pipe = client.pipeline()
+            self._merge_entries(pipe, BUFFER_PREFIX, list(seen), minutes, dict(percents), seen)
+            pipe.delete(*(DEAD_PREFIX + name for name in ("minutes", "percent", "seen")))
+            pipe.execute()
+        logger.info(f"🔁 Requeued {len(seen)} dead-lettered progress buffer entries")
+        return len(seen)
+
+    # -------------------------------------------------------------------------
+    # Background loop
+    # -------------------------------------------------------------------------
+
+    async def start(self):
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"🚀 Progress heartbeat buffer started (flush every {self.flush_interval}s)")
+
+    async def stop(self):
+        """Stop the flush loop and flush what is buffered"""
+        if not self.running:
+            return
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.flush_once)
+        logger.info("🛑 Progress heartbeat buffer stopped")
+
+    async def _run(self):
+        while self.running:
+            try:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                await asyncio.to_thread(self.flush_once)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Progress buffer error: {e}")
+
+    def status(self) -> dict:
+        pending = dead_letters = None
+        try:
+            with redis_dependency.guard():
+                client = get_redis_connection()
+                pending = client.zcard(SEEN_KEY)
+                dead_letters = client.zcard(DEAD_PREFIX + "seen")
+        except Exception as e:
+            _redis_failed(e)
+        return {
+            "enabled": BUFFER_ENABLED,
+            "running": self.running,
+            "flush_interval_seconds": self.flush_interval,
+            "pending_entries": pending,
+            "dead_letter_entries": dead_letters,
+            **self.stats
+        }
+
+
+progress_buffer = ProgressBuffer()
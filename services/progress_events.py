@@ -0,0 +1,239 @@
+"""
+Batched Progress Events
+Applies progress events replayed by clients that were offline, in one
+transaction with one statement per table instead of one request per event.
+
+- Idempotency: each event carries a client-generated event_id. Keys are
+  inserted into processed_progress_events with ON CONFLICT DO NOTHING
+  RETURNING, and only the events whose key was new are applied, so a replayed
+  batch (or an overlapping one from another device) never counts twice
+- Events are folded per concept / content item in Python, then written with a
+  single INSERT ... ON CONFLICT DO UPDATE per table
+- Merge semantics are monotonic and order independent: minutes accumulate,
+  progress_percent, status and best_score never regress, last_accessed is the
+  latest event time
+
+Keys older than PROGRESS_EVENT_KEY_RETENTION_DAYS are purged; clients must not
+replay events older than that.
+"""
+
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from config.logging_config import get_logger
+from database.models import (
+    Concept, ConceptContent, ProcessedProgressEvent, UserConceptProgress, UserContentProgress
+)
+
+logger = get_logger(__name__)
+
+MAX_PROGRESS_BATCH = int(os.getenv("PROGRESS_BATCH_MAX_EVENTS", "500"))
+KEY_RETENTION_DAYS = int(os.getenv("PROGRESS_EVENT_KEY_RETENTION_DAYS", "30"))
+PURGE_INTERVAL_SECONDS = 3600
+
+# Status order for the never-regress merge (unknown statuses rank lowest)
+CONCEPT_STATUS_RANK = {"not_started": 0, "in_progress": 1, "completed": 2}
+CONTENT_STATUS_RANK = {"not_started": 0, "in_progress": 1, "completed": 2, "mastered": 3}
+
+_last_purge = 0.0
+
+
+def _insert(db: Session):
+    return postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+
+
+def _greatest(current, incoming):
+    """Portable GREATEST() treating NULL as 'no value'"""
+    return case((current.is_(None), incoming), (incoming > current, incoming), else_=current)
+
+
+def _higher_status(current, incoming, ranks: Dict[str, int]):
+    rank = lambda expression: case(ranks, value=expression, else_=-1)
+    return case((rank(incoming) > rank(current), incoming), else_=current)
+
+
+def _higher(a, b, ranks: Dict[str, int]):
+    return b if ranks.get(b, -1) > ranks.get(a, -1) else a
+
+
+def _claim_event_ids(db: Session, user_id: str, event_ids: List[str]) -> set:
+    """Record the keys; returns the ones not seen before"""
+    if not event_ids:
+        return set()
+    now = datetime.utcnow()
+    statement = _insert(db)(ProcessedProgressEvent).values(
+        [{"user_id": user_id, "event_id": event_id, "processed_at": now} for event_id in event_ids]
+    ).on_conflict_do_nothing(index_elements=["user_id", "event_id"]).returning(ProcessedProgressEvent.event_id)
+    return set(db.execute(statement).scalars())
+
+
+def _occurred_at(event: dict) -> datetime:
+    """Event time as naive UTC, like the rest of the schema"""
+    occurred_at = event.get("occurred_at") or datetime.utcnow()
+    if occurred_at.tzinfo is not None:
+        occurred_at = occurred_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return occurred_at
+
+
+def _fold(events: List[dict], key: str, ranks: Dict[str, int]) -> Dict[str, dict]:
+    folded: Dict[str, dict] = {}
+    for event in events:
+        occurred_at = _occurred_at(event)
+        row = folded.setdefault(event[key], {
+            "minutes": 0, "percent": None, "status": None, "first": occurred_at, "last": occurred_at,
+            "count": 0, "best_score": None, "score": None, "score_at": None, "completed_at": None
+        })
+        row["count"] += 1
+        row["minutes"] += max(event.get("time_spent_minutes") or 0, 0)
+        if event.get("progress_percent") is not None:
+            row["percent"] = max(row["percent"] or 0, event["progress_percent"])
+        if event.get("status"):
+            row["status"] = _higher(row["status"], event["status"], ranks)
+            if event["status"] in ("completed", "mastered"):
+                row["completed_at"] = min(filter(None, (row["completed_at"], occurred_at)))
+        if event.get("score") is not None:
+            row["best_score"] = max(row["best_score"] or 0.0, event["score"])
+            if row["score_at"] is None or occurred_at >= row["score_at"]:
+                row["score"], row["score_at"] = event["score"], occurred_at
+        row["first"] = min(row["first"], occurred_at)
+        row["last"] = max(row["last"], occurred_at)
+    return folded
+
+
+def _upsert_concept_progress(db: Session, user_id: str, folded: Dict[str, dict]):
+    now = datetime.utcnow()
+    table = UserConceptProgress.__table__
+    statement = _insert(db)(table).values([
+        {
+            "progress_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "concept_id": concept_id,
+            "status": row["status"] or "in_progress",
+            "progress_percent": int(row["percent"] or 0),
+            "time_spent_minutes": row["minutes"],
+            "first_attempt": row["first"],
+            "last_accessed": row["last"],
+            "created_at": now,
+            "updated_at": now,
+        }
+        for concept_id, row in folded.items()
+    ])
+    excluded = statement.excluded
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["user_id", "concept_id"],
+        set_={
+            "time_spent_minutes": func.coalesce(table.c.time_spent_minutes, 0) + excluded.time_spent_minutes,
+            "progress_percent": _greatest(table.c.progress_percent, excluded.progress_percent),
+            "status": _higher_status(table.c.status, excluded.status, CONCEPT_STATUS_RANK),
+            "first_attempt": func.coalesce(table.c.first_attempt, excluded.first_attempt),
+            "last_accessed": _greatest(table.c.last_accessed, excluded.last_accessed),
+            "updated_at": excluded.updated_at,
+        }
+    ))
+
+
+def _upsert_content_progress(db: Session, user_id: str, folded: Dict[str, dict]):
+    table = UserContentProgress.__table__
+    statement = _insert(db)(table).values([
+        {
+            "progress_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "content_id": content_id,
+            "status": row["status"] or "in_progress",
+            "progress_percent": float(row["percent"] or 0.0),
+            "time_spent": row["minutes"],
+            "score": row["score"],
+            "best_score": row["best_score"] or 0.0,
+            "attempts": row["count"],
+            "first_accessed": row["first"],
+            "last_accessed": row["last"],
+            "last_completed": row["completed_at"],
+        }
+        for content_id, row in folded.items()
+    ])
+    excluded = statement.excluded
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["user_id", "content_id"],
+        set_={
+            "time_spent": func.coalesce(table.c.time_spent, 0) + excluded.time_spent,
+            "progress_percent": _greatest(table.c.progress_percent, excluded.progress_percent),
+            "status": _higher_status(table.c.status, excluded.status, CONTENT_STATUS_RANK),
+            "score": func.coalesce(excluded.score, table.c.score),
+            "best_score": _greatest(table.c.best_score, excluded.best_score),
+            "attempts": func.coalesce(table.c.attempts, 0) + excluded.attempts,
+            "last_accessed": _greatest(table.c.last_accessed, excluded.last_accessed),
+            "last_completed": func.coalesce(table.c.last_completed, excluded.last_completed),
+        }
+    ))
+
+
+def purge_expired_event_ids(db: Session, force: bool = False) -> int:
+    """Delete keys past the retention window (at most hourly per process unless forced)"""
+    global _last_purge
+    if not force and time.monotonic() - _last_purge < PURGE_INTERVAL_SECONDS:
+        return 0
+    _last_purge = time.monotonic()
+    cutoff = datetime.utcnow() - timedelta(days=KEY_RETENTION_DAYS)
+    return db.execute(delete(ProcessedProgressEvent).where(ProcessedProgressEvent.processed_at < cutoff)).rowcount
+
+
+def apply_progress_events(db: Session, user_id: str, events: List[dict]) -> dict:
+    """
+    Apply a batch of concept and content progress events for one user and commit.
+
+    Each event is a dict with event_id, exactly one of concept_id / content_id,
+    and optional time_spent_minutes, progress_percent, status, score
+    (content only) and occurred_at.
+
+    Returns:
+        Counts of applied and duplicate events, the ids of rejected events
+        (unknown concept/content) and the number of rows upserted per table
+    """
+    # Repeated keys within the batch count once
+    unique: Dict[str, dict] = {}
+    for event in events:
+        unique.setdefault(event["event_id"], event)
+
+    concept_ids = {event["concept_id"] for event in unique.values() if event.get("concept_id")}
+    content_ids = {event["content_id"] for event in unique.values() if event.get("content_id")}
+    known_concepts = set(db.scalars(select(Concept.concept_id).where(Concept.concept_id.in_(concept_ids)))) \
+        if concept_ids else set()
+    known_content = set(db.scalars(
+        select(ConceptContent.content_id).where(ConceptContent.content_id.in_(content_ids))
+    )) if content_ids else set()
+    rejected = [
+        event_id for event_id, event in unique.items()
+        if (event.get("concept_id") and event["concept_id"] not in known_concepts)
+        or (event.get("content_id") and event["content_id"] not in known_content)
+    ]
+    valid = {event_id: event for event_id, event in unique.items() if event_id not in rejected}
+
+    new_ids = _claim_event_ids(db, user_id, list(valid))
+    fresh = [event for event_id, event in valid.items() if event_id in new_ids]
+    concept_rows = _fold([e for e in fresh if e.get("concept_id")], "concept_id", CONCEPT_STATUS_RANK)
+    content_rows = _fold([e for e in fresh if e.get("content_id")], "content_id", CONTENT_STATUS_RANK)
+    if concept_rows:
+        _upsert_concept_progress(db, user_id, concept_rows)
+    if content_rows:
+        _upsert_content_progress(db, user_id, content_rows)
+    purge_expired_event_ids(db)
+    db.commit()
+
+    result = {
+        "applied": len(fresh),
+        "duplicates": len(events) - len(fresh) - len(rejected),
+        "rejected": rejected,
+        "concepts_updated": len(concept_rows),
+        "content_updated": len(content_rows),
+    }
+    logger.info(f"📦 Progress batch for {user_id}: {result['applied']} applied, "
+                f"{result['duplicates']} duplicates, {len(rejected)} rejected")
+    return result
@@ -0,0 +1,319 @@
+"""
+Dependency Resilience
+Circuit breakers, bulkheads and request deadlines for Neo4j, Redis and the
+LLM provider.
+
+Each external dependency gets a Dependency guard made of:
+
+- a circuit breaker: after BREAKER_FAILURE_THRESHOLD consecutive failures
+  calls are rejected for BREAKER_RESET_SECONDS, then a single probe call
+  decides whether the breaker closes again
+- a bulkhead: at most N calls in flight per dependency; extra calls are
+  rejected immediately instead of queueing behind a slow backend
+- a timeout: the dependency's own timeout, capped by the time left on the
+  current request's deadline
+
+Rejected calls raise DependencyUnavailable (or return the caller's fallback)
+without touching the backend, so a hung dependency costs callers nothing
+once its breaker is open. The request deadline lives in a context variable
+set per request by middleware in main.py, so nested calls share one budget.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from config.logging_config import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "30"))
+
+NEO4J_MAX_CONCURRENT = int(os.getenv("BULKHEAD_NEO4J_MAX_CONCURRENT", "20"))
+REDIS_MAX_CONCURRENT = int(os.getenv("BULKHEAD_REDIS_MAX_CONCURRENT", "50"))
+LLM_MAX_CONCURRENT = int(os.getenv("BULKHEAD_LLM_MAX_CONCURRENT", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+_NO_FALLBACK = object()
+
+
+class DependencyUnavailable(Exception):
+    """Raised when a call is rejected without being attempted"""
+
+    def __init__(self, dependency: str, reason: str):
+        super().__init__(f"{dependency} unavailable ({reason})")
+        self.dependency = dependency
+        self.reason = reason
+
+
+class DeadlineExceeded(DependencyUnavailable):
+    """Raised when the current request has no time left for another call"""
+
+    def __init__(self, dependency: str):
+        super().__init__(dependency, "request deadline exceeded")
+
+
+# =============================================================================
+# DEADLINES
+# =============================================================================
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Limit everything inside the block to `seconds` (never extends an outer deadline)"""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    new_deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(min(current, new_deadline) if current is not None else new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    """Seconds left on the current deadline, or None when there is none"""
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+# =============================================================================
+# CIRCUIT BREAKER / BULKHEAD
+# =============================================================================
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_OPEN:
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    return False
+                self.state = STATE_HALF_OPEN
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                logger.info(f"✅ {self.name} circuit closed")
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == STATE_HALF_OPEN or (self.state == STATE_CLOSED and self.failures >= self.failure_threshold):
+                self.state = STATE_OPEN
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+                logger.warning(f"⚠️  {self.name} circuit opened for {self.reset_seconds:g}s after "
+                               f"{self.failures} failures: {error!r}")
+
+    def release_probe(self):
+        """Give back a half-open probe slot when the call never reached the backend"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def status(self) -> dict:
+        with self._lock:
+            retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at)) \
+                if self.state == STATE_OPEN else 0.0
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "retry_in_seconds": round(retry_in, 1)
+            }
+
+
+class Bulkhead:
+    """Non-blocking limit on concurrent calls (works from threads and the event loop)"""
+
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max(1, max_concurrent)
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= self.max_concurrent:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class Dependency:
+    """Circuit breaker + bulkhead + deadline-aware timeout for one backend"""
+
+    def __init__(self, name: str, max_concurrent: int, timeout: Optional[float] = None,
+                 failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_seconds)
+        self.bulkhead = Bulkhead(max_concurrent)
+        self.stats = {"calls": 0, "failures": 0, "timeouts": 0, "rejected_open": 0,
+                      "rejected_full": 0, "rejected_deadline": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str):
+        """Increment a stats counter (callers run on threads and the event loop)"""
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _admit(self):
+        """Reserve a breaker and bulkhead slot or raise DependencyUnavailable"""
+        remaining = time_remaining()
+        if remaining is not None and remaining <= 0:
+            self._count("rejected_deadline")
+            raise DeadlineExceeded(self.name)
+        if not self.breaker.allow():
+            self._count("rejected_open")
+            raise DependencyUnavailable(self.name, "circuit open")
+        if not self.bulkhead.try_acquire():
+            self.breaker.release_probe()
+            self._count("rejected_full")
+            raise DependencyUnavailable(self.name, "too many concurrent calls")
+        self._count("calls")
+
+    def effective_timeout(self, timeout: Optional[float] = None) -> Optional[float]:
+        """The call timeout capped by the current request deadline"""
+        timeout = timeout if timeout is not None else self.timeout
+        remaining = time_remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    @contextmanager
+    def guard(self):
+        """
+        Guard a block of calls (sync code, or async code such as a stream that
+        cannot be wrapped in one awaitable). Exceptions inside count as failures.
+        """
+        self._admit()
+        try:
+            yield
+        except Exception as e:
+            self._count("failures")
+            self.breaker.record_failure(e)
+            raise
+        except BaseException:
+            # Cancellation / generator close says nothing about the backend
+            self.breaker.release_probe()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            self.bulkhead.release()
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, timeout: Optional[float] = None,
+                   fallback: Any = _NO_FALLBACK, **kwargs) -> Any:
+        """
+        Await fn(*args, **kwargs) under the breaker, bulkhead and timeout.
+
+        Args:
+            timeout: Overrides the dependency timeout (still capped by the deadline)
+            fallback: Returned instead of raising when the call is rejected, fails or times out
+        """
+        try:
+            self._admit()
+        except DependencyUnavailable:
+            if fallback is _NO_FALLBACK:
+                raise
+            return fallback
+
+        try:
+            result = await asyncio.wait_for(fn(*args, **kwargs), timeout=self.effective_timeout(timeout))
+        except asyncio.TimeoutError as e:
+            self._count("timeouts")
+            self.breaker.record_failure(e)
+            if fallback is _NO_FALLBACK:
+                raise
+            return fallback
+        except asyncio.CancelledError:
+            self.breaker.release_probe()
+            raise
+        except Exception as e:
+            self._count("failures")
+            self.breaker.record_failure(e)
+            if fallback is _NO_FALLBACK:
+                raise
+            return fallback
+        else:
+            self.breaker.record_success()
+            return result
+        finally:
+            self.bulkhead.release()
+
+    def status(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            **self.breaker.status(),
+            "in_flight": self.bulkhead.in_flight,
+            "max_concurrent": self.bulkhead.max_concurrent,
+            "timeout_seconds": self.timeout,
+            **stats
+        }
+
+
+# Global instances (Neo4j and Redis timeouts are enforced by their clients' own settings)
+neo4j_dependency = Dependency("neo4j", NEO4J_MAX_CONCURRENT)
+redis_dependency = Dependency("redis", REDIS_MAX_CONCURRENT)
+llm_dependency = Dependency("llm", LLM_MAX_CONCURRENT, timeout=LLM_TIMEOUT_SECONDS)
+
+DEPENDENCIES: Dict[str, Dependency] = {
+    dependency.name: dependency for dependency in (neo4j_dependency, redis_dependency, llm_dependency)
+}
+
+
+def resilience_status() -> dict:
+    """Breaker and bulkhead state per dependency (exposed on /metrics)"""
+    return {
+        "request_deadline_seconds": REQUEST_DEADLINE_SECONDS,
+        "dependencies": {name: dependency.status() for name, dependency in DEPENDENCIES.items()}
+    }
@@ -1,5 +1,16 @@
+import os
+import sys
+
 import requests
 from neo4j import GraphDatabase
+from sqlalchemy import select
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import SessionLocal
+from database.models import Concept
+from services.graph_outbox import apply_graph_statements
 
 # Configuration
 API_URL = "http://127.0.0.1:8000/api/v1"
@@ -38,47 +49,62 @@ GRAPH_PATHS = [
     }
 ]
 
+PATH_NODES_CYPHER = """
+UNWIND $rows AS row
+MERGE (lp:LearningPath {title: row.title})
+SET lp.difficulty = row.difficulty,
+    lp.category = row.category,
+    lp.estimated_hours = row.estimated_hours,
+    lp.created_at = datetime()
+"""
+
+PATH_CONTAINS_CYPHER = """
+UNWIND $rows AS row
+MATCH (lp:LearningPath {title: row.title})
+MATCH (c:Concept {concept_id: row.cid})
+MERGE (lp)-[r:CONTAINS]->(c)
+SET r.sequence_order = row.order
+"""
+
 def sync_learning_paths_to_neo4j():
     """Sync learning paths to Neo4j as graph nodes with CONTAINS relationships"""
     print("🚀 Syncing Learning Paths to Neo4j Graph...")
     print("=" * 60)
 
-    # 1. Login and get authentication
-    print("🔐 Authenticating...")
-    try:
-        auth_resp = requests.post(f"{API_URL}/auth/login", 
-                                 json={"username": USERNAME, "password": PASSWORD})
-        if auth_resp.status_code != 200:
-            print(f"❌ Authentication failed: {auth_resp.text}")
-            return False
-            
-        token = auth_resp.json()["access_token"]
-        headers = {"Authorization": f"Bearer {token}"}
-        print("✅ Authentication successful!")
-    except Exception as e:
-        print(f"❌ Authentication error: {e}")
-        return False
-
-    # 2. Get Concept IDs for lookup
-    print("\n🔍 Resolving concept IDs...")
+    # 1. Resolve concept IDs straight from SQL (one query, no API round trips)
+    print("🔍 Resolving concept IDs...")
     try:
-        concepts_resp = requests.get(f"{API_URL}/concepts/", headers=headers)
-        if concepts_resp.status_code != 200:
-            print(f"❌ Failed to fetch concepts: {concepts_resp.text}")
-            return False
-            
-        concepts_data = concepts_resp.json()
-        concepts = concepts_data.get('concepts', concepts_data)
-        concept_map = {c["name"]: c["concept_id"] for c in concepts}
+        wanted = sorted({name for path in GRAPH_PATHS for name in path['contains']})
+        db = SessionLocal()
+        try:
+            concept_map = dict(db.execute(
+                select(Concept.name, Concept.concept_id).where(Concept.name.in_(wanted))
+            ).all())
+        finally:
+            db.close()
         
-        print(f"✅ Resolved {len(concept_map)} concept IDs")
-        for name, cid in concept_map.items():
-            print(f"   📝 {name} -> {cid}")
+        print(f"✅ Resolved {len(concept_map)} of {len(wanted)} concept IDs")
+        for name in wanted:
+            if name not in concept_map:
+                print(f"   ⚠️  Concept not found: {name}")
     except Exception as e:
-        print(f"❌ Error fetching concepts: {e}")
+        print(f"❌ Error resolving concepts: {e}")
         return False
 
-    # 3. Sync to Neo4j
+    path_rows = [{
+        "title": path['title'],
+        "difficulty": path['difficulty'],
+        "category": path['category'],
+        "estimated_hours": path['estimated_hours']
+    } for path in GRAPH_PATHS]
+    contains_rows = [
+        {"title": path['title'], "cid": concept_map[name], "order": order}
+        for path in GRAPH_PATHS
+        for order, name in enumerate(path['contains'], start=1)
+        if name in concept_map
+    ]
+
+    # 2. Sync to Neo4j with one UNWIND batch per statement
     print(f"\n🌐 Connecting to Neo4j...")
     try:
         URI = "bolt://localhost:7687"
@@ -91,66 +117,22 @@ def sync_learning_paths_to_neo4j():
                 # Clear existing learning paths (optional - comment out if you want to preserve)
                 print("\n🧹 Clearing existing LearningPath nodes...")
                 session.run("MATCH (lp:LearningPath) DETACH DELETE lp")
-                
-                successful_paths = 0
-                total_concepts_linked = 0
-                
-                # Create Learning Path nodes and relationships
-                for path in GRAPH_PATHS:
-                    print(f"\n📦 Creating Learning Path: {path['title']}")
-                    
-                    # A. Create the Learning Path Node
-                    query_create_path = """
-                    MERGE (lp:LearningPath {title: $title})
-                    SET lp.difficulty = $difficulty,
-                        lp.category = $category,
-                        lp.estimated_hours = $estimated_hours,
-                        lp.created_at = datetime()
-                    RETURN lp.title, lp.difficulty
-                    """
-                    
-                    result = session.run(query_create_path, 
-                                       title=path['title'], 
-                                       difficulty=path['difficulty'],
-                                       category=path['category'],
-                                       estimated_hours=path['estimated_hours'])
-                    
-                    path_record = result.single()
-                    if path_record:
-                        print(f"   ✅ Created: {path_record['lp.title']} ({path_record['lp.difficulty']})")
-                        
-                        # B. Link Path to Concepts
-                        concepts_linked = 0
-                        for concept_name in path['contains']:
-                            concept_id = concept_map.get(concept_name)
-                            if concept_id:
-                                print(f"   🔗 Linking -> {concept_name}")
-                                
-                                query_link = """
-                                MATCH (lp:LearningPath {title: $title})
-                                MATCH (c:Concept {concept_id: $cid})
-                                MERGE (lp)-[:CONTAINS {sequence_order: $order}]->(c)
-                                """
-                                session.run(query_link, 
-                                          title=path['title'], 
-                                          cid=concept_id,
-                                          order=path['contains'].index(concept_name) + 1)
-                                concepts_linked += 1
-                            else:
-                                print(f"   ⚠️  Concept not found: {concept_name}")
-                        
-                        print(f"   📊 Linked {concepts_linked} concepts")
-                        total_concepts_linked += concepts_linked
-                        successful_paths += 1
-                    else:
-                        print(f"   ❌ Failed to create path: {path['title']}")
-                
-                print("\n" + "=" * 60)
-                print("🎉 LEARNING PATHS SYNC COMPLETE!")
-                print(f"   ✅ Learning paths created: {successful_paths}")
-                print(f"   🔗 Total concept links: {total_concepts_linked}")
-                print(f"   📋 Average concepts per path: {total_concepts_linked/successful_paths if successful_paths > 0 else 0:.1f}")
-                
+            
+            apply_graph_statements(driver, [
+                (PATH_NODES_CYPHER, path_rows),
+                (PATH_CONTAINS_CYPHER, contains_rows)
+            ])
+            
+            successful_paths = len(path_rows)
+            total_concepts_linked = len(contains_rows)
+            
+            print("\n" + "=" * 60)
+            print("🎉 LEARNING PATHS SYNC COMPLETE!")
+            print(f"   ✅ Learning paths created: {successful_paths}")
+            print(f"   🔗 Total concept links: {total_concepts_linked}")
+            print(f"   📋 Average concepts per path: {total_concepts_linked/successful_paths if successful_paths > 0 else 0:.1f}")
+            
+            with driver.session() as session:
                 # Verify the sync
                 print("\n🔍 Verifying sync in Neo4j...")
                 verify_query = """
@@ -349,6 +331,7 @@ def main():
     """Main function to sync all graph data"""
     print("🧠 POLYGLOT PERSISTENCE - GRAPH SYNC")
     print("Syncing graph-worthy data to Neo4j...")
+    print("(For full concept/relationship loads use: python bulk_graph_sync.py)")
     print("=" * 60)
     
     # Step 1: Sync Learning Paths
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Lesson Version Allocation Test Script
+Checks that lesson versions are numbered per concept without gaps, that a
+version taken concurrently by another writer is retried with the next number
+instead of failing, and that serving a legacy inline lesson does not write.
+Runs against a throwaway SQLite database.
+"""
+
+import sys
+import os
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "test_lesson_versions.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["DEBUG"] = "false"
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import uuid
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+
+from api.v1.auth import ADMIN_USERNAMES, get_current_user
+from api.v1.concepts import router as concepts_router
+from config.database import Base, SessionLocal, engine
+from database.models import Concept, ConceptLesson, User
+from services.lesson_store import get_active_lesson, list_lesson_versions, save_lesson_version
+
+Base.metadata.create_all(bind=engine)
+
+
+def make_concept(db, name):
+    concept = Concept(
+        name=name, display_name=name.title(), description="Test concept",
+        category="Testing", domain="Development", difficulty_level="beginner"
+    )
+    db.add(concept)
+    db.commit()
+    return concept
+
+
+def test_sequential_versions():
+    """Each save appends the next version and becomes the active lesson"""
+    db = SessionLocal()
+    try:
+        concept = make_concept(db, "sequential_versions")
+        for i in range(3):
+            save_lesson_version(db, concept, f"Lesson body {i}", model_used="test")
+
+        versions = [lesson.version for lesson in list_lesson_versions(db, concept.concept_id)]
+        active = get_active_lesson(db, concept)
+        assert versions == [3, 2, 1], f"Unexpected versions {versions}"
+        assert (active["version"], active["content"]) == (3, "Lesson body 2"), f"Unexpected active lesson {active}"
+
+        print(f"✅ Sequential saves produced versions {sorted(versions)}")
+    finally:
+        db.close()
+
+
+def test_concurrent_version_collision():
+    """A version claimed by another writer between read and insert is retried"""
+    db = SessionLocal()
+    other = create_engine(engine.url)
+    try:
+        concept = make_concept(db, "concurrent_versions")
+        save_lesson_version(db, concept, "First lesson")
+        concept_id = concept.concept_id
+        raced = []
+
+        # Another process commits version 2 right after this session reads max(version)
+        def race(orm_execute_state):
+            if not raced and "max(concept_lessons.version)" in str(orm_execute_state.statement):
+                raced.append(True)
+                with other.begin() as conn:
+                    conn.execute(ConceptLesson.__table__.insert().values(
+                        lesson_id=str(uuid.uuid4()), concept_id=concept_id, version=2,
+                        body=b"Other writer", compression="none"
+                    ))
+
+        event.listen(db, "do_orm_execute", race)
+        lesson = save_lesson_version(db, concept, "Second lesson")
+        event.remove(db, "do_orm_execute", race)
+
+        versions = sorted(l.version for l in list_lesson_versions(db, concept_id))
+        assert raced, "The competing writer never ran"
+        assert lesson.version == 3 and versions == [1, 2, 3], \
+            f"Collision not retried: saved version {lesson.version}, versions {versions}"
+
+        print("✅ Colliding version was retried as version 3")
+    finally:
+        db.close()
+        other.dispose()
+
+
+def test_legacy_lesson_read_only():
+    """Reading an inline legacy lesson serves it without moving it into the store"""
+    db = SessionLocal()
+    try:
+        concept = make_concept(db, "legacy_lesson")
+        concept.lesson_content = "Inline legacy lesson"
+        db.commit()
+
+        lesson = get_active_lesson(db, concept)
+        stored = db.query(ConceptLesson).filter(ConceptLesson.concept_id == concept.concept_id).count()
+        assert lesson and lesson["content"] == "Inline legacy lesson", f"Legacy read returned {lesson}"
+        assert not (stored or db.dirty or db.new), f"Legacy read stored {stored} versions"
+
+        print("✅ Legacy lesson served without writing")
+    finally:
+        db.close()
+
+
+def test_rollback_requires_admin():
+    """Only administrators can change the lesson version every learner sees"""
+    db = SessionLocal()
+    try:
+        concept = make_concept(db, "rollback_admin")
+        save_lesson_version(db, concept, "First lesson")
+        save_lesson_version(db, concept, "Second lesson")
+        concept_id = concept.concept_id
+    finally:
+        db.close()
+
+    app = FastAPI()
+    app.include_router(concepts_router, prefix="/api/v1/concepts")
+    client = TestClient(app)
+    url = f"/api/v1/concepts/{concept_id}/lesson/rollback"
+
+    app.dependency_overrides[get_current_user] = lambda: User(username="learner", email="l@example.com")
+    learner = client.post(url)
+    app.dependency_overrides[get_current_user] = lambda: User(username=next(iter(ADMIN_USERNAMES)),
+                                                            email="a@example.com")
+    admin = client.post(url)
+
+    assert learner.status_code == 403, f"Learner rollback returned {learner.status_code}"
+    assert admin.status_code == 200 and admin.json()["version"] == 1, f"Admin rollback returned {admin.json()}"
+    print("✅ Rollback refused for learners, allowed for admins")
+
+
+if __name__ == "__main__":
+    print("🎓 Jeseci Lesson Version Tests")
+    print("=" * 40)
+
+    tests = [
+        test_sequential_versions,
+        test_concurrent_version_collision,
+        test_legacy_lesson_read_only,
+        test_rollback_requires_admin,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+            failed += 1
+
+    if not failed:
+        print("\n🎉 All tests passed!")
+    else:
+        print(f"\n❌ {failed} test(s) failed!")
+        sys.exit(1)
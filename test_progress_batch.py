@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Batched Progress Events Test Script
+Checks that replaying a batch of progress events is idempotent (every event
+comes back as a duplicate and nothing is counted twice), that repeated keys
+inside one batch count once, and that merged progress never regresses.
+Runs against a throwaway SQLite database.
+"""
+
+import sys
+import os
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "test_progress_batch.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["DEBUG"] = "false"
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import uuid
+from datetime import datetime
+
+from config.database import Base, SessionLocal, engine
+from database.models import Concept, ProcessedProgressEvent, User, UserConceptProgress
+from services.progress_events import apply_progress_events
+
+Base.metadata.create_all(bind=engine)
+
+
+def make_user_and_concept(db, name):
+    user = User(username=name, email=f"{name}@example.com", password_hash="x")
+    concept = Concept(
+        name=name, display_name=name.title(), description="Test concept",
+        category="Testing", domain="Development", difficulty_level="beginner"
+    )
+    db.add_all([user, concept])
+    db.commit()
+    return user.user_id, concept.concept_id
+
+
+def progress_row(db, user_id, concept_id):
+    db.expire_all()
+    return db.query(UserConceptProgress).filter(
+        UserConceptProgress.user_id == user_id, UserConceptProgress.concept_id == concept_id
+    ).one()
+
+
+def test_replayed_batch_is_idempotent():
+    """The same batch applied twice only counts once"""
+    db = SessionLocal()
+    try:
+        user_id, concept_id = make_user_and_concept(db, "batch_replay")
+        events = [
+            {"event_id": str(uuid.uuid4()), "concept_id": concept_id, "time_spent_minutes": 5,
+             "progress_percent": 40, "status": "in_progress", "occurred_at": datetime(2026, 10, 1, 10)},
+            {"event_id": str(uuid.uuid4()), "concept_id": concept_id, "time_spent_minutes": 7,
+             "progress_percent": 80, "status": "completed", "occurred_at": datetime(2026, 10, 1, 11)},
+        ]
+
+        first = apply_progress_events(db, user_id, events)
+        replay = apply_progress_events(db, user_id, events)
+        row = progress_row(db, user_id, concept_id)
+        keys = db.query(ProcessedProgressEvent).filter(ProcessedProgressEvent.user_id == user_id).count()
+
+        assert (first["applied"], first["duplicates"]) == (2, 0), f"Unexpected first counts {first}"
+        assert (replay["applied"], replay["duplicates"]) == (0, 2), f"Unexpected replay counts {replay}"
+        assert (row.time_spent_minutes, row.progress_percent, row.status, keys) == (12, 80, "completed", 2), \
+            f"Replay changed progress: {row.time_spent_minutes} min, {row.progress_percent}%, {row.status}, {keys} keys"
+
+        print("✅ Replayed batch reported as duplicates, minutes counted once")
+    finally:
+        db.close()
+
+
+def test_repeated_key_in_batch_counts_once():
+    """An event repeated within one batch (client retry) is applied once"""
+    db = SessionLocal()
+    try:
+        user_id, concept_id = make_user_and_concept(db, "batch_repeat")
+        event = {"event_id": str(uuid.uuid4()), "concept_id": concept_id, "time_spent_minutes": 3}
+
+        result = apply_progress_events(db, user_id, [event, dict(event, time_spent_minutes=99)])
+        row = progress_row(db, user_id, concept_id)
+        assert (result["applied"], result["duplicates"], row.time_spent_minutes) == (1, 1, 3), \
+            f"Repeated key applied twice: {result}, {row.time_spent_minutes} min"
+
+        print("✅ Repeated key inside a batch applied once")
+    finally:
+        db.close()
+
+
+def test_overlapping_batches_never_regress():
+    """A later batch with older, lower progress keeps the higher status and percent"""
+    db = SessionLocal()
+    try:
+        user_id, concept_id = make_user_and_concept(db, "batch_overlap")
+        done = {"event_id": str(uuid.uuid4()), "concept_id": concept_id, "time_spent_minutes": 10,
+                "progress_percent": 100, "status": "completed"}
+        stale = {"event_id": str(uuid.uuid4()), "concept_id": concept_id, "time_spent_minutes": 2,
+                 "progress_percent": 30, "status": "in_progress"}
+
+        apply_progress_events(db, user_id, [done])
+        result = apply_progress_events(db, user_id, [done, stale])
+        row = progress_row(db, user_id, concept_id)
+        assert (result["applied"], result["duplicates"]) == (1, 1), f"Unexpected counts {result}"
+        assert (row.time_spent_minutes, row.progress_percent, row.status) == (12, 100, "completed"), \
+            f"Overlapping batch regressed progress: {row.progress_percent}%, {row.status}"
+
+        print("✅ Overlapping batch added new minutes without regressing progress")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("🎓 Jeseci Progress Batch Tests")
+    print("=" * 40)
+
+    tests = [
+        test_replayed_batch_is_idempotent,
+        test_repeated_key_in_batch_counts_once,
+        test_overlapping_batches_never_regress,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+            failed += 1
+
+    if not failed:
+        print("\n🎉 All tests passed!")
+    else:
+        print(f"\n❌ {failed} test(s) failed!")
+        sys.exit(1)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Progress Heartbeat Buffer Test Script
+Checks that heartbeats are merged in Redis and flushed to SQL once, and that
+a learner whose flush keeps failing is dead-lettered instead of blocking
+everyone else's progress. Uses fakeredis when installed, otherwise the Redis
+from the environment; skipped when neither is available. Runs against a
+throwaway SQLite database.
+"""
+
+import sys
+import os
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "test_progress_buffer.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["DEBUG"] = "false"
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.database import Base, SessionLocal, engine, get_redis_connection
+from database.models import Concept, User, UserConceptProgress
+import services.progress_buffer as buffer_module
+from services.progress_buffer import DEAD_PREFIX, FLUSHING_PREFIX, MAX_FLUSH_ATTEMPTS, ProgressBuffer
+
+Base.metadata.create_all(bind=engine)
+
+
+def redis_client():
+    """fakeredis, or the configured Redis if it answers; None when neither is usable"""
+    try:
+        import fakeredis
+        return fakeredis.FakeRedis(decode_responses=True)
+    except ImportError:
+        pass
+    try:
+        client = get_redis_connection()
+        client.ping()
+        return client
+    except Exception:
+        return None
+
+
+REDIS = redis_client()
+if REDIS is not None:
+    buffer_module.get_redis_connection = lambda: REDIS
+
+
+def make_learner(db, name):
+    user = User(username=name, email=f"{name}@example.com", password_hash="x")
+    concept = Concept(
+        name=name, display_name=name.title(), description="Test concept",
+        category="Testing", domain="Development", difficulty_level="beginner"
+    )
+    db.add_all([user, concept])
+    db.commit()
+    return user.user_id, concept.concept_id
+
+
+def minutes_in_sql(user_id, concept_id):
+    db = SessionLocal()
+    try:
+        row = db.query(UserConceptProgress).filter(
+            UserConceptProgress.user_id == user_id, UserConceptProgress.concept_id == concept_id
+        ).first()
+        return (row.time_spent_minutes, row.progress_percent) if row else None
+    finally:
+        db.close()
+
+
+def failing_for(*user_ids):
+    """apply_progress_events that fails for the given users"""
+    apply = buffer_module.apply_progress_events
+
+    def apply_or_fail(db, user_id, events):
+        if user_id in user_ids:
+            raise RuntimeError(f"constraint violation for {user_id}")
+        return apply(db, user_id, events)
+    return apply_or_fail
+
+
+def test_heartbeats_merge_and_flush_once():
+    """Heartbeats are summed / maxed in Redis and written to SQL in one flush"""
+    if REDIS is None:
+        print("⏭️  Redis not available, skipping merge/flush test")
+        return
+    REDIS.flushall()
+    buffer = ProgressBuffer()
+    db = SessionLocal()
+    try:
+        user_id, concept_id = make_learner(db, "buffer_merge")
+    finally:
+        db.close()
+
+    for minutes, percent in ((1, 10), (2, 40), (3, 20)):
+        buffer.record(user_id, concept_id, minutes, percent)
+    flushed = buffer.flush_once()
+    again = buffer.flush_once()
+
+    assert (flushed, again) == (1, 0), f"Unexpected flush: {flushed} then {again}"
+    assert minutes_in_sql(user_id, concept_id) == (6, 40), f"SQL holds {minutes_in_sql(user_id, concept_id)}"
+
+    print("✅ Three heartbeats merged into one SQL write (6 minutes, 40%)")
+
+
+def test_failing_user_dead_lettered():
+    """One failing learner is dead-lettered; the others flush and the live buffer keeps flowing"""
+    if REDIS is None:
+        print("⏭️  Redis not available, skipping dead-letter test")
+        return
+    REDIS.flushall()
+    buffer = ProgressBuffer()
+    db = SessionLocal()
+    try:
+        good_user, good_concept = make_learner(db, "buffer_good")
+        bad_user, bad_concept = make_learner(db, "buffer_bad")
+    finally:
+        db.close()
+
+    apply = buffer_module.apply_progress_events
+    buffer_module.apply_progress_events = failing_for(bad_user)
+    try:
+        buffer.record(good_user, good_concept, 4, 30)
+        buffer.record(bad_user, bad_concept, 7, 50)
+        first = buffer.flush_once()
+        buffer.record(good_user, good_concept, 2, 35)
+        second = buffer.flush_once()
+    finally:
+        buffer_module.apply_progress_events = apply
+
+    claim_left = REDIS.exists(FLUSHING_PREFIX + "seen")
+    dead = REDIS.hgetall(DEAD_PREFIX + "minutes")
+    assert (first, second, claim_left) == (1, 1, 0), \
+        f"Failing user blocked the flush: flushed {first}/{second}, claim left {claim_left}"
+    assert minutes_in_sql(good_user, good_concept) == (6, 35), f"SQL holds {minutes_in_sql(good_user, good_concept)}"
+    assert dead == {f"{bad_user}:{bad_concept}": "7"}, f"Failing user's entry not dead-lettered: {dead}"
+    assert minutes_in_sql(bad_user, bad_concept) is None, "Failing user's entry reached SQL"
+
+    requeued = buffer.requeue_dead_letters()
+    buffer.flush_once()
+    assert requeued == 1 and not REDIS.exists(DEAD_PREFIX + "seen"), f"Requeued {requeued} dead letters"
+    assert minutes_in_sql(bad_user, bad_concept) == (7, 50), \
+        f"Requeued entry not applied: {minutes_in_sql(bad_user, bad_concept)}"
+
+    print("✅ Failing user dead-lettered, others flushed, requeue applied it later")
+
+
+def test_total_failure_retried_then_dead_lettered():
+    """When every learner fails the claimed set is retried, then dead-lettered"""
+    if REDIS is None:
+        print("⏭️  Redis not available, skipping retry test")
+        return
+    REDIS.flushall()
+    buffer = ProgressBuffer()
+    db = SessionLocal()
+    try:
+        user_id, concept_id = make_learner(db, "buffer_down")
+    finally:
+        db.close()
+
+    apply = buffer_module.apply_progress_events
+    buffer_module.apply_progress_events = failing_for(user_id)
+    try:
+        buffer.record(user_id, concept_id, 5, 20)
+        kept = []
+        for _ in range(MAX_FLUSH_ATTEMPTS):
+            buffer.flush_once()
+            kept.append(bool(REDIS.exists(FLUSHING_PREFIX + "seen")))
+    finally:
+        buffer_module.apply_progress_events = apply
+
+    expected = [True] * (MAX_FLUSH_ATTEMPTS - 1) + [False]
+    assert kept == expected, f"Claimed set kept {kept}, expected {expected}"
+    assert REDIS.hget(DEAD_PREFIX + "minutes", f"{user_id}:{concept_id}") == "5", "Entry not dead-lettered"
+
+    print(f"✅ Total failure retried {MAX_FLUSH_ATTEMPTS - 1} times, then dead-lettered")
+
+
+if __name__ == "__main__":
+    print("🎓 Jeseci Progress Buffer Tests")
+    print("=" * 40)
+
+    tests = [
+        test_heartbeats_merge_and_flush_once,
+        test_failing_user_dead_lettered,
+        test_total_failure_retried_then_dead_lettered,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+            failed += 1
+
+    if not failed:
+        print("\n🎉 All tests passed!")
+    else:
+        print(f"\n❌ {failed} test(s) failed!")
+        sys.exit(1)
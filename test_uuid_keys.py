@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+UUID Key Storage Test Script
+Checks that keys round-trip unchanged with the default text storage
+(including legacy non-UUID ids), that binary storage writes 16-byte keys and
+reads them back in canonical form, that startup refuses a UUID_KEY_STORAGE
+setting that does not match the database, and that the key migration spots
+legacy ids before remapping them. Runs against throwaway SQLite databases.
+"""
+
+import sys
+import os
+import tempfile
+
+TEMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEMP_DIR, 'test_uuid_app.db')}"
+os.environ["DEBUG"] = "false"
+os.environ.pop("UUID_KEY_STORAGE", None)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import uuid
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import config.database as database
+from config.database import Base, check_uuid_key_storage, detect_uuid_key_storage
+from database.models import Concept
+from migrate_uuid_keys import legacy_key_counts, migrate_sqlite
+
+# Own engines, so the test does not depend on which database config.database picked
+engine = create_engine(f"sqlite:///{os.path.join(TEMP_DIR, 'test_uuid_text.db')}")
+SessionLocal = sessionmaker(bind=engine)
+Base.metadata.create_all(bind=engine)
+
+LEGACY_ID = "legacy-concept-1"
+
+
+def make_concept(db, name, concept_id=None):
+    concept = Concept(
+        name=name, display_name=name.title(), description="Test concept",
+        category="Testing", domain="Development", difficulty_level="beginner"
+    )
+    if concept_id:
+        concept.concept_id = concept_id
+    db.add(concept)
+    db.commit()
+    return concept.concept_id
+
+
+def binary_engine(name):
+    """Fresh engine (and dialect type cache) for a database using binary keys"""
+    return create_engine(f"sqlite:///{os.path.join(TEMP_DIR, name)}")
+
+
+def test_text_keys_round_trip():
+    """Default text storage keeps UUID and legacy ids exactly as written"""
+    assert database.UUID_KEY_STORAGE == "text", f"Default UUID_KEY_STORAGE is {database.UUID_KEY_STORAGE}"
+
+    db = SessionLocal()
+    try:
+        uuid_id = make_concept(db, "text_key")
+        legacy_id = make_concept(db, "legacy_key", LEGACY_ID)
+        stored = db.execute(text("SELECT typeof(concept_id) FROM concepts WHERE concept_id = :id"),
+                            {"id": uuid_id}).scalar()
+        found = {c.concept_id for c in db.query(Concept).filter(Concept.concept_id.in_([uuid_id, legacy_id]))}
+        assert stored == "text", f"Text keys stored as {stored}"
+        assert found == {uuid_id, LEGACY_ID}, f"Text keys changed: read back {found}"
+
+        print("✅ Text keys round-trip unchanged, legacy ids included")
+    finally:
+        db.close()
+
+
+def test_binary_keys_round_trip():
+    """Binary storage writes 16 bytes and reads back the canonical string"""
+    database.UUID_KEY_STORAGE = "binary"
+    binary = binary_engine("test_uuid_binary.db")
+    try:
+        Base.metadata.create_all(bind=binary)
+        db = sessionmaker(bind=binary)()
+        try:
+            concept_id = make_concept(db, "binary_key")
+            raw = db.execute(text("SELECT concept_id FROM concepts")).scalar()
+            db.expire_all()
+            upper = db.query(Concept).filter(Concept.concept_id == concept_id.upper()).first()
+            assert raw == uuid.UUID(concept_id).bytes, f"Binary key stored as {raw!r}"
+            assert upper and upper.concept_id == concept_id, \
+                f"Binary key did not round-trip: read back {upper and upper.concept_id}"
+        finally:
+            db.close()
+
+        print("✅ Binary keys stored in 16 bytes and read back in canonical form")
+    finally:
+        database.UUID_KEY_STORAGE = "text"
+        binary.dispose()
+
+
+def test_storage_mismatch_refused():
+    """Startup check detects the stored layout and refuses the other setting"""
+    binary = binary_engine("test_uuid_binary.db")
+    try:
+        with engine.connect() as text_conn, binary.connect() as binary_conn:
+            detected = (detect_uuid_key_storage(text_conn), detect_uuid_key_storage(binary_conn))
+            assert detected == ("text", "binary"), f"Detected storage {detected}"
+
+            check_uuid_key_storage(text_conn)
+            refused = []
+            for setting, conn in (("binary", text_conn), ("text", binary_conn)):
+                database.UUID_KEY_STORAGE = setting
+                try:
+                    check_uuid_key_storage(conn)
+                except RuntimeError as e:
+                    refused.append(str(e))
+                finally:
+                    database.UUID_KEY_STORAGE = "text"
+        assert len(refused) == 2, f"Mismatched storage accepted: {refused}"
+
+        print("✅ Mismatched UUID_KEY_STORAGE refused at startup")
+    finally:
+        binary.dispose()
+
+
+def test_legacy_ids_reported_before_conversion():
+    """The key migration finds legacy ids and converts UUID keys losslessly"""
+    db = SessionLocal()
+    try:
+        uuid_id = db.query(Concept.concept_id).filter(Concept.name == "text_key").scalar()
+        legacy = legacy_key_counts(engine)
+        assert legacy.get("concepts.concept_id") == 1, f"Legacy ids not reported: {legacy}"
+
+        migrate_sqlite(engine)
+        raw = db.execute(text("SELECT concept_id FROM concepts WHERE name = 'text_key'")).scalar()
+        with engine.connect() as conn:
+            stored = detect_uuid_key_storage(conn)
+        assert raw == uuid.UUID(uuid_id).bytes, f"Converted key {raw!r} does not match {uuid_id}"
+        assert stored == "binary", f"Converted database detected as {stored}"
+
+        print("✅ Legacy ids reported; UUID keys converted to the same 16 bytes")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("🎓 Jeseci UUID Key Tests")
+    print("=" * 40)
+
+    tests = [
+        test_text_keys_round_trip,
+        test_binary_keys_round_trip,
+        test_storage_mismatch_refused,
+        test_legacy_ids_reported_before_conversion,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+            failed += 1
+
+    if not failed:
+        print("\n🎉 All tests passed!")
+    else:
+        print(f"\n❌ {failed} test(s) failed!")
+        sys.exit(1)